@@ -6,9 +6,11 @@ import pyodbc
 from PIL import Image, ImageTk
 
 from services import export_service, history_service, access_service, search_service
+from services.logging_setup import configure_logging
 from ui import (CamposGeneralesFrame, OnboardingFrame, OffboardingFrame, 
                 LateralMovementFrame, FlexStaffFrame, EdicionBusquedaFrame, CreacionPersonaFrame)
 from ui.styles import aplicar_estilos_personalizados
+from ui.background import get_task_runner
 
 
 class AppEmpleadosRefactorizada:
@@ -16,7 +18,8 @@ class AppEmpleadosRefactorizada:
     
     def __init__(self, root):
         self.root = root
-        self.root.title("GAMLO - Sistema Integrado de Gestión de Empleados y Conciliación de Accesos")
+        self._titulo_ventana = "GAMLO - Sistema Integrado de Gestión de Empleados y Conciliación de Accesos"
+        self.root.title(self._titulo_ventana)
         
         # Configuración responsive
         self.configurar_ventana_responsive()
@@ -413,42 +416,30 @@ class AppEmpleadosRefactorizada:
             if not responsable:
                 responsable = 'Sistema'
             
-            # Procesar según el tipo de proceso usando la nueva estructura
+            # Procesar según el tipo de proceso usando la nueva estructura.
+            # Los datos del formulario se leen aquí (hilo de la interfaz); la llamada al
+            # servicio se ejecuta en segundo plano.
             if tipo_proceso == 'onboarding':
                 # Para onboarding, solo procesamos los accesos (el empleado debe existir previamente)
                 # o se debe crear desde la sección "Crear Persona"
+                nuevo_cargo = datos_generales.get('nuevo_cargo', '')
+                nueva_unidad_subunidad = datos_generales.get('nueva_unidad_subunidad', '')
                 
-                # Verificar si el empleado existe
-                empleado_existente = access_service.get_employee_by_id(scotia_id)
-                if not empleado_existente:
-                    messagebox.showerror("Error", 
-                        f"El empleado {scotia_id} no existe en el headcount.\n"
-                        "Por favor, cree primero el empleado en la sección 'Crear Persona'.")
-                    return
-                
-                # Procesar onboarding
-                success, message, records = access_service.process_employee_onboarding(
-                    scotia_id, 
-                    datos_generales.get('nuevo_cargo', ''), 
-                    datos_generales.get('nueva_unidad_subunidad', ''),  # Corregir nombre del campo
-                    responsable
-                )
-                
-                if success:
-                    messagebox.showinfo("Éxito", f"Onboarding procesado exitosamente.\n{message}")
-                    self.limpiar_campos()
-                else:
-                    messagebox.showerror("Error", message)
+                def trabajo():
+                    # Verificar si el empleado existe
+                    if not access_service.get_employee_by_id(scotia_id):
+                        return (False,
+                                f"El empleado {scotia_id} no existe en el headcount.\n"
+                                "Por favor, cree primero el empleado en la sección 'Crear Persona'.", [])
+                    return access_service.process_employee_onboarding(
+                        scotia_id, nuevo_cargo, nueva_unidad_subunidad, responsable)
+                titulo = "Onboarding procesado exitosamente."
                     
             elif tipo_proceso == 'offboarding':
                 # Procesar offboarding
-                success, message, records = access_service.process_employee_offboarding(scotia_id, responsable)
-                
-                if success:
-                    messagebox.showinfo("Éxito", f"Offboarding procesado exitosamente.\n{message}")
-                    self.limpiar_campos()
-                else:
-                    messagebox.showerror("Error", message)
+                def trabajo():
+                    return access_service.process_employee_offboarding(scotia_id, responsable)
+                titulo = "Offboarding procesado exitosamente."
                     
             elif tipo_proceso == 'lateral':
                 # Procesar movimiento lateral
@@ -459,20 +450,12 @@ class AppEmpleadosRefactorizada:
                 else:
                     nueva_unidad = nueva_unidad_subunidad
                     nueva_subunidad = None
+                nuevo_cargo = datos_generales.get('nuevo_cargo', '')
                 
-                success, message, records = access_service.process_lateral_movement(
-                    scotia_id,
-                    datos_generales.get('nuevo_cargo', ''),
-                    nueva_unidad,
-                    responsable,
-                    nueva_subunidad
-                )
-                
-                if success:
-                    messagebox.showinfo("Éxito", f"Movimiento lateral procesado exitosamente.\n{message}")
-                    self.limpiar_campos()
-                else:
-                    messagebox.showerror("Error", message)
+                def trabajo():
+                    return access_service.process_lateral_movement(
+                        scotia_id, nuevo_cargo, nueva_unidad, responsable, nueva_subunidad)
+                titulo = "Movimiento lateral procesado exitosamente."
                     
             elif tipo_proceso == 'flex_staff':
                 # Procesar asignación flex staff
@@ -487,27 +470,49 @@ class AppEmpleadosRefactorizada:
                 print(f"  Original: '{temp_position}' + '{temp_unit}'")
                 print(f"  Mapeado: '{mapped_position}' + '{mapped_unit}' + '{mapped_unidad_subunidad}'")
                 
-                success, message, records = access_service.process_flex_staff_assignment(
-                    scotia_id,
-                    mapped_position,  # temporary_position (mapeado)
-                    mapped_unit,  # temporary_unit (mapeado)
-                    mapped_unit,  # temporary_subunit (mapeado)
-                    datos_flex.get('duracion_dias'),  # duration_days
-                    responsable  # responsible
-                )
-                
-                if success:
-                    messagebox.showinfo("Éxito", f"Asignación flex staff procesada exitosamente.\n{message}")
-                    self.limpiar_campos()
-                else:
-                    messagebox.showerror("Error", message)
+                def trabajo():
+                    return access_service.process_flex_staff_assignment(
+                        scotia_id,
+                        mapped_position,  # temporary_position (mapeado)
+                        mapped_unit,  # temporary_unit (mapeado)
+                        mapped_unit,  # temporary_subunit (mapeado)
+                        datos_flex.get('duracion_dias'),  # duration_days
+                        responsable  # responsible
+                    )
+                titulo = "Asignación flex staff procesada exitosamente."
             else:
                 messagebox.showerror("Error", f"Tipo de proceso no soportado: {tipo_proceso}")
+                return
+            
+            self._ejecutar_proceso(tipo_proceso, trabajo, titulo)
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error inesperado: {str(e)}")
             print(f"Error en guardar_datos: {e}")
     
+    def _ejecutar_proceso(self, tipo_proceso, trabajo, titulo):
+        """Ejecuta un proceso (onboarding, offboarding, lateral, flex staff) en segundo plano"""
+        runner = get_task_runner(self.root)
+        if runner.is_running('proceso'):
+            messagebox.showwarning("Advertencia", "Ya hay un proceso en ejecución. Espere a que termine.")
+            return
+        
+        def _mostrar(resultado):
+            success, message, records = resultado
+            if success:
+                messagebox.showinfo("Éxito", f"{titulo}\n{message}")
+                self.limpiar_campos()
+            else:
+                messagebox.showerror("Error", message)
+        
+        def _error(e):
+            messagebox.showerror("Error", f"Error inesperado: {str(e)}")
+            print(f"Error en guardar_datos ({tipo_proceso}): {e}")
+        
+        self.root.title(f"{self._titulo_ventana} - Procesando {tipo_proceso}...")
+        runner.submit('proceso', trabajo, on_success=_mostrar, on_error=_error,
+                      on_done=lambda: self.root.title(self._titulo_ventana))
+    
     def limpiar_campos(self):
         """Limpia todos los campos del formulario"""
         try:
@@ -577,6 +582,7 @@ class ConciliacionFrame:
         
         # Variables de control
         self.sid_var = tk.StringVar()
+        self.progreso_var = tk.StringVar()
         self.resultado_conciliacion = None
         
         self._crear_interfaz()
@@ -620,13 +626,28 @@ class ConciliacionFrame:
         ttk.Button(entrada_frame, text="⚡ Asignar Accesos Automáticamente", 
                   command=self._asignar_accesos_automaticos, style="Warning.TButton").grid(row=3, column=0, pady=(0, 10), sticky="ew")
         
+        ttk.Button(entrada_frame, text="🌐 Conciliar Todos", 
+                  command=self._conciliar_todos, style="Success.TButton").grid(row=4, column=0, pady=(0, 10), sticky="ew")
+        
+        # Progreso y cancelación de las conciliaciones en segundo plano
+        progreso_frame = ttk.Frame(entrada_frame)
+        progreso_frame.grid(row=5, column=0, pady=(0, 10), sticky="ew")
+        progreso_frame.columnconfigure(0, weight=1)
+        ttk.Label(progreso_frame, textvariable=self.progreso_var, 
+                 style="Subsection.TLabel").grid(row=0, column=0, sticky="w")
+        self.btn_cancelar = ttk.Button(progreso_frame, text="⛔ Cancelar", 
+                                       command=self._cancelar_conciliacion, state="disabled")
+        self.btn_cancelar.grid(row=0, column=1, sticky="e")
+        self.barra_progreso = ttk.Progressbar(progreso_frame, mode="determinate")
+        self.barra_progreso.grid(row=1, column=0, columnspan=2, pady=(5, 0), sticky="ew")
         
         # Información adicional
         info_text = ("Este sistema compara los accesos actuales de un empleado\n"
                     "con los accesos que debería tener según su puesto.\n"
-                    "Identifica accesos faltantes y excesivos.")
+                    "Identifica accesos faltantes y excesivos.\n"
+                    "Puede ingresar varios SIDs separados por coma.")
         ttk.Label(entrada_frame, text=info_text, style="Subsection.TLabel", 
-                 justify="center").grid(row=4, column=0, pady=(20, 0), sticky="ew")
+                 justify="center").grid(row=6, column=0, pady=(20, 0), sticky="ew")
     
     def _crear_seccion_acciones(self, parent):
         """Crea la sección de acciones y resultados"""
@@ -688,51 +709,67 @@ class ConciliacionFrame:
         # Mensaje inicial
         self.tree_resultados.insert('', 'end', values=('', '', '', '', '', 'Sin datos', ''))
     
-    def _conciliar_accesos(self):
-        """Ejecuta la conciliación de accesos para un SID específico usando la nueva estructura"""
+    def _conciliar_accesos(self, al_terminar=None):
+        """Ejecuta la conciliación de accesos para un SID específico usando la nueva estructura.
+        
+        La consulta se ejecuta en segundo plano; `al_terminar` se llama (en el hilo de la
+        interfaz) cuando la conciliación termina con éxito.
+        """
         sid = self.sid_var.get().strip()
         if not sid:
             messagebox.showerror("Error", "Por favor ingrese un SID válido")
             return
         
-        try:
-            # Verificar si el empleado existe y tiene datos necesarios
-            empleado = access_service.get_employee_by_id(sid)
-            if not empleado:
-                messagebox.showerror("Error", f"El empleado {sid} no existe en el headcount")
+        # Varios SIDs: conciliación en paralelo
+        sids = [s.strip() for s in sid.replace(';', ',').split(',') if s.strip()]
+        if len(sids) > 1:
+            self._conciliar_lista(sids)
+            return
+        
+        # Verificar si el empleado existe y tiene datos necesarios
+        self._ejecutar_tarea(
+            access_service.get_employee_by_id, sid,
+            on_success=lambda empleado: self._continuar_conciliacion(sid, empleado, al_terminar),
+            texto=f"Buscando empleado {sid}...")
+    
+    def _continuar_conciliacion(self, sid, empleado, al_terminar=None):
+        """Valida el empleado obtenido y lanza la conciliación en segundo plano"""
+        if not empleado:
+            messagebox.showerror("Error", f"El empleado {sid} no existe en el headcount")
+            return
+        
+        # Verificar si tiene posición y unidad
+        usar_datos_ejemplo = False
+        if not empleado.get('position') or not empleado.get('unit'):
+            respuesta = messagebox.askyesno(
+                "Datos Incompletos", 
+                f"El empleado {sid} no tiene posición o unidad definida.\n\n"
+                "¿Desea usar datos de ejemplo para probar la conciliación?\n"
+                "(Se asignará: ANALISTA SENIOR - TECNOLOGÍA)"
+            )
+            if not respuesta:
                 return
-            
-            # Verificar si tiene posición y unidad
-            if not empleado.get('position') or not empleado.get('unit'):
-                respuesta = messagebox.askyesno(
-                    "Datos Incompletos", 
-                    f"El empleado {sid} no tiene posición o unidad definida.\n\n"
-                    "¿Desea usar datos de ejemplo para probar la conciliación?\n"
-                    "(Se asignará: ANALISTA SENIOR - TECNOLOGÍA)"
-                )
-                
-                if respuesta:
-                    # Actualizar con datos de ejemplo
-                    conn = access_service.get_connection()
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        UPDATE headcount 
-                        SET position = 'ANALISTA SENIOR', unit = 'TECNOLOGÍA'
-                        WHERE scotia_id = ?
-                    """, (sid,))
-                    conn.commit()
-                    conn.close()
-                    
-                    # Crear aplicaciones de ejemplo si no existen
-                    
-                    messagebox.showinfo("Datos Actualizados", 
-                        "Se han asignado datos de ejemplo al empleado.\n"
-                        "Ahora puede proceder con la conciliación.")
-                else:
-                    return
-            
+            usar_datos_ejemplo = True
+        
+        def _trabajo():
+            if usar_datos_ejemplo:
+                # Actualizar con datos de ejemplo
+                conn = access_service.get_connection()
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE headcount 
+                    SET position = 'ANALISTA SENIOR', unit = 'TECNOLOGÍA'
+                    WHERE scotia_id = ?
+                """, (sid,))
+                conn.commit()
+                conn.close()
             # Usar el nuevo servicio de conciliación
-            reporte = access_service.get_access_reconciliation_report(sid)
+            return access_service.get_access_reconciliation_report(sid)
+        
+        def _mostrar(reporte):
+            if usar_datos_ejemplo:
+                messagebox.showinfo("Datos Actualizados", 
+                    "Se han asignado datos de ejemplo al empleado.")
             
             if "error" in reporte:
                 messagebox.showerror("Error", reporte["error"])
@@ -743,12 +780,180 @@ class ConciliacionFrame:
                 data = reporte.get('data', {})
                 self._mostrar_resultados_nuevos(data)
                 messagebox.showinfo("Éxito", f"Conciliación completada para {sid}")
+                if al_terminar:
+                    al_terminar()
             else:
                 messagebox.showerror("Error", reporte.get('message', 'Error desconocido'))
-            
-        except Exception as e:
+        
+        self._ejecutar_tarea(_trabajo, on_success=_mostrar, texto=f"Conciliando {sid}...")
+    
+    # ==============================
+    # TAREAS EN SEGUNDO PLANO
+    # ==============================
+    
+    _TAREA = 'conciliacion'
+    
+    def _ejecutar_tarea(self, func, *args, on_success, texto, on_progress=None,
+                        cancelable=False, pass_task=False):
+        """Ejecuta una operación de conciliación en segundo plano (una a la vez)"""
+        runner = get_task_runner(self.frame)
+        if runner.is_running(self._TAREA):
+            messagebox.showwarning("Advertencia", "Ya hay una conciliación en curso")
+            return None
+        
+        def _error(e):
             messagebox.showerror("Error", f"Error durante la conciliación: {str(e)}")
+        
+        self._iniciar_progreso(texto, cancelable)
+        return runner.submit(self._TAREA, func, *args, on_success=on_success, on_error=_error,
+                             on_progress=on_progress, on_done=self._terminar_progreso,
+                             pass_task=pass_task)
+    
+    def _iniciar_progreso(self, texto, cancelable=False):
+        """Muestra el indicador de progreso (indeterminado hasta recibir un total)"""
+        self.progreso_var.set(texto)
+        self.barra_progreso.config(mode="indeterminate", value=0)
+        self.barra_progreso.start(15)
+        self.btn_cancelar.config(state="normal" if cancelable else "disabled")
+    
+    def _actualizar_progreso(self, completados, total, texto):
+        """Actualiza el indicador con un avance conocido"""
+        if total:
+            if str(self.barra_progreso.cget('mode')) != "determinate":
+                self.barra_progreso.stop()
+                self.barra_progreso.config(mode="determinate", maximum=total)
+            self.barra_progreso.config(value=completados)
+        self.progreso_var.set(texto)
+    
+    def _terminar_progreso(self):
+        """Detiene el indicador de progreso"""
+        self.barra_progreso.stop()
+        self.barra_progreso.config(mode="determinate", value=0)
+        self.btn_cancelar.config(state="disabled")
+        if self.progreso_var.get().endswith('...'):
+            self.progreso_var.set("")
+    
+    def _conciliar_todos(self):
+        """Concilia todo el headcount activo con el motor set-based y muestra un resumen por empleado"""
+        def _trabajo(task):
+            total_empleados = 0
+            con_acciones = []
+            totales = {'current_count': 0, 'to_grant_count': 0, 'to_revoke_count': 0}
+            
+            for resultado in access_service.iter_mass_reconciliation():
+                if task.cancelled:
+                    break
+                total_empleados += 1
+                if total_empleados % 200 == 0:
+                    task.report_progress(total_empleados)
+                if not resultado.get('success', False):
+                    continue
+                
+                data = resultado['data']
+                resumen = data['summary']
+                for clave in totales:
+                    totales[clave] += resumen[clave]
+                
+                # Solo se listan los empleados que requieren acción
+                if resumen['to_grant_count'] or resumen['to_revoke_count']:
+                    con_acciones.append(data)
+            
+            return total_empleados, con_acciones, totales, task.cancelled
+        
+        def _progreso(procesados):
+            self._actualizar_progreso(procesados, None, f"Conciliando todos: {procesados} empleados...")
+        
+        def _mostrar(resultado):
+            total_empleados, con_acciones, totales, cancelada = resultado
+            self.tree_resultados.delete(*self.tree_resultados.get_children())
+            for data in con_acciones:
+                self._insertar_resumen_empleado(data)
+            
+            if not con_acciones:
+                self.tree_resultados.insert('', 'end', values=('', '', '', '', '', '✅ Conciliado', ''))
+            
+            self.resultado_conciliacion = None
+            self._mostrar_totales(totales)
+            
+            estado = "cancelada" if cancelada else "completada"
+            self.progreso_var.set(f"Conciliación masiva {estado}: {total_empleados} empleados")
+            messagebox.showinfo("Éxito", f"Conciliación masiva {estado}.\n\n"
+                                f"Empleados conciliados: {total_empleados}\n"
+                                f"Empleados que requieren acción: {len(con_acciones)}")
+        
+        self._ejecutar_tarea(_trabajo, on_success=_mostrar, on_progress=_progreso,
+                             texto="Conciliando todos los empleados...", cancelable=True, pass_task=True)
+    
+    def _mostrar_totales(self, totales):
+        """Actualiza el panel de estadísticas con los totales de varios empleados"""
+        self.label_activos.config(text=f"✅ Activos: {totales['current_count']}")
+        self.label_otorgar.config(text=f"🟢 A Otorgar: {totales['to_grant_count']}")
+        self.label_revocar.config(text=f"🔴 A Revocar: {totales['to_revoke_count']}")
+    
+    def _insertar_resumen_empleado(self, data):
+        """Inserta una fila de resumen por empleado en la tabla de resultados"""
+        empleado = data.get('employee') or {}
+        resumen = data['summary']
+        requiere_accion = resumen['to_grant_count'] or resumen['to_revoke_count']
+        self.tree_resultados.insert('', 'end', values=(
+            f"{empleado.get('scotia_id', '')} - {empleado.get('full_name', '')}",
+            empleado.get('unit', ''),
+            empleado.get('unidad_subunidad', ''),
+            empleado.get('position', ''),
+            f"{resumen['current_count']} actuales",
+            '⚠️ Requiere Acción' if requiere_accion else '✅ Conciliado',
+            f"🟢 {resumen['to_grant_count']} / 🔴 {resumen['to_revoke_count']}"
+        ))
+    
+    def _conciliar_lista(self, sids):
+        """Concilia varios SIDs en paralelo sin bloquear la interfaz"""
+        def _trabajo(task):
+            # El callback de progreso corre en el hilo de trabajo: solo publica el avance
+            resultados = access_service.reconcile_many(
+                sids, workers=4, cancel_token=task.cancel_event,
+                progress_callback=lambda completados, total, scotia_id, resultado:
+                    task.report_progress(completados, total))
+            return resultados, task.cancelled
+        
+        def _progreso(completados, total):
+            self._actualizar_progreso(completados, total, f"Conciliando {completados}/{total}...")
+        
+        self._ejecutar_tarea(_trabajo, on_success=lambda r: self._finalizar_conciliacion_lista(sids, *r),
+                             on_progress=_progreso, texto=f"Conciliando 0/{len(sids)}...",
+                             cancelable=True, pass_task=True)
+    
+    def _finalizar_conciliacion_lista(self, sids, resultados, cancelada):
+        """Muestra los resultados de la conciliación de varios SIDs"""
+        self.tree_resultados.delete(*self.tree_resultados.get_children())
+        self.resultado_conciliacion = None
+        
+        errores = []
+        totales = {'current_count': 0, 'to_grant_count': 0, 'to_revoke_count': 0}
+        for sid, resultado in zip(sids, resultados):
+            if resultado.get('success', False):
+                data = resultado['data']
+                for clave in totales:
+                    totales[clave] += data['summary'][clave]
+                self._insertar_resumen_empleado(data)
+            elif not resultado.get('cancelled'):
+                errores.append(f"{sid}: {resultado.get('message', 'Error desconocido')}")
+        
+        if not self.tree_resultados.get_children():
+            self.tree_resultados.insert('', 'end', values=('', '', '', '', '', 'Sin datos', ''))
+        
+        self._mostrar_totales(totales)
+        
+        procesados = sum(1 for r in resultados if not r.get('cancelled'))
+        estado = "cancelada" if cancelada else "completada"
+        self.progreso_var.set(f"Conciliación {estado}: {procesados}/{len(sids)}")
+        
+        if errores:
+            messagebox.showwarning("Conciliación con errores", "\n".join(errores[:20]))
     
+    def _cancelar_conciliacion(self):
+        """Solicita la cancelación de la conciliación en curso"""
+        if get_task_runner(self.frame).cancel(self._TAREA):
+            self.progreso_var.set("Cancelando...")
     
     def _asignar_accesos_automaticos(self):
         """Asigna accesos automáticamente según la unit y position del empleado"""
@@ -757,20 +962,18 @@ class ConciliacionFrame:
             messagebox.showerror("Error", "Por favor ingrese un SID válido")
             return
         
-        try:
-            # Confirmar la acción
-            result = messagebox.askyesno(
-                "Confirmar Asignación Automática",
-                f"¿Está seguro de que desea asignar accesos automáticamente para {sid}?\n\n"
-                "Esto creará tickets 'Pendiente' para los accesos que faltan y revocará los excesivos."
-            )
-            
-            if not result:
-                return
-            
-            # Llamar al método assign_accesses del servicio
-            success, message, counts = access_service.assign_accesses(sid, "Sistema")
-            
+        # Confirmar la acción
+        result = messagebox.askyesno(
+            "Confirmar Asignación Automática",
+            f"¿Está seguro de que desea asignar accesos automáticamente para {sid}?\n\n"
+            "Esto creará tickets 'Pendiente' para los accesos que faltan y revocará los excesivos."
+        )
+        
+        if not result:
+            return
+        
+        def _mostrar(resultado):
+            success, message, counts = resultado
             if success:
                 # Mostrar resultados
                 resultado_texto = f"✅ {message}\n\n"
@@ -783,12 +986,12 @@ class ConciliacionFrame:
                 
                 # Actualizar la conciliación para mostrar los cambios
                 self._conciliar_accesos()
-                
             else:
                 messagebox.showerror("Error", f"Error en la asignación automática: {message}")
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Error durante la asignación automática: {str(e)}")
+        
+        # Llamar al método assign_accesses del servicio
+        self._ejecutar_tarea(access_service.assign_accesses, sid, "Sistema",
+                             on_success=_mostrar, texto=f"Asignando accesos a {sid}...")
     
     
     def _exportar_excel(self):
@@ -804,13 +1007,9 @@ class ConciliacionFrame:
             respuesta = messagebox.askyesno("Sin resultados", 
                                           "No hay resultados de conciliación. ¿Desea ejecutar la conciliación primero?")
             if respuesta:
-                self._conciliar_accesos()
-                # Verificar si ahora hay resultados
-                if not self.resultado_conciliacion:
-                    messagebox.showwarning("Advertencia", "No se pudieron obtener resultados de conciliación")
-                    return
-            else:
-                return
+                # La conciliación corre en segundo plano; al terminar se reintenta la exportación
+                self._conciliar_accesos(al_terminar=self._exportar_excel)
+            return
         
         try:
             # Crear archivo Excel personalizado con información detallada
@@ -1748,15 +1947,21 @@ class AplicacionesFrame:
         self.db_info_label.pack(side=tk.RIGHT)
     
     def _cargar_aplicaciones(self):
-        """Carga las aplicaciones desde la nueva estructura de base de datos"""
-        try:
-            self.applications = access_service.get_all_applications()
+        """Carga las aplicaciones desde la nueva estructura de base de datos (en segundo plano)"""
+        def _mostrar(applications):
+            self.applications = applications
             self.filtered_applications = self.applications.copy()
             self._actualizar_tabla()
             self._actualizar_estado(f"✅ Cargadas {len(self.applications)} aplicaciones")
             self._actualizar_info_bd()
-        except Exception as e:
+        
+        def _error(e):
             self._actualizar_estado(f"❌ Error al cargar aplicaciones: {str(e)}", error=True)
+        
+        tarea = get_task_runner(self.frame).submit(
+            'aplicaciones', access_service.get_all_applications, on_success=_mostrar, on_error=_error)
+        if tarea is not None:
+            self._actualizar_estado("⏳ Cargando aplicaciones...")
     
     def _actualizar_tabla(self):
         """Actualiza la tabla con los datos actuales"""
@@ -1923,7 +2128,7 @@ class AplicacionesFrame:
         try:
             # Forzar actualización de los valores únicos
             from services.dropdown_service import dropdown_service
-            dropdown_service.get_all_dropdown_values()  # Esto actualiza la caché si existe
+            dropdown_service.get_all_dropdown_values(force_refresh=True)
             self._actualizar_estado("🔄 Dropdowns actualizados con valores de la base de datos")
         except Exception as e:
             print(f"Error actualizando dropdowns: {e}")
@@ -2146,9 +2351,12 @@ class ApplicationDialog:
 
 def main():
     """Función principal para ejecutar la aplicación"""
+    configure_logging()
     root = tk.Tk()
     app = AppEmpleadosRefactorizada(root)
     root.mainloop()
+    # Cancelar las tareas en segundo plano que sigan en curso al cerrar la ventana
+    get_task_runner(root).shutdown()
 
 
 if __name__ == "__main__":
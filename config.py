@@ -4,6 +4,9 @@ Configuración del sistema para SQL Server
 Sistema optimizado para usar únicamente SQL Server
 """
 import os
+import time
+import threading
+from collections import deque
 import pyodbc
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
@@ -23,6 +26,232 @@ SQL_SERVER_CONFIG = {
     'timeout': 30
 }
 
+# Configuración del pool de conexiones
+SQL_SERVER_POOL_CONFIG = {
+    'max_size': 10,              # Máximo de conexiones abiertas simultáneamente
+    'checkout_timeout': 30,      # Segundos de espera por una conexión libre
+    'max_idle_time': 300,        # Segundos antes de descartar una conexión ociosa
+    'health_check_interval': 60  # Segundos de inactividad antes de validar con SELECT 1
+}
+
+# Configuración de logging de los servicios (ver services/logging_setup.py)
+LOGGING_CONFIG = {
+    'level': os.environ.get('GAMLO_LOG_LEVEL', 'INFO'),     # Nivel por defecto de 'services'
+    'json': os.environ.get('GAMLO_LOG_JSON', '0') == '1',  # Una línea JSON por evento
+    'file': os.environ.get('GAMLO_LOG_FILE') or None,      # None = consola (stderr)
+    'modules': {
+        # Niveles por módulo, p. ej. 'services.access_management_service': 'DEBUG'
+    }
+}
+
+# =====================================================
+# POOL DE CONEXIONES
+# =====================================================
+
+class PoolTimeoutError(Exception):
+    """No se obtuvo una conexión libre del pool dentro del tiempo de espera"""
+
+
+class PooledConnection:
+    """
+    Envoltorio de una conexión pyodbc prestada por el pool.
+    
+    Expone la misma interfaz que pyodbc.Connection, pero close() devuelve la
+    conexión al pool en lugar de cerrarla, de modo que el patrón habitual
+    ``conn = ...get_connection(); ...; conn.close()`` sigue funcionando.
+    """
+    
+    def __init__(self, pool: 'SQLServerConnectionPool', raw_connection):
+        self._pool = pool
+        self._raw = raw_connection
+    
+    def __getattr__(self, name):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise pyodbc.ProgrammingError("La conexión ya fue devuelta al pool")
+        return getattr(raw, name)
+    
+    @property
+    def raw_connection(self):
+        """Conexión pyodbc subyacente"""
+        return self._raw
+    
+    @property
+    def closed(self) -> bool:
+        return self._raw is None
+    
+    def close(self):
+        """Devuelve la conexión al pool (no la cierra físicamente)"""
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._release(raw)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Mismo comportamiento que pyodbc: commit si no hubo error, rollback si lo hubo
+        try:
+            if self._raw is not None:
+                if exc_type is None:
+                    self._raw.commit()
+                else:
+                    self._raw.rollback()
+        finally:
+            self.close()
+        return False
+    
+    def __del__(self):
+        # Red de seguridad: si una ruta de error olvidó conn.close(), liberar el cupo
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class SQLServerConnectionPool:
+    """Pool acotado y thread-safe de conexiones pyodbc"""
+    
+    def __init__(self, connection_string: str, pool_config: Dict[str, Any] = None):
+        pool_config = {**SQL_SERVER_POOL_CONFIG, **(pool_config or {})}
+        self.connection_string = connection_string
+        self.max_size = int(pool_config['max_size'])
+        self.checkout_timeout = pool_config['checkout_timeout']
+        self.max_idle_time = pool_config['max_idle_time']
+        self.health_check_interval = pool_config['health_check_interval']
+        
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._idle = deque()  # (conexión, momento en que quedó ociosa)
+        self._in_use = 0
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'discarded': 0,
+            'health_check_failures': 0,
+            'timeouts': 0,
+            'checkouts': 0
+        }
+    
+    def _connect(self):
+        connection = pyodbc.connect(self.connection_string)
+        with self._lock:
+            self._stats['created'] += 1
+        return connection
+    
+    def _discard(self, connection):
+        with self._lock:
+            self._stats['discarded'] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+    
+    def _is_healthy(self, connection) -> bool:
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception:
+            with self._lock:
+                self._stats['health_check_failures'] += 1
+            return False
+    
+    def _take_idle(self):
+        """Toma una conexión ociosa válida o None si no hay"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection, idle_since = self._idle.pop()
+            
+            idle_for = time.monotonic() - idle_since
+            if self.max_idle_time is not None and idle_for > self.max_idle_time:
+                self._discard(connection)
+                continue
+            if idle_for > self.health_check_interval and not self._is_healthy(connection):
+                self._discard(connection)
+                continue
+            return connection
+    
+    def checkout(self) -> PooledConnection:
+        """Presta una conexión del pool, esperando si todas están en uso"""
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise PoolTimeoutError(
+                f"No hay conexiones libres en el pool (máximo {self.max_size}, "
+                f"espera {self.checkout_timeout}s)"
+            )
+        
+        try:
+            connection = self._take_idle()
+            if connection is None:
+                connection = self._connect()
+            else:
+                with self._lock:
+                    self._stats['reused'] += 1
+        except Exception:
+            self._slots.release()
+            raise
+        
+        with self._lock:
+            self._in_use += 1
+            self._stats['checkouts'] += 1
+        return PooledConnection(self, connection)
+    
+    def _release(self, connection):
+        """Recibe una conexión devuelta por un PooledConnection"""
+        try:
+            # Descartar trabajo sin confirmar para no filtrarlo al siguiente usuario
+            connection.rollback()
+            reusable = True
+        except Exception:
+            reusable = False
+        
+        if reusable:
+            with self._lock:
+                self._idle.append((connection, time.monotonic()))
+        else:
+            self._discard(connection)
+        
+        with self._lock:
+            self._in_use -= 1
+        self._slots.release()
+    
+    def close_idle(self):
+        """Cierra todas las conexiones ociosas del pool"""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection, _ in idle:
+            self._discard(connection)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas de uso del pool"""
+        with self._lock:
+            return {
+                **self._stats,
+                'max_size': self.max_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle)
+            }
+
+
+_pools: Dict[str, SQLServerConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_shared_pool(connection_string: str) -> SQLServerConnectionPool:
+    """Retorna el pool compartido para una cadena de conexión"""
+    with _pools_lock:
+        pool = _pools.get(connection_string)
+        if pool is None:
+            pool = SQLServerConnectionPool(connection_string)
+            _pools[connection_string] = pool
+        return pool
+
 # =====================================================
 # GESTOR DE BASE DE DATOS
 # =====================================================
@@ -33,6 +262,8 @@ class SQLServerConnection:
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or SQL_SERVER_CONFIG
         self.connection_string = self._build_connection_string()
+        # Todas las instancias con la misma cadena comparten un único pool
+        self.pool = _get_shared_pool(self.connection_string)
     
     def _build_connection_string(self) -> str:
         """Construye la cadena de conexión para SQL Server"""
@@ -59,14 +290,18 @@ class SQLServerConnection:
                 f"Timeout={self.config['timeout']};"
             )
     
-    def get_connection(self) -> pyodbc.Connection:
-        """Obtiene una conexión a la base de datos SQL Server"""
+    def get_connection(self) -> PooledConnection:
+        """Obtiene una conexión del pool (conn.close() la devuelve al pool)"""
         try:
-            return pyodbc.connect(self.connection_string)
-        except pyodbc.Error as e:
+            return self.pool.checkout()
+        except (pyodbc.Error, PoolTimeoutError) as e:
             print(f"Error conectando a SQL Server: {e}")
             raise
     
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Estadísticas del pool de conexiones"""
+        return self.pool.get_stats()
+    
     def test_connection(self) -> bool:
         """Prueba la conexión a la base de datos"""
         try:
@@ -93,6 +328,17 @@ def test_database_connection():
     connection = get_database_connection()
     return connection.test_connection()
 
+def get_pool_stats():
+    """Retorna las estadísticas del pool de conexiones compartido"""
+    return get_database_connection().get_pool_stats()
+
+def close_idle_connections():
+    """Cierra las conexiones ociosas de todos los pools"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_idle()
+
 def get_connection_info():
     """Retorna información sobre la configuración de conexión"""
     config = SQL_SERVER_CONFIG
@@ -101,7 +347,8 @@ def get_connection_info():
         'server': config['server'],
         'database': config['database'],
         'authentication': 'Windows Authentication' if config['trusted_connection'] == 'yes' else 'SQL Server Authentication',
-        'driver': config['driver']
+        'driver': config['driver'],
+        'pool_max_size': SQL_SERVER_POOL_CONFIG['max_size']
     }
 
 # =====================================================
@@ -0,0 +1,60 @@
+-- =====================================================
+-- MIGRACIÓN: PROYECCIÓN DE ACCESOS ACTUALES
+-- Sistema de Gestión de Empleados y Conciliación de Accesos
+-- =====================================================
+-- Crea la tabla current_access y la carga desde historico. Es idempotente:
+-- puede ejecutarse más de una vez. Requiere migration_normalized_columns.sql
+-- (usa historico.status_norm).
+--
+-- Si historico se modifica por fuera de la aplicación (scripts, cargas
+-- directas), reconstruir la proyección con
+-- AccessManagementService.rebuild_current_access().
+-- =====================================================
+
+USE GAMLO_Empleados;
+GO
+
+-- =====================================================
+-- PROYECCIÓN DE ACCESOS ACTUALES (current_access)
+-- =====================================================
+-- Una fila por empleado y aplicación con el último registro 'closed completed'
+-- del historial. La mantiene la aplicación en cada escritura sobre historico
+-- (AccessManagementService._refresh_current_access).
+
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[current_access]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[current_access] (
+        [scotia_id] VARCHAR(20) NOT NULL,
+        [app_access_name] VARCHAR(150) NOT NULL,
+        [last_process] VARCHAR(50) NOT NULL,
+        [last_record_date] DATETIME2 NULL,
+        [subunit] VARCHAR(100) NULL,
+        [status] VARCHAR(50) NULL,
+        [event_description] NVARCHAR(MAX) NULL,
+        CONSTRAINT PK_current_access PRIMARY KEY ([scotia_id], [app_access_name])
+    );
+    PRINT 'Tabla current_access creada exitosamente';
+END
+GO
+
+-- Carga inicial desde historico (solo si la proyección está vacía)
+IF NOT EXISTS (SELECT 1 FROM [dbo].[current_access])
+BEGIN
+    INSERT INTO [dbo].[current_access]
+    (scotia_id, app_access_name, last_process, last_record_date, subunit, status, event_description)
+    SELECT scotia_id, app_access_name, process_access, record_date, subunit, status, event_description
+    FROM (
+        SELECT scotia_id, app_access_name, process_access, record_date, subunit, status, event_description,
+               ROW_NUMBER() OVER (PARTITION BY scotia_id, app_access_name ORDER BY record_date DESC, id DESC) AS rn
+        FROM [dbo].[historico]
+        WHERE status_norm = 'CLOSED COMPLETED'
+          AND process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access', 'offboarding')
+          AND app_access_name IS NOT NULL
+    ) latest
+    WHERE rn = 1;
+    PRINT 'current_access cargada desde historico';
+END
+GO
+
+PRINT 'Migración de current_access completada';
+GO
@@ -0,0 +1,54 @@
+-- =====================================================
+-- MIGRACIÓN: BÚSQUEDA DE TEXTO COMPLETO EN HISTORICO
+-- Sistema de Gestión de Empleados y Conciliación de Accesos
+-- =====================================================
+-- Crea el catálogo ftc_historico y un índice de texto completo sobre los
+-- campos libres de historico (event_description, comment, responsible,
+-- ticket_email). Es idempotente: puede ejecutarse más de una vez.
+--
+-- Requiere el componente Full-Text Search de SQL Server. Si no está
+-- instalado el script no hace cambios y la aplicación sigue buscando con
+-- LIKE (SearchService detecta el índice al primer uso).
+-- El índice se mantiene solo (CHANGE_TRACKING AUTO).
+-- =====================================================
+
+USE GAMLO_Empleados;
+GO
+
+IF FULLTEXTSERVICEPROPERTY('IsFullTextInstalled') = 1
+   AND NOT EXISTS (SELECT * FROM sys.fulltext_catalogs WHERE name = 'ftc_historico')
+BEGIN
+    CREATE FULLTEXT CATALOG ftc_historico;
+    PRINT 'Catálogo de texto completo ftc_historico creado exitosamente';
+END
+GO
+
+-- La clave del índice de texto completo es la PK de historico; su nombre lo
+-- genera SQL Server, por eso se busca en sys.indexes y se usa SQL dinámico.
+IF FULLTEXTSERVICEPROPERTY('IsFullTextInstalled') = 1
+   AND NOT EXISTS (SELECT * FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID(N'[dbo].[historico]'))
+BEGIN
+    DECLARE @pk_name SYSNAME = (
+        SELECT name FROM sys.indexes
+        WHERE object_id = OBJECT_ID(N'[dbo].[historico]') AND is_primary_key = 1
+    );
+    DECLARE @sql NVARCHAR(MAX) = N'CREATE FULLTEXT INDEX ON [dbo].[historico] (
+            [event_description] LANGUAGE 3082,
+            [comment] LANGUAGE 3082,
+            [responsible] LANGUAGE 3082,
+            [ticket_email] LANGUAGE 3082
+        )
+        KEY INDEX ' + QUOTENAME(@pk_name) + N'
+        ON ftc_historico
+        WITH CHANGE_TRACKING AUTO;';
+    EXEC sp_executesql @sql;
+    PRINT 'Índice de texto completo sobre historico creado exitosamente';
+END
+GO
+
+IF FULLTEXTSERVICEPROPERTY('IsFullTextInstalled') = 0
+    PRINT 'Full-Text Search no está instalado: se omite el índice de texto completo';
+GO
+
+PRINT 'Migración de búsqueda de texto completo completada';
+GO
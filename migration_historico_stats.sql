@@ -0,0 +1,189 @@
+-- =====================================================
+-- MIGRACIÓN: RESUMEN PRE-AGREGADO DEL HISTORIAL
+-- Sistema de Gestión de Empleados y Conciliación de Accesos
+-- =====================================================
+-- Crea historico_stats (por día, subunidad, aplicación y proceso),
+-- historico_stats_employee (por empleado) y el trigger TR_historico_stats
+-- que los mantiene en cada escritura sobre historico; luego los carga desde
+-- historico. Es idempotente: puede ejecutarse más de una vez.
+--
+-- Si el trigger se deshabilita (p. ej. durante una carga directa), reconstruir
+-- los resúmenes con AccessManagementService.rebuild_historico_stats().
+-- =====================================================
+
+USE GAMLO_Empleados;
+GO
+
+-- =====================================================
+-- RESUMEN DEL HISTORIAL (historico_stats)
+-- =====================================================
+-- historico_stats: conteos por día, subunidad, aplicación y proceso.
+-- historico_stats_employee: conteos por empleado (unidad y puesto se obtienen
+-- de headcount al leer). Los mantiene de forma incremental el trigger
+-- TR_historico_stats en cada INSERT, UPDATE o DELETE sobre historico, venga de
+-- la aplicación, de una importación o de un script. Los valores NULL de las
+-- dimensiones se guardan como ''. Los lee
+-- AccessManagementService.get_historial_statistics.
+
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[historico_stats]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[historico_stats] (
+        [stat_date] DATE NOT NULL,
+        [subunit] VARCHAR(100) NOT NULL,
+        [app_access_name] VARCHAR(150) NOT NULL,
+        [process_access] VARCHAR(50) NOT NULL,
+        [total_registros] INT NOT NULL,
+        [completados] INT NOT NULL,
+        [pendientes] INT NOT NULL,
+        [en_proceso] INT NOT NULL,
+        [cancelados] INT NOT NULL,
+        [rechazados] INT NOT NULL,
+        CONSTRAINT PK_historico_stats PRIMARY KEY ([stat_date], [subunit], [app_access_name], [process_access])
+    );
+    PRINT 'Tabla historico_stats creada exitosamente';
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[historico_stats_employee]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[historico_stats_employee] (
+        [scotia_id] VARCHAR(20) NOT NULL,
+        [total_registros] INT NOT NULL,
+        [completados] INT NOT NULL,
+        [pendientes] INT NOT NULL,
+        [en_proceso] INT NOT NULL,
+        [cancelados] INT NOT NULL,
+        [rechazados] INT NOT NULL,
+        CONSTRAINT PK_historico_stats_employee PRIMARY KEY ([scotia_id])
+    );
+    PRINT 'Tabla historico_stats_employee creada exitosamente';
+END
+GO
+
+IF EXISTS (SELECT * FROM sys.triggers WHERE name = 'TR_historico_stats')
+    DROP TRIGGER [dbo].[TR_historico_stats];
+GO
+
+CREATE TRIGGER [dbo].[TR_historico_stats] ON [dbo].[historico]
+AFTER INSERT, UPDATE, DELETE
+AS
+-- Suma las filas nuevas y resta las anteriores (deleted) en ambos resúmenes;
+-- elimina los grupos que quedan en cero.
+BEGIN
+    SET NOCOUNT ON;
+
+    IF NOT EXISTS (SELECT 1 FROM inserted) AND NOT EXISTS (SELECT 1 FROM deleted)
+        RETURN;
+
+    -- Ediciones que no tocan columnas del resumen (comentarios, fechas de cierre, SLA...)
+    IF EXISTS (SELECT 1 FROM inserted) AND EXISTS (SELECT 1 FROM deleted)
+       AND NOT (UPDATE(scotia_id) OR UPDATE(record_date) OR UPDATE(subunit)
+                OR UPDATE(app_access_name) OR UPDATE(process_access) OR UPDATE(status))
+        RETURN;
+
+    SELECT scotia_id, record_date, subunit, app_access_name, process_access, status, 1 AS sign
+    INTO #cambios
+    FROM inserted
+    UNION ALL
+    SELECT scotia_id, record_date, subunit, app_access_name, process_access, status, -1
+    FROM deleted;
+
+    MERGE [dbo].[historico_stats] WITH (HOLDLOCK) AS target
+    USING (
+        SELECT CAST(record_date AS DATE) AS stat_date, ISNULL(subunit, '') AS subunit,
+               ISNULL(app_access_name, '') AS app_access_name, ISNULL(process_access, '') AS process_access,
+               SUM(sign) AS total_registros,
+               SUM(CASE WHEN status = 'Completado' THEN sign ELSE 0 END) AS completados,
+               SUM(CASE WHEN status = 'Pendiente' THEN sign ELSE 0 END) AS pendientes,
+               SUM(CASE WHEN status = 'En Proceso' THEN sign ELSE 0 END) AS en_proceso,
+               SUM(CASE WHEN status = 'Cancelado' THEN sign ELSE 0 END) AS cancelados,
+               SUM(CASE WHEN status = 'Rechazado' THEN sign ELSE 0 END) AS rechazados
+        FROM #cambios
+        GROUP BY CAST(record_date AS DATE), ISNULL(subunit, ''), ISNULL(app_access_name, ''), ISNULL(process_access, '')
+    ) AS source
+    ON target.stat_date = source.stat_date AND target.subunit = source.subunit
+       AND target.app_access_name = source.app_access_name AND target.process_access = source.process_access
+    WHEN MATCHED AND target.total_registros + source.total_registros = 0 THEN DELETE
+    WHEN MATCHED THEN UPDATE SET
+        total_registros = target.total_registros + source.total_registros,
+        completados = target.completados + source.completados,
+        pendientes = target.pendientes + source.pendientes,
+        en_proceso = target.en_proceso + source.en_proceso,
+        cancelados = target.cancelados + source.cancelados,
+        rechazados = target.rechazados + source.rechazados
+    WHEN NOT MATCHED BY TARGET AND source.total_registros > 0 THEN
+        INSERT (stat_date, subunit, app_access_name, process_access, total_registros,
+                completados, pendientes, en_proceso, cancelados, rechazados)
+        VALUES (source.stat_date, source.subunit, source.app_access_name, source.process_access,
+                source.total_registros, source.completados, source.pendientes, source.en_proceso,
+                source.cancelados, source.rechazados);
+
+    MERGE [dbo].[historico_stats_employee] WITH (HOLDLOCK) AS target
+    USING (
+        SELECT scotia_id,
+               SUM(sign) AS total_registros,
+               SUM(CASE WHEN status = 'Completado' THEN sign ELSE 0 END) AS completados,
+               SUM(CASE WHEN status = 'Pendiente' THEN sign ELSE 0 END) AS pendientes,
+               SUM(CASE WHEN status = 'En Proceso' THEN sign ELSE 0 END) AS en_proceso,
+               SUM(CASE WHEN status = 'Cancelado' THEN sign ELSE 0 END) AS cancelados,
+               SUM(CASE WHEN status = 'Rechazado' THEN sign ELSE 0 END) AS rechazados
+        FROM #cambios
+        GROUP BY scotia_id
+    ) AS source
+    ON target.scotia_id = source.scotia_id
+    WHEN MATCHED AND target.total_registros + source.total_registros = 0 THEN DELETE
+    WHEN MATCHED THEN UPDATE SET
+        total_registros = target.total_registros + source.total_registros,
+        completados = target.completados + source.completados,
+        pendientes = target.pendientes + source.pendientes,
+        en_proceso = target.en_proceso + source.en_proceso,
+        cancelados = target.cancelados + source.cancelados,
+        rechazados = target.rechazados + source.rechazados
+    WHEN NOT MATCHED BY TARGET AND source.total_registros > 0 THEN
+        INSERT (scotia_id, total_registros, completados, pendientes, en_proceso, cancelados, rechazados)
+        VALUES (source.scotia_id, source.total_registros, source.completados, source.pendientes,
+                source.en_proceso, source.cancelados, source.rechazados);
+END
+GO
+
+PRINT 'Trigger TR_historico_stats creado exitosamente';
+GO
+
+-- Carga inicial desde historico (solo si los resúmenes están vacíos)
+IF NOT EXISTS (SELECT 1 FROM [dbo].[historico_stats])
+BEGIN
+    INSERT INTO [dbo].[historico_stats]
+    (stat_date, subunit, app_access_name, process_access, total_registros,
+     completados, pendientes, en_proceso, cancelados, rechazados)
+    SELECT CAST(record_date AS DATE), ISNULL(subunit, ''), ISNULL(app_access_name, ''), ISNULL(process_access, ''),
+           COUNT(*),
+           COUNT(CASE WHEN status = 'Completado' THEN 1 END),
+           COUNT(CASE WHEN status = 'Pendiente' THEN 1 END),
+           COUNT(CASE WHEN status = 'En Proceso' THEN 1 END),
+           COUNT(CASE WHEN status = 'Cancelado' THEN 1 END),
+           COUNT(CASE WHEN status = 'Rechazado' THEN 1 END)
+    FROM [dbo].[historico]
+    GROUP BY CAST(record_date AS DATE), ISNULL(subunit, ''), ISNULL(app_access_name, ''), ISNULL(process_access, '');
+    PRINT 'historico_stats cargada desde historico';
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM [dbo].[historico_stats_employee])
+BEGIN
+    INSERT INTO [dbo].[historico_stats_employee]
+    (scotia_id, total_registros, completados, pendientes, en_proceso, cancelados, rechazados)
+    SELECT scotia_id,
+           COUNT(*),
+           COUNT(CASE WHEN status = 'Completado' THEN 1 END),
+           COUNT(CASE WHEN status = 'Pendiente' THEN 1 END),
+           COUNT(CASE WHEN status = 'En Proceso' THEN 1 END),
+           COUNT(CASE WHEN status = 'Cancelado' THEN 1 END),
+           COUNT(CASE WHEN status = 'Rechazado' THEN 1 END)
+    FROM [dbo].[historico]
+    GROUP BY scotia_id;
+    PRINT 'historico_stats_employee cargada desde historico';
+END
+GO
+
+PRINT 'Migración de historico_stats completada';
+GO
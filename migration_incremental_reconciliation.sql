@@ -0,0 +1,104 @@
+-- =====================================================
+-- MIGRACIÓN: CONCILIACIÓN INCREMENTAL
+-- Sistema de Gestión de Empleados y Conciliación de Accesos
+-- =====================================================
+-- Agrega columnas ROWVERSION a headcount, applications e historico y crea las
+-- tablas materializadas reconciliation_state, reconciliation_results y
+-- reconciliation_watermark. Es idempotente: puede ejecutarse más de una vez.
+--
+-- Después de ejecutarla, correr una vez la conciliación completa:
+--     python reconciliation_job.py --full
+-- y programar el job nocturno sin parámetros (modo incremental).
+-- =====================================================
+
+USE GAMLO_Empleados;
+GO
+
+-- =====================================================
+-- CONCILIACIÓN INCREMENTAL (CONTROL DE CAMBIOS Y TABLAS MATERIALIZADAS)
+-- =====================================================
+-- Cada tabla de origen lleva una columna ROWVERSION que SQL Server incrementa en
+-- cada INSERT/UPDATE. La conciliación incremental guarda la última versión
+-- procesada (watermark) y solo recalcula los empleados afectados desde entonces.
+
+IF COL_LENGTH('dbo.headcount', 'row_version') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[headcount] ADD [row_version] ROWVERSION;
+    PRINT 'Columna headcount.row_version agregada';
+END
+GO
+
+IF COL_LENGTH('dbo.applications', 'row_version') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications] ADD [row_version] ROWVERSION;
+    PRINT 'Columna applications.row_version agregada';
+END
+GO
+
+IF COL_LENGTH('dbo.historico', 'row_version') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[historico] ADD [row_version] ROWVERSION;
+    PRINT 'Columna historico.row_version agregada';
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_headcount_row_version' AND object_id = OBJECT_ID('headcount'))
+    CREATE INDEX IX_headcount_row_version ON [dbo].[headcount] ([row_version]);
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_applications_row_version' AND object_id = OBJECT_ID('applications'))
+    CREATE INDEX IX_applications_row_version ON [dbo].[applications] ([row_version]) INCLUDE (logical_access_name, unidad_subunidad, position_role);
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_historico_row_version' AND object_id = OBJECT_ID('historico'))
+    CREATE INDEX IX_historico_row_version ON [dbo].[historico] ([row_version]) INCLUDE (scotia_id);
+GO
+
+-- Última versión procesada por tabla de origen
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[reconciliation_watermark]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[reconciliation_watermark] (
+        [source_table] VARCHAR(50) NOT NULL PRIMARY KEY,
+        [last_version] BIGINT NOT NULL DEFAULT 0,
+        [updated_at] DATETIME2 NOT NULL DEFAULT GETDATE()
+    );
+    PRINT 'Tabla reconciliation_watermark creada exitosamente';
+END
+GO
+
+-- Resumen materializado por empleado
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[reconciliation_state]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[reconciliation_state] (
+        [scotia_id] VARCHAR(20) NOT NULL PRIMARY KEY,
+        [current_count] INT NOT NULL DEFAULT 0,
+        [to_grant_count] INT NOT NULL DEFAULT 0,
+        [to_revoke_count] INT NOT NULL DEFAULT 0,
+        [is_stale] BIT NOT NULL DEFAULT 0,
+        [computed_at] DATETIME2 NOT NULL DEFAULT GETDATE()
+    );
+    CREATE INDEX IX_reconciliation_state_stale ON [dbo].[reconciliation_state] ([is_stale]);
+    PRINT 'Tabla reconciliation_state creada exitosamente';
+END
+GO
+
+-- Detalle materializado (mismas columnas que sp_GetAccessReconciliationReport)
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[reconciliation_results]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[reconciliation_results] (
+        [id] INT IDENTITY(1,1) NOT NULL PRIMARY KEY,
+        [scotia_id] VARCHAR(20) NOT NULL,
+        [access_type] VARCHAR(20) NOT NULL,
+        [app_name] VARCHAR(150) NULL,
+        [unit] VARCHAR(100) NULL,
+        [subunit] VARCHAR(100) NULL,
+        [position_role] VARCHAR(100) NULL,
+        [role_name] VARCHAR(100) NULL,
+        [description] NVARCHAR(MAX) NULL,
+        [record_date] DATETIME2 NULL,
+        [status] VARCHAR(50) NULL
+    );
+    CREATE INDEX IX_reconciliation_results_scotia ON [dbo].[reconciliation_results] ([scotia_id], [access_type]);
+    CREATE INDEX IX_reconciliation_results_app ON [dbo].[reconciliation_results] ([app_name]) INCLUDE (scotia_id);
+    PRINT 'Tabla reconciliation_results creada exitosamente';
+END
+GO
+
+PRINT 'Migración de conciliación incremental completada';
+GO
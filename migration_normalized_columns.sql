@@ -0,0 +1,142 @@
+-- =====================================================
+-- MIGRACIÓN: COLUMNAS NORMALIZADAS PERSISTIDAS
+-- Sistema de Gestión de Empleados y Conciliación de Accesos
+-- =====================================================
+-- Agrega a una base existente las columnas *_norm (UPPER(LTRIM(RTRIM(col))))
+-- y sus índices de cobertura. Es idempotente: puede ejecutarse más de una vez.
+--
+-- Backfill: al agregar una columna computada PERSISTED, SQL Server calcula y
+-- guarda el valor de TODAS las filas existentes dentro del mismo ALTER TABLE,
+-- por lo que no hace falta un UPDATE manual. En tablas grandes conviene
+-- ejecutarla fuera del horario de uso (el ALTER reescribe la tabla).
+-- =====================================================
+
+USE GAMLO_Empleados;
+GO
+
+-- =====================================================
+-- COLUMNAS NORMALIZADAS (COMPUTADAS PERSISTIDAS)
+-- =====================================================
+-- Las comparaciones UPPER(LTRIM(RTRIM(col))) no pueden usar índices. Estas columnas
+-- guardan el valor ya normalizado y se mantienen solas en cada INSERT/UPDATE.
+-- Al agregarlas, SQL Server calcula el valor de todas las filas existentes.
+
+-- Columnas normalizadas en applications
+IF COL_LENGTH('dbo.applications', 'unidad_subunidad_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications]
+    ADD [unidad_subunidad_norm] AS UPPER(LTRIM(RTRIM([unidad_subunidad]))) PERSISTED;
+    PRINT 'Columna applications.unidad_subunidad_norm agregada';
+END
+GO
+
+IF COL_LENGTH('dbo.applications', 'position_role_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications]
+    ADD [position_role_norm] AS UPPER(LTRIM(RTRIM([position_role]))) PERSISTED;
+    PRINT 'Columna applications.position_role_norm agregada';
+END
+GO
+
+IF COL_LENGTH('dbo.applications', 'subunit_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications]
+    ADD [subunit_norm] AS UPPER(LTRIM(RTRIM([subunit]))) PERSISTED;
+    PRINT 'Columna applications.subunit_norm agregada';
+END
+GO
+
+IF COL_LENGTH('dbo.applications', 'role_name_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications]
+    ADD [role_name_norm] AS UPPER(LTRIM(RTRIM([role_name]))) PERSISTED;
+    PRINT 'Columna applications.role_name_norm agregada';
+END
+GO
+
+-- Columnas normalizadas en historico
+IF COL_LENGTH('dbo.historico', 'status_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[historico]
+    ADD [status_norm] AS UPPER(LTRIM(RTRIM([status]))) PERSISTED;
+    PRINT 'Columna historico.status_norm agregada';
+END
+GO
+
+IF COL_LENGTH('dbo.historico', 'app_access_name_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[historico]
+    ADD [app_access_name_norm] AS UPPER(LTRIM(RTRIM([app_access_name]))) PERSISTED;
+    PRINT 'Columna historico.app_access_name_norm agregada';
+END
+GO
+
+-- Columnas normalizadas en headcount (lado empleado del cruce con applications)
+IF COL_LENGTH('dbo.headcount', 'unidad_subunidad_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[headcount]
+    ADD [unidad_subunidad_norm] AS UPPER(LTRIM(RTRIM([unidad_subunidad]))) PERSISTED;
+    PRINT 'Columna headcount.unidad_subunidad_norm agregada';
+END
+GO
+
+IF COL_LENGTH('dbo.headcount', 'position_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[headcount]
+    ADD [position_norm] AS UPPER(LTRIM(RTRIM([position]))) PERSISTED;
+    PRINT 'Columna headcount.position_norm agregada';
+END
+GO
+
+-- Índices de cobertura sobre columnas normalizadas
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_applications_norm_unidad_position' AND object_id = OBJECT_ID(N'[dbo].[applications]'))
+BEGIN
+    CREATE INDEX IX_applications_norm_unidad_position ON [dbo].[applications] ([unidad_subunidad_norm], [position_role_norm])
+    INCLUDE ([logical_access_name], [subunit_norm], [role_name_norm], [access_status]);
+    PRINT 'Índice IX_applications_norm_unidad_position creado exitosamente';
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_historico_norm_scotia_status_app' AND object_id = OBJECT_ID(N'[dbo].[historico]'))
+BEGIN
+    CREATE INDEX IX_historico_norm_scotia_status_app ON [dbo].[historico] ([scotia_id], [status_norm], [app_access_name_norm])
+    INCLUDE ([process_access], [record_date]);
+    PRINT 'Índice IX_historico_norm_scotia_status_app creado exitosamente';
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_headcount_norm_unidad_position' AND object_id = OBJECT_ID(N'[dbo].[headcount]'))
+BEGIN
+    CREATE INDEX IX_headcount_norm_unidad_position ON [dbo].[headcount] ([unidad_subunidad_norm], [position_norm])
+    INCLUDE ([activo]);
+    PRINT 'Índice IX_headcount_norm_unidad_position creado exitosamente';
+END
+GO
+
+-- =====================================================
+-- ESTADÍSTICAS Y VERIFICACIÓN
+-- =====================================================
+UPDATE STATISTICS [dbo].[applications];
+UPDATE STATISTICS [dbo].[historico];
+UPDATE STATISTICS [dbo].[headcount];
+GO
+
+-- Debe devolver 0 en todas las filas
+SELECT 'applications' as tabla, COUNT(*) as filas_sin_normalizar
+FROM [dbo].[applications]
+WHERE ISNULL(unidad_subunidad_norm, '') <> ISNULL(UPPER(LTRIM(RTRIM(unidad_subunidad))), '')
+   OR ISNULL(position_role_norm, '') <> ISNULL(UPPER(LTRIM(RTRIM(position_role))), '')
+UNION ALL
+SELECT 'historico' as tabla, COUNT(*) as filas_sin_normalizar
+FROM [dbo].[historico]
+WHERE ISNULL(status_norm, '') <> ISNULL(UPPER(LTRIM(RTRIM(status))), '')
+   OR ISNULL(app_access_name_norm, '') <> ISNULL(UPPER(LTRIM(RTRIM(app_access_name))), '')
+UNION ALL
+SELECT 'headcount' as tabla, COUNT(*) as filas_sin_normalizar
+FROM [dbo].[headcount]
+WHERE ISNULL(unidad_subunidad_norm, '') <> ISNULL(UPPER(LTRIM(RTRIM(unidad_subunidad))), '')
+   OR ISNULL(position_norm, '') <> ISNULL(UPPER(LTRIM(RTRIM(position))), '');
+GO
+
+PRINT 'Migración de columnas normalizadas completada';
+GO
@@ -0,0 +1,160 @@
+-- =====================================================
+-- MIGRACIÓN: ESTADÍSTICAS DE CONCILIACIÓN SET-BASED
+-- Sistema de Gestión de Empleados y Conciliación de Accesos
+-- =====================================================
+-- Reemplaza sp_GetReconciliationStats. La versión anterior ejecutaba
+-- sp_GetAccessReconciliationReport dentro de un INSERT ... EXEC para contar
+-- filas de un empleado; la nueva calcula actuales / a otorgar / a revocar de
+-- todos los empleados en una sola pasada y agrega el modo por unidad:
+--
+--     EXEC sp_GetReconciliationStats;                       -- totales (global)
+--     EXEC sp_GetReconciliationStats @scotia_id = 'EMP001'; -- un empleado
+--     EXEC sp_GetReconciliationStats @mode = 'employee';    -- por empleado
+--     EXEC sp_GetReconciliationStats @mode = 'unit';        -- por unidad_subunidad
+--
+-- Es idempotente: puede ejecutarse más de una vez.
+-- =====================================================
+
+USE GAMLO_Empleados;
+GO
+
+IF EXISTS (SELECT * FROM sys.procedures WHERE name = 'sp_GetReconciliationStats')
+    DROP PROCEDURE [dbo].[sp_GetReconciliationStats];
+GO
+
+CREATE PROCEDURE [dbo].[sp_GetReconciliationStats]
+    @scotia_id VARCHAR(20) = NULL,
+    @mode VARCHAR(20) = NULL
+AS
+-- Estadísticas de conciliación calculadas en una sola pasada set-based (sin
+-- ejecutar sp_GetAccessReconciliationReport por empleado). Usa las mismas
+-- reglas que el reporte: accesos actuales = onboarding/lateral_movement
+-- 'Completado' del historial; requeridos = applications 'Activo' de la
+-- unidad_subunidad y posición del empleado. Los conteos son por aplicación.
+--
+-- Modos:
+--   @scotia_id          -> una fila para ese empleado
+--   @mode = 'global'    -> una fila con los totales de la compañía (por defecto)
+--   @mode = 'employee'  -> una fila por empleado activo
+--   @mode = 'unit'      -> una fila por unidad_subunidad
+BEGIN
+    SET NOCOUNT ON;
+
+    SET @mode = CASE WHEN @scotia_id IS NOT NULL THEN 'employee' ELSE ISNULL(@mode, 'global') END;
+
+    IF @mode NOT IN ('global', 'employee', 'unit')
+    BEGIN
+        SELECT 'error' as status, 'Modo no soportado: ' + @mode as message;
+        RETURN;
+    END
+
+    -- Conteos por empleado: un FULL JOIN entre accesos actuales y requeridos
+    SELECT e.scotia_id,
+           e.unidad_subunidad,
+           ISNULL(SUM(CASE WHEN p.is_current = 1 THEN 1 ELSE 0 END), 0) as accesos_actuales,
+           ISNULL(SUM(CASE WHEN p.is_current = 0 THEN 1 ELSE 0 END), 0) as accesos_a_otorgar,
+           ISNULL(SUM(CASE WHEN p.is_required = 0 THEN 1 ELSE 0 END), 0) as accesos_a_revocar
+    INTO #EmployeeStats
+    FROM [dbo].[headcount] e
+    LEFT JOIN (
+        SELECT COALESCE(cur.scotia_id, req.scotia_id) as scotia_id,
+               CASE WHEN cur.app_name IS NULL THEN 0 ELSE 1 END as is_current,
+               CASE WHEN req.app_name IS NULL THEN 0 ELSE 1 END as is_required
+        FROM (
+            SELECT DISTINCT h.scotia_id, h.app_access_name as app_name
+            FROM [dbo].[historico] h
+            WHERE h.process_access IN ('onboarding', 'lateral_movement')
+            AND h.app_access_name IS NOT NULL
+            AND h.status = 'Completado'
+            AND (@scotia_id IS NULL OR h.scotia_id = @scotia_id)
+        ) cur
+        FULL OUTER JOIN (
+            SELECT DISTINCT hc.scotia_id, a.logical_access_name as app_name
+            FROM [dbo].[headcount] hc
+            INNER JOIN [dbo].[applications] a
+                ON a.unidad_subunidad = hc.unidad_subunidad
+               AND a.position_role = hc.position
+            WHERE hc.activo = 1
+            AND a.access_status = 'Activo'
+            AND (@scotia_id IS NULL OR hc.scotia_id = @scotia_id)
+        ) req ON req.scotia_id = cur.scotia_id AND req.app_name = cur.app_name
+    ) p ON p.scotia_id = e.scotia_id
+    WHERE e.activo = 1
+    AND e.unit IS NOT NULL
+    AND e.position IS NOT NULL
+    AND (@scotia_id IS NULL OR e.scotia_id = @scotia_id)
+    GROUP BY e.scotia_id, e.unidad_subunidad
+    OPTION (RECOMPILE);  -- plan distinto para un empleado y para toda la compañía
+
+    IF @scotia_id IS NOT NULL
+    BEGIN
+        -- Siempre una fila (en cero si el empleado no está activo)
+        SELECT @scotia_id as scope,
+               ISNULL(SUM(accesos_actuales), 0) as accesos_actuales,
+               ISNULL(SUM(accesos_a_otorgar), 0) as accesos_a_otorgar,
+               ISNULL(SUM(accesos_a_revocar), 0) as accesos_a_revocar,
+               ISNULL(SUM(accesos_actuales + accesos_a_otorgar - accesos_a_revocar), 0) as accesos_finales
+        FROM #EmployeeStats;
+    END
+    ELSE IF @mode = 'employee'
+    BEGIN
+        SELECT scotia_id as scope,
+               unidad_subunidad,
+               accesos_actuales,
+               accesos_a_otorgar,
+               accesos_a_revocar,
+               accesos_actuales + accesos_a_otorgar - accesos_a_revocar as accesos_finales
+        FROM #EmployeeStats
+        ORDER BY scotia_id;
+    END
+    ELSE IF @mode = 'unit'
+    BEGIN
+        SELECT ISNULL(unidad_subunidad, 'Sin Unidad/Subunidad') as scope,
+               COUNT(*) as empleados,
+               SUM(CASE WHEN accesos_a_otorgar > 0 OR accesos_a_revocar > 0 THEN 1 ELSE 0 END) as empleados_con_diferencias,
+               SUM(accesos_actuales) as accesos_actuales,
+               SUM(accesos_a_otorgar) as accesos_a_otorgar,
+               SUM(accesos_a_revocar) as accesos_a_revocar
+        FROM #EmployeeStats
+        GROUP BY unidad_subunidad
+        ORDER BY scope;
+    END
+    ELSE
+    BEGIN
+        -- Totales de la compañía: un agregado por tabla en lugar de una subconsulta por métrica
+        SELECT 'Global' as scope,
+               emp.empleados_activos,
+               app.aplicaciones_activas,
+               hist.tickets_pendientes,
+               hist.tickets_completados,
+               hist.total_historico,
+               rec.empleados_con_diferencias,
+               rec.accesos_actuales,
+               rec.accesos_a_otorgar,
+               rec.accesos_a_revocar
+        FROM (SELECT COUNT(*) as empleados_activos FROM [dbo].[headcount] WHERE activo = 1) emp
+        CROSS JOIN (SELECT COUNT(*) as aplicaciones_activas FROM [dbo].[applications] WHERE access_status = 'Activo') app
+        CROSS JOIN (
+            SELECT ISNULL(SUM(CASE WHEN status = 'Pendiente' THEN 1 ELSE 0 END), 0) as tickets_pendientes,
+                   ISNULL(SUM(CASE WHEN status = 'Completado' THEN 1 ELSE 0 END), 0) as tickets_completados,
+                   COUNT(*) as total_historico
+            FROM [dbo].[historico]
+        ) hist
+        CROSS JOIN (
+            SELECT ISNULL(SUM(CASE WHEN accesos_a_otorgar > 0 OR accesos_a_revocar > 0 THEN 1 ELSE 0 END), 0) as empleados_con_diferencias,
+                   ISNULL(SUM(accesos_actuales), 0) as accesos_actuales,
+                   ISNULL(SUM(accesos_a_otorgar), 0) as accesos_a_otorgar,
+                   ISNULL(SUM(accesos_a_revocar), 0) as accesos_a_revocar
+            FROM #EmployeeStats
+        ) rec;
+    END
+
+    DROP TABLE #EmployeeStats;
+END
+GO
+
+PRINT 'Procedimiento sp_GetReconciliationStats actualizado exitosamente';
+GO
+
+PRINT 'Migración de estadísticas de conciliación completada';
+GO
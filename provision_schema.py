@@ -0,0 +1,30 @@
+"""
+Aprovisionamiento explícito del esquema.
+
+Crea (si no existen) las columnas normalizadas persistidas y los índices que
+usan los servicios. Es idempotente y reemplaza el DDL que antes se ejecutaba
+al importar services.access_management_service.
+
+Uso:
+    python provision_schema.py
+"""
+import sys
+import time
+
+from services.access_management_service import access_service
+from services.logging_setup import configure_logging
+
+
+def main() -> int:
+    configure_logging()
+
+    inicio = time.time()
+    success, message = access_service.provision_schema()
+    duracion = time.time() - inicio
+
+    print(f"{'OK' if success else 'ERROR'}: {message} ({duracion:.1f}s)")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""
+Job de conciliación materializada.
+
+Actualiza reconciliation_state / reconciliation_results. Por defecto solo
+recalcula los empleados afectados desde la última ejecución (modo incremental);
+con --full recalcula todo el headcount activo.
+
+Uso:
+    python reconciliation_job.py          # incremental (job nocturno)
+    python reconciliation_job.py --full   # recálculo completo
+"""
+import argparse
+import sys
+import time
+
+from services.access_management_service import access_service
+from services.logging_setup import configure_logging
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Actualiza la conciliación de accesos materializada")
+    parser.add_argument('--full', action='store_true', help="Recalcular todos los empleados activos")
+    args = parser.parse_args()
+    configure_logging()
+
+    inicio = time.time()
+    success, message, counts = access_service.refresh_reconciliation(full=args.full)
+    duracion = time.time() - inicio
+
+    print(f"{'OK' if success else 'ERROR'}: {message} ({duracion:.1f}s)")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,15 @@
 Módulo de servicios para el sistema de conciliación de accesos
 """
 
-# Servicios del sistema de gestión de accesos
+# Servicios del sistema de gestión de accesos (instancias perezosas: ver registry.py)
+from .registry import LazyService, get_service
 from .export_service import ExportService, export_service
 from .history_service import HistoryService, history_service
 from .access_management_service import AccessManagementService, access_service
 from .search_service import SearchService, search_service
 
 __all__ = [
+    'LazyService', 'get_service',
     # Servicios de gestión de accesos
     'ExportService', 'export_service',
     'HistoryService', 'history_service',
@@ -6,15 +6,25 @@ Servicio para gestionar la lógica de negocio entre las tablas:
 
 Sistema optimizado para SQL Server únicamente.
 """
+import logging
 import pyodbc
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from datetime import datetime, timedelta
+import re
 import sys
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 
 # Importar configuración
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from config import get_database_connection
+from services.registry import LazyService, notify_table_changed, subscribe_table_changes
+from services.search_service import build_historico_conditions, historico_fulltext_mode
+
+logger = logging.getLogger(__name__)
 
 
 class AccessManagementService:
@@ -55,41 +65,123 @@ class AccessManagementService:
             (logical_access_name or '').strip().upper(),
         )
 
+    # Columna ROWVERSION de control de cambios (conciliación incremental); es binaria
+    # y no forma parte de los datos de negocio, por eso no se expone en los dicts.
+    _CHANGE_TRACKING_COLUMN = 'row_version'
+
+    @classmethod
+    def _rows_to_dicts(cls, cursor, rows) -> List[Dict[str, Any]]:
+        """Convierte filas de un SELECT * en dicts sin la columna de control de cambios"""
+        columns = [description[0] for description in cursor.description]
+        records = [dict(zip(columns, row)) for row in rows]
+        if cls._CHANGE_TRACKING_COLUMN in columns:
+            for record in records:
+                record.pop(cls._CHANGE_TRACKING_COLUMN, None)
+        return records
+
     def __init__(self):
-        """Inicializa el servicio con conexión a SQL Server"""
+        """Inicializa el servicio con conexión a SQL Server.
+
+        No abre conexiones ni ejecuta DDL: las columnas normalizadas e índices
+        se crean de forma explícita con provision_schema() (provision_schema.py).
+        """
         self.db_manager = get_database_connection()
-        self._ensure_views_and_indexes()
+        subscribe_table_changes(('headcount',), self.invalidate_headcount_statistics)
+        subscribe_table_changes(('applications',), self.invalidate_application_index)
 
     def get_connection(self) -> pyodbc.Connection:
         """Obtiene una conexión a la base de datos"""
         return self.db_manager.get_connection()
 
-    def _ensure_views_and_indexes(self):
-        """Asegura que existan los índices necesarios para SQL Server"""
+    @contextmanager
+    def unit_of_work(self, changed_tables: Tuple[str, ...] = ()):
+        """Ejecuta un proceso completo en una sola conexión y una sola transacción.
+
+        Uso:
+            with self.unit_of_work(changed_tables=('headcount',)) as conn:
+                self.create_historical_record(record_data, conn=conn)
+                self.update_employee_status(scotia_id, True, conn=conn)
+
+        Hace commit una única vez al salir del bloque; si se produce cualquier
+        excepción se hace rollback de todo el caso y la excepción se propaga.
+        Después del commit avisa del cambio en `changed_tables` (notify_table_changed).
+        """
+        conn = self.get_connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        for table in changed_tables:
+            notify_table_changed(table)
+
+    # Columnas computadas persistidas: (tabla, columna normalizada, columna origen)
+    _NORMALIZED_COLUMNS = [
+        ('applications', 'unidad_subunidad_norm', 'unidad_subunidad'),
+        ('applications', 'position_role_norm', 'position_role'),
+        ('applications', 'subunit_norm', 'subunit'),
+        ('applications', 'role_name_norm', 'role_name'),
+        ('historico', 'status_norm', 'status'),
+        ('historico', 'app_access_name_norm', 'app_access_name'),
+        ('headcount', 'unidad_subunidad_norm', 'unidad_subunidad'),
+        ('headcount', 'position_norm', 'position'),
+    ]
+
+    def provision_schema(self) -> Tuple[bool, str]:
+        """Asegura que existan las columnas normalizadas e índices necesarios (idempotente).
+
+        Paso explícito de instalación/migración; no se ejecuta al construir el servicio.
+        """
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
+            failures = 0
+            
+            # Columnas normalizadas persistidas (UPPER(LTRIM(RTRIM(col)))) para comparaciones indexables.
+            # Al agregarlas, SQL Server calcula el valor de las filas existentes.
+            for table, column, source in self._NORMALIZED_COLUMNS:
+                try:
+                    cursor.execute(
+                        f"IF COL_LENGTH('dbo.{table}', '{column}') IS NULL "
+                        f"ALTER TABLE {table} ADD {column} AS UPPER(LTRIM(RTRIM({source}))) PERSISTED"
+                    )
+                except Exception as e:
+                    failures += 1
+                    logger.warning("No se pudo crear columna %s.%s: %s", table, column, e)
             
             # Crear índices para optimizar las consultas (sintaxis SQL Server)
             indexes = [
                 "IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'idx_applications_unit_position' AND object_id = OBJECT_ID('applications')) CREATE INDEX idx_applications_unit_position ON applications (unit, position_role)",
                 "IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'idx_historico_scotia_status' AND object_id = OBJECT_ID('historico')) CREATE INDEX idx_historico_scotia_status ON historico (scotia_id, status)",
                 "IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'idx_historico_process_status' AND object_id = OBJECT_ID('historico')) CREATE INDEX idx_historico_process_status ON historico (process_access, status)",
-                "IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'idx_headcount_unit_position' AND object_id = OBJECT_ID('headcount')) CREATE INDEX idx_headcount_unit_position ON headcount (unit, position)"
+                "IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'idx_headcount_unit_position' AND object_id = OBJECT_ID('headcount')) CREATE INDEX idx_headcount_unit_position ON headcount (unit, position)",
+                # Índices de cobertura sobre columnas normalizadas (mismos nombres que sql_server_setup.sql)
+                "IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_applications_norm_unidad_position' AND object_id = OBJECT_ID('applications')) CREATE INDEX IX_applications_norm_unidad_position ON applications (unidad_subunidad_norm, position_role_norm) INCLUDE (logical_access_name, subunit_norm, role_name_norm, access_status)",
+                "IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_historico_norm_scotia_status_app' AND object_id = OBJECT_ID('historico')) CREATE INDEX IX_historico_norm_scotia_status_app ON historico (scotia_id, status_norm, app_access_name_norm) INCLUDE (process_access, record_date)",
+                "IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_headcount_norm_unidad_position' AND object_id = OBJECT_ID('headcount')) CREATE INDEX IX_headcount_norm_unidad_position ON headcount (unidad_subunidad_norm, position_norm) INCLUDE (activo)"
             ]
             
             for index_sql in indexes:
                 try:
                     cursor.execute(index_sql)
                 except Exception as e:
-                    print(f"Advertencia: No se pudo crear índice: {e}")
+                    failures += 1
+                    logger.warning("No se pudo crear índice: %s", e)
             
             conn.commit()
             conn.close()
             
+            total = len(self._NORMALIZED_COLUMNS) + len(indexes)
+            if failures:
+                return False, f"Esquema aprovisionado con {failures} de {total} sentencias fallidas (ver log)"
+            return True, f"Esquema aprovisionado: {total} columnas normalizadas e índices verificados"
+            
         except Exception as e:
-            print(f"Error creando vistas e índices: {e}")
-            # No lanzar excepción para no interrumpir la inicialización
+            logger.error("Error creando vistas e índices: %s", e)
+            return False, f"Error aprovisionando esquema: {str(e)}"
 
     # ==============================
     # MÉTODOS PARA HEADCOUNT
@@ -145,6 +237,7 @@ class AccessManagementService:
 
             conn.commit()
             conn.close()
+            notify_table_changed('headcount')
 
             return True, f"Empleado {employee_data.get('scotia_id')} creado exitosamente"
 
@@ -163,8 +256,7 @@ class AccessManagementService:
             row = cursor.fetchone()
 
             if row:
-                columns = [description[0] for description in cursor.description]
-                employee = dict(zip(columns, row))
+                employee = self._rows_to_dicts(cursor, [row])[0]
                 conn.close()
                 return employee
 
@@ -172,7 +264,7 @@ class AccessManagementService:
             return None
 
         except Exception as e:
-            print(f"Error obteniendo empleado: {e}")
+            logger.error("Error obteniendo empleado: %s", e)
             return None
 
     def get_all_employees(self) -> List[Dict[str, Any]]:
@@ -184,20 +276,24 @@ class AccessManagementService:
             cursor.execute('SELECT * FROM headcount WHERE activo = 1 ORDER BY full_name')
             rows = cursor.fetchall()
 
-            columns = [description[0] for description in cursor.description]
-            employees = [dict(zip(columns, row)) for row in rows]
+            employees = self._rows_to_dicts(cursor, rows)
 
             conn.close()
             return employees
 
         except Exception as e:
-            print(f"Error obteniendo empleados: {e}")
+            logger.error("Error obteniendo empleados: %s", e)
             return []
 
-    def update_employee_position(self, scotia_id: str, new_position: str, new_unit: str, new_unidad_subunidad: str = None) -> Tuple[bool, str]:
-        """Actualiza la posición, unidad y unidad_subunidad de un empleado"""
+    def update_employee_position(self, scotia_id: str, new_position: str, new_unit: str, new_unidad_subunidad: str = None,
+                                 conn=None) -> Tuple[bool, str]:
+        """Actualiza la posición, unidad y unidad_subunidad de un empleado.
+        Si se pasa `conn` (unit_of_work), no hace commit ni cierra la conexión.
+        """
+        own_conn = conn is None
         try:
-            conn = self.get_connection()
+            if own_conn:
+                conn = self.get_connection()
             cursor = conn.cursor()
 
             # Si no se proporciona unidad_subunidad, generar una basada en la unidad
@@ -211,11 +307,14 @@ class AccessManagementService:
             ''', (new_position, new_unit, new_unidad_subunidad, scotia_id))
 
             if cursor.rowcount == 0:
-                conn.close()
+                if own_conn:
+                    conn.close()
                 return False, f"Empleado {scotia_id} no encontrado"
 
-            conn.commit()
-            conn.close()
+            if own_conn:
+                conn.commit()
+                conn.close()
+                notify_table_changed('headcount')
 
             return True, f"Posición y unidad actualizadas para {scotia_id}"
 
@@ -266,6 +365,7 @@ class AccessManagementService:
 
             conn.commit()
             conn.close()
+            notify_table_changed('headcount')
 
             return True, f"Empleado {scotia_id} actualizado exitosamente"
 
@@ -293,8 +393,11 @@ class AccessManagementService:
                 conn.close()
                 return False, f"No se pudo eliminar el empleado {scotia_id}"
 
+            self._mark_reconciliation_stale(cursor, scotia_ids=[scotia_id])
+
             conn.commit()
             conn.close()
+            notify_table_changed('headcount')
 
             return True, f"Empleado {scotia_id} eliminado exitosamente"
 
@@ -305,183 +408,190 @@ class AccessManagementService:
     # MÉTODOS PARA APPLICATIONS
     # ==============================
 
+    # Columnas de applications que devuelven las búsquedas por posición
+    _APPLICATION_COLUMNS = [
+        'logical_access_name', 'jurisdiction', 'unit', 'subunit', 'unidad_subunidad', 'alias',
+        'path_email_url', 'position_role', 'exception_tracking', 'fulfillment_action', 'system_owner',
+        'role_name', 'access_type', 'category', 'additional_data', 'ad_code', 'access_status',
+        'last_update_date', 'require_licensing', 'description', 'authentication_method'
+    ]
+
+    # Segundos entre verificaciones de cambios en applications (COUNT + MAX(last_update_date))
+    APPLICATION_INDEX_CHECK_INTERVAL = 30
+
+    # Índice en memoria de applications (ver _get_application_index)
+    _application_index = None
+    _application_index_lock = threading.Lock()
+
+    @staticmethod
+    def _norm(value: Any) -> str:
+        """Normaliza igual que UPPER(LTRIM(RTRIM(col))) en SQL"""
+        if value is None:
+            return ''
+        return str(value).strip().upper()
+
+    def invalidate_application_index(self, table: str = 'applications'):
+        """Descarta el índice en memoria de applications (se reconstruye en la próxima búsqueda)"""
+        self._application_index = None
+
+    def _get_application_index(self) -> Dict[str, Any]:
+        """Retorna el índice en memoria de applications, reconstruyéndolo si la tabla cambió.
+
+        El índice guarda cada aplicación una sola vez con sus campos ya normalizados y
+        diccionarios por (unidad_subunidad, position_role), position_role, unidad_subunidad
+        y role_name, de modo que las búsquedas por posición no consultan la base de datos.
+        Se invalida explícitamente desde create/update/delete_application y con cada
+        notify_table_changed('applications') (p. ej. la importación desde Excel); como respaldo
+        ante cambios externos, se compara COUNT(*) y MAX(last_update_date) como máximo una
+        vez cada APPLICATION_INDEX_CHECK_INTERVAL segundos.
+        """
+        with self._application_index_lock:
+            index = self._application_index
+            now = time.monotonic()
+            if index is not None and now - index['checked_at'] < self.APPLICATION_INDEX_CHECK_INTERVAL:
+                return index
+
+            conn = self.get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute('SELECT COUNT(*), MAX(last_update_date) FROM applications')
+                row = cursor.fetchone()
+                version = (row[0], str(row[1])) if row else None
+
+                if index is not None and index['version'] == version:
+                    index['checked_at'] = now
+                    return index
+
+                cursor.execute(
+                    f"SELECT {', '.join(self._APPLICATION_COLUMNS)} FROM applications ORDER BY logical_access_name"
+                )
+                columns = [description[0] for description in cursor.description]
+                rows = cursor.fetchall()
+            finally:
+                conn.close()
+
+            index = {
+                'version': version,
+                'checked_at': now,
+                'all': [],
+                'by_unidad_position': {},
+                'by_position': {},
+                'by_unidad': {},
+                'by_role_name': {},
+            }
+            for row in rows:
+                app = dict(zip(columns, row))
+                entry = (app, {
+                    'unidad_subunidad': self._norm(app.get('unidad_subunidad')),
+                    'position_role': self._norm(app.get('position_role')),
+                    'subunit': self._norm(app.get('subunit')),
+                    'role_name': self._norm(app.get('role_name')),
+                })
+                norm = entry[1]
+                index['all'].append(entry)
+                index['by_unidad_position'].setdefault((norm['unidad_subunidad'], norm['position_role']), []).append(entry)
+                index['by_position'].setdefault(norm['position_role'], []).append(entry)
+                index['by_unidad'].setdefault(norm['unidad_subunidad'], []).append(entry)
+                index['by_role_name'].setdefault(norm['role_name'], []).append(entry)
+
+            logger.debug("Índice de applications reconstruido (%s aplicaciones)", len(index['all']))
+            self._application_index = index
+            return index
+
+    def _lookup_applications(self, position: Optional[str], unidad_subunidad: Optional[str],
+                             subunit: Optional[str] = None, title: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Busca en el índice en memoria aplicando las mismas comparaciones normalizadas que el SQL original"""
+        index = self._get_application_index()
+        position_n = self._norm(position)
+        unidad_n = self._norm(unidad_subunidad)
+        subunit_n = self._norm(subunit)
+        title_n = self._norm(title)
+
+        # Elegir el diccionario más selectivo disponible (acceso O(1))
+        if position_n and unidad_n:
+            candidates = index['by_unidad_position'].get((unidad_n, position_n), [])
+        elif position_n:
+            candidates = index['by_position'].get(position_n, [])
+        elif unidad_n:
+            candidates = index['by_unidad'].get(unidad_n, [])
+        elif title_n:
+            candidates = index['by_role_name'].get(title_n, [])
+        else:
+            candidates = index['all']
+
+        return [
+            dict(app) for app, norm in candidates
+            if (not subunit_n or norm['subunit'] == subunit_n)
+            and (not title_n or norm['role_name'] == title_n)
+        ]
+
+    def _log_available_application_keys(self):
+        """Debug: registra las posiciones y unidades/subunidades disponibles (desde el índice en memoria)"""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        index = self._get_application_index()
+        positions = sorted(key for key in index['by_position'] if key)
+        unidades = sorted(key for key in index['by_unidad'] if key)
+        logger.debug("Posiciones disponibles: %s", positions)
+        logger.debug("Unidades/Subunidades disponibles: %s", unidades)
+
     def get_applications_by_position(self, position: str, unidad_subunidad: str, subunit: Optional[str] = None, title: Optional[str] = None) -> List[Dict[str, Any]]:
         """Obtiene las aplicaciones que debe tener un empleado según posición/unidad_subunidad/subunidad/título.
         **Sin duplicados**: devuelve una fila por tripleta (unidad_subunidad, position_role, logical_access_name).
+        Resuelve la búsqueda sobre el índice en memoria de applications.
         """
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-
-            # Construir consulta dinámicamente
-            query = 'SELECT logical_access_name, jurisdiction, unit, subunit, unidad_subunidad, alias, path_email_url, position_role, exception_tracking, fulfillment_action, system_owner, role_name, access_type, category, additional_data, ad_code, access_status, last_update_date, require_licensing, description, authentication_method FROM applications WHERE 1=1'
-            params = []
-            
-            if unidad_subunidad:
-                query += ' AND UPPER(LTRIM(RTRIM(unidad_subunidad))) = UPPER(LTRIM(RTRIM(?)))'
-                params.append(unidad_subunidad)
-            
-            if subunit:
-                query += ' AND UPPER(LTRIM(RTRIM(subunit))) = UPPER(LTRIM(RTRIM(?)))'
-                params.append(subunit)
-            
-            if position:
-                # Buscar en ambas columnas: position (nueva) y position_role (antigua)
-                query += ' AND (UPPER(LTRIM(RTRIM(position))) = UPPER(LTRIM(RTRIM(?))) OR UPPER(LTRIM(RTRIM(position_role))) = UPPER(LTRIM(RTRIM(?))))'
-                params.append(position)
-                params.append(position)
-            
-            if title:
-                query += ' AND UPPER(LTRIM(RTRIM(role_name))) = UPPER(LTRIM(RTRIM(?)))'
-                params.append(title)
-            
-            query += ' ORDER BY logical_access_name'
-            
-            # Debug: imprimir la consulta y parámetros
-            print(f"DEBUG get_applications_by_position:")
-            print(f"  - Posición: '{position}'")
-            print(f"  - Unidad/Subunidad: '{unidad_subunidad}'")
-            print(f"  - Subunidad: '{subunit}'")
-            print(f"  - Título: '{title}'")
-            print(f"  - Consulta: {query}")
-            print(f"  - Parámetros: {params}")
-            
-            cursor.execute(query, params)
-
-            rows = cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-            applications = [dict(zip(columns, row)) for row in rows]
-            
-            # Debug: mostrar resultados
-            print(f"  - Resultados encontrados: {len(applications)}")
+            applications = self._lookup_applications(position, unidad_subunidad, subunit=subunit, title=title)
             
-            # Si no hay resultados, hacer debug para ver qué datos existen
-            if len(applications) == 0:
-                print("DEBUG: No se encontraron aplicaciones. Verificando qué datos existen...")
+            # Debug: registrar la búsqueda y resultados (solo si el nivel DEBUG está habilitado)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("get_applications_by_position: posición='%s', unidad_subunidad='%s', subunidad='%s', título='%s' -> %s resultados",
+                             position, unidad_subunidad, subunit, title, len(applications))
                 
-                # Verificar posiciones disponibles
-                cursor.execute("SELECT DISTINCT position, position_role FROM applications WHERE access_status = 'Active'")
-                positions = cursor.fetchall()
-                print(f"DEBUG: Posiciones disponibles: {positions}")
+                # Si no hay resultados, mostrar qué datos existen
+                if len(applications) == 0:
+                    logger.debug("No se encontraron aplicaciones. Verificando qué datos existen...")
+                    self._log_available_application_keys()
                 
-                # Verificar unidades/subunidades disponibles
-                cursor.execute("SELECT DISTINCT unidad_subunidad FROM applications WHERE access_status = 'Active'")
-                unidades = cursor.fetchall()
-                print(f"DEBUG: Unidades/Subunidades disponibles: {unidades}")
-                
-                # Verificar subunidades disponibles
-                cursor.execute("SELECT DISTINCT subunit FROM applications WHERE access_status = 'Active'")
-                subunidades = cursor.fetchall()
-                print(f"DEBUG: Subunidades disponibles: {subunidades}")
-                
-                # Buscar aplicaciones que contengan "Summer" en cualquier campo
-                cursor.execute("SELECT logical_access_name, position, position_role, unidad_subunidad, subunit FROM applications WHERE access_status = 'Active' AND (position LIKE '%Summer%' OR position_role LIKE '%Summer%')")
-                summer_apps = cursor.fetchall()
-                print(f"DEBUG: Aplicaciones que contienen 'Summer': {summer_apps}")
-                
-                # Buscar aplicaciones que contengan "Business Intelligence" o "Analytics"
-                cursor.execute("SELECT logical_access_name, position, position_role, unidad_subunidad, subunit FROM applications WHERE access_status = 'Active' AND (unidad_subunidad LIKE '%Business Intelligence%' OR unidad_subunidad LIKE '%Analytics%' OR subunit LIKE '%Analytics%')")
-                bi_apps = cursor.fetchall()
-                print(f"DEBUG: Aplicaciones relacionadas con Business Intelligence/Analytics: {bi_apps}")
-            
-            for app in applications:
-                print(f"    * {app.get('logical_access_name', '')} | {app.get('unidad_subunidad', '')} | {app.get('position_role', '')}")
+                for app in applications:
+                    logger.debug("    * %s | %s | %s", app.get('logical_access_name', ''), app.get('unidad_subunidad', ''), app.get('position_role', ''))
 
-            conn.close()
             return applications
 
         except Exception as e:
-            print(f"Error obteniendo aplicaciones por posición: {e}")
+            logger.error("Error obteniendo aplicaciones por posición: %s", e)
             return []
 
     def get_applications_by_position_flexible(self, position: str, unit: str, subunit: Optional[str] = None, title: Optional[str] = None) -> List[Dict[str, Any]]:
         """Obtiene las aplicaciones usando la misma lógica flexible que se usa para accesos normales.
         Esta función es más permisiva y encuentra aplicaciones incluso si las unidades/subunidades no coinciden exactamente.
+        Resuelve la búsqueda sobre el índice en memoria de applications.
         """
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-
-            # Construir consulta más flexible - similar a la lógica de accesos normales
-            query = 'SELECT logical_access_name, jurisdiction, unit, subunit, alias, path_email_url, position_role, exception_tracking, fulfillment_action, system_owner, role_name, access_type, category, additional_data, ad_code, access_status, last_update_date, require_licensing, description, authentication_method FROM applications WHERE 1=1'
-            params = []
-            
-            # Filtrar por posición (obligatorio)
-            if position:
-                query += ' AND UPPER(LTRIM(RTRIM(position_role))) = UPPER(LTRIM(RTRIM(?)))'
-                params.append(position)
-            
-            # Filtrar por unidad_subunidad (obligatorio) - buscar solo coincidencia exacta
-            # Esto evita encontrar "eddu/qa" cuando se busca "eddu" (solo encuentra "eddu" exacto)
-            if unit:
-                # Normalizar el valor de búsqueda para comparación exacta
-                unit_normalized = unit.strip().upper()
-                # Buscar solo coincidencia exacta de unidad_subunidad
-                query += ' AND UPPER(LTRIM(RTRIM(unidad_subunidad))) = ?'
-                params.append(unit_normalized)
-            
-            # Subunidad es opcional - no filtrar si no se proporciona
-            if subunit:
-                query += ' AND UPPER(LTRIM(RTRIM(subunit))) = UPPER(LTRIM(RTRIM(?)))'
-                params.append(subunit)
-            
-            # Título es opcional
-            if title:
-                query += ' AND UPPER(LTRIM(RTRIM(role_name))) = UPPER(LTRIM(RTRIM(?)))'
-                params.append(title)
-            
-            query += ' ORDER BY logical_access_name'
-            
-            # Debug: imprimir la consulta y parámetros
-            print(f"DEBUG get_applications_by_position_flexible:")
-            print(f"  - Posición: '{position}'")
-            print(f"  - Unidad: '{unit}'")
-            print(f"  - Subunidad: '{subunit}' (opcional)")
-            print(f"  - Título: '{title}' (opcional)")
-            print(f"  - Consulta: {query}")
-            print(f"  - Parámetros: {params}")
-            
-            cursor.execute(query, params)
-
-            rows = cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-            applications = [dict(zip(columns, row)) for row in rows]
-            
-            # Debug: mostrar resultados
-            print(f"  - Resultados encontrados: {len(applications)}")
+            # Posición contra position_role y unidad contra unidad_subunidad, ambas por coincidencia exacta
+            # normalizada. Esto evita encontrar "eddu/qa" cuando se busca "eddu" (solo encuentra "eddu" exacto).
+            # Subunidad y título son opcionales.
+            applications = self._lookup_applications(position, unit, subunit=subunit, title=title)
+            for app in applications:
+                app.pop('unidad_subunidad', None)  # Mismas columnas que devolvía la consulta flexible
             
-            # Si no hay resultados, hacer debug para ver qué datos existen
-            if len(applications) == 0:
-                print("DEBUG: No se encontraron aplicaciones para flex staff. Verificando qué datos existen...")
-                
-                # Verificar posiciones disponibles
-                cursor.execute("SELECT DISTINCT position, position_role FROM applications WHERE access_status = 'Active'")
-                positions = cursor.fetchall()
-                print(f"DEBUG: Posiciones disponibles: {positions}")
+            # Debug: registrar la búsqueda y resultados (solo si el nivel DEBUG está habilitado)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("get_applications_by_position_flexible: posición='%s', unidad='%s', subunidad='%s', título='%s' -> %s resultados",
+                             position, unit, subunit, title, len(applications))
                 
-                # Verificar unidades disponibles
-                cursor.execute("SELECT DISTINCT unit FROM applications WHERE access_status = 'Active'")
-                units = cursor.fetchall()
-                print(f"DEBUG: Unidades disponibles: {units}")
+                # Si no hay resultados, mostrar qué datos existen
+                if len(applications) == 0:
+                    logger.debug("No se encontraron aplicaciones para flex staff. Verificando qué datos existen...")
+                    self._log_available_application_keys()
                 
-                # Buscar aplicaciones que contengan "Analista"
-                cursor.execute("SELECT logical_access_name, position, position_role, unit, subunit FROM applications WHERE access_status = 'Active' AND (position LIKE '%Analista%' OR position_role LIKE '%Analista%')")
-                analista_apps = cursor.fetchall()
-                print(f"DEBUG: Aplicaciones que contienen 'Analista': {analista_apps}")
-                
-                # Buscar aplicaciones que contengan "Recursos Humanos"
-                cursor.execute("SELECT logical_access_name, position, position_role, unit, subunit FROM applications WHERE access_status = 'Active' AND (unit LIKE '%Recursos Humanos%' OR subunit LIKE '%Recursos Humanos%')")
-                rh_apps = cursor.fetchall()
-                print(f"DEBUG: Aplicaciones relacionadas con Recursos Humanos: {rh_apps}")
-            
-            for app in applications:
-                print(f"    * {app.get('logical_access_name', '')} | {app.get('unit', '')} | {app.get('subunit', '')} | {app.get('position_role', '')}")
+                for app in applications:
+                    logger.debug("    * %s | %s | %s | %s", app.get('logical_access_name', ''), app.get('unit', ''), app.get('subunit', ''), app.get('position_role', ''))
 
-            conn.close()
             return applications
 
         except Exception as e:
-            print(f"Error obteniendo aplicaciones por posición flexible: {e}")
+            logger.error("Error obteniendo aplicaciones por posición flexible: %s", e)
             return []
 
     def get_all_applications(self) -> List[Dict[str, Any]]:
@@ -493,14 +603,13 @@ class AccessManagementService:
             cursor.execute('SELECT * FROM applications ORDER BY logical_access_name')
             rows = cursor.fetchall()
 
-            columns = [description[0] for description in cursor.description]
-            applications = [dict(zip(columns, row)) for row in rows]
+            applications = self._rows_to_dicts(cursor, rows)
 
             conn.close()
             return applications
 
         except Exception as e:
-            print(f"Error obteniendo aplicaciones: {e}")
+            logger.error("Error obteniendo aplicaciones: %s", e)
             return []
 
     def _get_application_by_name(self, logical_access_name: str) -> Optional[Dict[str, Any]]:
@@ -531,7 +640,7 @@ class AccessManagementService:
             return None
 
         except Exception as e:
-            print(f"Error obteniendo aplicación por nombre: {e}")
+            logger.error("Error obteniendo aplicación por nombre: %s", e)
             return None
 
     def create_application(self, app_data: Dict[str, Any]) -> Tuple[bool, str]:
@@ -587,6 +696,8 @@ class AccessManagementService:
 
             conn.commit()
             conn.close()
+            self.invalidate_application_index()
+            notify_table_changed('applications')
 
             return True, f"Aplicación {app_data.get('logical_access_name')} creada exitosamente con ID {app_id}"
 
@@ -639,6 +750,8 @@ class AccessManagementService:
 
             conn.commit()
             conn.close()
+            self.invalidate_application_index()
+            notify_table_changed('applications')
 
             return True, f"Aplicación {app_id} actualizada exitosamente"
 
@@ -665,9 +778,12 @@ class AccessManagementService:
                 return False, f"No se puede eliminar la aplicación porque tiene {historico_count} registros en el historial"
 
             cursor.execute('DELETE FROM applications WHERE id = ?', (app_id,))
+            self._mark_reconciliation_stale(cursor, app_name=app_name)
 
             conn.commit()
             conn.close()
+            self.invalidate_application_index()
+            notify_table_changed('applications')
 
             return True, f"Aplicación {app_name} eliminada exitosamente"
 
@@ -718,7 +834,7 @@ class AccessManagementService:
                         }
                     conn.close()
                 except Exception as e:
-                    print(f"Error obteniendo información de aplicación: {e}")
+                    logger.error("Error obteniendo información de aplicación: %s", e)
             
             # Datos del registro manual
             record_data = {
@@ -756,21 +872,24 @@ class AccessManagementService:
         except Exception as e:
             return False, f"Error creando registro manual: {str(e)}"
 
-    def create_historical_record(self, record_data: Dict[str, Any]) -> Tuple[bool, str]:
-        """Crea un registro en el historial con verificación anti-duplicados"""
+    def create_historical_record(self, record_data: Dict[str, Any], conn=None) -> Tuple[bool, str]:
+        """Crea un registro en el historial con verificación anti-duplicados.
+        Si se pasa `conn` (unit_of_work), no hace commit ni cierra la conexión.
+        """
+        own_conn = conn is None
         try:
-            print(f"DEBUG: Iniciando creación de registro histórico")
-            print(f"DEBUG: Datos recibidos: {record_data}")
-            
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            logger.debug("Iniciando creación de registro histórico: %s", record_data)
 
             required_fields = ['scotia_id', 'process_access']
             for field in required_fields:
                 if not record_data.get(field):
-                    print(f"DEBUG: Error - Campo requerido faltante: {field}")
+                    logger.warning("Campo requerido faltante: %s", field)
                     return False, f"Campo requerido faltante: {field}"
 
+            if own_conn:
+                conn = self.get_connection()
+            cursor = conn.cursor()
+
             # Verificación anti-duplicados: evita más de un "Pendiente" por la misma app/empleado
             # PERO permite registros de offboarding incluso si ya existe un registro pendiente
             process_access = record_data.get('process_access', '')
@@ -779,70 +898,265 @@ class AccessManagementService:
                     SELECT COUNT(*) FROM historico
                     WHERE scotia_id = ?
                       AND status = 'Pendiente'
-                      AND UPPER(TRIM(app_access_name)) = UPPER(TRIM(?))
-                ''', (record_data['scotia_id'], record_data.get('app_access_name', '')))
+                      AND app_access_name_norm = ?
+                ''', (record_data['scotia_id'], self._norm(record_data.get('app_access_name', ''))))
                 
                 existing_count = cursor.fetchone()[0]
                 if existing_count > 0:
-                    conn.close()
+                    if own_conn:
+                        conn.close()
                     return True, f"Registro ya pendiente; no se duplicó (existentes: {existing_count})"
 
             # Obtener el email del empleado si no se proporciona
             employee_email = record_data.get('employee_email')
             if not employee_email:
-                print(f"DEBUG: Obteniendo email del empleado {record_data.get('scotia_id')}")
                 cursor.execute('SELECT email FROM headcount WHERE scotia_id = ?', (record_data.get('scotia_id'),))
                 email_result = cursor.fetchone()
                 employee_email = email_result[0] if email_result else None
-                print(f"DEBUG: Email obtenido: {employee_email}")
-
-            print(f"DEBUG: Preparando inserción con email: {employee_email}")
-            
-            # Preparar parámetros para debug
-            params = (
-                record_data.get('scotia_id'),
-                employee_email,
-                record_data.get('case_id'),
-                record_data.get('responsible'),
-                record_data.get('record_date', datetime.now().isoformat()),
-                record_data.get('request_date'),
-                record_data.get('process_access'),
-                record_data.get('subunit'),
-                record_data.get('event_description'),
-                record_data.get('ticket_email'),
-                record_data.get('app_access_name'),
-                record_data.get('computer_system_type'),
-                record_data.get('status', 'Pendiente'),
-                record_data.get('closing_date_app'),
-                record_data.get('closing_date_ticket'),
-                record_data.get('app_quality'),
-                record_data.get('confirmation_by_user'),
-                record_data.get('comment'),
-                record_data.get('ticket_quality'),
-                record_data.get('general_status_ticket'),
-                record_data.get('average_time_open_ticket')
-            )
-            
-            print(f"DEBUG: Parámetros para inserción: {params}")
+
+            params = self._historical_record_params(record_data, employee_email)
+            logger.debug("Parámetros para inserción (email: %s): %s", employee_email, params)
             
-            cursor.execute('''
-                INSERT INTO historico 
-                (scotia_id, employee_email, case_id, responsible, record_date, request_date, process_access, subunit, 
-                 event_description, ticket_email, app_access_name, computer_system_type, status, 
-                 closing_date_app, closing_date_ticket, app_quality, confirmation_by_user, comment, 
-                 ticket_quality, general_status_ticket, average_time_open_ticket)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', params)
+            cursor.execute(self._HISTORICO_INSERT_SQL, params)
 
-            conn.commit()
-            print(f"DEBUG: Registro insertado exitosamente en la base de datos")
-            conn.close()
+            if self._norm(record_data.get('status', 'Pendiente')) == self._CLOSED_COMPLETED:
+                self._refresh_current_access(cursor, record_data['scotia_id'], [record_data.get('app_access_name')])
+
+            if own_conn:
+                conn.commit()
+                conn.close()
+            logger.debug("Registro insertado exitosamente en la base de datos")
 
             return True, "Registro histórico creado exitosamente"
 
         except Exception as e:
             return False, f"Error creando registro histórico: {str(e)}"
 
+    # Columnas que se insertan en historico al crear un registro (mismo orden que los parámetros)
+    _HISTORICO_INSERT_SQL = '''
+        INSERT INTO historico 
+        (scotia_id, employee_email, case_id, responsible, record_date, request_date, process_access, subunit, 
+         event_description, ticket_email, app_access_name, computer_system_type, status, 
+         closing_date_app, closing_date_ticket, app_quality, confirmation_by_user, comment, 
+         ticket_quality, general_status_ticket, average_time_open_ticket)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+
+    # Máximo de valores por cláusula IN (SQL Server admite hasta 2100 parámetros)
+    _IN_CHUNK_SIZE = 500
+
+    @staticmethod
+    def _historical_record_params(record_data: Dict[str, Any], employee_email: Optional[str]) -> Tuple:
+        """Parámetros de _HISTORICO_INSERT_SQL para un registro"""
+        return (
+            record_data.get('scotia_id'),
+            employee_email,
+            record_data.get('case_id'),
+            record_data.get('responsible'),
+            record_data.get('record_date', datetime.now().isoformat()),
+            record_data.get('request_date'),
+            record_data.get('process_access'),
+            record_data.get('subunit'),
+            record_data.get('event_description'),
+            record_data.get('ticket_email'),
+            record_data.get('app_access_name'),
+            record_data.get('computer_system_type'),
+            record_data.get('status', 'Pendiente'),
+            record_data.get('closing_date_app'),
+            record_data.get('closing_date_ticket'),
+            record_data.get('app_quality'),
+            record_data.get('confirmation_by_user'),
+            record_data.get('comment'),
+            record_data.get('ticket_quality'),
+            record_data.get('general_status_ticket'),
+            record_data.get('average_time_open_ticket')
+        )
+
+    def create_historical_records_bulk(self, records: List[Dict[str, Any]], conn=None) -> Tuple[bool, str, List[Dict[str, Any]]]:
+        """Crea varios registros en el historial con un solo lote de inserción.
+
+        Aplica las mismas reglas que create_historical_record, pero resolviendo en bloque:
+        - Anti-duplicados: una sola consulta trae los "Pendiente" existentes de todos los
+          scotia_id del lote; los registros que no son offboarding y ya tienen un pendiente
+          para la misma app (o uno anterior en el mismo lote) se omiten.
+        - Email del empleado: una sola consulta a headcount para los registros que no lo traen.
+        - Inserción: executemany con fast_executemany (pyodbc) sobre un único cursor.
+
+        Si se pasa `conn` (unit_of_work), no hace commit ni cierra la conexión.
+
+        Returns:
+            Tuple[success, message, registros_insertados]
+        """
+        if not records:
+            return True, "No hay registros para crear", []
+
+        for record_data in records:
+            for field in ('scotia_id', 'process_access'):
+                if not record_data.get(field):
+                    return False, f"Campo requerido faltante: {field}", []
+
+        own_conn = conn is None
+        try:
+            if own_conn:
+                conn = self.get_connection()
+            cursor = conn.cursor()
+
+            scotia_ids = sorted({record_data['scotia_id'] for record_data in records})
+
+            # Pendientes existentes por (scotia_id, app normalizada)
+            pending_keys = set()
+            for i in range(0, len(scotia_ids), self._IN_CHUNK_SIZE):
+                chunk = scotia_ids[i:i + self._IN_CHUNK_SIZE]
+                placeholders = ','.join(['?'] * len(chunk))
+                cursor.execute(f'''
+                    SELECT DISTINCT scotia_id, app_access_name_norm
+                    FROM historico
+                    WHERE status = 'Pendiente'
+                      AND scotia_id IN ({placeholders})
+                ''', tuple(chunk))
+                for row in cursor.fetchall():
+                    pending_keys.add((row[0], row[1] or ''))
+
+            # Emails de headcount solo para los empleados que lo necesitan
+            emails = {}
+            missing_email_ids = sorted({r['scotia_id'] for r in records if not r.get('employee_email')})
+            for i in range(0, len(missing_email_ids), self._IN_CHUNK_SIZE):
+                chunk = missing_email_ids[i:i + self._IN_CHUNK_SIZE]
+                placeholders = ','.join(['?'] * len(chunk))
+                cursor.execute(f'SELECT scotia_id, email FROM headcount WHERE scotia_id IN ({placeholders})', tuple(chunk))
+                for row in cursor.fetchall():
+                    emails[row[0]] = row[1]
+
+            to_insert = []
+            params = []
+            skipped = 0
+            for record_data in records:
+                key = (record_data['scotia_id'], self._norm(record_data.get('app_access_name')))
+                if record_data.get('process_access') != 'offboarding' and key in pending_keys:
+                    skipped += 1
+                    continue
+                if record_data.get('status', 'Pendiente') == 'Pendiente':
+                    pending_keys.add(key)
+
+                employee_email = record_data.get('employee_email') or emails.get(record_data['scotia_id'])
+                to_insert.append(record_data)
+                params.append(self._historical_record_params(record_data, employee_email))
+
+            if params:
+                try:
+                    cursor.fast_executemany = True
+                except AttributeError:
+                    pass  # Drivers sin fast_executemany (p. ej. sqlite3 en pruebas)
+                cursor.executemany(self._HISTORICO_INSERT_SQL, params)
+
+            # Mantener current_access para los registros que ya llegan cerrados
+            completed_apps: Dict[str, List[str]] = {}
+            for record_data in to_insert:
+                if self._norm(record_data.get('status', 'Pendiente')) == self._CLOSED_COMPLETED:
+                    completed_apps.setdefault(record_data['scotia_id'], []).append(record_data.get('app_access_name'))
+            for scotia_id, app_names in completed_apps.items():
+                self._refresh_current_access(cursor, scotia_id, app_names)
+
+            if own_conn:
+                conn.commit()
+                conn.close()
+
+            logger.debug("Inserción masiva en historico: %s insertados, %s omitidos por pendientes", len(to_insert), skipped)
+            return True, f"{len(to_insert)} registros creados, {skipped} ya pendientes (no duplicados)", to_insert
+
+        except Exception as e:
+            if own_conn and conn is not None:
+                conn.rollback()
+                conn.close()
+            return False, f"Error creando registros históricos: {str(e)}", []
+
+    # ==============================
+    # PROYECCIÓN current_access
+    # ==============================
+    # current_access guarda, por empleado y aplicación, el último registro 'closed completed'
+    # del historial (onboarding, lateral_movement, flex_staff, manual_access u offboarding).
+    # Se recalcula desde historico en cada escritura que lo afecta, así que leer los accesos
+    # actuales de un empleado es una búsqueda por clave primaria.
+
+    _CURRENT_ACCESS_PROCESSES = ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access', 'offboarding')
+    _CLOSED_COMPLETED = 'CLOSED COMPLETED'
+
+    def _refresh_current_access(self, cursor, scotia_id: str, app_names: Optional[List[str]] = None):
+        """Recalcula las filas de current_access de un empleado (opcionalmente solo algunas apps)"""
+        app_filter = ""
+        app_params: Tuple = ()
+        if app_names:
+            app_names = sorted({name for name in app_names if name})
+            app_filter = f" AND app_access_name IN ({', '.join('?' for _ in app_names)})"
+            app_params = tuple(app_names)
+
+        process_list = ', '.join(f"'{process}'" for process in self._CURRENT_ACCESS_PROCESSES)
+        cursor.execute(f'DELETE FROM current_access WHERE scotia_id = ?{app_filter}', (scotia_id,) + app_params)
+        cursor.execute(f'''
+            INSERT INTO current_access
+            (scotia_id, app_access_name, last_process, last_record_date, subunit, status, event_description)
+            SELECT scotia_id, app_access_name, process_access, record_date, subunit, status, event_description
+            FROM (
+                SELECT scotia_id, app_access_name, process_access, record_date, subunit, status, event_description,
+                       ROW_NUMBER() OVER (PARTITION BY app_access_name ORDER BY record_date DESC, id DESC) AS rn
+                FROM historico
+                WHERE scotia_id = ?
+                  AND status_norm = '{self._CLOSED_COMPLETED}'
+                  AND process_access IN ({process_list})
+                  AND app_access_name IS NOT NULL{app_filter}
+            ) latest
+            WHERE rn = 1
+        ''', (scotia_id,) + app_params)
+
+    def refresh_current_access(self, scotia_id: str, app_names: Optional[List[str]] = None, conn=None) -> bool:
+        """
+        Recalcula current_access para un empleado. Llamar después de modificar
+        historico por fuera de este servicio (p. ej. ediciones desde la UI).
+        Si se pasa `conn` (unit_of_work), no hace commit ni cierra la conexión.
+        """
+        own_conn = conn is None
+        try:
+            if own_conn:
+                conn = self.get_connection()
+            self._refresh_current_access(conn.cursor(), scotia_id, app_names)
+            if own_conn:
+                conn.commit()
+                conn.close()
+            return True
+        except Exception as e:
+            logger.error("Error actualizando current_access de %s: %s", scotia_id, e)
+            if own_conn and conn is not None:
+                conn.rollback()
+                conn.close()
+            return False
+
+    def rebuild_current_access(self) -> Tuple[bool, str]:
+        """Reconstruye current_access completo desde historico (p. ej. tras una importación masiva)"""
+        process_list = ', '.join(f"'{process}'" for process in self._CURRENT_ACCESS_PROCESSES)
+        try:
+            with self.unit_of_work() as conn:
+                cursor = conn.cursor()
+                cursor.execute('DELETE FROM current_access')
+                cursor.execute(f'''
+                    INSERT INTO current_access
+                    (scotia_id, app_access_name, last_process, last_record_date, subunit, status, event_description)
+                    SELECT scotia_id, app_access_name, process_access, record_date, subunit, status, event_description
+                    FROM (
+                        SELECT scotia_id, app_access_name, process_access, record_date, subunit, status, event_description,
+                               ROW_NUMBER() OVER (PARTITION BY scotia_id, app_access_name
+                                                  ORDER BY record_date DESC, id DESC) AS rn
+                        FROM historico
+                        WHERE status_norm = '{self._CLOSED_COMPLETED}'
+                          AND process_access IN ({process_list})
+                          AND app_access_name IS NOT NULL
+                    ) latest
+                    WHERE rn = 1
+                ''')
+                total = cursor.rowcount
+            return True, f"current_access reconstruida ({total} filas)"
+        except Exception as e:
+            return False, f"Error reconstruyendo current_access: {str(e)}"
+
     def get_employee_history(self, scotia_id: str) -> List[Dict[str, Any]]:
         """Obtiene el historial de un empleado incluyendo metadatos de la app para comparación estricta.
         Evita duplicados usando subconsulta para obtener solo una app por logical_access_name.
@@ -882,7 +1196,7 @@ class AccessManagementService:
             return history
 
         except Exception as e:
-            print(f"Error obteniendo historial: {e}")
+            logger.error("Error obteniendo historial: %s", e)
             return []
 
     def get_employee_current_access(self, scotia_id: str) -> List[Dict[str, Any]]:
@@ -918,7 +1232,7 @@ class AccessManagementService:
             return current_access
 
         except Exception as e:
-            print(f"Error obteniendo accesos actuales del empleado: {e}")
+            logger.error("Error obteniendo accesos actuales del empleado: %s", e)
             return []
 
     def get_employee_current_position_access(self, scotia_id: str) -> List[Dict[str, Any]]:
@@ -927,256 +1241,211 @@ class AccessManagementService:
             conn = self.get_connection()
             cursor = conn.cursor()
 
-            # Primero obtener la posición actual del empleado
+            # Posición, unidad y unidad_subunidad actuales del empleado en una sola consulta
             cursor.execute('''
-                SELECT unit, position FROM headcount 
+                SELECT unit, position, unidad_subunidad FROM headcount 
                 WHERE scotia_id = ? AND activo = 1
             ''', (scotia_id,))
             
             emp_data = cursor.fetchone()
             has_headcount = bool(emp_data)
-            current_unit, current_position = (emp_data if has_headcount else (None, None))
+            current_unit, current_position, unidad_subunidad = (emp_data if has_headcount else (None, None, None))
             if has_headcount:
-                print(f"DEBUG: Accesos actuales - Posición actual: {current_position} en unidad: {current_unit}")
-                print(f"DEBUG: Onboarding: mostrar todos cuyo último proceso fue onboarding (sin filtrar por unidad/posición)")
-                print(f"DEBUG: Lateral Movement: solo los que coinciden con posición actual")
+                logger.debug("Accesos actuales - Posición actual: %s en unidad: %s (unidad_subunidad: %s)",
+                             current_position, current_unit, unidad_subunidad)
             else:
-                print("DEBUG: SID sin registro activo en headcount - usando modo fallback solo con historico")
-                print(f"DEBUG: Onboarding: mostrar todos cuyo último proceso fue onboarding")
-                print(f"DEBUG: Lateral Movement: mostrar todos cuyo último proceso fue lateral_movement")
+                logger.debug("SID sin registro activo en headcount - usando modo fallback solo con historico")
 
-            # Obtener la posición temporal específica de Flex Staff más reciente
-            cursor.execute('''
-                SELECT TOP 1 event_description
-                FROM historico 
-                WHERE scotia_id = ? 
-                AND process_access = 'flex_staff' 
-                AND status = 'closed completed'
-                ORDER BY record_date DESC
-            ''', (scotia_id,))
-            
-            flex_staff_desc = cursor.fetchone()
-            flex_staff_position = None
-            if flex_staff_desc:
-                # Extraer la posición temporal de la descripción: "(flex staff - POSICIÓN)"
-                import re
-                match = re.search(r'\(flex staff - ([^)]+)\)', flex_staff_desc[0])
-                if match:
-                    flex_staff_position = match.group(1).strip()
-                    print(f"DEBUG: Posición temporal de Flex Staff encontrada: {flex_staff_position}")
-            
-            # Construir el filtro para Flex Staff
-            flex_staff_filter = f'%flex staff - {flex_staff_position}%' if flex_staff_position else '%flex staff%'
+            if self.diagnostics_enabled:
+                self._log_current_access_diagnostics(cursor, scotia_id)
 
-            # Primero verificar qué registros hay en el historial para este empleado
-            cursor.execute('''
-                SELECT COUNT(*), process_access, status
-                FROM historico
-                WHERE scotia_id = ?
-                GROUP BY process_access, status
-            ''', (scotia_id,))
-            debug_counts = cursor.fetchall()
-            print(f"DEBUG: Registros en historial por tipo y status:")
-            total_registros = 0
-            for count, proc, stat in debug_counts:
-                print(f"  {proc} - {stat}: {count}")
-                total_registros += count
-            print(f"DEBUG: Total de registros en historial: {total_registros}")
-            
-            # Verificar específicamente registros 'closed completed'
-            cursor.execute('''
-                SELECT COUNT(*), process_access
-                FROM historico
-                WHERE scotia_id = ?
-                AND status = 'closed completed'
-                AND process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access', 'offboarding')
-                GROUP BY process_access
-            ''', (scotia_id,))
-            completed_counts = cursor.fetchall()
-            print(f"DEBUG: Registros 'closed completed' disponibles:")
-            for count, proc in completed_counts:
-                print(f"  {proc}: {count}")
-            
-            # Verificar cuántos accesos tienen offboarding como último proceso
+            # Último proceso 'closed completed' por aplicación desde la proyección current_access
+            # IMPORTANTE: Excluir accesos cuyo último proceso sea 'offboarding' (ya fueron removidos)
             cursor.execute('''
-                WITH AllProcessesByApp AS (
-                    SELECT 
-                        app_access_name,
-                        process_access as last_process,
-                        MAX(record_date) as last_record_date
-                    FROM historico
-                    WHERE scotia_id = ?
-                    AND status = 'closed completed'
-                    AND process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access', 'offboarding')
-                    AND app_access_name IS NOT NULL
-                    GROUP BY app_access_name, process_access
-                ),
-                LastProcessByApp AS (
-                    SELECT 
-                        app_access_name,
-                        last_process,
-                        ROW_NUMBER() OVER (PARTITION BY app_access_name ORDER BY last_record_date DESC) as rn
-                    FROM AllProcessesByApp
-                )
-                SELECT COUNT(*) 
-                FROM LastProcessByApp 
-                WHERE rn = 1 AND last_process = 'offboarding'
+                SELECT ca.scotia_id, ca.subunit, ca.app_access_name, ca.last_record_date, ca.status,
+                       ca.last_process, ca.event_description,
+                       a.unidad_subunidad, a.position_role, a.role_name, a.description
+                FROM current_access ca
+                LEFT JOIN applications a ON a.logical_access_name = ca.app_access_name
+                WHERE ca.scotia_id = ?
+                AND ca.last_process <> 'offboarding'
             ''', (scotia_id,))
-            offboarding_count = cursor.fetchone()[0]
-            print(f"DEBUG: Accesos excluidos por tener offboarding como último proceso: {offboarding_count}")
-
-            # Obtener unidad_subunidad del headcount si existe
-            unidad_subunidad = None
-            if has_headcount:
-                cursor.execute('''
-                    SELECT unidad_subunidad FROM headcount 
-                    WHERE scotia_id = ? AND activo = 1
-                ''', (scotia_id,))
-                unidad_result = cursor.fetchone()
-                unidad_subunidad = unidad_result[0] if unidad_result else None
-                print(f"DEBUG: unidad_subunidad del headcount: {unidad_subunidad}")
-
-            # Obtener todos los tipos de accesos actuales
-            # IMPORTANTE: Excluir accesos cuyo último proceso sea 'offboarding' (ya fueron removidos)
-            query = '''
-                WITH AllProcessesByApp AS (
-                    -- Para cada aplicación, obtener todos los procesos con sus fechas máximas
-                    SELECT 
-                        app_access_name,
-                        process_access as last_process,
-                        MAX(record_date) as last_record_date
-                    FROM historico
-                    WHERE scotia_id = ?
-                    AND status = 'closed completed'
-                    AND process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access', 'offboarding')
-                    AND app_access_name IS NOT NULL
-                    GROUP BY app_access_name, process_access
-                ),
-                LastProcessByApp AS (
-                    -- Para cada aplicación, obtener solo el proceso más reciente (último en el tiempo)
-                    SELECT 
-                        app_access_name,
-                        last_process,
-                        last_record_date,
-                        ROW_NUMBER() OVER (PARTITION BY app_access_name ORDER BY last_record_date DESC) as rn
-                    FROM AllProcessesByApp
-                )
-                SELECT 
-                    h.scotia_id,
-                    h.subunit as unit,
-                    h.subunit,
-                    h.app_access_name as logical_access_name,
-                    MAX(h.record_date) as record_date,
-                    h.status,
-                    h.process_access,
-                    MAX(h.event_description) as event_description,
-                    CASE 
-                        WHEN h.process_access = 'flex_staff' THEN 
-                            SUBSTRING(MAX(h.event_description), CHARINDEX('flex staff - ', MAX(h.event_description)) + 13, 
-                                     CHARINDEX(')', MAX(h.event_description), CHARINDEX('flex staff - ', MAX(h.event_description))) - CHARINDEX('flex staff - ', MAX(h.event_description)) - 13)
-                        WHEN h.process_access = 'manual_access' THEN 
-                            COALESCE(MAX(a.position_role), 'Manual')
-                        ELSE MAX(a.position_role)
-                    END as position_role,
-                    MAX(a.role_name) as role_name,
-                    MAX(a.description) as description,
-                    CASE 
-                        WHEN h.process_access = 'manual_access' THEN 'Manual'
-                        WHEN h.process_access = 'flex_staff' THEN 'Flex Staff'
-                        WHEN h.process_access IN ('onboarding', 'lateral_movement') THEN 'Aplicación'
-                        ELSE 'Otro'
-                    END as access_type
-                FROM historico h
-                LEFT JOIN applications a ON h.app_access_name = a.logical_access_name
-                INNER JOIN LastProcessByApp lp ON h.app_access_name = lp.app_access_name AND lp.rn = 1
-                WHERE h.scotia_id = ?
-                AND h.status = 'closed completed'
-                AND h.process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access')
-                AND h.app_access_name IS NOT NULL
-                -- EXCLUIR accesos cuyo último proceso sea 'offboarding' (ya fueron removidos)
-                AND lp.last_process != 'offboarding'
-                AND (
-                    -- Mostrar onboarding si fue el último proceso (sin filtrar por unidad/posición)
-                    (lp.last_process = 'onboarding' AND h.process_access = 'onboarding')
-                    OR
-                    -- Mostrar lateral_movement si fue el último proceso
-                    -- Y si hay headcount, verificar que coincida con posición actual
-                    (lp.last_process = 'lateral_movement' AND h.process_access = 'lateral_movement'
-                     {lateral_condition})
-                    OR
-                    -- Mostrar manual_access siempre (si fue el último proceso)
-                    (lp.last_process = 'manual_access' AND h.process_access = 'manual_access')
-                    OR
-                    -- Mostrar flex_staff con el filtro de posición temporal (si fue el último proceso)
-                    (lp.last_process = 'flex_staff' AND h.process_access = 'flex_staff' 
-                     AND h.event_description LIKE ?)
-                )
-                GROUP BY h.scotia_id, h.subunit, h.app_access_name, h.status, h.process_access
-                ORDER BY h.process_access, MAX(h.record_date) DESC
-            '''
+            rows = cursor.fetchall()
+            conn.close()
 
-            # Construir la condición para lateral_movement
             # Para lateral_movement, si hay headcount, solo mostrar si coincide con unidad_subunidad y posición
             # Para onboarding, mostrar todos sin restricciones
-            if has_headcount and unidad_subunidad:
-                # Si hay headcount, filtrar lateral_movement por unidad_subunidad y posición
-                # Pero solo si la aplicación tiene estos campos definidos
-                lateral_condition = "AND (a.unidad_subunidad = ? AND a.position_role = ?)"
-                params = (scotia_id, scotia_id, unidad_subunidad, current_position, flex_staff_filter)
-                print(f"DEBUG: Usando filtro lateral_movement con unidad_subunidad={unidad_subunidad}, position={current_position}")
-            else:
-                # Sin headcount o sin unidad_subunidad: mostrar todos los lateral_movement también
-                lateral_condition = ""
-                params = (scotia_id, scotia_id, flex_staff_filter)
-                print(f"DEBUG: Sin filtro lateral_movement (no hay headcount o unidad_subunidad)")
-            
-            query = query.format(lateral_condition=lateral_condition)
-            print(f"DEBUG: Ejecutando consulta con {len(params)} parámetros")
-            print(f"DEBUG: Parámetros: scotia_id (2 veces)={scotia_id}, unidad_subunidad={unidad_subunidad if has_headcount else 'N/A'}, position={current_position if has_headcount else 'N/A'}, flex_staff_filter={flex_staff_filter}")
-            try:
-                cursor.execute(query, params)
-            except Exception as query_error:
-                print(f"ERROR en consulta SQL: {query_error}")
-                print(f"Query: {query}")
-                print(f"Params: {params}")
-                raise
-
-            rows = cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-            current_access = [dict(zip(columns, row)) for row in rows]
+            lateral_filter = (unidad_subunidad, current_position) if has_headcount and unidad_subunidad else None
+            current_access = self._build_current_position_access(rows, lateral_filter)
             
-            print(f"DEBUG: Accesos encontrados: {len(current_access)}")
-            for acceso in current_access:
-                print(f"DEBUG: - {acceso.get('logical_access_name', '')} | {acceso.get('process_access', '')} | {acceso.get('position_role', '')} | {acceso.get('access_type', '')}")
-                
-            # Debug específico para accesos manuales
-            manual_accesses = [a for a in current_access if a.get('process_access') == 'manual_access']
-            print(f"DEBUG: Accesos manuales encontrados: {len(manual_accesses)}")
-            for manual in manual_accesses:
-                print(f"DEBUG: Manual - {manual.get('logical_access_name', '')} | Status: {manual.get('status', '')}")
+            logger.debug("Accesos encontrados: %s", len(current_access))
+            if self.diagnostics_enabled:
+                for acceso in current_access:
+                    logger.info("- %s | %s | %s | %s", acceso.get('logical_access_name', ''), acceso.get('process_access', ''), acceso.get('position_role', ''), acceso.get('access_type', ''))
+                    
+                # Debug específico para accesos manuales
+                manual_accesses = [a for a in current_access if a.get('process_access') == 'manual_access']
+                logger.info("Accesos manuales encontrados: %s", len(manual_accesses))
+                for manual in manual_accesses:
+                    logger.info("Manual - %s | Status: %s", manual.get('logical_access_name', ''), manual.get('status', ''))
 
-            conn.close()
             return current_access
 
         except Exception as e:
-            print(f"Error obteniendo accesos actuales del empleado: {e}")
+            logger.error("Error obteniendo accesos actuales del empleado: %s", e)
             return []
 
+    # Consultas de diagnóstico adicionales (conteos del historial); desactivadas por defecto
+    diagnostics_enabled = False
+
+    @classmethod
+    def set_diagnostics_mode(cls, enabled: bool):
+        """Activa o desactiva las consultas de diagnóstico del servicio"""
+        cls.diagnostics_enabled = bool(enabled)
+
+    def _log_current_access_diagnostics(self, cursor, scotia_id: str):
+        """Registra (nivel INFO) conteos del historial de un empleado para depurar sus accesos actuales"""
+        # Registros en el historial por tipo y status
+        cursor.execute('''
+            SELECT COUNT(*), process_access, status
+            FROM historico
+            WHERE scotia_id = ?
+            GROUP BY process_access, status
+        ''', (scotia_id,))
+        debug_counts = cursor.fetchall()
+        logger.info("Registros en historial por tipo y status:")
+        total_registros = 0
+        for count, proc, stat in debug_counts:
+            logger.info("  %s - %s: %s", proc, stat, count)
+            total_registros += count
+        logger.info("Total de registros en historial: %s", total_registros)
+        
+        # Registros 'closed completed'
+        cursor.execute('''
+            SELECT COUNT(*), process_access
+            FROM historico
+            WHERE scotia_id = ?
+            AND status = 'closed completed'
+            AND process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access', 'offboarding')
+            GROUP BY process_access
+        ''', (scotia_id,))
+        completed_counts = cursor.fetchall()
+        logger.info("Registros 'closed completed' disponibles:")
+        for count, proc in completed_counts:
+            logger.info("  %s: %s", proc, count)
+        
+        # Accesos con offboarding como último proceso
+        cursor.execute('''
+            SELECT COUNT(*) FROM current_access
+            WHERE scotia_id = ? AND last_process = 'offboarding'
+        ''', (scotia_id,))
+        offboarding_count = cursor.fetchone()[0]
+        logger.info("Accesos excluidos por tener offboarding como último proceso: %s", offboarding_count)
+
+    @classmethod
+    def _build_current_position_access(cls, rows: List[Tuple],
+                                       lateral_filter: Optional[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Arma los accesos actuales a partir de filas de current_access unidas con applications.
+
+        Args:
+            rows: (scotia_id, subunit, app_access_name, last_record_date, status, last_process,
+                   event_description, a.unidad_subunidad, a.position_role, a.role_name, a.description)
+            lateral_filter: (unidad_subunidad, position) del empleado para filtrar lateral_movement,
+                            o None para no filtrar
+        """
+        by_app: Dict[str, Dict[str, Any]] = {}
+        for (sid, subunit, app_name, record_date, status, process, event_description,
+             app_unidad, app_position, app_role, app_description) in rows:
+            entry = by_app.setdefault(app_name, {
+                'scotia_id': sid, 'subunit': subunit, 'record_date': record_date, 'status': status,
+                'process_access': process, 'event_description': event_description or '', 'apps': []
+            })
+            entry['apps'].append((app_unidad, app_position, app_role, app_description))
+
+        # Posición temporal de Flex Staff más reciente: "(flex staff - POSICIÓN)"
+        flex_staff_position = None
+        flex_entries = [e for e in by_app.values() if e['process_access'] == 'flex_staff']
+        if flex_entries:
+            latest_flex = max(flex_entries, key=lambda e: str(e['record_date'] or ''))
+            match = re.search(r'\(flex staff - ([^)]+)\)', latest_flex['event_description'])
+            if match:
+                flex_staff_position = match.group(1).strip()
+                logger.debug("Posición temporal de Flex Staff encontrada: %s", flex_staff_position)
+        flex_staff_marker = (f'flex staff - {flex_staff_position}' if flex_staff_position else 'flex staff').lower()
+
+        current_access = []
+        for app_name, entry in by_app.items():
+            process = entry['process_access']
+            apps = entry['apps']
+
+            if process == 'lateral_movement' and lateral_filter:
+                unidad_norm, position_norm = cls._norm(lateral_filter[0]), cls._norm(lateral_filter[1])
+                apps = [a for a in apps if cls._norm(a[0]) == unidad_norm and cls._norm(a[1]) == position_norm]
+                if not apps:
+                    continue
+            elif process == 'flex_staff' and flex_staff_marker not in entry['event_description'].lower():
+                continue
+
+            positions = [a[1] for a in apps if a[1] is not None]
+            roles = [a[2] for a in apps if a[2] is not None]
+            descriptions = [a[3] for a in apps if a[3] is not None]
+
+            if process == 'flex_staff':
+                match = re.search(r'flex staff - ([^)]*)\)', entry['event_description'])
+                position_role = match.group(1) if match else None
+            elif process == 'manual_access':
+                position_role = max(positions) if positions else 'Manual'
+            else:
+                position_role = max(positions) if positions else None
+
+            current_access.append({
+                'scotia_id': entry['scotia_id'],
+                'unit': entry['subunit'],
+                'subunit': entry['subunit'],
+                'logical_access_name': app_name,
+                'record_date': entry['record_date'],
+                'status': entry['status'],
+                'process_access': process,
+                'event_description': entry['event_description'],
+                'position_role': position_role,
+                'role_name': max(roles) if roles else None,
+                'description': max(descriptions) if descriptions else None,
+                'access_type': cls._CURRENT_ACCESS_TYPES.get(process, 'Otro')
+            })
+
+        # Mismo orden que antes: por proceso y, dentro de cada uno, del más reciente al más antiguo
+        current_access.sort(key=lambda a: str(a['record_date'] or ''), reverse=True)
+        current_access.sort(key=lambda a: a['process_access'])
+        return current_access
+
+    _CURRENT_ACCESS_TYPES = {
+        'manual_access': 'Manual',
+        'flex_staff': 'Flex Staff',
+        'onboarding': 'Aplicación',
+        'lateral_movement': 'Aplicación',
+    }
+
     # ==============================
     # MÉTODOS DE LÓGICA DE NEGOCIO
     # ==============================
 
-    def update_employee_status(self, scotia_id: str, active: bool) -> Tuple[bool, str]:
-        """Actualiza el estado activo/inactivo de un empleado"""
+    def update_employee_status(self, scotia_id: str, active: bool, conn=None) -> Tuple[bool, str]:
+        """Actualiza el estado activo/inactivo de un empleado.
+        Si se pasa `conn` (unit_of_work), no hace commit ni cierra la conexión.
+        """
+        own_conn = conn is None
         try:
-            conn = self.get_connection()
+            if own_conn:
+                conn = self.get_connection()
             cursor = conn.cursor()
             
             # Verificar que el empleado existe
             cursor.execute('SELECT COUNT(*) FROM headcount WHERE scotia_id = ?', (scotia_id,))
             result = cursor.fetchone()
             if not result or result[0] == 0:
-                conn.close()
+                if own_conn:
+                    conn.close()
                 return False, f"Empleado {scotia_id} no encontrado"
             
             # Actualizar estado
@@ -1195,8 +1464,10 @@ class AccessManagementService:
                 ''', (datetime.now().isoformat(), scotia_id))
                 status_text = "inactivo"
             
-            conn.commit()
-            conn.close()
+            if own_conn:
+                conn.commit()
+                conn.close()
+                notify_table_changed('headcount')
             
             return True, f"Estado del empleado {scotia_id} cambiado a {status_text}"
             
@@ -1217,77 +1488,75 @@ class AccessManagementService:
             if not employee:
                 return False, f"Empleado {scotia_id} no encontrado", []
 
-            # 2. Actualizar estado del empleado a activo
-            success, message = self.update_employee_status(scotia_id, True)
-            if success:
-                print(f"✅ {message}")
-            else:
-                print(f"⚠️ {message}")
-
-            # 3. Usar el valor de unidad_subunidad del formulario para filtrar
-            # Este valor viene del campo "Nueva Unidad/Subunidad" del formulario
-            unidad_subunidad = unit  # Usar directamente el valor del formulario
-            
-            # 4. Actualizar posición, unidad y unidad_subunidad del empleado si están vacías
-            current_position = self._safe_strip(employee.get('position'), '')
-            current_unit = self._safe_strip(employee.get('unit'), '')
-            current_unidad_subunidad = self._safe_strip(employee.get('unidad_subunidad'), '')
-            
-            if not current_position or not current_unit or not current_unidad_subunidad:
-                conn = self.get_connection()
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE headcount 
-                    SET position = ?, unit = ?, unidad_subunidad = ?
-                    WHERE scotia_id = ?
-                ''', (position, unit, unidad_subunidad, scotia_id))
-                conn.commit()
-                conn.close()
-                print(f"✅ Posición, unidad y unidad_subunidad actualizadas para {scotia_id}")
-                print(f"  - unidad_subunidad: '{unidad_subunidad}' (del formulario)")
-            else:
-                print(f"✅ Empleado ya tiene todos los campos poblados")
-                print(f"  - unidad_subunidad actual: '{current_unidad_subunidad}'")
-            
-            # 5. Obtener aplicaciones requeridas para la posición y unidad/subunidad
-            required_apps = self.get_applications_by_position(position, unidad_subunidad, subunit=subunit)
-            if not required_apps:
-                return False, f"No se encontraron aplicaciones para la posición '{position}'", []
+            # Todo el caso se ejecuta en una sola transacción: si algo falla, se revierte completo
+            with self.unit_of_work(changed_tables=('headcount',)) as conn:
+                # 2. Actualizar estado del empleado a activo
+                success, message = self.update_employee_status(scotia_id, True, conn=conn)
+                if success:
+                    logger.info("%s", message)
+                else:
+                    logger.warning("%s", message)
 
-            # 6. Crear registros históricos para cada aplicación (dedupe por tripleta normalizada)
-            case_id = f"CASE-{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{scotia_id}"
-            created_records = []
-            seen_triplets = set()
-
-            for app in required_apps:
-                unit_n = self._safe_strip(app.get('unit'), '').upper()
-                pos_n = self._safe_strip(app.get('position_role'), '').upper()
-                lan_n = self._safe_strip(app.get('logical_access_name'), '').upper()
-
-                tkey = (unit_n, pos_n, lan_n)
-                if tkey in seen_triplets:
-                    continue
-                seen_triplets.add(tkey)
-
-                record_data = {
-                    'scotia_id': scotia_id,
-                    'case_id': case_id,
-                    'responsible': responsible,
-                    'process_access': 'onboarding',
-                    'subunit': app.get('subunit') or '',  # ya no afecta dedupe
-                    'event_description': f"Otorgamiento de acceso para {app.get('logical_access_name')}",
-                    'ticket_email': app.get('path_email_url', ''),
-                    'app_access_name': app.get('logical_access_name'),
-                    'computer_system_type': 'Desktop',
-                    'status': 'Pendiente',
-                    'general_status_ticket': 'En Proceso'
-                }
+                # 3. Usar el valor de unidad_subunidad del formulario para filtrar
+                # Este valor viene del campo "Nueva Unidad/Subunidad" del formulario
+                unidad_subunidad = unit  # Usar directamente el valor del formulario
+                
+                # 4. Actualizar posición, unidad y unidad_subunidad del empleado si están vacías
+                current_position = self._safe_strip(employee.get('position'), '')
+                current_unit = self._safe_strip(employee.get('unit'), '')
+                current_unidad_subunidad = self._safe_strip(employee.get('unidad_subunidad'), '')
+                
+                if not current_position or not current_unit or not current_unidad_subunidad:
+                    cursor = conn.cursor()
+                    cursor.execute('''
+                        UPDATE headcount 
+                        SET position = ?, unit = ?, unidad_subunidad = ?
+                        WHERE scotia_id = ?
+                    ''', (position, unit, unidad_subunidad, scotia_id))
+                    logger.info("Posición, unidad y unidad_subunidad actualizadas para %s (unidad_subunidad del formulario: '%s')",
+                                scotia_id, unidad_subunidad)
+                else:
+                    logger.debug("Empleado ya tiene todos los campos poblados (unidad_subunidad actual: '%s')",
+                                 current_unidad_subunidad)
+                
+                # 5. Obtener aplicaciones requeridas para la posición y unidad/subunidad
+                required_apps = self.get_applications_by_position(position, unidad_subunidad, subunit=subunit)
+                if not required_apps:
+                    return False, f"No se encontraron aplicaciones para la posición '{position}'", []
+
+                # 6. Crear registros históricos para cada aplicación (dedupe por tripleta normalizada)
+                case_id = f"CASE-{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{scotia_id}"
+                created_records = []
+                seen_triplets = set()
+
+                for app in required_apps:
+                    unit_n = self._safe_strip(app.get('unit'), '').upper()
+                    pos_n = self._safe_strip(app.get('position_role'), '').upper()
+                    lan_n = self._safe_strip(app.get('logical_access_name'), '').upper()
+
+                    tkey = (unit_n, pos_n, lan_n)
+                    if tkey in seen_triplets:
+                        continue
+                    seen_triplets.add(tkey)
 
-                success, message = self.create_historical_record(record_data)
-                if success:
+                    record_data = {
+                        'scotia_id': scotia_id,
+                        'case_id': case_id,
+                        'responsible': responsible,
+                        'process_access': 'onboarding',
+                        'subunit': app.get('subunit') or '',  # ya no afecta dedupe
+                        'event_description': f"Otorgamiento de acceso para {app.get('logical_access_name')}",
+                        'ticket_email': app.get('path_email_url', ''),
+                        'app_access_name': app.get('logical_access_name'),
+                        'computer_system_type': 'Desktop',
+                        'status': 'Pendiente',
+                        'general_status_ticket': 'En Proceso'
+                    }
                     created_records.append(record_data)
-                else:
-                    print(f"Error creando registro para {app.get('logical_access_name')}: {message}")
+
+                success, message, _ = self.create_historical_records_bulk(created_records, conn=conn)
+                if not success:
+                    raise RuntimeError(message)
 
             return True, f"Onboarding procesado para {scotia_id}. {len(created_records)} accesos requeridos.", created_records
 
@@ -1304,109 +1573,106 @@ class AccessManagementService:
         - Tienen estado 'closed completed'
         - Son de tipos: onboarding, lateral_movement, flex_staff, manual_access
         - NO han sido ya revocados en un offboarding anterior
+        
+        La lectura, los registros de revocación y la baja del empleado se ejecutan
+        en una sola transacción (unit_of_work).
         """
         try:
             employee = self.get_employee_by_id(scotia_id)
             if not employee:
                 return False, f"Empleado {scotia_id} no encontrado", []
 
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Buscar directamente en la base de datos todos los accesos completados del empleado
-            # que NO hayan sido ya revocados en un offboarding anterior
-            cursor.execute('''
-                SELECT DISTINCT
-                    h.id,
-                    h.app_access_name,
-                    h.process_access,
-                    h.record_date,
-                    h.subunit,
-                    h.event_description
-                FROM historico h
-                WHERE h.scotia_id = ?
-                AND UPPER(LTRIM(RTRIM(h.status))) = 'CLOSED COMPLETED'
-                AND h.process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access')
-                AND h.app_access_name IS NOT NULL
-                AND NOT EXISTS (
-                    -- Verificar que no haya un offboarding completado posterior para este mismo acceso
-                    SELECT 1 
-                    FROM historico h2 
-                    WHERE h2.scotia_id = h.scotia_id
-                    AND h2.app_access_name = h.app_access_name
-                    AND h2.process_access = 'offboarding'
-                    AND UPPER(LTRIM(RTRIM(h2.status))) = 'CLOSED COMPLETED'
-                    AND h2.record_date >= h.record_date
-                )
-                ORDER BY h.record_date DESC
-            ''', (scotia_id,))
-            
-            rows = cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-            active_access = [dict(zip(columns, row)) for row in rows]
-            
-            conn.close()
-            
-            print(f"DEBUG: Accesos encontrados para revocar (solo 'closed completed' y no revocados previamente): {len(active_access)}")
-            for acc in active_access:
-                app_name = acc.get('app_access_name') or ''
-                print(f"DEBUG: Acceso a revocar: {app_name} - Tipo: {acc.get('process_access', 'N/A')}")
-
-            case_id = f"CASE-{datetime.now().strftime('%Y%m%d%H%M%S')}-{scotia_id}"
-            created_records = []
-            processed_access = []
-            for access in active_access:
-                app_name = self._safe_strip(access.get('app_access_name'), '')
-                if not app_name:
-                    continue  # Saltar si no hay nombre de aplicación
+            with self.unit_of_work(changed_tables=('headcount',)) as conn:
+                cursor = conn.cursor()
                 
-                access_type = self._safe_strip(access.get('process_access'), '')
+                # Buscar directamente en la base de datos todos los accesos completados del empleado
+                # que NO hayan sido ya revocados en un offboarding anterior
+                cursor.execute('''
+                    SELECT DISTINCT
+                        h.id,
+                        h.app_access_name,
+                        h.process_access,
+                        h.record_date,
+                        h.subunit,
+                        h.event_description
+                    FROM historico h
+                    WHERE h.scotia_id = ?
+                    AND h.status_norm = 'CLOSED COMPLETED'
+                    AND h.process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access')
+                    AND h.app_access_name IS NOT NULL
+                    AND NOT EXISTS (
+                        -- Verificar que no haya un offboarding completado posterior para este mismo acceso
+                        SELECT 1 
+                        FROM historico h2 
+                        WHERE h2.scotia_id = h.scotia_id
+                        AND h2.app_access_name = h.app_access_name
+                        AND h2.process_access = 'offboarding'
+                        AND h2.status_norm = 'CLOSED COMPLETED'
+                        AND h2.record_date >= h.record_date
+                    )
+                    ORDER BY h.record_date DESC
+                ''', (scotia_id,))
                 
-                # Crear descripción específica según el tipo de acceso
-                if access_type == 'flex_staff':
-                    event_description = f"Revocación de acceso temporal (flex staff) para {app_name}"
-                elif access_type == 'manual_access':
-                    event_description = f"Revocación de acceso manual para {app_name}"
-                elif access_type in ('onboarding', 'lateral_movement'):
-                    event_description = f"Revocación de acceso de posición para {app_name}"
-                else:
-                    event_description = f"Revocación de acceso para {app_name}"
+                rows = cursor.fetchall()
+                columns = [description[0] for description in cursor.description]
+                active_access = [dict(zip(columns, row)) for row in rows]
                 
-                record_data = {
-                    'scotia_id': scotia_id,
-                    'case_id': case_id,
-                    'responsible': responsible,
-                    'process_access': 'offboarding',
-                    'subunit': 'out of the company',  # Subárea fija para offboarding
-                    'event_description': event_description,
-                    'ticket_email': f"{responsible}@empresa.com",
-                    'app_access_name': app_name,
-                    'computer_system_type': 'Desktop',
-                    'status': 'Pendiente',
-                    'general_status_ticket': 'En Proceso'
-                }
+                logger.debug("Accesos encontrados para revocar (solo 'closed completed' y no revocados previamente): %s", len(active_access))
+                if logger.isEnabledFor(logging.DEBUG):
+                    for acc in active_access:
+                        logger.debug("Acceso a revocar: %s - Tipo: %s", acc.get('app_access_name') or '', acc.get('process_access', 'N/A'))
+
+                case_id = f"CASE-{datetime.now().strftime('%Y%m%d%H%M%S')}-{scotia_id}"
+                created_records = []
+                processed_access = []
+                for access in active_access:
+                    app_name = self._safe_strip(access.get('app_access_name'), '')
+                    if not app_name:
+                        continue  # Saltar si no hay nombre de aplicación
+                    
+                    access_type = self._safe_strip(access.get('process_access'), '')
+                    
+                    # Crear descripción específica según el tipo de acceso
+                    if access_type == 'flex_staff':
+                        event_description = f"Revocación de acceso temporal (flex staff) para {app_name}"
+                    elif access_type == 'manual_access':
+                        event_description = f"Revocación de acceso manual para {app_name}"
+                    elif access_type in ('onboarding', 'lateral_movement'):
+                        event_description = f"Revocación de acceso de posición para {app_name}"
+                    else:
+                        event_description = f"Revocación de acceso para {app_name}"
+                    
+                    record_data = {
+                        'scotia_id': scotia_id,
+                        'case_id': case_id,
+                        'responsible': responsible,
+                        'process_access': 'offboarding',
+                        'subunit': 'out of the company',  # Subárea fija para offboarding
+                        'event_description': event_description,
+                        'ticket_email': f"{responsible}@empresa.com",
+                        'app_access_name': app_name,
+                        'computer_system_type': 'Desktop',
+                        'status': 'Pendiente',
+                        'general_status_ticket': 'En Proceso'
+                    }
 
-                success, message = self.create_historical_record(record_data)
-                if success:
                     created_records.append(record_data)
                     processed_access.append(access)
-                else:
-                    print(f"Error creando registro de offboarding para {app_name}: {message}")
 
-            # Marcar empleado como inactivo y registrar fecha de inactivación
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            inactivation_date = datetime.now().strftime('%Y-%m-%d')
-            cursor.execute('''
-                UPDATE headcount 
-                SET activo = 0, 
-                    inactivation_date = ?, 
-                    unit = 'out of the unit',
-                    unidad_subunidad = 'out of the unit'
-                WHERE scotia_id = ?
-            ''', (inactivation_date, scotia_id))
-            conn.commit()
-            conn.close()
+                success, message, _ = self.create_historical_records_bulk(created_records, conn=conn)
+                if not success:
+                    raise RuntimeError(f"Error creando registros de offboarding: {message}")
+
+                # Marcar empleado como inactivo y registrar fecha de inactivación
+                inactivation_date = datetime.now().strftime('%Y-%m-%d')
+                cursor.execute('''
+                    UPDATE headcount 
+                    SET activo = 0, 
+                        inactivation_date = ?, 
+                        unit = 'out of the unit',
+                        unidad_subunidad = 'out of the unit'
+                    WHERE scotia_id = ?
+                ''', (inactivation_date, scotia_id))
 
             # Crear mensaje detallado con conteo por tipo de acceso
             access_counts = {}
@@ -1442,231 +1708,219 @@ class AccessManagementService:
         - Evita duplicados comparando por logical_access_name y unidad
         """
         try:
-            print(f"DEBUG: Iniciando lateral movement para {scotia_id}")
-            print(f"DEBUG: Nueva posición: {new_position}")
-            print(f"DEBUG: Nueva unidad: {new_unit}")
-            print(f"DEBUG: Nueva subunidad: {new_subunit}")
+            logger.debug("Iniciando lateral movement para %s: posición=%s, unidad=%s, subunidad=%s",
+                         scotia_id, new_position, new_unit, new_subunit)
             
             employee = self.get_employee_by_id(scotia_id)
             if not employee:
-                print(f"DEBUG: Error - Empleado {scotia_id} no encontrado")
+                logger.warning("Lateral movement: empleado %s no encontrado", scotia_id)
                 return False, f"Empleado {scotia_id} no encontrado", []
 
             old_position = self._safe_strip(employee.get('position'), '')
             old_unit = self._safe_strip(employee.get('unit'), '')
             old_unidad_subunidad = self._safe_strip(employee.get('unidad_subunidad'), '')
             
-            print(f"DEBUG: Posición anterior: {old_position}")
-            print(f"DEBUG: Unidad anterior: {old_unit}")
-            print(f"DEBUG: Unidad/Subunidad anterior: {old_unidad_subunidad}")
+            logger.debug("Posición anterior: %s, unidad anterior: %s, unidad/subunidad anterior: %s",
+                         old_position, old_unit, old_unidad_subunidad)
 
             # Obtener accesos requeridos para la nueva posición (usando unidad_subunidad como el onboarding)
             new_unidad_subunidad = f"{new_unit}/{new_subunit}" if new_subunit else new_unit
-            print(f"DEBUG: Nueva unidad_subunidad: {new_unidad_subunidad}")
+            logger.debug("Nueva unidad_subunidad: %s", new_unidad_subunidad)
             new_mesh_apps = self.get_applications_by_position(new_position, new_unidad_subunidad, subunit=new_subunit)
-            print(f"DEBUG: Aplicaciones encontradas para nueva posición (estricto): {len(new_mesh_apps)}")
-            for app in new_mesh_apps:
-                print(f"DEBUG: App requerida (estricto): {app.get('logical_access_name', '')} - Unidad/Subunidad: {app.get('unidad_subunidad', '')}")
+            logger.debug("Aplicaciones encontradas para nueva posición (estricto): %s", len(new_mesh_apps))
+            if logger.isEnabledFor(logging.DEBUG):
+                for app in new_mesh_apps:
+                    logger.debug("App requerida (estricto): %s - Unidad/Subunidad: %s", app.get('logical_access_name', ''), app.get('unidad_subunidad', ''))
 
             # Fallback: si no se encontraron apps con la coincidencia exacta, usar la búsqueda flexible
             if not new_mesh_apps:
-                print("DEBUG: Sin resultados en búsqueda estricta. Usando get_applications_by_position_flexible como respaldo.")
+                logger.debug("Sin resultados en búsqueda estricta. Usando get_applications_by_position_flexible como respaldo.")
                 new_mesh_apps = self.get_applications_by_position_flexible(new_position, new_unidad_subunidad, subunit=new_subunit)
-                print(f"DEBUG: Aplicaciones encontradas para nueva posición (flexible): {len(new_mesh_apps)}")
-                for app in new_mesh_apps:
-                    print(f"DEBUG: App requerida (flexible): {app.get('logical_access_name', '')} - Unidad/Subunidad: {app.get('unidad_subunidad', '')}")
+                logger.debug("Aplicaciones encontradas para nueva posición (flexible): %s", len(new_mesh_apps))
+                if logger.isEnabledFor(logging.DEBUG):
+                    for app in new_mesh_apps:
+                        logger.debug("App requerida (flexible): %s - Unidad/Subunidad: %s", app.get('logical_access_name', ''), app.get('unidad_subunidad', ''))
             
             # Obtener accesos ACTUALES del empleado (no los de la malla anterior, sino los que realmente tiene)
             current_access = self.get_employee_current_position_access(scotia_id)
-            print(f"DEBUG: Accesos actuales del empleado: {len(current_access)}")
-            
-            # Crear índice de accesos actuales usando logical_access_name + unidad_subunidad + rol/posición
-            # Obtener unidad_subunidad y roles de todas las aplicaciones de una vez
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Obtener unidad_subunidad del headcount para usar como fallback
-            cursor.execute('SELECT unidad_subunidad FROM headcount WHERE scotia_id = ?', (scotia_id,))
-            hc_result = cursor.fetchone()
-            default_unidad_subunidad = self._safe_strip(hc_result[0] if hc_result else None, '').upper()
-            
-            # Obtener unidad_subunidad y roles de todas las aplicaciones actuales de una vez
-            app_names = [self._safe_strip(acc.get('logical_access_name'), '').upper() for acc in current_access if acc.get('logical_access_name')]
-            app_unidad_subunidad_map = {}
-            app_role_map = {}
-            
-            if app_names:
-                placeholders = ','.join(['?'] * len(app_names))
-                cursor.execute(f'''
-                    SELECT DISTINCT a.logical_access_name, a.unidad_subunidad, a.role_name, a.position_role
-                    FROM applications a
-                    WHERE a.logical_access_name IN ({placeholders})
-                ''', tuple(app_names))
-                for row in cursor.fetchall():
-                    name_key = self._safe_strip(row[0], '').upper()
-                    app_unidad_subunidad_map[name_key] = self._safe_strip(row[1], '').upper()
-                    app_role_map[name_key] = {
-                        'role_name': self._safe_strip(row[2], ''),
-                        'position_role': self._safe_strip(row[3], '')
-                    }
-            
-            conn.close()
+            logger.debug("Accesos actuales del empleado: %s", len(current_access))
             
-            current_access_by_key = {}
-            for acc in current_access:
-                app_name = self._safe_strip(acc.get('logical_access_name'), '').upper()
-                if app_name:
-                    # Usar unidad_subunidad de la aplicación si está disponible, sino usar la del headcount
-                    app_unidad_subunidad = app_unidad_subunidad_map.get(app_name, default_unidad_subunidad)
-                    roles = app_role_map.get(app_name, {})
-                    role_name = self._safe_strip(roles.get('role_name') or acc.get('role_name'), '')
-                    position_role = self._safe_strip(roles.get('position_role') or acc.get('position_role'), '')
-                    
-                    key = f"{app_name}|||{app_unidad_subunidad}|||{role_name.upper()}|||{position_role.upper()}"
-                    current_access_by_key[key] = {
-                        'logical_access_name': app_name,
-                        'unidad_subunidad': app_unidad_subunidad,
-                        'role_name': role_name,
-                        'position_role': position_role,
-                        'process_access': acc.get('process_access', ''),
-                        'status': acc.get('status', '')
-                    }
-            
-            print(f"DEBUG: Accesos actuales indexados: {len(current_access_by_key)}")
-            for key, acc in current_access_by_key.items():
-                print(f"DEBUG: Acceso actual: {acc.get('logical_access_name', '')} - {acc.get('unidad_subunidad', '')}")
-            
-            # Crear índice de accesos requeridos para la nueva posición (incluyendo rol/posición)
-            new_apps_by_key = {}
-            for app in new_mesh_apps:
-                app_name = self._safe_strip(app.get('logical_access_name'), '').upper()
-                app_unidad_subunidad = self._safe_strip(app.get('unidad_subunidad'), '').upper()
-                role_name = self._safe_strip(app.get('role_name'), '')
-                position_role = self._safe_strip(app.get('position_role'), '')
-                key = f"{app_name}|||{app_unidad_subunidad}|||{role_name.upper()}|||{position_role.upper()}"
-                if app_name:  # Solo agregar si tiene nombre
-                    new_apps_by_key[key] = app
-            
-            print(f"DEBUG: Accesos requeridos para nueva posición: {len(new_apps_by_key)}")
-            for key, app in new_apps_by_key.items():
-                print(f"DEBUG: Acceso requerido: {app.get('logical_access_name', '')} - {app.get('unidad_subunidad', '')}")
-            
-            # Calcular qué revocar y qué otorgar
-            to_revoke = []
-            to_grant = []
-            maintained = []
-            
-            # REVOCAR: accesos actuales que NO están en los requeridos de la nueva posición
-            # Solo si están en estado 'closed completed'
-            for key, current_acc in current_access_by_key.items():
-                if key not in new_apps_by_key:
-                    # Este acceso actual no es necesario en la nueva posición, revocarlo
-                    # Pero solo si está en 'closed completed'
-                    if self._safe_strip(current_acc.get('status'), '').lower() == 'closed completed':
-                        # Buscar la app completa en applications para obtener todos los datos
-                        conn = self.get_connection()
-                        cursor = conn.cursor()
-                        cursor.execute('''
-                            SELECT logical_access_name, unidad_subunidad, subunit, path_email_url
-                            FROM applications
-                            WHERE logical_access_name = ?
-                        ''', (current_acc.get('logical_access_name', ''),))
-                        app_data = cursor.fetchone()
-                        conn.close()
+            # Lecturas de apoyo, registros de revocación/otorgamiento y cambio de posición
+            # se ejecutan en una sola transacción (unit_of_work)
+            with self.unit_of_work(changed_tables=('headcount',)) as conn:
+                # Crear índice de accesos actuales usando logical_access_name + unidad_subunidad + rol/posición
+                # Obtener unidad_subunidad y roles de todas las aplicaciones de una vez
+                cursor = conn.cursor()
+                
+                # Obtener unidad_subunidad del headcount para usar como fallback
+                cursor.execute('SELECT unidad_subunidad FROM headcount WHERE scotia_id = ?', (scotia_id,))
+                hc_result = cursor.fetchone()
+                default_unidad_subunidad = self._safe_strip(hc_result[0] if hc_result else None, '').upper()
+                
+                # Obtener unidad_subunidad y roles de todas las aplicaciones actuales de una vez
+                app_names = [self._safe_strip(acc.get('logical_access_name'), '').upper() for acc in current_access if acc.get('logical_access_name')]
+                app_unidad_subunidad_map = {}
+                app_role_map = {}
+                
+                if app_names:
+                    placeholders = ','.join(['?'] * len(app_names))
+                    cursor.execute(f'''
+                        SELECT DISTINCT a.logical_access_name, a.unidad_subunidad, a.role_name, a.position_role
+                        FROM applications a
+                        WHERE a.logical_access_name IN ({placeholders})
+                    ''', tuple(app_names))
+                    for row in cursor.fetchall():
+                        name_key = self._safe_strip(row[0], '').upper()
+                        app_unidad_subunidad_map[name_key] = self._safe_strip(row[1], '').upper()
+                        app_role_map[name_key] = {
+                            'role_name': self._safe_strip(row[2], ''),
+                            'position_role': self._safe_strip(row[3], '')
+                        }
+                
+                current_access_by_key = {}
+                for acc in current_access:
+                    app_name = self._safe_strip(acc.get('logical_access_name'), '').upper()
+                    if app_name:
+                        # Usar unidad_subunidad de la aplicación si está disponible, sino usar la del headcount
+                        app_unidad_subunidad = app_unidad_subunidad_map.get(app_name, default_unidad_subunidad)
+                        roles = app_role_map.get(app_name, {})
+                        role_name = self._safe_strip(roles.get('role_name') or acc.get('role_name'), '')
+                        position_role = self._safe_strip(roles.get('position_role') or acc.get('position_role'), '')
                         
-                        if app_data:
-                            app_dict = {
-                                'logical_access_name': app_data[0],
-                                'unidad_subunidad': app_data[1] or current_acc.get('unidad_subunidad', ''),
-                                'subunit': app_data[2] or '',
-                                'path_email_url': app_data[3] or ''
-                            }
-                            to_revoke.append(app_dict)
-                            print(f"DEBUG: Marcado para revocar (no necesario en nueva posición): {app_dict.get('logical_access_name', '')} - {app_dict.get('unidad_subunidad', '')}")
-                        else:
-                            # Si no está en applications, crear un dict básico
-                            app_dict = {
-                                'logical_access_name': current_acc.get('logical_access_name', ''),
-                                'unidad_subunidad': current_acc.get('unidad_subunidad', ''),
-                                'subunit': '',
-                                'path_email_url': ''
-                            }
-                            to_revoke.append(app_dict)
-                            print(f"DEBUG: Marcado para revocar (no está en applications): {app_dict.get('logical_access_name', '')}")
-                else:
-                    # Este acceso ya lo tiene y también lo necesita en la nueva posición, mantenerlo
-                    maintained.append(current_acc)
-                    print(f"DEBUG: Acceso mantenido (ya lo tiene y lo necesita): {current_acc.get('logical_access_name', '')} - {current_acc.get('unidad_subunidad', '')}")
-            
-            # OTORGAR: accesos requeridos de la nueva posición que NO tiene actualmente
-            for key, app in new_apps_by_key.items():
-                if key not in current_access_by_key:
-                    to_grant.append(app)
-                    print(f"DEBUG: Marcado para otorgar (no lo tiene actualmente): {app.get('logical_access_name', '')} - {app.get('unidad_subunidad', '')}")
-                else:
-                    print(f"DEBUG: Acceso ya existe (no se otorga): {app.get('logical_access_name', '')} - {app.get('unidad_subunidad', '')}")
-            
-            print(f"DEBUG: Resumen - Mantener: {len(maintained)}, Revocar: {len(to_revoke)}, Otorgar: {len(to_grant)}")
+                        key = f"{app_name}|||{app_unidad_subunidad}|||{role_name.upper()}|||{position_role.upper()}"
+                        current_access_by_key[key] = {
+                            'logical_access_name': app_name,
+                            'unidad_subunidad': app_unidad_subunidad,
+                            'role_name': role_name,
+                            'position_role': position_role,
+                            'process_access': acc.get('process_access', ''),
+                            'status': acc.get('status', '')
+                        }
+                
+                logger.debug("Accesos actuales indexados: %s", len(current_access_by_key))
+                if logger.isEnabledFor(logging.DEBUG):
+                    for acc in current_access_by_key.values():
+                        logger.debug("Acceso actual: %s - %s", acc.get('logical_access_name', ''), acc.get('unidad_subunidad', ''))
+                
+                # Crear índice de accesos requeridos para la nueva posición (incluyendo rol/posición)
+                new_apps_by_key = {}
+                for app in new_mesh_apps:
+                    app_name = self._safe_strip(app.get('logical_access_name'), '').upper()
+                    app_unidad_subunidad = self._safe_strip(app.get('unidad_subunidad'), '').upper()
+                    role_name = self._safe_strip(app.get('role_name'), '')
+                    position_role = self._safe_strip(app.get('position_role'), '')
+                    key = f"{app_name}|||{app_unidad_subunidad}|||{role_name.upper()}|||{position_role.upper()}"
+                    if app_name:  # Solo agregar si tiene nombre
+                        new_apps_by_key[key] = app
+                
+                logger.debug("Accesos requeridos para nueva posición: %s", len(new_apps_by_key))
+                if logger.isEnabledFor(logging.DEBUG):
+                    for app in new_apps_by_key.values():
+                        logger.debug("Acceso requerido: %s - %s", app.get('logical_access_name', ''), app.get('unidad_subunidad', ''))
+                
+                # Calcular qué revocar y qué otorgar
+                to_revoke = []
+                to_grant = []
+                maintained = []
+                
+                # REVOCAR: accesos actuales que NO están en los requeridos de la nueva posición
+                # Solo si están en estado 'closed completed'
+                for key, current_acc in current_access_by_key.items():
+                    if key not in new_apps_by_key:
+                        # Este acceso actual no es necesario en la nueva posición, revocarlo
+                        # Pero solo si está en 'closed completed'
+                        if self._safe_strip(current_acc.get('status'), '').lower() == 'closed completed':
+                            # Buscar la app completa en applications para obtener todos los datos
+                            cursor.execute('''
+                                SELECT logical_access_name, unidad_subunidad, subunit, path_email_url
+                                FROM applications
+                                WHERE logical_access_name = ?
+                            ''', (current_acc.get('logical_access_name', ''),))
+                            app_data = cursor.fetchone()
+                            
+                            if app_data:
+                                app_dict = {
+                                    'logical_access_name': app_data[0],
+                                    'unidad_subunidad': app_data[1] or current_acc.get('unidad_subunidad', ''),
+                                    'subunit': app_data[2] or '',
+                                    'path_email_url': app_data[3] or ''
+                                }
+                                to_revoke.append(app_dict)
+                                logger.debug("Marcado para revocar (no necesario en nueva posición): %s - %s", app_dict.get('logical_access_name', ''), app_dict.get('unidad_subunidad', ''))
+                            else:
+                                # Si no está en applications, crear un dict básico
+                                app_dict = {
+                                    'logical_access_name': current_acc.get('logical_access_name', ''),
+                                    'unidad_subunidad': current_acc.get('unidad_subunidad', ''),
+                                    'subunit': '',
+                                    'path_email_url': ''
+                                }
+                                to_revoke.append(app_dict)
+                                logger.debug("Marcado para revocar (no está en applications): %s", app_dict.get('logical_access_name', ''))
+                    else:
+                        # Este acceso ya lo tiene y también lo necesita en la nueva posición, mantenerlo
+                        maintained.append(current_acc)
+                        logger.debug("Acceso mantenido (ya lo tiene y lo necesita): %s - %s", current_acc.get('logical_access_name', ''), current_acc.get('unidad_subunidad', ''))
+                
+                # OTORGAR: accesos requeridos de la nueva posición que NO tiene actualmente
+                for key, app in new_apps_by_key.items():
+                    if key not in current_access_by_key:
+                        to_grant.append(app)
+                        logger.debug("Marcado para otorgar (no lo tiene actualmente): %s - %s", app.get('logical_access_name', ''), app.get('unidad_subunidad', ''))
+                    else:
+                        logger.debug("Acceso ya existe (no se otorga): %s - %s", app.get('logical_access_name', ''), app.get('unidad_subunidad', ''))
+                
+                logger.debug("Resumen - Mantener: %s, Revocar: %s, Otorgar: %s", len(maintained), len(to_revoke), len(to_grant))
 
-            case_id = f"CASE-{datetime.now().strftime('%Y%m%d%H%M%S')}-{scotia_id}"
-            created_records = []
+                case_id = f"CASE-{datetime.now().strftime('%Y%m%d%H%M%S')}-{scotia_id}"
+                created_records = []
 
-            # 1. REVOCAR accesos de la posición anterior que ya no son necesarios
-            print(f"DEBUG: Procesando {len(to_revoke)} aplicaciones para revocar")
-            for acc in to_revoke:
-                print(f"DEBUG: Procesando revocación: {acc.get('logical_access_name', '')}")
-                record_data = {
-                    'scotia_id': scotia_id,
-                    'case_id': case_id,
-                    'responsible': responsible,
-                    'process_access': 'offboarding',
-                    'subunit': acc.get('subunit', ''),
-                    'event_description': f"Revocación de acceso para {acc.get('logical_access_name', '')} (lateral movement - cambio de posición)",
-                    'ticket_email': acc.get('path_email_url', ''),
-                    'app_access_name': acc.get('logical_access_name', ''),
-                    'computer_system_type': 'Desktop',
-                    'status': 'Pendiente',
-                    'general_status_ticket': 'En Proceso'
-                }
-                print(f"DEBUG: Creando registro de revocación para {acc.get('logical_access_name', '')}")
-                ok, message = self.create_historical_record(record_data)
-                print(f"DEBUG: Resultado de revocación: {ok}, Mensaje: {message}")
-                if ok:
+                # 1. REVOCAR accesos de la posición anterior que ya no son necesarios
+                logger.debug("Procesando %s aplicaciones para revocar", len(to_revoke))
+                for acc in to_revoke:
+                    record_data = {
+                        'scotia_id': scotia_id,
+                        'case_id': case_id,
+                        'responsible': responsible,
+                        'process_access': 'offboarding',
+                        'subunit': acc.get('subunit', ''),
+                        'event_description': f"Revocación de acceso para {acc.get('logical_access_name', '')} (lateral movement - cambio de posición)",
+                        'ticket_email': acc.get('path_email_url', ''),
+                        'app_access_name': acc.get('logical_access_name', ''),
+                        'computer_system_type': 'Desktop',
+                        'status': 'Pendiente',
+                        'general_status_ticket': 'En Proceso'
+                    }
                     created_records.append(record_data)
-                    print(f"DEBUG: Registro de revocación agregado a created_records")
-                else:
-                    print(f"DEBUG: Error creando registro de revocación: {message}")
 
-            # 2. OTORGAR nuevos accesos de la nueva posición que no tiene actualmente
-            print(f"DEBUG: Procesando {len(to_grant)} aplicaciones para otorgar")
-            for app in to_grant:
-                print(f"DEBUG: Procesando otorgamiento: {app.get('logical_access_name', '')}")
-                record_data = {
-                    'scotia_id': scotia_id,
-                    'case_id': case_id,
-                    'responsible': responsible,
-                    'process_access': 'lateral_movement',
-                    'subunit': app.get('subunit', ''),
-                    'event_description': f"Otorgamiento de acceso para {app.get('logical_access_name', '')} (lateral movement - nueva posición)",
-                    'ticket_email': app.get('path_email_url', ''),
-                    'app_access_name': app.get('logical_access_name', ''),
-                    'computer_system_type': 'Desktop',
-                    'status': 'Pendiente',
-                    'general_status_ticket': 'En Proceso'
-                }
-                print(f"DEBUG: Creando registro de otorgamiento para {app.get('logical_access_name', '')}")
-                ok, message = self.create_historical_record(record_data)
-                print(f"DEBUG: Resultado de otorgamiento: {ok}, Mensaje: {message}")
-                if ok:
+                # 2. OTORGAR nuevos accesos de la nueva posición que no tiene actualmente
+                logger.debug("Procesando %s aplicaciones para otorgar", len(to_grant))
+                for app in to_grant:
+                    record_data = {
+                        'scotia_id': scotia_id,
+                        'case_id': case_id,
+                        'responsible': responsible,
+                        'process_access': 'lateral_movement',
+                        'subunit': app.get('subunit', ''),
+                        'event_description': f"Otorgamiento de acceso para {app.get('logical_access_name', '')} (lateral movement - nueva posición)",
+                        'ticket_email': app.get('path_email_url', ''),
+                        'app_access_name': app.get('logical_access_name', ''),
+                        'computer_system_type': 'Desktop',
+                        'status': 'Pendiente',
+                        'general_status_ticket': 'En Proceso'
+                    }
                     created_records.append(record_data)
-                    print(f"DEBUG: Registro de otorgamiento agregado a created_records")
-                else:
-                    print(f"DEBUG: Error creando registro de otorgamiento: {message}")
 
-            # Actualizar posición/unidad del empleado
-            success, message = self.update_employee_position(scotia_id, new_position, new_unit, new_unidad_subunidad)
-            if not success:
-                return False, f"Error actualizando posición: {message}", []
+                # Revocaciones y otorgamientos en un solo lote
+                ok, message, _ = self.create_historical_records_bulk(created_records, conn=conn)
+                logger.debug("Resultado de inserción masiva: %s, Mensaje: %s", ok, message)
+                if not ok:
+                    raise RuntimeError(f"Error creando registros de movimiento lateral: {message}")
+
+                # Actualizar posición/unidad del empleado (si falla, se revierte todo el caso)
+                success, message = self.update_employee_position(scotia_id, new_position, new_unit, new_unidad_subunidad, conn=conn)
+                if not success:
+                    raise RuntimeError(f"Error actualizando posición: {message}")
 
             # Crear mensaje detallado
             revoke_details = []
@@ -1703,15 +1957,12 @@ class AccessManagementService:
         - NO revoca ningún acceso existente
         """
         try:
-            print(f"DEBUG: Iniciando flex staff para {scotia_id}")
-            print(f"DEBUG: Posición temporal: {temporary_position}")
-            print(f"DEBUG: Unidad temporal: {temporary_unit}")
-            print(f"DEBUG: Subunidad temporal: {temporary_subunit}")
-            print(f"DEBUG: Duración: {duration_days} días")
+            logger.debug("Iniciando flex staff para %s: posición temporal=%s, unidad=%s, subunidad=%s, duración=%s días",
+                         scotia_id, temporary_position, temporary_unit, temporary_subunit, duration_days)
             
             employee = self.get_employee_by_id(scotia_id)
             if not employee:
-                print(f"DEBUG: Error - Empleado {scotia_id} no encontrado")
+                logger.warning("Flex staff: empleado %s no encontrado", scotia_id)
                 return False, f"Empleado {scotia_id} no encontrado", []
 
             original_position = self._safe_strip(employee.get('position'), '')
@@ -1722,15 +1973,16 @@ class AccessManagementService:
             
             # También obtener accesos flex_staff existentes (pendientes y completados) para evitar duplicados
             flex_staff_access = self._get_all_flex_staff_access(scotia_id)
-            print(f"DEBUG: Accesos flex_staff existentes (pendientes y completados): {len(flex_staff_access)}")
+            logger.debug("Accesos flex_staff existentes (pendientes y completados): %s", len(flex_staff_access))
             
             # Obtener accesos requeridos para la posición temporal usando lógica flexible
             # No usar subunidad para flex staff - buscar solo por posición y unidad
-            print(f"DEBUG: Buscando aplicaciones para posición temporal: {temporary_position} en unidad: {temporary_unit}")
+            logger.debug("Buscando aplicaciones para posición temporal: %s en unidad: %s", temporary_position, temporary_unit)
             temp_mesh_apps = self.get_applications_by_position_flexible(temporary_position, temporary_unit, subunit=None)
-            print(f"DEBUG: Aplicaciones encontradas para posición temporal: {len(temp_mesh_apps)}")
-            for app in temp_mesh_apps:
-                print(f"DEBUG: - {app.get('logical_access_name', '')} | {app.get('unit', '')} | {app.get('subunit', '')}")
+            logger.debug("Aplicaciones encontradas para posición temporal: %s", len(temp_mesh_apps))
+            if logger.isEnabledFor(logging.DEBUG):
+                for app in temp_mesh_apps:
+                    logger.debug("- %s | %s | %s", app.get('logical_access_name', ''), app.get('unit', ''), app.get('subunit', ''))
             
             # Crear índices para comparación (incluyendo accesos flex_staff existentes)
             # Comparar usando clave extendida: nombre + unidad_subunidad + rol + posición
@@ -1752,7 +2004,7 @@ class AccessManagementService:
                 key = _build_key(acc)
                 if key.strip('|') and key not in current_apps_by_key:
                     current_apps_by_key[key] = acc
-                    print(f"DEBUG: Acceso flex_staff existente incluido en comparación: {key}")
+                    logger.debug("Acceso flex_staff existente incluido en comparación: %s", key)
             
             temp_apps_by_key = {}
             for app in temp_mesh_apps:
@@ -1770,41 +2022,39 @@ class AccessManagementService:
             case_id = f"FLEX-{datetime.now().strftime('%Y%m%d%H%M%S')}-{scotia_id}"
             created_records = []
 
-            # OTORGAR accesos temporales de la nueva posición
-            print(f"DEBUG: Procesando {len(to_grant_temp)} aplicaciones para flex staff")
-            for app in to_grant_temp:
-                print(f"DEBUG: Procesando flex staff: {app.get('logical_access_name', '')}")
-                # Calcular fecha de expiración si se especifica duración
-                expiration_date = None
-                if duration_days:
-                    expiration_date = datetime.now().replace(hour=23, minute=59, second=59) + timedelta(days=duration_days)
-                
-                record_data = {
-                    'scotia_id': scotia_id,
-                    'case_id': case_id,
-                    'responsible': responsible,
-                    'process_access': 'flex_staff',
-                    'subunit': app.get('subunit', ''),
-                    'event_description': f"Otorgamiento temporal de acceso para {app.get('logical_access_name', '')} (flex staff - {temporary_position})",
-                    'ticket_email': app.get('path_email_url', ''),
-                    'app_access_name': app.get('logical_access_name', ''),
-                    'computer_system_type': 'Desktop',
-                    'status': 'Pendiente',
-                    'general_status_ticket': 'En Proceso',
-                    'expiration_date': expiration_date.isoformat() if expiration_date else None
-                }
-                print(f"DEBUG: Creando registro flex staff para {app.get('logical_access_name', '')}")
-                ok, message = self.create_historical_record(record_data)
-                print(f"DEBUG: Resultado de flex staff: {ok}, Mensaje: {message}")
-                if ok:
+            # Calcular fecha de expiración si se especifica duración
+            expiration_date = None
+            if duration_days:
+                expiration_date = datetime.now().replace(hour=23, minute=59, second=59) + timedelta(days=duration_days)
+
+            # OTORGAR accesos temporales de la nueva posición (una sola transacción)
+            logger.debug("Procesando %s aplicaciones para flex staff", len(to_grant_temp))
+            with self.unit_of_work() as conn:
+                for app in to_grant_temp:
+                    record_data = {
+                        'scotia_id': scotia_id,
+                        'case_id': case_id,
+                        'responsible': responsible,
+                        'process_access': 'flex_staff',
+                        'subunit': app.get('subunit', ''),
+                        'event_description': f"Otorgamiento temporal de acceso para {app.get('logical_access_name', '')} (flex staff - {temporary_position})",
+                        'ticket_email': app.get('path_email_url', ''),
+                        'app_access_name': app.get('logical_access_name', ''),
+                        'computer_system_type': 'Desktop',
+                        'status': 'Pendiente',
+                        'general_status_ticket': 'En Proceso',
+                        'expiration_date': expiration_date.isoformat() if expiration_date else None
+                    }
                     created_records.append(record_data)
-                    print(f"DEBUG: Registro flex staff agregado a created_records")
-                else:
-                    print(f"DEBUG: Error creando registro flex staff: {message}")
+
+                ok, message, _ = self.create_historical_records_bulk(created_records, conn=conn)
+                logger.debug("Resultado de flex staff: %s, Mensaje: %s", ok, message)
+                if not ok:
+                    raise RuntimeError(f"Error creando registros flex staff: {message}")
 
             # Crear mensaje detallado
             grant_details = [app.get('logical_access_name', '') for app in to_grant_temp]
-            maintained_count = len(current_apps_by_name)
+            maintained_count = len(current_access)
             
             message = f"Asignación flex staff procesada para {scotia_id}.\n"
             message += f"- Posición original: {original_position} ({original_unit})\n"
@@ -1840,6 +2090,7 @@ class AccessManagementService:
             created_records = []
 
             # REVOCAR accesos temporales
+            records = []
             for acc in temp_access:
                 record_data = {
                     'scotia_id': scotia_id,
@@ -1854,9 +2105,11 @@ class AccessManagementService:
                     'status': 'Pendiente',
                     'general_status_ticket': 'En Proceso'
                 }
-                ok, _ = self.create_historical_record(record_data)
-                if ok:
-                    created_records.append(record_data)
+                records.append(record_data)
+
+            ok, _, _ = self.create_historical_records_bulk(records)
+            if ok:
+                created_records.extend(records)
 
             # Crear mensaje detallado
             revoke_details = [acc.get('logical_access_name', '') for acc in temp_access]
@@ -1900,13 +2153,13 @@ class AccessManagementService:
             return access_list
             
         except Exception as e:
-            print(f"Error obteniendo todos los accesos flex staff: {e}")
+            logger.error("Error obteniendo todos los accesos flex staff: %s", e)
             return []
 
     def get_employee_flex_staff_access(self, scotia_id: str) -> List[Dict[str, Any]]:
         """Obtiene los accesos temporales (flex_staff) de un empleado"""
         try:
-            print(f"DEBUG: Buscando accesos flex_staff para {scotia_id}")
+            logger.debug("Buscando accesos flex_staff para %s", scotia_id)
             conn = self.get_connection()
             cursor = conn.cursor()
             
@@ -1931,29 +2184,28 @@ class AccessManagementService:
             columns = [description[0] for description in cursor.description]
             access_list = [dict(zip(columns, row)) for row in rows]
             
-            print(f"DEBUG: Accesos flex_staff encontrados: {len(access_list)}")
-            for acc in access_list:
-                print(f"DEBUG: - {acc.get('logical_access_name', '')} | {acc.get('status', '')} | {acc.get('event_description', '')}")
-            
-            # Si no hay resultados, verificar qué registros existen para este empleado
-            if len(access_list) == 0:
-                print(f"DEBUG: No se encontraron accesos flex_staff. Verificando registros del empleado...")
-                cursor.execute('''
-                    SELECT process_access, app_access_name, status, event_description
-                    FROM historico 
-                    WHERE scotia_id = ? 
-                    ORDER BY record_date DESC
-                ''', (scotia_id,))
-                all_records = cursor.fetchall()
-                print(f"DEBUG: Todos los registros del empleado: {len(all_records)}")
-                for record in all_records[:10]:  # Mostrar solo los primeros 10
-                    print(f"DEBUG: - {record[0]} | {record[1]} | {record[2]} | {record[3]}")
+            logger.debug("Accesos flex_staff encontrados: %s", len(access_list))
+            if logger.isEnabledFor(logging.DEBUG):
+                for acc in access_list:
+                    logger.debug("- %s | %s | %s", acc.get('logical_access_name', ''), acc.get('status', ''), acc.get('event_description', ''))
+                
+                # Si no hay resultados, verificar qué registros existen para este empleado (consulta solo de depuración)
+                if len(access_list) == 0:
+                    logger.debug("No se encontraron accesos flex_staff. Verificando registros del empleado...")
+                    cursor.execute('''
+                        SELECT TOP 10 process_access, app_access_name, status, event_description
+                        FROM historico 
+                        WHERE scotia_id = ? 
+                        ORDER BY record_date DESC
+                    ''', (scotia_id,))
+                    for record in cursor.fetchall():  # Mostrar solo los primeros 10
+                        logger.debug("- %s | %s | %s | %s", record[0], record[1], record[2], record[3])
             
             conn.close()
             return access_list
             
         except Exception as e:
-            print(f"Error obteniendo accesos flex staff: {e}")
+            logger.error("Error obteniendo accesos flex staff: %s", e)
             return []
 
     def get_access_reconciliation_report(self, scotia_id: str) -> Dict[str, Any]:
@@ -1969,13 +2221,8 @@ class AccessManagementService:
             emp_unidad_subunidad = self._safe_strip(employee.get('unidad_subunidad'), '')
             
             # Debug: mostrar valores del empleado
-            print(f"DEBUG empleado {scotia_id}:")
-            print(f"  - unit: '{emp_unit}'")
-            print(f"  - position: '{emp_position}'")
-            print(f"  - unidad_subunidad: '{emp_unidad_subunidad}'")
-            print(f"  - Datos completos del empleado:")
-            for key, value in employee.items():
-                print(f"    - {key}: '{value}'")
+            logger.debug("Conciliación de %s: unit='%s', position='%s', unidad_subunidad='%s' (datos completos: %s)",
+                         scotia_id, emp_unit, emp_position, emp_unidad_subunidad, employee)
             
             # Si no hay unidad_subunidad, construirla a partir de unit y subunit
             if not emp_unidad_subunidad:
@@ -2179,7 +2426,7 @@ class AccessManagementService:
     def delete_historical_record(self, scotia_id: str, case_id: str, app_access_name: str = None, delete_all: bool = False) -> bool:
         """Elimina un registro específico o todos los registros de un case_id."""
         try:
-            print(f"[DEBUG] delete_historical_record called -> scotia_id={scotia_id}, case_id={case_id}, app_access_name={app_access_name}, delete_all={delete_all}")
+            logger.debug("delete_historical_record called -> scotia_id=%s, case_id=%s, app_access_name=%s, delete_all=%s", scotia_id, case_id, app_access_name, delete_all)
             with self.db_manager.get_connection() as conn:
                 cursor = conn.cursor()
                 
@@ -2188,12 +2435,12 @@ class AccessManagementService:
                         "DELETE FROM historico WHERE CAST(scotia_id AS NVARCHAR(50)) = ? AND case_id = ?",
                         (scotia_id, case_id)
                     )
-                    print(f"[DEBUG] delete_all affected rows: {cursor.rowcount}")
+                    logger.debug("delete_all affected rows: %s", cursor.rowcount)
                 elif app_access_name:
                     cursor.execute('SELECT id FROM historico WHERE CAST(scotia_id AS NVARCHAR(50)) = ? AND case_id = ? AND app_access_name = ?', (scotia_id, case_id, app_access_name))
                     
                     if not cursor.fetchone():
-                        print("[DEBUG] No matching record found for provided app_access_name")
+                        logger.debug("No matching record found for provided app_access_name")
                         return False
                     
                     # Eliminar solo el registro específico
@@ -2201,13 +2448,13 @@ class AccessManagementService:
                         "DELETE FROM historico WHERE CAST(scotia_id AS NVARCHAR(50)) = ? AND case_id = ? AND app_access_name = ?",
                         (scotia_id, case_id, app_access_name)
                     )
-                    print(f"[DEBUG] delete specific rowcount: {cursor.rowcount}")
+                    logger.debug("delete specific rowcount: %s", cursor.rowcount)
                 else:
                     # Si no se proporciona app_access_name, eliminar solo el primer registro encontrado
                     cursor.execute('SELECT TOP 1 id FROM historico WHERE CAST(scotia_id AS NVARCHAR(50)) = ? AND case_id = ?', (scotia_id, case_id))
                     
                     if not cursor.fetchone():
-                        print("[DEBUG] No records found for given scotia_id and case_id")
+                        logger.debug("No records found for given scotia_id and case_id")
                         return False
                     
                     # Eliminar solo el primer registro
@@ -2215,143 +2462,162 @@ class AccessManagementService:
                         "DELETE TOP (1) FROM historico WHERE CAST(scotia_id AS NVARCHAR(50)) = ? AND case_id = ?",
                         (scotia_id, case_id)
                     )
-                    print(f"[DEBUG] delete first row rowcount: {cursor.rowcount}")
+                    logger.debug("delete first row rowcount: %s", cursor.rowcount)
                 
-                return cursor.rowcount > 0
+                deleted = cursor.rowcount > 0
+                if deleted:
+                    self._refresh_current_access(cursor, scotia_id)
+                    self._mark_reconciliation_stale(cursor, scotia_ids=[scotia_id])
+                return deleted
                 
         except Exception as e:
-            print(f"Error eliminando registro: {str(e)}")
+            logger.error("Error eliminando registro: %s", e)
             return False
 
-    def get_headcount_statistics(self) -> Dict[str, Any]:
-        """Obtiene estadísticas del headcount agrupadas por diferentes criterios"""
+    # Segundos que se reutiliza la instantánea de get_headcount_statistics
+    HEADCOUNT_STATS_CACHE_SECONDS = 120
+
+    # (time.monotonic() de la carga, estadísticas); se descarta al cambiar headcount
+    _headcount_stats_snapshot = None
+
+    def invalidate_headcount_statistics(self, table: str = 'headcount'):
+        """Descarta la instantánea de estadísticas del headcount"""
+        self._headcount_stats_snapshot = None
+
+    def get_headcount_statistics(self, use_cache: bool = True) -> Dict[str, Any]:
+        """Obtiene estadísticas del headcount agrupadas por diferentes criterios.
+
+        Lee headcount una sola vez y calcula todas las dimensiones en una pasada
+        (_aggregate_headcount_statistics). Con use_cache, reutiliza la última
+        instantánea durante HEADCOUNT_STATS_CACHE_SECONDS o hasta que cambie headcount;
+        el resultado es compartido y no debe modificarse.
+        """
+        snapshot = self._headcount_stats_snapshot
+        if (use_cache and snapshot is not None
+                and time.monotonic() - snapshot[0] < self.HEADCOUNT_STATS_CACHE_SECONDS):
+            return snapshot[1]
+
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
-            
-            stats = {}
-            
-            # 1. Estadísticas por unidad
-            cursor.execute('''
-                SELECT unit as unidad, COUNT(*) as total_empleados,
-                       COUNT(CASE WHEN activo = 1 THEN 1 END) as activos,
-                       COUNT(CASE WHEN activo = 0 THEN 1 END) as inactivos,
-                       COUNT(CASE WHEN position IS NOT NULL AND position != '' THEN 1 END) as con_posicion,
-                       COUNT(CASE WHEN start_date IS NOT NULL AND start_date != '' THEN 1 END) as con_fecha_inicio
-                FROM headcount
-                WHERE unit IS NOT NULL AND unit != ''
-                GROUP BY unit
-                ORDER BY total_empleados DESC
-            ''')
-            stats['por_unidad'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 2. Estadísticas por puesto
-            cursor.execute('''
-                SELECT position as puesto, unit as unidad, COUNT(*) as total_empleados,
-                       COUNT(CASE WHEN activo = 1 THEN 1 END) as activos,
-                       COUNT(CASE WHEN activo = 0 THEN 1 END) as inactivos,
-                       COUNT(CASE WHEN start_date IS NOT NULL AND start_date != '' THEN 1 END) as con_fecha_inicio
-                FROM headcount
-                WHERE position IS NOT NULL AND position != ''
-                GROUP BY position, unit
-                ORDER BY total_empleados DESC
-            ''')
-            stats['por_puesto'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 3. Estadísticas por manager
-            cursor.execute('''
-                SELECT manager, unit as unidad, COUNT(*) as total_empleados,
-                       COUNT(CASE WHEN activo = 1 THEN 1 END) as activos,
-                       COUNT(CASE WHEN activo = 0 THEN 1 END) as inactivos
-                FROM headcount
-                WHERE manager IS NOT NULL AND manager != ''
-                GROUP BY manager, unit
-                ORDER BY total_empleados DESC
-            ''')
-            stats['por_manager'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 4. Estadísticas por senior manager
-            cursor.execute('''
-                SELECT senior_manager, unit as unidad, COUNT(*) as total_empleados,
-                       COUNT(CASE WHEN activo = 1 THEN 1 END) as activos,
-                       COUNT(CASE WHEN activo = 0 THEN 1 END) as inactivos
-                FROM headcount
-                WHERE senior_manager IS NOT NULL AND senior_manager != ''
-                GROUP BY senior_manager, unit
-                ORDER BY total_empleados DESC
-            ''')
-            stats['por_senior_manager'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 5. Estadísticas por estado de activación
-            cursor.execute('''
-                SELECT 
-                    CASE WHEN activo = 1 THEN 'Active' ELSE 'Inactive' END as estado,
-                    COUNT(*) as total_empleados,
-                    COUNT(CASE WHEN inactivation_date IS NOT NULL THEN 1 END) as con_fecha_inactivacion
-                FROM headcount
-                GROUP BY activo
-                ORDER BY activo DESC
-            ''')
-            stats['por_estado'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 6. Estadísticas por año de inicio (si hay fecha de inicio)
-            cursor.execute('''
-                SELECT 
-                    YEAR(start_date) as año_inicio,
-                    COUNT(*) as total_empleados,
-                    COUNT(CASE WHEN activo = 1 THEN 1 END) as activos,
-                    COUNT(CASE WHEN activo = 0 THEN 1 END) as inactivos
-                FROM headcount
-                WHERE start_date IS NOT NULL
-                GROUP BY YEAR(start_date)
-                ORDER BY año_inicio DESC
-            ''')
-            stats['por_año_inicio'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 7. Resumen detallado por unidad (con lista de empleados)
+
             cursor.execute('''
-                SELECT 
-                    unit as unidad,
-                    scotia_id,
-                    full_name,
-                    position as puesto,
-                    manager,
-                    senior_manager,
-                    CASE WHEN activo = 1 THEN 'Active' ELSE 'Inactive' END as estado,
-                    start_date,
-                    inactivation_date
+                SELECT scotia_id, full_name, unit, position, manager, senior_manager,
+                       activo, start_date, inactivation_date
                 FROM headcount
-                WHERE unit IS NOT NULL AND unit != ''
                 ORDER BY unit, full_name
             ''')
-            stats['detalle_por_unidad'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 8. Estadísticas generales
-            cursor.execute('''
-                SELECT 
-                    COUNT(*) as total_empleados,
-                    COUNT(CASE WHEN activo = 1 THEN 1 END) as activos,
-                    COUNT(CASE WHEN activo = 0 THEN 1 END) as inactivos,
-                    COUNT(CASE WHEN position IS NOT NULL AND position != '' THEN 1 END) as con_posicion,
-                    COUNT(CASE WHEN start_date IS NOT NULL AND start_date != '' THEN 1 END) as con_fecha_inicio,
-                    COUNT(CASE WHEN manager IS NOT NULL AND manager != '' THEN 1 END) as con_manager,
-                    COUNT(CASE WHEN senior_manager IS NOT NULL AND senior_manager != '' THEN 1 END) as con_senior_manager,
-                    COUNT(CASE WHEN inactivation_date IS NOT NULL THEN 1 END) as con_fecha_inactivacion
-                FROM headcount
-            ''')
-            stats['generales'] = dict(zip([col[0] for col in cursor.description], cursor.fetchone()))
-            
+            stats = self._aggregate_headcount_statistics(cursor.fetchall())
+
             conn.close()
+            self._headcount_stats_snapshot = (time.monotonic(), stats)
             return stats
-            
+
         except Exception as e:
             return {"error": f"Error obteniendo estadísticas del headcount: {str(e)}"}
 
-    def get_available_applications(self) -> List[Dict[str, Any]]:
-        """Obtiene la lista de aplicaciones disponibles para registros manuales"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+    @staticmethod
+    def _aggregate_headcount_statistics(rows) -> Dict[str, Any]:
+        """Calcula todas las dimensiones de get_headcount_statistics en una sola pasada.
+
+        `rows`: (scotia_id, full_name, unit, position, manager, senior_manager, activo,
+        start_date, inactivation_date) ordenadas por unidad y nombre.
+
+        Las dimensiones se agrupan por el valor normalizado (_norm), como el GROUP BY con
+        la intercalación CI de SQL Server; cada grupo muestra la primera etiqueta vista.
+        """
+        norm = AccessManagementService._norm
+
+        def has(value) -> bool:
+            return norm(value) != ''
+
+        def bump(groups: Dict[Any, Dict[str, Any]], key, activo, labels: Dict[str, Any],
+                 extra: Tuple[str, ...] = ()) -> Dict[str, Any]:
+            entry = groups.get(key)
+            if entry is None:
+                entry = groups[key] = dict(labels, total_empleados=0, activos=0, inactivos=0,
+                                           **{name: 0 for name in extra})
+            entry['total_empleados'] += 1
+            if activo == 1:
+                entry['activos'] += 1
+            elif activo == 0:
+                entry['inactivos'] += 1
+            return entry
+
+        def by_total(groups: Dict[Any, Dict[str, Any]]) -> List[Dict[str, Any]]:
+            return sorted(groups.values(), key=lambda entry: -entry['total_empleados'])
+
+        por_unidad, por_puesto, por_manager, por_senior_manager = {}, {}, {}, {}
+        por_estado, por_anio = {}, {}
+        detalle = []
+        generales = dict.fromkeys(('total_empleados', 'activos', 'inactivos', 'con_posicion', 'con_unidad',
+                                   'con_fecha_inicio', 'con_manager', 'con_senior_manager',
+                                   'con_fecha_inactivacion'), 0)
+
+        for (scotia_id, full_name, unit, position, manager, senior_manager,
+             activo, start_date, inactivation_date) in rows:
+            estado = 'Active' if activo == 1 else 'Inactive'
+
+            generales['total_empleados'] += 1
+            generales['activos'] += activo == 1
+            generales['inactivos'] += activo == 0
+            generales['con_posicion'] += has(position)
+            generales['con_unidad'] += has(unit)
+            generales['con_fecha_inicio'] += has(start_date)
+            generales['con_manager'] += has(manager)
+            generales['con_senior_manager'] += has(senior_manager)
+            generales['con_fecha_inactivacion'] += inactivation_date is not None
+
+            if has(unit):
+                entry = bump(por_unidad, norm(unit), activo, {'unidad': unit}, ('con_posicion', 'con_fecha_inicio'))
+                entry['con_posicion'] += has(position)
+                entry['con_fecha_inicio'] += has(start_date)
+                detalle.append({
+                    'unidad': unit, 'scotia_id': scotia_id, 'full_name': full_name, 'puesto': position,
+                    'manager': manager, 'senior_manager': senior_manager, 'estado': estado,
+                    'start_date': start_date, 'inactivation_date': inactivation_date
+                })
+            if has(position):
+                entry = bump(por_puesto, (norm(position), norm(unit)), activo, {'puesto': position, 'unidad': unit},
+                             ('con_fecha_inicio',))
+                entry['con_fecha_inicio'] += has(start_date)
+            if has(manager):
+                bump(por_manager, (norm(manager), norm(unit)), activo, {'manager': manager, 'unidad': unit})
+            if has(senior_manager):
+                bump(por_senior_manager, (norm(senior_manager), norm(unit)), activo,
+                     {'senior_manager': senior_manager, 'unidad': unit})
+
+            entry = por_estado.setdefault(activo == 1, {'estado': estado, 'total_empleados': 0,
+                                                        'con_fecha_inactivacion': 0})
+            entry['total_empleados'] += 1
+            entry['con_fecha_inactivacion'] += inactivation_date is not None
+
+            if start_date is not None:
+                year = getattr(start_date, 'year', None)
+                if year is None and has(start_date):
+                    year = int(str(start_date)[:4])
+                if year is not None:
+                    bump(por_anio, year, activo, {'año_inicio': year})
+
+        generales['unidades_unicas'] = len(por_unidad)
+        generales['puestos_unicos'] = len({position for position, _ in por_puesto})
+
+        return {
+            'por_unidad': by_total(por_unidad),
+            'por_puesto': by_total(por_puesto),
+            'por_manager': by_total(por_manager),
+            'por_senior_manager': by_total(por_senior_manager),
+            'por_estado': [por_estado[key] for key in (True, False) if key in por_estado],
+            'por_año_inicio': [por_anio[year] for year in sorted(por_anio, reverse=True)],
+            'detalle_por_unidad': detalle,
+            'generales': generales,
+        }
+
+    def get_available_applications(self) -> List[Dict[str, Any]]:
+        """Obtiene la lista de aplicaciones disponibles para registros manuales"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
             
             # Obtener aplicaciones únicas del historial y de la tabla applications
             cursor.execute('''
@@ -2392,7 +2658,7 @@ class AccessManagementService:
             return positions
             
         except Exception as e:
-            print(f"Error obteniendo posiciones disponibles: {e}")
+            logger.error("Error obteniendo posiciones disponibles: %s", e)
             return []
     
     def get_applications_by_position_simple(self, position: str) -> List[Dict[str, Any]]:
@@ -2423,124 +2689,289 @@ class AccessManagementService:
             return applications
             
         except Exception as e:
-            print(f"Error obteniendo aplicaciones por posición: {e}")
+            logger.error("Error obteniendo aplicaciones por posición: %s", e)
             return []
 
-    def get_historial_statistics(self) -> Dict[str, Any]:
-        """Obtiene estadísticas del historial agrupadas por diferentes criterios"""
+    # ==============================
+    # ESTADÍSTICAS DEL HISTORIAL
+    # ==============================
+    # historico_stats (por día, subunidad, aplicación y proceso) e historico_stats_employee
+    # (por empleado) son resúmenes que mantiene el trigger TR_historico_stats en cada
+    # escritura sobre historico. Unidad y puesto salen de headcount a través del resumen por
+    # empleado. Si los resúmenes no existen (base sin migrar) se usa una sola consulta sobre
+    # historico con GROUPING SETS.
+
+    # (columna de salida, valor de status que cuenta)
+    _HISTORIAL_STATUS_COLUMNS = (
+        ('completados', 'Completado'),
+        ('pendientes', 'Pendiente'),
+        ('en_proceso', 'En Proceso'),
+        ('cancelados', 'Cancelado'),
+        ('rechazados', 'Rechazado'),
+    )
+
+    # dimensión de la consulta -> (clave en las estadísticas, nombre de la columna del valor)
+    _HISTORIAL_STATS_DIMENSIONS = {
+        'unidad': ('por_unidad', 'unidad'),
+        'subunidad': ('por_subunidad', 'subunidad'),
+        'puesto': ('por_puesto', 'puesto'),
+        'aplicacion': ('por_aplicacion', 'aplicacion'),
+        'proceso': ('por_proceso', 'proceso'),
+    }
+
+    @classmethod
+    def _historial_counters_sql(cls, aggregate: str) -> str:
+        """Columnas total_registros + una por status; `aggregate` recibe el nombre de la columna"""
+        return ',\n                   '.join([f"{aggregate.format(column='total_registros')} AS total_registros"] + [
+            f"{aggregate.format(column=column)} AS {column}" for column, _ in cls._HISTORIAL_STATUS_COLUMNS])
+
+    @classmethod
+    def _historial_summary_sql(cls) -> str:
+        """Estadísticas leídas de los resúmenes (una consulta, filas etiquetadas por dimensión)"""
+        counters = cls._historial_counters_sql('SUM({column})')
+        employee_counters = cls._historial_counters_sql('SUM(s.{column})')
+        return f'''
+            SELECT CASE WHEN GROUPING(subunit) = 0 THEN 'subunidad'
+                        WHEN GROUPING(app_access_name) = 0 THEN 'aplicacion'
+                        WHEN GROUPING(process_access) = 0 THEN 'proceso'
+                        ELSE 'generales' END AS dimension,
+                   COALESCE(subunit, app_access_name, process_access) AS valor,
+                   NULL AS unidad,
+                   {counters},
+                   NULL AS elementos
+            FROM historico_stats
+            GROUP BY GROUPING SETS ((subunit), (app_access_name), (process_access), ())
+            UNION ALL
+            SELECT CASE WHEN GROUPING(hc.position) = 0 THEN 'puesto'
+                        WHEN GROUPING(hc.unit) = 0 THEN 'unidad'
+                        ELSE 'empleados' END,
+                   CASE WHEN GROUPING(hc.position) = 0 THEN hc.position ELSE hc.unit END,
+                   CASE WHEN GROUPING(hc.position) = 0 THEN hc.unit END,
+                   {employee_counters},
+                   COUNT(*)
+            FROM historico_stats_employee s
+            LEFT JOIN headcount hc ON hc.scotia_id = s.scotia_id
+            GROUP BY GROUPING SETS ((hc.position, hc.unit), (hc.unit), ())
+        '''
+
+    @classmethod
+    def _historial_scan_sql(cls) -> str:
+        """Las mismas estadísticas con una sola pasada sobre historico"""
+        counters = ',\n                   '.join(['COUNT(*) AS total_registros'] + [
+            f"COUNT(CASE WHEN h.status = '{status}' THEN 1 END) AS {column}"
+            for column, status in cls._HISTORIAL_STATUS_COLUMNS])
+        return f'''
+            SELECT CASE WHEN GROUPING(h.subunit) = 0 THEN 'subunidad'
+                        WHEN GROUPING(h.app_access_name) = 0 THEN 'aplicacion'
+                        WHEN GROUPING(h.process_access) = 0 THEN 'proceso'
+                        WHEN GROUPING(hc.position) = 0 THEN 'puesto'
+                        WHEN GROUPING(hc.unit) = 0 THEN 'unidad'
+                        ELSE 'generales' END AS dimension,
+                   CASE WHEN GROUPING(h.subunit) = 0 THEN h.subunit
+                        WHEN GROUPING(h.app_access_name) = 0 THEN h.app_access_name
+                        WHEN GROUPING(h.process_access) = 0 THEN h.process_access
+                        WHEN GROUPING(hc.position) = 0 THEN hc.position
+                        ELSE hc.unit END AS valor,
+                   CASE WHEN GROUPING(hc.position) = 0 THEN hc.unit END AS unidad,
+                   {counters},
+                   COUNT(DISTINCT h.scotia_id) AS elementos
+            FROM historico h
+            LEFT JOIN headcount hc ON hc.scotia_id = h.scotia_id
+            GROUP BY GROUPING SETS ((h.subunit), (h.app_access_name), (h.process_access),
+                                    (hc.position, hc.unit), (hc.unit), ())
+        '''
+
+    def get_historial_statistics(self, use_summary: bool = True) -> Dict[str, Any]:
+        """Obtiene estadísticas del historial agrupadas por diferentes criterios.
+
+        Lee los resúmenes historico_stats / historico_stats_employee; con use_summary=False,
+        o si los resúmenes no existen, recorre historico una sola vez.
+        """
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
-            
-            stats = {}
-            
-            # 1. Estadísticas por unidad
-            cursor.execute('''
-                SELECT h.area as unidad, COUNT(*) as total_registros,
-                       COUNT(CASE WHEN h.status = 'Completado' THEN 1 END) as completados,
-                       COUNT(CASE WHEN h.status = 'Pendiente' THEN 1 END) as pendientes,
-                       COUNT(CASE WHEN h.status = 'En Proceso' THEN 1 END) as en_proceso,
-                       COUNT(CASE WHEN h.status = 'Cancelado' THEN 1 END) as cancelados,
-                       COUNT(CASE WHEN h.status = 'Rechazado' THEN 1 END) as rechazados
-                FROM historico h
-                WHERE h.area IS NOT NULL AND h.area != ''
-                GROUP BY h.area
-                ORDER BY total_registros DESC
-            ''')
-            stats['por_unidad'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 2. Estadísticas por subunidad
-            cursor.execute('''
-                SELECT h.subunit as subunidad, h.area as unidad, COUNT(*) as total_registros,
-                       COUNT(CASE WHEN h.status = 'Completado' THEN 1 END) as completados,
-                       COUNT(CASE WHEN h.status = 'Pendiente' THEN 1 END) as pendientes,
-                       COUNT(CASE WHEN h.status = 'En Proceso' THEN 1 END) as en_proceso,
-                       COUNT(CASE WHEN h.status = 'Cancelado' THEN 1 END) as cancelados,
-                       COUNT(CASE WHEN h.status = 'Rechazado' THEN 1 END) as rechazados
-                FROM historico h
-                WHERE h.subunit IS NOT NULL AND h.subunit != ''
-                GROUP BY h.subunit, h.area
-                ORDER BY total_registros DESC
-            ''')
-            stats['por_subunidad'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 3. Estadísticas por puesto
-            cursor.execute('''
-                SELECT head.position as puesto, head.unit as unidad, COUNT(*) as total_registros,
-                       COUNT(CASE WHEN h.status = 'Completado' THEN 1 END) as completados,
-                       COUNT(CASE WHEN h.status = 'Pendiente' THEN 1 END) as pendientes,
-                       COUNT(CASE WHEN h.status = 'En Proceso' THEN 1 END) as en_proceso,
-                       COUNT(CASE WHEN h.status = 'Cancelado' THEN 1 END) as cancelados,
-                       COUNT(CASE WHEN h.status = 'Rechazado' THEN 1 END) as rechazados
-                FROM historico h
-                INNER JOIN headcount head ON h.scotia_id = head.scotia_id
-                WHERE head.position IS NOT NULL AND head.position != ''
-                GROUP BY head.position, head.unit
-                ORDER BY total_registros DESC
-            ''')
-            stats['por_puesto'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 4. Estadísticas por aplicación
-            cursor.execute('''
-                SELECT h.app_access_name as aplicacion, COUNT(*) as total_registros,
-                       COUNT(CASE WHEN h.status = 'Completado' THEN 1 END) as completados,
-                       COUNT(CASE WHEN h.status = 'Pendiente' THEN 1 END) as pendientes,
-                       COUNT(CASE WHEN h.status = 'En Proceso' THEN 1 END) as en_proceso,
-                       COUNT(CASE WHEN h.status = 'Cancelado' THEN 1 END) as cancelados,
-                       COUNT(CASE WHEN h.status = 'Rechazado' THEN 1 END) as rechazados
-                FROM historico h
-                WHERE h.app_access_name IS NOT NULL AND h.app_access_name != ''
-                GROUP BY h.app_access_name
-                ORDER BY total_registros DESC
-            ''')
-            stats['por_aplicacion'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 5. Estadísticas por proceso
-            cursor.execute('''
-                SELECT h.process_access as proceso, COUNT(*) as total_registros,
-                       COUNT(CASE WHEN h.status = 'Completado' THEN 1 END) as completados,
-                       COUNT(CASE WHEN h.status = 'Pendiente' THEN 1 END) as pendientes,
-                       COUNT(CASE WHEN h.status = 'En Proceso' THEN 1 END) as en_proceso,
-                       COUNT(CASE WHEN h.status = 'Cancelado' THEN 1 END) as cancelados,
-                       COUNT(CASE WHEN h.status = 'Rechazado' THEN 1 END) as rechazados
-                FROM historico h
-                WHERE h.process_access IS NOT NULL AND h.process_access != ''
-                GROUP BY h.process_access
-                ORDER BY total_registros DESC
-            ''')
-            stats['por_proceso'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 6. Estadísticas generales
-            cursor.execute('''
-                SELECT 
-                    COUNT(*) as total_registros,
-                    COUNT(CASE WHEN h.status = 'Completado' THEN 1 END) as completados,
-                    COUNT(CASE WHEN h.status = 'Pendiente' THEN 1 END) as pendientes,
-                    COUNT(CASE WHEN h.status = 'En Proceso' THEN 1 END) as en_proceso,
-                    COUNT(CASE WHEN h.status = 'Cancelado' THEN 1 END) as cancelados,
-                    COUNT(CASE WHEN h.status = 'Rechazado' THEN 1 END) as rechazados
-                FROM historico h
-            ''')
-            stats['generales'] = dict(zip([col[0] for col in cursor.description], cursor.fetchone()))
-            
+
+            rows = None
+            if use_summary:
+                try:
+                    cursor.execute(self._historial_summary_sql())
+                    rows = cursor.fetchall()
+                except pyodbc.Error as e:
+                    logger.warning("Resúmenes de historico no disponibles, se recorre historico: %s", e)
+            if rows is None:
+                cursor.execute(self._historial_scan_sql())
+                rows = cursor.fetchall()
+
             conn.close()
-            return stats
-            
+            return self._assemble_historial_statistics(rows)
+
         except Exception as e:
             return {"error": f"Error obteniendo estadísticas: {str(e)}"}
 
-    def buscar_procesos(self, filtros: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    @classmethod
+    def _assemble_historial_statistics(cls, rows) -> Dict[str, Any]:
+        """Arma el diccionario de estadísticas a partir de las filas etiquetadas por dimensión.
+
+        Cada fila: (dimension, valor, unidad, total_registros, <una columna por status>, elementos).
+        """
+        counter_names = ['total_registros'] + [column for column, _ in cls._HISTORIAL_STATUS_COLUMNS]
+        stats: Dict[str, Any] = {key: [] for key, _ in cls._HISTORIAL_STATS_DIMENSIONS.values()}
+        generales: Dict[str, Any] = dict.fromkeys(counter_names, 0)
+        generales['empleados_unicos'] = 0
+
+        for dimension, valor, unidad, *counters, elementos in rows:
+            counts = dict(zip(counter_names, (int(count or 0) for count in counters)))
+            if dimension in cls._HISTORIAL_STATS_DIMENSIONS:
+                if valor is None or valor == '':
+                    continue
+                key, label = cls._HISTORIAL_STATS_DIMENSIONS[dimension]
+                entry = {label: valor}
+                if dimension == 'puesto':
+                    entry['unidad'] = unidad
+                entry.update(counts)
+                stats[key].append(entry)
+            elif dimension == 'generales':
+                generales.update(counts)
+                if elementos is not None:
+                    generales['empleados_unicos'] = elementos
+            elif dimension == 'empleados':
+                generales['empleados_unicos'] = elementos or 0
+
+        for key, label in cls._HISTORIAL_STATS_DIMENSIONS.values():
+            stats[key].sort(key=lambda entry: (-entry['total_registros'], str(entry[label])))
+        generales['aplicaciones_unicas'] = len(stats['por_aplicacion'])
+        stats['generales'] = generales
+        return stats
+
+    def rebuild_historico_stats(self) -> Tuple[bool, str]:
+        """Reconstruye historico_stats e historico_stats_employee desde historico
+        (p. ej. si el trigger TR_historico_stats estuvo deshabilitado durante una carga)"""
+        counters = ',\n                           '.join(['COUNT(*)'] + [
+            f"COUNT(CASE WHEN status = '{status}' THEN 1 END)" for _, status in self._HISTORIAL_STATUS_COLUMNS])
+        counter_columns = ', '.join(['total_registros'] + [column for column, _ in self._HISTORIAL_STATUS_COLUMNS])
+        try:
+            with self.unit_of_work() as conn:
+                cursor = conn.cursor()
+                cursor.execute('DELETE FROM historico_stats')
+                cursor.execute(f'''
+                    INSERT INTO historico_stats (stat_date, subunit, app_access_name, process_access, {counter_columns})
+                    SELECT CAST(record_date AS DATE), ISNULL(subunit, ''), ISNULL(app_access_name, ''),
+                           ISNULL(process_access, ''),
+                           {counters}
+                    FROM historico
+                    GROUP BY CAST(record_date AS DATE), ISNULL(subunit, ''), ISNULL(app_access_name, ''),
+                             ISNULL(process_access, '')
+                ''')
+                total = cursor.rowcount
+                cursor.execute('DELETE FROM historico_stats_employee')
+                cursor.execute(f'''
+                    INSERT INTO historico_stats_employee (scotia_id, {counter_columns})
+                    SELECT scotia_id,
+                           {counters}
+                    FROM historico
+                    GROUP BY scotia_id
+                ''')
+            return True, f"historico_stats reconstruida ({total} filas)"
+        except Exception as e:
+            return False, f"Error reconstruyendo historico_stats: {str(e)}"
+
+    _HISTORIAL_PAGE_COLUMNS = '''
+                h.id, h.scotia_id, h.case_id, h.responsible, h.record_date, h.request_date,
+                h.process_access, h.subunit, h.event_description, h.ticket_email, h.app_access_name,
+                h.computer_system_type, h.status, h.closing_date_app, h.closing_date_ticket,
+                h.app_quality, h.confirmation_by_user, h.comment, h.ticket_quality,
+                h.average_time_open_ticket, h.duration_of_access, h.comment_tq, h.general_status_ticket,
+                h.general_status_case, h.sla_app, h.sla_ticket, h.sla_case, h.employee_email,
+                a.logical_access_name, a.description as app_description,
+                hc.email as headcount_email
+    '''
+
+    def get_historial_page(self, before: Optional[Tuple[Any, int]] = None,
+                           after: Optional[Tuple[Any, int]] = None,
+                           page_size: int = 200, conn=None) -> List[Dict[str, Any]]:
+        """
+        Obtiene una página del historial completo con paginación por clave (keyset).
+
+        El orden es (record_date DESC, id DESC). En lugar de OFFSET creciente se
+        parte de la clave de la última fila mostrada, de modo que cada página cuesta
+        lo mismo sin importar cuán lejos se haya desplazado el usuario (usa
+        IX_historico_record_date, que incluye el id del índice clúster).
+
+        Args:
+            before: Clave (record_date, id) de la última fila cargada; retorna las filas más antiguas
+            after: Clave (record_date, id) de la primera fila cargada; retorna las filas más recientes
+            page_size: Número máximo de filas
+            conn: Conexión existente (opcional); si se omite se abre y cierra una propia
+
+        Returns:
+            Filas ordenadas de la más reciente a la más antigua (también con `after`)
+        """
+        where = ''
+        params: List[Any] = []
+        order = 'DESC'
+        if before is not None:
+            where = 'WHERE h.record_date < ? OR (h.record_date = ? AND h.id < ?)'
+            params = [before[0], before[0], before[1]]
+        elif after is not None:
+            # Se recorre hacia adelante desde la primera fila y luego se invierte
+            where = 'WHERE h.record_date > ? OR (h.record_date = ? AND h.id > ?)'
+            params = [after[0], after[0], after[1]]
+            order = 'ASC'
+        params.append(page_size)
+
+        own_conn = conn is None
+        if own_conn:
+            conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {self._HISTORIAL_PAGE_COLUMNS}
+                FROM historico h
+                LEFT JOIN (
+                    SELECT
+                        logical_access_name,
+                        description,
+                        ROW_NUMBER() OVER (PARTITION BY logical_access_name ORDER BY id) as rn
+                    FROM applications
+                ) a ON h.app_access_name = a.logical_access_name AND a.rn = 1
+                LEFT JOIN headcount hc ON h.scotia_id = hc.scotia_id
+                {where}
+                ORDER BY h.record_date {order}, h.id {order}
+                OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY
+            ''', tuple(params))
+            rows = self._rows_to_dicts(cursor, cursor.fetchall())
+        finally:
+            if own_conn:
+                conn.close()
+
+        if order == 'ASC':
+            rows.reverse()
+        logger.debug("Página de historial: %s filas (before=%s, after=%s)", len(rows), before, after)
+        return rows
+
+    def buscar_procesos(self, filtros: Dict[str, Any] = None, limit: Optional[int] = None,
+                        offset: int = 0, conn=None) -> List[Dict[str, Any]]:
         """
         Busca procesos en el historial con filtros opcionales.
         
+        Los filtros se traducen a predicados parametrizados en SQL (ver
+        build_historico_conditions), de modo que solo viajan las filas que coinciden.
+        Los campos libres usan el índice de texto completo si está disponible.
+        
         Args:
-            filtros: Diccionario con filtros de búsqueda
+            filtros: Diccionario con filtros de búsqueda (columnas de historico o alias
+                     de la interfaz como 'sid', 'numero_caso', 'aplicacion')
+            limit: Máximo de registros a retornar (None = todos)
+            offset: Registros a saltar antes de la página (requiere limit)
+            conn: Conexión existente (opcional); si se omite se abre y cierra una propia
             
         Returns:
             Lista de registros del historial que coinciden con los filtros
         """
+        own_conn = conn is None
         try:
-            conn = self.get_connection()
+            if own_conn:
+                conn = self.get_connection()
             cursor = conn.cursor()
             
             # Query base
@@ -2556,54 +2987,62 @@ class AccessManagementService:
                 ) a ON h.app_access_name = a.logical_access_name AND a.rn = 1
             '''
             
-            # Construir WHERE clause basado en filtros
-            where_conditions = []
-            params = []
-            
-            if filtros:
-                for campo, valor in filtros.items():
-                    if valor and valor.strip():
-                        if campo == 'numero_caso':
-                            where_conditions.append("h.case_id LIKE ?")
-                            params.append(f"%{valor}%")
-                        elif campo == 'sid':
-                            where_conditions.append("h.scotia_id LIKE ?")
-                            params.append(f"%{valor}%")
-                        elif campo == 'proceso':
-                            where_conditions.append("h.process_access LIKE ?")
-                            params.append(f"%{valor}%")
-                        elif campo == 'aplicacion':
-                            where_conditions.append("h.app_access_name LIKE ?")
-                            params.append(f"%{valor}%")
-                        elif campo == 'estado':
-                            where_conditions.append("h.status LIKE ?")
-                            params.append(f"%{valor}%")
-                        elif campo == 'fecha':
-                            where_conditions.append("h.record_date LIKE ?")
-                            params.append(f"%{valor}%")
-                        elif campo == 'responsable':
-                            where_conditions.append("h.responsible LIKE ?")
-                            params.append(f"%{valor}%")
-                        elif campo == 'descripcion':
-                            where_conditions.append("h.event_description LIKE ?")
-                            params.append(f"%{valor}%")
-            
-            if where_conditions:
-                query += " WHERE " + " AND ".join(where_conditions)
-            
-            query += " ORDER BY h.record_date DESC"
+            where, params = build_historico_conditions(
+                filtros, alias='h', fulltext=historico_fulltext_mode(conn))
+            query += where + " ORDER BY h.record_date DESC, h.id DESC"
+            if limit is not None:
+                query += " OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
+                params.extend([offset, limit])
             
             cursor.execute(query, params)
             rows = cursor.fetchall()
-            conn.close()
             
             # Convertir a diccionarios
-            columns = [description[0] for description in cursor.description]
-            return [dict(zip(columns, row)) for row in rows]
+            return self._rows_to_dicts(cursor, rows)
             
         except Exception as e:
-            print(f"Error en buscar_procesos: {e}")
+            logger.error("Error en buscar_procesos: %s", e)
             return []
+        finally:
+            if own_conn and conn is not None:
+                conn.close()
+
+    def contar_procesos(self, filtros: Dict[str, Any] = None, conn=None) -> int:
+        """Cuenta los registros del historial que coinciden con los filtros de buscar_procesos"""
+        own_conn = conn is None
+        try:
+            if own_conn:
+                conn = self.get_connection()
+            cursor = conn.cursor()
+            where, params = build_historico_conditions(
+                filtros, fulltext=historico_fulltext_mode(conn))
+            cursor.execute("SELECT COUNT(*) FROM historico" + where, params)
+            return cursor.fetchone()[0]
+        except Exception as e:
+            logger.error("Error en contar_procesos: %s", e)
+            return 0
+        finally:
+            if own_conn and conn is not None:
+                conn.close()
+
+    def buscar_procesos_con_total(self, filtros: Dict[str, Any] = None,
+                                  limit: int = 1000) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Retorna la primera página de coincidencias y el total, con una sola conexión.
+        
+        Returns:
+            Tupla (registros hasta `limit`, total de coincidencias)
+        """
+        conn = self.get_connection()
+        try:
+            resultados = self.buscar_procesos(filtros, limit=limit, conn=conn)
+            total = len(resultados)
+            # Solo hace falta contar si la página vino llena
+            if total >= limit:
+                total = self.contar_procesos(filtros, conn=conn)
+            return resultados, total
+        finally:
+            conn.close()
 
     def assign_accesses(self, scotia_id: str, responsable: str = "Sistema") -> Tuple[bool, str, Dict[str, int]]:
         """
@@ -2651,6 +3090,7 @@ class AccessManagementService:
             case_id = f"CASE-{datetime.now().strftime('%Y%m%d%H%M%S')}-{scotia_id}"
             
             # Procesar accesos por otorgar
+            grant_records = []
             for access_data in to_grant:
                 app_name = access_data.get('app_name', '')
                 if app_name:
@@ -2671,13 +3111,10 @@ class AccessManagementService:
                         'general_status_ticket': 'En Proceso'
                     }
                     
-                    success, message = self.create_historical_record(record_data)
-                    if success:
-                        granted_count += 1
-                    else:
-                        print(f"Error creando registro de otorgamiento: {message}")
+                    grant_records.append(record_data)
             
             # Procesar accesos por revocar
+            revoke_records = []
             for access_data in to_revoke:
                 app_name = access_data.get('app_name', '')
                 if app_name:
@@ -2698,11 +3135,16 @@ class AccessManagementService:
                         'general_status_ticket': 'En Proceso'
                     }
                     
-                    success, message = self.create_historical_record(record_data)
-                    if success:
-                        revoked_count += 1
-                    else:
-                        print(f"Error creando registro de revocación: {message}")
+                    revoke_records.append(record_data)
+            
+            # Otorgamientos y revocaciones en un solo lote, sobre la conexión ya abierta
+            success, message, _ = self.create_historical_records_bulk(grant_records + revoke_records, conn=conn)
+            if success:
+                conn.commit()
+                granted_count = len(grant_records)
+                revoked_count = len(revoke_records)
+            else:
+                logger.error("Error creando registros de conciliación: %s", message)
             
             conn.close()
             
@@ -2775,11 +3217,12 @@ class AccessManagementService:
                     access_data['date'] = record_date
                     to_revoke.append(access_data)
             
+            # Liberar la conexión antes de pedir otra para el empleado
+            conn.close()
+            
             # Obtener información del empleado
             employee = self.get_employee_by_id(scotia_id)
             
-            conn.close()
-            
             return {
                 'success': True,
                 'message': f'Reporte de conciliación generado para {scotia_id}',
@@ -2804,6 +3247,627 @@ class AccessManagementService:
                 'data': {}
             }
 
+    # Modos de sp_GetReconciliationStats
+    RECONCILIATION_STATS_MODES = ('global', 'employee', 'unit')
+
+    def get_reconciliation_stats(self, scotia_id: Optional[str] = None,
+                                 mode: str = 'global') -> List[Dict[str, Any]]:
+        """
+        Conteos de accesos actuales / a otorgar / a revocar con sp_GetReconciliationStats.
+
+        El procedimiento resuelve todos los empleados en una sola pasada set-based,
+        por lo que el modo 'unit' sirve para tableros de toda la compañía.
+
+        Args:
+            scotia_id: Un empleado (ignora `mode`)
+            mode: 'global' (una fila de totales), 'employee' (una fila por empleado
+                  activo) o 'unit' (una fila por unidad_subunidad)
+
+        Returns:
+            Lista de filas como dicts ('scope' identifica cada fila); vacía si hay error
+        """
+        if scotia_id is None and mode not in self.RECONCILIATION_STATS_MODES:
+            logger.error("Modo de estadísticas de conciliación no soportado: %s", mode)
+            return []
+        try:
+            conn = self.get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("EXEC sp_GetReconciliationStats @scotia_id = ?, @mode = ?", (scotia_id, mode))
+                stats = self._rows_to_dicts(cursor, cursor.fetchall())
+            finally:
+                conn.close()
+
+            if stats and stats[0].get('status') == 'error':
+                logger.error("%s", stats[0].get('message'))
+                return []
+            return stats
+
+        except Exception as e:
+            logger.error("Error obteniendo estadísticas de conciliación: %s", e)
+            return []
+
+    # ==============================
+    # CONCILIACIÓN MASIVA (SET-BASED)
+    # ==============================
+
+    MASS_RECONCILIATION_FETCH_SIZE = 2000
+
+    @staticmethod
+    def _build_reconciliation_result(employee: Dict[str, Any], current_rows: List[Tuple],
+                                     required_rows: List[Tuple]) -> Dict[str, Any]:
+        """
+        Calcula current/to_grant/to_revoke de un empleado con la misma lógica
+        que sp_GetAccessReconciliationReport, a partir de filas ya cargadas.
+
+        Las filas tienen la forma (app_name, unit, subunit, position_role,
+        role_name, description, record_date, status).
+        """
+        scotia_id = employee.get('scotia_id')
+        if employee.get('unit') is None or employee.get('position') is None:
+            return {
+                'success': False,
+                'message': 'Empleado no encontrado o inactivo',
+                'data': {'employee': employee}
+            }
+
+        current_access = []
+        for app_name, unit, subunit, position_role, role_name, description, record_date, status in current_rows:
+            current_access.append({
+                'app_name': app_name,
+                'unit': unit,
+                'subunit': subunit,
+                'position_role': position_role,
+                'role_name': role_name,
+                'description': description,
+                'status': status,
+                'date': record_date
+            })
+
+        # El procedimiento compara nombres con la intercalación de la base (sin distinguir
+        # mayúsculas); se normalizan igual que las columnas *_norm
+        norm = AccessManagementService._norm
+        current_names = {norm(row[0]) for row in current_rows if row[0] is not None}
+        required_names = {norm(row[0]) for row in required_rows if row[0] is not None}
+
+        # Requeridos - actuales (DISTINCT como en el procedimiento)
+        to_grant = []
+        seen_grant = set()
+        for app_name, unit, subunit, position_role, role_name, description, _, _ in required_rows:
+            key = (app_name, unit, subunit, position_role, role_name, description)
+            if norm(app_name) in current_names or key in seen_grant:
+                continue
+            seen_grant.add(key)
+            to_grant.append({
+                'app_name': app_name,
+                'unit': unit,
+                'subunit': subunit,
+                'position_role': position_role,
+                'role_name': role_name,
+                'description': description,
+                'status': 'To Grant'
+            })
+
+        # Actuales - requeridos
+        to_revoke = []
+        seen_revoke = set()
+        for app_name, unit, subunit, position_role, role_name, description, record_date, _ in current_rows:
+            key = (app_name, unit, subunit, position_role, role_name, description, record_date)
+            if norm(app_name) in required_names or key in seen_revoke:
+                continue
+            seen_revoke.add(key)
+            to_revoke.append({
+                'app_name': app_name,
+                'unit': unit,
+                'subunit': subunit,
+                'position_role': position_role,
+                'role_name': role_name,
+                'description': description,
+                'status': 'To Revoke',
+                'date': record_date
+            })
+
+        by_name = lambda item: item['app_name'] or ''
+        current_access.sort(key=by_name)
+        to_grant.sort(key=by_name)
+        to_revoke.sort(key=by_name)
+
+        return {
+            'success': True,
+            'message': f'Reporte de conciliación generado para {scotia_id}',
+            'data': {
+                'employee': employee,
+                'current_access': current_access,
+                'to_grant': to_grant,
+                'to_revoke': to_revoke,
+                'summary': {
+                    'current_count': len(current_access),
+                    'to_grant_count': len(to_grant),
+                    'to_revoke_count': len(to_revoke),
+                    'final_count': len(current_access) + len(to_grant) - len(to_revoke)
+                }
+            }
+        }
+
+    def iter_mass_reconciliation(self, unit: Optional[str] = None, scotia_ids: Optional[List[str]] = None,
+                                 conn=None):
+        """
+        Concilia a todo el headcount activo con consultas set-based en lugar de
+        ejecutar sp_GetAccessReconciliationReport una vez por empleado.
+
+        Se hacen dos consultas: los empleados activos y un único UNION ALL con
+        los accesos actuales y requeridos de todos ellos, ordenado por
+        scotia_id. El segundo se lee en bloques con fetchmany y se agrupa por
+        empleado, así que los resultados se entregan a medida que se leen.
+
+        Args:
+            unit: Limitar la conciliación a una unidad (opcional)
+            scotia_ids: Limitar la conciliación a estos empleados (opcional);
+                se consultan en bloques de _IN_CHUNK_SIZE
+            conn: Conexión existente (opcional); si se omite se abre y cierra una propia
+
+        Yields:
+            Dict con el mismo formato que get_access_reconciliation_report
+        """
+        own_conn = conn is None
+        if own_conn:
+            conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            base_filter = " AND hc.unit = ?" if unit else ""
+            base_params = (unit,) if unit else ()
+
+            if scotia_ids is None:
+                yield from self._iter_reconciliation_block(cursor, base_filter, base_params)
+                return
+
+            ids = list(dict.fromkeys(scotia_ids))
+            for start in range(0, len(ids), self._IN_CHUNK_SIZE):
+                chunk = ids[start:start + self._IN_CHUNK_SIZE]
+                placeholders = ', '.join('?' for _ in chunk)
+                yield from self._iter_reconciliation_block(
+                    cursor,
+                    f"{base_filter} AND hc.scotia_id IN ({placeholders})",
+                    base_params + tuple(chunk)
+                )
+        finally:
+            if own_conn:
+                conn.close()
+
+    def _iter_reconciliation_block(self, cursor, filter_sql: str, params: Tuple):
+        """Ejecuta las consultas de conciliación masiva para un filtro sobre headcount (alias hc)"""
+        cursor.execute(f'''
+            SELECT hc.* FROM headcount hc
+            WHERE hc.activo = 1{filter_sql}
+            ORDER BY hc.scotia_id
+        ''', params)
+        employees = self._rows_to_dicts(cursor, cursor.fetchall())
+
+        # Las dos ramas replican los pasos 1 y 2 del procedimiento almacenado
+        cursor.execute(f'''
+            SELECT hc.scotia_id, 'current' AS access_type,
+                   h.app_access_name AS app_name, a.unit, h.subunit,
+                   hc.position AS position_role, a.role_name, a.description,
+                   h.record_date, h.status
+            FROM historico h
+            INNER JOIN headcount hc ON hc.scotia_id = h.scotia_id
+            LEFT JOIN applications a ON h.app_access_name = a.logical_access_name
+            WHERE hc.activo = 1{filter_sql}
+              AND hc.unit IS NOT NULL AND hc.position IS NOT NULL
+              AND h.process_access IN ('onboarding', 'lateral_movement')
+              AND h.app_access_name IS NOT NULL
+              AND h.status = 'Completado'
+            UNION ALL
+            SELECT hc.scotia_id, 'required' AS access_type,
+                   a.logical_access_name AS app_name, a.unit, a.subunit,
+                   a.position_role, a.role_name, a.description,
+                   NULL AS record_date, 'Required' AS status
+            FROM headcount hc
+            INNER JOIN applications a
+                ON a.unidad_subunidad = hc.unidad_subunidad
+               AND a.position_role = hc.position
+            WHERE hc.activo = 1{filter_sql}
+              AND hc.unit IS NOT NULL AND hc.position IS NOT NULL
+              AND a.access_status = 'Activo'
+            ORDER BY scotia_id
+        ''', params + params)
+
+        # Ambas consultas están ordenadas por scotia_id con la misma
+        # intercalación, así que basta con avanzar en paralelo. Son dos sentencias
+        # distintas: las filas de empleados que no están en la primera (p. ej.
+        # activados entre ambas) se descartan para no bloquear el avance.
+        employee_ids = {employee.get('scotia_id') for employee in employees}
+        pending = []
+        exhausted = False
+        for employee in employees:
+            scotia_id = employee.get('scotia_id')
+            current_rows = []
+            required_rows = []
+
+            while True:
+                if not pending and not exhausted:
+                    pending = list(cursor.fetchmany(self.MASS_RECONCILIATION_FETCH_SIZE))
+                    pending.reverse()
+                    exhausted = not pending
+                if pending and pending[-1][0] not in employee_ids:
+                    pending.pop()
+                    continue
+                if not pending or pending[-1][0] != scotia_id:
+                    break
+                row = pending.pop()
+                if row[1] == 'current':
+                    current_rows.append(tuple(row[2:]))
+                else:
+                    required_rows.append(tuple(row[2:]))
+
+            yield self._build_reconciliation_result(employee, current_rows, required_rows)
+
+    def get_mass_reconciliation_report(self, unit: Optional[str] = None,
+                                       only_pending: bool = False) -> Dict[str, Any]:
+        """
+        Ejecuta la conciliación masiva completa y agrega los totales
+
+        Args:
+            unit: Limitar la conciliación a una unidad (opcional)
+            only_pending: Devolver solo empleados con accesos a otorgar o revocar
+
+        Returns:
+            Dict con 'success', 'message', 'data' (lista de reportes) y 'summary'
+        """
+        try:
+            results = []
+            summary = {'employees': 0, 'with_actions': 0, 'errors': 0,
+                       'current_count': 0, 'to_grant_count': 0, 'to_revoke_count': 0}
+
+            for result in self.iter_mass_reconciliation(unit):
+                summary['employees'] += 1
+                if not result['success']:
+                    summary['errors'] += 1
+                    if not only_pending:
+                        results.append(result)
+                    continue
+
+                counts = result['data']['summary']
+                summary['current_count'] += counts['current_count']
+                summary['to_grant_count'] += counts['to_grant_count']
+                summary['to_revoke_count'] += counts['to_revoke_count']
+                has_actions = counts['to_grant_count'] or counts['to_revoke_count']
+                if has_actions:
+                    summary['with_actions'] += 1
+                if has_actions or not only_pending:
+                    results.append(result)
+
+            return {
+                'success': True,
+                'message': f"Conciliación masiva completada: {summary['employees']} empleados, "
+                           f"{summary['with_actions']} requieren acción",
+                'data': results,
+                'summary': summary
+            }
+
+        except Exception as e:
+            return {
+                'success': False,
+                'message': f'Error en conciliación masiva: {str(e)}',
+                'data': [],
+                'summary': {}
+            }
+
+    # ==============================
+    # CONCILIACIÓN INCREMENTAL (MATERIALIZADA)
+    # ==============================
+
+    # Tablas de origen con columna ROWVERSION para detectar cambios
+    _RECONCILIATION_SOURCES = ('headcount', 'applications', 'historico')
+
+    # Empleados afectados entre dos versiones: cambios propios en historico/headcount,
+    # cambios en aplicaciones de su malla o que ya figuran en su conciliación, y los marcados como is_stale
+    _AFFECTED_SCOTIA_IDS_SQL = '''
+        SELECT h.scotia_id FROM historico h
+        WHERE h.row_version > CAST(CAST(? AS BIGINT) AS BINARY(8))
+          AND h.row_version <= CAST(CAST(? AS BIGINT) AS BINARY(8))
+        UNION
+        SELECT hc.scotia_id FROM headcount hc
+        WHERE hc.row_version > CAST(CAST(? AS BIGINT) AS BINARY(8))
+          AND hc.row_version <= CAST(CAST(? AS BIGINT) AS BINARY(8))
+        UNION
+        SELECT hc.scotia_id FROM applications a
+        INNER JOIN headcount hc
+            ON hc.unidad_subunidad = a.unidad_subunidad
+           AND hc.position = a.position_role
+        WHERE a.row_version > CAST(CAST(? AS BIGINT) AS BINARY(8))
+          AND a.row_version <= CAST(CAST(? AS BIGINT) AS BINARY(8))
+        UNION
+        SELECT r.scotia_id FROM reconciliation_results r
+        INNER JOIN applications a ON a.logical_access_name = r.app_name
+        WHERE a.row_version > CAST(CAST(? AS BIGINT) AS BINARY(8))
+          AND a.row_version <= CAST(CAST(? AS BIGINT) AS BINARY(8))
+        UNION
+        SELECT scotia_id FROM reconciliation_state WHERE is_stale = 1
+    '''
+
+    def refresh_reconciliation(self, full: bool = False) -> Tuple[bool, str, Dict[str, int]]:
+        """
+        Actualiza las tablas materializadas reconciliation_state y reconciliation_results.
+
+        En modo incremental solo se recalculan los empleados afectados desde el
+        último watermark (ROWVERSION de headcount, applications e historico, más
+        los marcados como is_stale por eliminaciones). Con full=True se recalcula
+        todo el headcount activo.
+
+        Args:
+            full: Recalcular a todos los empleados en lugar de solo los afectados
+
+        Returns:
+            Tuple[bool, str, Dict[str, int]]: (success, message, counts)
+            counts contiene: {'affected': int, 'recomputed': int, 'removed': int}
+        """
+        counts = {'affected': 0, 'recomputed': 0, 'removed': 0}
+        try:
+            with self.unit_of_work() as conn:
+                cursor = conn.cursor()
+
+                # Límite superior: última versión confirmada (excluye transacciones en curso)
+                cursor.execute("SELECT CAST(MIN_ACTIVE_ROWVERSION() AS BIGINT) - 1")
+                upper_version = cursor.fetchone()[0]
+
+                if full:
+                    cursor.execute('''
+                        SELECT scotia_id FROM headcount WHERE activo = 1
+                        UNION
+                        SELECT scotia_id FROM reconciliation_state
+                    ''')
+                else:
+                    watermarks = self._get_reconciliation_watermarks(cursor)
+                    cursor.execute(self._AFFECTED_SCOTIA_IDS_SQL, (
+                        watermarks['historico'], upper_version,
+                        watermarks['headcount'], upper_version,
+                        watermarks['applications'], upper_version,
+                        watermarks['applications'], upper_version,
+                    ))
+                affected = [row[0] for row in cursor.fetchall()]
+
+                counts = self._recompute_reconciliation(conn, affected)
+                self._save_reconciliation_watermarks(cursor, upper_version)
+
+            mode = "completa" if full else "incremental"
+            return True, (f"Conciliación {mode}: {counts['affected']} empleados afectados, "
+                          f"{counts['recomputed']} recalculados, {counts['removed']} eliminados"), counts
+
+        except Exception as e:
+            return False, f"Error actualizando conciliación materializada: {str(e)}", counts
+
+    def _get_reconciliation_watermarks(self, cursor) -> Dict[str, int]:
+        """Obtiene la última versión procesada de cada tabla de origen (0 si nunca se procesó)"""
+        watermarks = {source: 0 for source in self._RECONCILIATION_SOURCES}
+        cursor.execute('SELECT source_table, last_version FROM reconciliation_watermark')
+        for source_table, last_version in cursor.fetchall():
+            if source_table in watermarks:
+                watermarks[source_table] = last_version
+        return watermarks
+
+    def _save_reconciliation_watermarks(self, cursor, version: int):
+        """Guarda la versión procesada para todas las tablas de origen"""
+        for source in self._RECONCILIATION_SOURCES:
+            cursor.execute(
+                'UPDATE reconciliation_watermark SET last_version = ?, updated_at = ? WHERE source_table = ?',
+                (version, datetime.now(), source)
+            )
+            if cursor.rowcount == 0:
+                cursor.execute(
+                    'INSERT INTO reconciliation_watermark (source_table, last_version, updated_at) VALUES (?, ?, ?)',
+                    (source, version, datetime.now())
+                )
+
+    def _recompute_reconciliation(self, conn, scotia_ids: List[str]) -> Dict[str, int]:
+        """
+        Reemplaza las filas materializadas de los empleados indicados.
+
+        Los empleados que ya no están activos (o no tienen unidad/posición)
+        quedan sin filas en las tablas materializadas.
+        """
+        counts = {'affected': len(scotia_ids), 'recomputed': 0, 'removed': 0}
+        cursor = conn.cursor()
+        try:
+            cursor.fast_executemany = True
+        except AttributeError:
+            pass
+
+        for start in range(0, len(scotia_ids), self._IN_CHUNK_SIZE):
+            chunk = scotia_ids[start:start + self._IN_CHUNK_SIZE]
+            placeholders = ', '.join('?' for _ in chunk)
+
+            # Se consume el bloque completo antes de escribir en la misma conexión
+            results = [r for r in self.iter_mass_reconciliation(scotia_ids=chunk, conn=conn) if r['success']]
+
+            cursor.execute(f'DELETE FROM reconciliation_results WHERE scotia_id IN ({placeholders})', chunk)
+            cursor.execute(f'DELETE FROM reconciliation_state WHERE scotia_id IN ({placeholders})', chunk)
+
+            computed_at = datetime.now()
+            state_rows = []
+            detail_rows = []
+            for result in results:
+                data = result['data']
+                scotia_id = data['employee']['scotia_id']
+                summary = data['summary']
+                state_rows.append((scotia_id, summary['current_count'], summary['to_grant_count'],
+                                   summary['to_revoke_count'], 0, computed_at))
+                for access_type in ('current_access', 'to_grant', 'to_revoke'):
+                    for item in data[access_type]:
+                        detail_rows.append((
+                            scotia_id, 'current' if access_type == 'current_access' else access_type,
+                            item['app_name'], item['unit'], item['subunit'], item['position_role'],
+                            item['role_name'], item['description'], item.get('date'), item['status']
+                        ))
+
+            if state_rows:
+                cursor.executemany('''
+                    INSERT INTO reconciliation_state
+                    (scotia_id, current_count, to_grant_count, to_revoke_count, is_stale, computed_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', state_rows)
+            if detail_rows:
+                cursor.executemany('''
+                    INSERT INTO reconciliation_results
+                    (scotia_id, access_type, app_name, unit, subunit, position_role,
+                     role_name, description, record_date, status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', detail_rows)
+
+            counts['recomputed'] += len(state_rows)
+            counts['removed'] += len(chunk) - len(state_rows)
+
+        return counts
+
+    def _mark_reconciliation_stale(self, cursor, scotia_ids: Optional[List[str]] = None,
+                                   app_name: Optional[str] = None):
+        """
+        Marca empleados para recalcular en la próxima conciliación incremental.
+        Se usa en eliminaciones, que no dejan rastro en las columnas ROWVERSION.
+        """
+        try:
+            for scotia_id in scotia_ids or []:
+                cursor.execute('UPDATE reconciliation_state SET is_stale = 1 WHERE scotia_id = ?', (scotia_id,))
+            if app_name:
+                cursor.execute('''
+                    UPDATE reconciliation_state SET is_stale = 1
+                    WHERE scotia_id IN (SELECT scotia_id FROM reconciliation_results WHERE app_name = ?)
+                ''', (app_name,))
+        except Exception as e:
+            logger.warning("No se pudo marcar la conciliación como pendiente: %s", e)
+
+    def get_materialized_reconciliation_report(self, scotia_id: str) -> Dict[str, Any]:
+        """
+        Lee la conciliación de un empleado desde reconciliation_results, sin recalcularla.
+
+        Returns:
+            Dict con el mismo formato que get_access_reconciliation_report más
+            'computed_at' y 'is_stale' en data
+        """
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                SELECT is_stale, computed_at FROM reconciliation_state WHERE scotia_id = ?
+            ''', (scotia_id,))
+            state = cursor.fetchone()
+            if not state:
+                conn.close()
+                return {
+                    'success': False,
+                    'message': f'No hay conciliación materializada para el empleado {scotia_id}',
+                    'data': {}
+                }
+
+            cursor.execute('''
+                SELECT access_type, app_name, unit, subunit, position_role, role_name,
+                       description, record_date, status
+                FROM reconciliation_results
+                WHERE scotia_id = ?
+                ORDER BY access_type, app_name
+            ''', (scotia_id,))
+            rows = cursor.fetchall()
+            conn.close()
+
+            data = {'current': [], 'to_grant': [], 'to_revoke': []}
+            for access_type, app_name, unit, subunit, position_role, role_name, description, record_date, status in rows:
+                access_data = {
+                    'app_name': app_name,
+                    'unit': unit,
+                    'subunit': subunit,
+                    'position_role': position_role,
+                    'role_name': role_name,
+                    'description': description,
+                    'status': status
+                }
+                if access_type != 'to_grant':
+                    access_data['date'] = record_date
+                data.setdefault(access_type, []).append(access_data)
+
+            current_access, to_grant, to_revoke = data['current'], data['to_grant'], data['to_revoke']
+            return {
+                'success': True,
+                'message': f'Reporte de conciliación materializado para {scotia_id}',
+                'data': {
+                    'employee': self.get_employee_by_id(scotia_id),
+                    'current_access': current_access,
+                    'to_grant': to_grant,
+                    'to_revoke': to_revoke,
+                    'summary': {
+                        'current_count': len(current_access),
+                        'to_grant_count': len(to_grant),
+                        'to_revoke_count': len(to_revoke),
+                        'final_count': len(current_access) + len(to_grant) - len(to_revoke)
+                    },
+                    'is_stale': bool(state[0]),
+                    'computed_at': state[1]
+                }
+            }
+
+        except Exception as e:
+            return {
+                'success': False,
+                'message': f'Error leyendo conciliación materializada: {str(e)}',
+                'data': {}
+            }
+
+    def reconcile_many(self, scotia_ids: List[str], workers: int = 4,
+                       progress_callback: Optional[Callable[[int, int, str, Dict[str, Any]], None]] = None,
+                       cancel_token: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+        """
+        Concilia una lista de empleados en paralelo usando un pool de hilos.
+
+        Cada hilo ejecuta get_access_reconciliation_report con su propia
+        conexión del pool, de modo que el lote deja de estar limitado por la
+        latencia de ida y vuelta de cada llamada. Usar cuando no aplica la
+        conciliación masiva set-based (por ejemplo, una lista arbitraria de SIDs).
+
+        Args:
+            scotia_ids: Lista de IDs de empleados
+            workers: Número de hilos (se limita al tamaño del pool de conexiones)
+            progress_callback: Función (completados, total, scotia_id, resultado);
+                se invoca desde el hilo que llama a reconcile_many
+            cancel_token: threading.Event; al activarse no se inician más conciliaciones
+
+        Returns:
+            Lista de resultados en el mismo orden que scotia_ids. Un error en un
+            empleado no afecta al resto: su resultado queda con success=False.
+        """
+        total = len(scotia_ids)
+        results: List[Optional[Dict[str, Any]]] = [None] * total
+        if not total:
+            return []
+
+        pool = getattr(self.db_manager, 'pool', None)
+        max_workers = max(1, min(workers, total, getattr(pool, 'max_size', workers)))
+
+        def _reconcile(scotia_id: str) -> Dict[str, Any]:
+            if cancel_token is not None and cancel_token.is_set():
+                return {'success': False, 'cancelled': True,
+                        'message': f'Conciliación cancelada para {scotia_id}', 'data': {}}
+            try:
+                return self.get_access_reconciliation_report(scotia_id)
+            except Exception as e:
+                return {'success': False,
+                        'message': f'Error generando reporte de conciliación: {str(e)}', 'data': {}}
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='reconcile') as executor:
+            futures = {executor.submit(_reconcile, scotia_id): index
+                       for index, scotia_id in enumerate(scotia_ids)}
+
+            for completed, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                results[index] = future.result()
+
+                if progress_callback is not None:
+                    try:
+                        progress_callback(completed, total, scotia_ids[index], results[index])
+                    except Exception as e:
+                        logger.error("Error en callback de progreso: %s", e)
+
+        return results
+
     def revoke_specific_access(self, scotia_id: str, app_name: str, access_type: str, responsible: str = "Sistema") -> Dict[str, Any]:
         """
         Revoca un acceso específico (flex staff o manual) de un empleado
@@ -2822,7 +3886,7 @@ class AccessManagementService:
             cursor = conn.cursor()
             
             # Verificar que el acceso existe y es del tipo correcto
-            print(f"DEBUG: Buscando acceso {access_type} para {app_name} del empleado {scotia_id}")
+            logger.debug("Buscando acceso %s para %s del empleado %s", access_type, app_name, scotia_id)
             cursor.execute('''
                 SELECT h.id, h.app_access_name, h.process_access, h.event_description, h.status
                 FROM historico h
@@ -2836,21 +3900,22 @@ class AccessManagementService:
             access_record = cursor.fetchone()
             
             if not access_record:
-                print(f"DEBUG: No se encontró acceso {access_type} con status 'Pendiente'. Verificando otros estados...")
-                # Buscar con otros estados
-                cursor.execute('''
-                    SELECT h.id, h.app_access_name, h.process_access, h.event_description, h.status
-                    FROM historico h
-                    WHERE h.scotia_id = ? 
-                    AND h.app_access_name = ?
-                    AND h.process_access = ?
-                    ORDER BY h.record_date DESC
-                ''', (scotia_id, app_name, access_type))
-                
-                all_records = cursor.fetchall()
-                print(f"DEBUG: Registros encontrados para {app_name} con {access_type}: {len(all_records)}")
-                for record in all_records:
-                    print(f"DEBUG: - ID: {record[0]}, App: {record[1]}, Process: {record[2]}, Status: {record[4]}")
+                # Buscar con otros estados (consulta solo de depuración)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("No se encontró acceso %s con status 'Pendiente'. Verificando otros estados...", access_type)
+                    cursor.execute('''
+                        SELECT h.id, h.app_access_name, h.process_access, h.event_description, h.status
+                        FROM historico h
+                        WHERE h.scotia_id = ? 
+                        AND h.app_access_name = ?
+                        AND h.process_access = ?
+                        ORDER BY h.record_date DESC
+                    ''', (scotia_id, app_name, access_type))
+                    
+                    all_records = cursor.fetchall()
+                    logger.debug("Registros encontrados para %s con %s: %s", app_name, access_type, len(all_records))
+                    for record in all_records:
+                        logger.debug("- ID: %s, App: %s, Process: %s, Status: %s", record[0], record[1], record[2], record[4])
                 
                 return {
                     'success': False,
@@ -2887,6 +3952,8 @@ class AccessManagementService:
                 WHERE id = ?
             ''', (datetime.now(), responsible, access_record[0]))
             
+            self._refresh_current_access(cursor, scotia_id, [app_name])
+            
             conn.commit()
             conn.close()
             
@@ -2949,9 +4016,9 @@ class AccessManagementService:
             return accesses
             
         except Exception as e:
-            print(f"Error obteniendo accesos revocables: {e}")
+            logger.error("Error obteniendo accesos revocables: %s", e)
             return []
 
 
-# Instancia global del servicio
-access_service = AccessManagementService()
+# Instancia global del servicio (se construye en el primer uso)
+access_service = LazyService('access_service', AccessManagementService)
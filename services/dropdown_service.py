@@ -1,288 +1,204 @@
 """
 Servicio para obtener valores únicos de la base de datos para dropdowns
+
+Todos los dominios se cargan con una sola consulta (GROUPING SETS sobre
+applications) y se guardan en caché. La caché vence a los CACHE_TTL_SECONDS y se
+descarta explícitamente cuando cambian applications o headcount (ver
+services.registry.notify_table_changed).
 """
+import logging
+import threading
+import time
 from services.access_management_service import access_service
 import pyodbc
-from typing import List, Dict, Any
+from typing import List, Dict, Optional
+from services.registry import LazyService, subscribe_table_changes
+
+logger = logging.getLogger(__name__)
+
 
 class DropdownService:
     """Servicio para obtener valores únicos de la base de datos"""
-    
+
+    # Dominio (clave de get_all_dropdown_values) -> columna de applications
+    _DOMAIN_COLUMNS = {
+        'units': 'unit',
+        'subunits': 'subunit',
+        'unidad_subunidad': 'unidad_subunidad',
+        'positions': 'position_role',
+        'roles': 'role_name',
+        'jurisdictions': 'jurisdiction',
+        'system_owners': 'system_owner',
+        'categories': 'category',
+        'access_types': 'access_type',
+        'access_statuses': 'access_status',
+        'authentication_methods': 'authentication_method',
+    }
+
+    # Valores por defecto de unidad/subunidad cuando la tabla está vacía o falla la consulta
+    DEFAULT_UNIDAD_SUBUNIDAD = ["Tecnología/Desarrollo", "Tecnología/QA", "Tecnología/Infraestructura",
+                                "Recursos Humanos/RRHH", "Finanzas/Contabilidad", "Marketing/Ventas",
+                                "Operaciones/Logística", "Legal/Compliance"]
+
+    # Segundos que se reutiliza el catálogo antes de volver a consultarlo
+    CACHE_TTL_SECONDS = 300
+
+    # Tablas cuyos cambios invalidan el catálogo
+    SOURCE_TABLES = ('applications', 'headcount')
+
     def __init__(self):
         self.access_service = access_service
-    
+        self._cache: Optional[Dict[str, List[str]]] = None
+        self._cache_loaded_at = 0.0
+        self._cache_generation = 0
+        self._cache_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        subscribe_table_changes(self.SOURCE_TABLES, self._on_table_changed)
+
     def get_connection(self) -> pyodbc.Connection:
         """Obtiene una conexión a la base de datos"""
         return self.access_service.get_connection()
-    
-    def get_unique_units(self) -> List[str]:
-        """Obtiene las unidades únicas de la base de datos"""
+
+    # ==============================
+    # CATÁLOGO EN CACHÉ
+    # ==============================
+
+    @classmethod
+    def _build_catalog_query(cls) -> str:
+        """Una fila (dominio, valor) por valor distinto de cada columna, en un solo recorrido"""
+        columns = list(cls._DOMAIN_COLUMNS.items())
+        domain_case = ' '.join(f"WHEN GROUPING({col}) = 0 THEN '{key}'" for key, col in columns)
+        value_case = ' '.join(f"WHEN GROUPING({col}) = 0 THEN {col}" for key, col in columns)
+        grouping_sets = ', '.join(f"({col})" for key, col in columns)
+        return f"""
+            SELECT d.domain, d.value
+            FROM (
+                SELECT CASE {domain_case} END AS domain,
+                       CASE {value_case} END AS value
+                FROM applications
+                GROUP BY GROUPING SETS ({grouping_sets})
+            ) d
+            WHERE d.value IS NOT NULL AND d.value != ''
+            ORDER BY d.domain, d.value
+        """
+
+    def _load_catalog(self) -> Dict[str, List[str]]:
+        """Consulta todos los dominios en un solo viaje a la base de datos"""
+        catalog = {key: [] for key in self._DOMAIN_COLUMNS}
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT DISTINCT unit 
-                FROM applications 
-                WHERE unit IS NOT NULL AND unit != ''
-                ORDER BY unit
-            """)
-            
-            units = [row[0] for row in cursor.fetchall()]
+            cursor.execute(self._build_catalog_query())
+            for domain, value in cursor.fetchall():
+                if domain in catalog:
+                    catalog[domain].append(value)
+        finally:
             conn.close()
-            
-            return units
-            
-        except Exception as e:
-            print(f"Error obteniendo unidades: {e}")
-            return []
-    
+        return catalog
+
+    def _get_catalog(self, force_refresh: bool = False) -> Optional[Dict[str, List[str]]]:
+        """Retorna el catálogo en caché, recargándolo si venció. None si la consulta falla."""
+        with self._cache_lock:
+            if (not force_refresh and self._cache is not None
+                    and time.monotonic() - self._cache_loaded_at < self.CACHE_TTL_SECONDS):
+                return self._cache
+
+        # Un solo hilo recarga; los demás esperan y reutilizan el resultado
+        with self._load_lock:
+            with self._cache_lock:
+                if (not force_refresh and self._cache is not None
+                        and time.monotonic() - self._cache_loaded_at < self.CACHE_TTL_SECONDS):
+                    return self._cache
+                generation = self._cache_generation
+
+            try:
+                catalog = self._load_catalog()
+            except Exception as e:
+                logger.error("Error obteniendo valores para dropdowns: %s", e)
+                return None
+
+            with self._cache_lock:
+                # Si se invalidó durante la carga, no guardar un catálogo que puede estar desactualizado
+                if generation == self._cache_generation:
+                    self._cache = catalog
+                    self._cache_loaded_at = time.monotonic()
+            return catalog
+
+    def invalidate_cache(self):
+        """Descarta el catálogo en caché (se recarga en la próxima lectura)"""
+        with self._cache_lock:
+            self._cache = None
+            self._cache_generation += 1
+
+    def _on_table_changed(self, table: str):
+        self.invalidate_cache()
+
+    def _get_domain(self, key: str) -> List[str]:
+        catalog = self._get_catalog()
+        values = list(catalog[key]) if catalog is not None else []
+        if key == 'unidad_subunidad' and not values:
+            return list(self.DEFAULT_UNIDAD_SUBUNIDAD)
+        return values
+
+    # ==============================
+    # VALORES POR DOMINIO
+    # ==============================
+
+    def get_unique_units(self) -> List[str]:
+        """Obtiene las unidades únicas de la base de datos"""
+        return self._get_domain('units')
+
     def get_unique_subunits(self) -> List[str]:
         """Obtiene las subunidades únicas de la base de datos"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT DISTINCT subunit 
-                FROM applications 
-                WHERE subunit IS NOT NULL AND subunit != ''
-                ORDER BY subunit
-            """)
-            
-            subunits = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return subunits
-            
-        except Exception as e:
-            print(f"Error obteniendo subunidades: {e}")
-            return []
-    
+        return self._get_domain('subunits')
+
     def get_unique_positions(self) -> List[str]:
         """Obtiene las posiciones únicas de la base de datos"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT DISTINCT position_role 
-                FROM applications 
-                WHERE position_role IS NOT NULL AND position_role != ''
-                ORDER BY position_role
-            """)
-            
-            positions = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return positions
-            
-        except Exception as e:
-            print(f"Error obteniendo posiciones: {e}")
-            return []
-    
+        return self._get_domain('positions')
+
     def get_unique_roles(self) -> List[str]:
         """Obtiene los roles únicos de la base de datos"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT DISTINCT role_name 
-                FROM applications 
-                WHERE role_name IS NOT NULL AND role_name != ''
-                ORDER BY role_name
-            """)
-            
-            roles = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return roles
-            
-        except Exception as e:
-            print(f"Error obteniendo roles: {e}")
-            return []
-    
+        return self._get_domain('roles')
+
     def get_unique_jurisdictions(self) -> List[str]:
         """Obtiene las jurisdicciones únicas de la base de datos"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT DISTINCT jurisdiction 
-                FROM applications 
-                WHERE jurisdiction IS NOT NULL AND jurisdiction != ''
-                ORDER BY jurisdiction
-            """)
-            
-            jurisdictions = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return jurisdictions
-            
-        except Exception as e:
-            print(f"Error obteniendo jurisdicciones: {e}")
-            return []
-    
+        return self._get_domain('jurisdictions')
+
     def get_unique_system_owners(self) -> List[str]:
         """Obtiene los propietarios de sistema únicos de la base de datos"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT DISTINCT system_owner 
-                FROM applications 
-                WHERE system_owner IS NOT NULL AND system_owner != ''
-                ORDER BY system_owner
-            """)
-            
-            owners = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return owners
-            
-        except Exception as e:
-            print(f"Error obteniendo propietarios: {e}")
-            return []
-    
+        return self._get_domain('system_owners')
+
     def get_unique_categories(self) -> List[str]:
         """Obtiene las categorías únicas de la base de datos"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT DISTINCT category 
-                FROM applications 
-                WHERE category IS NOT NULL AND category != ''
-                ORDER BY category
-            """)
-            
-            categories = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return categories
-            
-        except Exception as e:
-            print(f"Error obteniendo categorías: {e}")
-            return []
-    
+        return self._get_domain('categories')
+
     def get_unique_access_types(self) -> List[str]:
         """Obtiene los tipos de acceso únicos de la base de datos"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT DISTINCT access_type 
-                FROM applications 
-                WHERE access_type IS NOT NULL AND access_type != ''
-                ORDER BY access_type
-            """)
-            
-            access_types = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return access_types
-            
-        except Exception as e:
-            print(f"Error obteniendo tipos de acceso: {e}")
-            return []
-    
+        return self._get_domain('access_types')
+
     def get_unique_access_statuses(self) -> List[str]:
         """Obtiene los estados de acceso únicos de la base de datos"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT DISTINCT access_status 
-                FROM applications 
-                WHERE access_status IS NOT NULL AND access_status != ''
-                ORDER BY access_status
-            """)
-            
-            statuses = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return statuses
-            
-        except Exception as e:
-            print(f"Error obteniendo estados: {e}")
-            return []
-    
+        return self._get_domain('access_statuses')
+
     def get_unique_authentication_methods(self) -> List[str]:
         """Obtiene los métodos de autenticación únicos de la base de datos"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT DISTINCT authentication_method 
-                FROM applications 
-                WHERE authentication_method IS NOT NULL AND authentication_method != ''
-                ORDER BY authentication_method
-            """)
-            
-            methods = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return methods
-            
-        except Exception as e:
-            print(f"Error obteniendo métodos de autenticación: {e}")
-            return []
-    
+        return self._get_domain('authentication_methods')
+
     def get_unique_unidad_subunidad(self) -> List[str]:
         """Obtiene las unidades/subunidades únicas de la base de datos (solo de applications)"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Solo obtener de la tabla applications (que tiene las aplicaciones reales)
-            cursor.execute("""
-                SELECT DISTINCT unidad_subunidad 
-                FROM applications 
-                WHERE unidad_subunidad IS NOT NULL AND unidad_subunidad != ''
-                ORDER BY unidad_subunidad
-            """)
-            
-            apps_unidad_subunidad = [row[0] for row in cursor.fetchall()]
-            
-            conn.close()
-            
-            # Si no hay datos en la base de datos, usar valores por defecto
-            if not apps_unidad_subunidad:
-                apps_unidad_subunidad = ["Tecnología/Desarrollo", "Tecnología/QA", "Tecnología/Infraestructura", 
-                                       "Recursos Humanos/RRHH", "Finanzas/Contabilidad", "Marketing/Ventas", 
-                                       "Operaciones/Logística", "Legal/Compliance"]
-            
-            return apps_unidad_subunidad
-            
-        except Exception as e:
-            print(f"Error obteniendo unidades/subunidades: {e}")
-            # En caso de error, devolver valores por defecto
-            return ["Tecnología/Desarrollo", "Tecnología/QA", "Tecnología/Infraestructura", 
-                   "Recursos Humanos/RRHH", "Finanzas/Contabilidad", "Marketing/Ventas", 
-                   "Operaciones/Logística", "Legal/Compliance"]
-    
-    def get_all_dropdown_values(self) -> Dict[str, List[str]]:
-        """Obtiene todos los valores únicos para los dropdowns"""
-        return {
-            'units': self.get_unique_units(),
-            'subunits': self.get_unique_subunits(),
-            'unidad_subunidad': self.get_unique_unidad_subunidad(),
-            'positions': self.get_unique_positions(),
-            'roles': self.get_unique_roles(),
-            'jurisdictions': self.get_unique_jurisdictions(),
-            'system_owners': self.get_unique_system_owners(),
-            'categories': self.get_unique_categories(),
-            'access_types': self.get_unique_access_types(),
-            'access_statuses': self.get_unique_access_statuses(),
-            'authentication_methods': self.get_unique_authentication_methods()
-        }
-
-# Instancia global del servicio
-dropdown_service = DropdownService()
+        return self._get_domain('unidad_subunidad')
+
+    def get_all_dropdown_values(self, force_refresh: bool = False) -> Dict[str, List[str]]:
+        """Obtiene todos los valores únicos para los dropdowns (una consulta, con caché)
+
+        Args:
+            force_refresh: Ignorar la caché y volver a consultar la base de datos
+        """
+        catalog = self._get_catalog(force_refresh=force_refresh)
+        values = {key: list(catalog[key]) if catalog is not None else [] for key in self._DOMAIN_COLUMNS}
+        if not values['unidad_subunidad']:
+            values['unidad_subunidad'] = list(self.DEFAULT_UNIDAD_SUBUNIDAD)
+        return values
+
+# Instancia global del servicio (se construye en el primer uso)
+dropdown_service = LazyService('dropdown_service', DropdownService)
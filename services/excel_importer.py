@@ -1,29 +1,454 @@
 """
 Servicio para importar datos desde Excel a bases de datos
 Soporta SQLite y SQL Server con las mismas tablas
+
+La importación es por lotes: la hoja se limpia y valida con operaciones de
+pandas sobre columnas completas (prepare_import_frame), las filas inválidas se
+separan en un reporte de rechazados y las válidas se cargan de una vez. En SQL
+Server se cargan con fast_executemany a una tabla de staging temporal y un
+único MERGE las aplica sobre headcount, applications o historico.
+
+Para libros grandes, import_from_excel_streaming lee la hoja por bloques con
+openpyxl en modo read_only (ExcelChunkReader) y procesa cada bloque con el mismo
+flujo, de modo que la memoria no crece con el tamaño del archivo.
 """
+import openpyxl
 import pandas as pd
 import sqlite3
+import logging
 import pyodbc
+from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterator
 import sys
 import os
 
 # Agregar el directorio database al path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'database'))
-from config import get_database_connection
+from config import get_database_connection, SQLServerConnection, SQL_SERVER_CONFIG
+from services.registry import notify_table_changed
+
+logger = logging.getLogger(__name__)
+
+
+# ==============================
+# ESPECIFICACIÓN DE LAS TABLAS IMPORTABLES
+# ==============================
+
+# Tipo por columna: entero = VARCHAR(n), None = texto sin límite,
+# 'date' / 'datetime' = fecha, 'bool' = BIT
+IMPORT_SPECS: Dict[str, Dict[str, Any]] = {
+    'headcount': {
+        'columns': {
+            'scotia_id': 20, 'employee': 100, 'full_name': 150, 'email': 150,
+            'position': 100, 'manager': 100, 'senior_manager': 100, 'unit': 100,
+            'unidad_subunidad': 150, 'start_date': 'date', 'ceco': 100, 'skip_level': 100,
+            'cafe_alcides': 100, 'parents': 100, 'personal_email': 150, 'size': 50,
+            'birthday': 'date', 'validacion': 100, 'activo': 'bool',
+        },
+        'required': ('scotia_id', 'employee', 'full_name', 'email'),
+        'key': ('scotia_id',),
+        'defaults': {'activo': True},
+        'update': True,
+    },
+    'applications': {
+        'columns': {
+            'jurisdiction': 100, 'unit': 100, 'subunit': 100, 'unidad_subunidad': 150,
+            'logical_access_name': 150, 'alias': 150, 'path_email_url': 255,
+            'position_role': 100, 'exception_tracking': 255, 'fulfillment_action': 255,
+            'system_owner': 100, 'role_name': 100, 'access_type': 50, 'category': 100,
+            'additional_data': 255, 'ad_code': 100, 'access_status': 50,
+            'last_update_date': 'datetime', 'require_licensing': 255, 'description': None,
+            'authentication_method': 100,
+        },
+        'required': ('logical_access_name',),
+        # Misma identidad que usan las conciliaciones (_build_key)
+        'key': ('logical_access_name', 'unidad_subunidad', 'role_name', 'position_role'),
+        'defaults': {},
+        'update': True,
+    },
+    'historico': {
+        'columns': {
+            'scotia_id': 20, 'employee_email': 150, 'case_id': 100, 'responsible': 100,
+            'record_date': 'datetime', 'request_date': 'date', 'process_access': 50,
+            'subunit': 100, 'event_description': None, 'ticket_email': 150,
+            'app_access_name': 150, 'computer_system_type': 100, 'duration_of_access': 50,
+            'status': 50, 'closing_date_app': 'date', 'closing_date_ticket': 'date',
+            'app_quality': 50, 'confirmation_by_user': 'date', 'comment': None,
+            'comment_tq': None, 'ticket_quality': 50, 'general_status_ticket': 50,
+            'general_status_case': 50, 'average_time_open_ticket': 20, 'sla_app': 50,
+            'sla_ticket': 50, 'sla_case': 50,
+        },
+        'required': ('scotia_id',),
+        # El historial no se modifica: el MERGE solo inserta lo que no existe
+        'key': ('scotia_id', 'case_id', 'app_access_name', 'process_access', 'record_date'),
+        'defaults': {},
+        'update': False,
+    },
+}
+
+_TRUE_VALUES = {'true', '1', 'si', 'sí', 'yes', 'verdadero', 'activo', 'x'}
+_FALSE_VALUES = {'false', '0', 'no', 'falso', 'inactivo'}
+
+# Fechas escritas como texto: se prueban en orden con formato explícito (nunca se infiere).
+# ISO primero; después dd/mm/aaaa (configuración regional de la aplicación) salvo que la
+# hoja demuestre que viene como mm/dd/aaaa (ver resolve_date_formats)
+ISO_DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S.%f')
+DAY_FIRST_DATE_FORMATS = ('%d/%m/%Y', '%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S', '%d-%m-%Y')
+MONTH_FIRST_DATE_FORMATS = ('%m/%d/%Y', '%m/%d/%Y %H:%M', '%m/%d/%Y %H:%M:%S', '%m-%d-%Y')
+DEFAULT_DATE_FORMATS = ISO_DATE_FORMATS + DAY_FIRST_DATE_FORMATS
+
+
+def _normalize_header(header: Any) -> str:
+    """'Full Name' / 'full-name' / ' FULL_NAME ' -> 'full_name'"""
+    return str(header).strip().lower().replace(' ', '_').replace('-', '_')
+
+
+def _cell_text(value: Any) -> Any:
+    """Texto de una celda; los números enteros leídos como float no arrastran '.0'"""
+    if value is None or value is pd.NA:
+        return pd.NA
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return pd.NA
+        if value.is_integer():
+            return str(int(value))
+    return str(value)
+
+
+def _text_dates(values: pd.Series) -> pd.Series:
+    """Solo las celdas de texto no vacías (sin espacios); las celdas fecha de Excel quedan fuera"""
+    text = values[values.map(lambda v: isinstance(v, str))].str.strip()
+    return text[text != '']
+
+
+def _parse_text_dates(text: pd.Series, formats: Tuple[str, ...]) -> pd.Series:
+    """Convierte textos probando cada formato en orden; NaT si ninguno encaja"""
+    parsed = pd.Series(pd.NaT, index=text.index, dtype='datetime64[ns]')
+    for fmt in formats:
+        pending = text[parsed.isna()]
+        if pending.empty:
+            break
+        parsed[pending.index] = pd.to_datetime(pending, format=fmt, errors='coerce')
+    return parsed
+
+
+def parse_import_dates(values: pd.Series, formats: Tuple[str, ...] = DEFAULT_DATE_FORMATS) -> pd.Series:
+    """Fechas de una columna importada: las celdas fecha se respetan y los textos usan `formats`"""
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    native = values[values.notna() & ~values.map(lambda v: isinstance(v, str))]
+    if len(native):
+        parsed[native.index] = pd.to_datetime(native, errors='coerce')
+    text = _text_dates(values)
+    if len(text):
+        parsed[text.index] = _parse_text_dates(text, formats)
+    return parsed
+
+
+def _date_columns(mapping: Dict[Any, str], table_name: str) -> Dict[Any, str]:
+    """Encabezado -> columna, solo para las columnas de fecha de la tabla"""
+    kinds = IMPORT_SPECS[table_name]['columns']
+    return {header: column for header, column in mapping.items() if kinds[column] in ('date', 'datetime')}
+
+
+def _date_format_evidence(df: pd.DataFrame, date_columns: Dict[Any, str],
+                          evidence: Optional[Dict[str, List[bool]]] = None) -> Dict[str, List[bool]]:
+    """Acumula por columna [hay fechas solo válidas dd/mm, hay fechas solo válidas mm/dd]"""
+    evidence = {} if evidence is None else evidence
+    for header, column in date_columns.items():
+        text = _text_dates(df[header])
+        day_first = _parse_text_dates(text, DAY_FIRST_DATE_FORMATS).notna()
+        month_first = _parse_text_dates(text, MONTH_FIRST_DATE_FORMATS).notna()
+        seen = evidence.setdefault(column, [False, False])
+        seen[0] = seen[0] or bool((day_first & ~month_first).any())
+        seen[1] = seen[1] or bool((month_first & ~day_first).any())
+    return evidence
+
+
+def _choose_date_formats(evidence: Dict[str, List[bool]]) -> Dict[str, Tuple[str, ...]]:
+    return {column: ISO_DATE_FORMATS + MONTH_FIRST_DATE_FORMATS if month_only and not day_only
+            else DEFAULT_DATE_FORMATS
+            for column, (day_only, month_only) in evidence.items()}
+
+
+def resolve_date_formats(df: pd.DataFrame, table_name: str,
+                         mapping: Optional[Dict[Any, str]] = None) -> Dict[str, Tuple[str, ...]]:
+    """Decide una sola vez por importación los formatos de texto de cada columna de fecha.
+
+    Por defecto dd/mm/aaaa. Solo se pasa a mm/dd/aaaa si en `df` hay fechas que únicamente
+    son válidas como mes/día (p. ej. '12/25/2024') y ninguna que solo lo sea como día/mes.
+    """
+    if mapping is None:
+        mapping = map_import_columns(list(df.columns), table_name)
+    return _choose_date_formats(_date_format_evidence(df, _date_columns(mapping, table_name)))
+
+
+def map_import_columns(headers: List[Any], table_name: str) -> Dict[Any, str]:
+    """Relaciona los encabezados de la hoja con columnas de la tabla (una sola vez por importación).
+
+    Raises:
+        ValueError: Si la tabla no es importable o faltan columnas requeridas
+    """
+    spec = IMPORT_SPECS.get(table_name)
+    if spec is None:
+        raise ValueError(f"Tabla {table_name} no soportada")
+
+    mapping = {}
+    for header in headers:
+        column = _normalize_header(header)
+        if column in spec['columns'] and column not in mapping.values():
+            mapping[header] = column
+
+    missing = [c for c in spec['required'] if c not in mapping.values()]
+    if missing:
+        raise ValueError(f"Faltan columnas requeridas en la hoja: {', '.join(missing)}")
+    return mapping
+
+
+def prepare_import_frame(df: pd.DataFrame, table_name: str, first_row: int = 2,
+                         mapping: Optional[Dict[Any, str]] = None,
+                         date_formats: Optional[Dict[str, Tuple[str, ...]]] = None
+                         ) -> Tuple[pd.DataFrame, pd.DataFrame, List[str]]:
+    """Limpia, tipa y valida una hoja (o un bloque de filas) para importarla.
+
+    Args:
+        df: Filas leídas de la hoja, con los encabezados originales
+        table_name: Tabla destino (clave de IMPORT_SPECS)
+        first_row: Número de fila en Excel de la primera fila de `df`
+        mapping: Resultado de map_import_columns (se calcula si no se indica)
+        date_formats: Resultado de resolve_date_formats (se calcula si no se indica)
+
+    Returns:
+        (válidas, rechazadas, columnas): las válidas tienen 'source_row' y las columnas de
+        la tabla presentes en la hoja, ya tipadas (None para vacíos); las rechazadas tienen
+        'fila', 'motivo' y los valores originales.
+    """
+    spec = IMPORT_SPECS[table_name]
+    if mapping is None:
+        mapping = map_import_columns(list(df.columns), table_name)
+    if date_formats is None:
+        date_formats = resolve_date_formats(df, table_name, mapping)
+    columns = [c for c in spec['columns'] if c in mapping.values()]
+
+    raw = df[list(mapping)].rename(columns=mapping)
+    raw.insert(0, 'source_row', range(first_row, first_row + len(raw)))
+    raw = raw[raw[columns].notna().any(axis=1)]  # filas completamente vacías
+
+    clean = pd.DataFrame({'source_row': raw['source_row']}, index=raw.index)
+    motivo = pd.Series('', index=raw.index, dtype=object)
+
+    def reject(mask, reason):
+        motivo[mask] = motivo[mask] + reason + '; '
+
+    for column in columns:
+        kind = spec['columns'][column]
+        values = raw[column]
+        if kind in ('date', 'datetime'):
+            parsed = parse_import_dates(values, date_formats.get(column, DEFAULT_DATE_FORMATS))
+            blank = values.isna() | (values.astype('string').str.strip() == '')
+            reject(parsed.isna() & ~blank, f"fecha inválida en {column}")
+            if column in spec['defaults']:
+                parsed = parsed.fillna(spec['defaults'][column])
+            clean[column] = parsed.dt.date if kind == 'date' else parsed
+        elif kind == 'bool':
+            text = values.map(_cell_text).astype('string').str.strip().str.lower()
+            parsed = pd.Series(pd.NA, index=raw.index, dtype=object)
+            parsed[text.isin(_TRUE_VALUES).fillna(False)] = True
+            parsed[text.isin(_FALSE_VALUES).fillna(False)] = False
+            blank = text.isna() | (text == '')
+            reject(parsed.isna() & ~blank, f"valor no booleano en {column}")
+            if column in spec['defaults']:
+                parsed[blank] = spec['defaults'][column]
+            clean[column] = parsed
+        else:
+            text = values.map(_cell_text).astype('string').str.strip()
+            text = text.mask(text == '')
+            if kind is not None:
+                reject((text.str.len() > kind).fillna(False), f"{column} supera {kind} caracteres")
+            clean[column] = text
+
+    for column in spec['required']:
+        reject(clean[column].isna(), f"falta {column}")
+
+    valid_mask = motivo == ''
+    duplicated = clean[valid_mask].duplicated(subset=list(c for c in spec['key'] if c in columns),
+                                              keep='last')
+    motivo[duplicated[duplicated].index] = "fila duplicada en el archivo (se importa la última); "
+
+    rejected = raw[motivo != ''].rename(columns={'source_row': 'fila'})
+    rejected.insert(1, 'motivo', motivo[motivo != ''].str.rstrip('; '))
+    valid = clean[motivo == ''].astype(object).where(clean[motivo == ''].notna(), None)
+    return valid, rejected.reset_index(drop=True), columns
+
+
+def write_rejected_report(rejected: pd.DataFrame, path: str) -> str:
+    """Guarda el reporte de filas rechazadas (.xlsx o .csv según la extensión)"""
+    if str(path).lower().endswith('.xlsx'):
+        rejected.to_excel(path, index=False)
+    else:
+        rejected.to_csv(path, index=False, encoding='utf-8-sig')
+    return str(path)
+
+
+def default_rejected_path(excel_path: str, table_name: str) -> str:
+    """Ruta por defecto del reporte de rechazados: junto al archivo importado"""
+    source = Path(excel_path)
+    return str(source.with_name(f"{source.stem}_{table_name}_rechazados.csv"))
+
+
+def _import_summary(records: int, rejected_count: int, report_path: Optional[str]) -> str:
+    message = f"Importación exitosa: {records} registros importados"
+    if rejected_count:
+        message += f", {rejected_count} filas rechazadas"
+        if report_path:
+            message += f" (ver {report_path})"
+    return message
+
+
+# ==============================
+# IMPORTACIÓN EN STREAMING
+# ==============================
+
+# Filas por bloque al leer la hoja en streaming
+IMPORT_CHUNK_SIZE = 5000
+
+# progress_callback(filas_leidas, total_filas_estimado o None, importadas, rechazadas)
+ProgressCallback = Callable[[int, Optional[int], int, int], None]
+
+
+class ExcelChunkReader:
+    """Lee una hoja por bloques de DataFrame con openpyxl en modo read_only (memoria constante)"""
+
+    def __init__(self, excel_path: str, sheet_name: Optional[str] = None, skip_rows: int = 0,
+                 chunk_size: int = IMPORT_CHUNK_SIZE):
+        self.excel_path = excel_path
+        self.sheet_name = sheet_name
+        self.skip_rows = skip_rows
+        self.chunk_size = chunk_size
+        self.total_rows: Optional[int] = None  # se conoce al empezar a iterar (si la hoja lo declara)
+
+    def __iter__(self) -> Iterator[Tuple[pd.DataFrame, int]]:
+        """Genera (bloque con los encabezados de la hoja, fila de Excel de su primera fila)"""
+        return self._read_chunks()
+
+    def iter_columns(self, select: Callable[[List[Any]], List[Any]]) -> Iterator[Tuple[pd.DataFrame, int]]:
+        """Como iterar el lector, pero solo con los encabezados que elija `select(encabezados)`"""
+        return self._read_chunks(select)
+
+    def _read_chunks(self, select: Optional[Callable[[List[Any]], List[Any]]] = None
+                     ) -> Iterator[Tuple[pd.DataFrame, int]]:
+        workbook = openpyxl.load_workbook(self.excel_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook[self.sheet_name] if self.sheet_name else workbook.active
+            header_row = self.skip_rows + 1
+            if sheet.max_row:
+                self.total_rows = max(0, sheet.max_row - header_row)
+
+            rows = sheet.iter_rows(min_row=header_row, values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            headers = [h if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+            width = len(headers)
+            if select is not None:
+                wanted = set(select(headers))
+                positions = [i for i, h in enumerate(headers) if h in wanted]
+                headers = [headers[i] for i in positions]
+
+            first_row = header_row + 1
+            buffer = []
+            for row in rows:
+                row = row[:width] if len(row) >= width else row + (None,) * (width - len(row))
+                buffer.append(row if select is None else tuple(row[i] for i in positions))
+                if len(buffer) >= self.chunk_size:
+                    yield pd.DataFrame(buffer, columns=headers, dtype=object), first_row
+                    first_row += len(buffer)
+                    buffer = []
+            if buffer:
+                yield pd.DataFrame(buffer, columns=headers, dtype=object), first_row
+        finally:
+            workbook.close()
+
+
+def resolve_sheet_date_formats(reader: ExcelChunkReader, table_name: str) -> Dict[str, Tuple[str, ...]]:
+    """Formatos de fecha decididos con toda la hoja, en una pasada previa que solo lee las
+    columnas de fecha (resolve_date_formats sobre el primer bloque podría fijar dd/mm en una
+    hoja mm/dd cuyas primeras fechas son ambiguas)"""
+    date_columns: Dict[Any, str] = {}
+
+    def select(headers: List[Any]) -> List[Any]:
+        date_columns.update(_date_columns(map_import_columns(headers, table_name), table_name))
+        return list(date_columns)
+
+    evidence: Dict[str, List[bool]] = {}
+    for chunk, _ in reader.iter_columns(select):
+        if not date_columns:
+            break
+        _date_format_evidence(chunk, date_columns, evidence)
+    return _choose_date_formats(evidence)
+
+
+def stream_import_chunks(reader: ExcelChunkReader, table_name: str,
+                         load_chunk: Callable[[pd.DataFrame, List[str]], int],
+                         report_path: str,
+                         progress_callback: Optional[ProgressCallback] = None) -> Dict[str, int]:
+    """Valida y carga cada bloque de `reader` con `load_chunk(válidas, columnas) -> importadas`.
+
+    Las filas rechazadas se agregan al reporte CSV `report_path` a medida que aparecen.
+    Los formatos de fecha se deciden antes con resolve_sheet_date_formats, iguales para todos
+    los bloques.
+
+    Returns:
+        {'read': filas leídas, 'imported': importadas, 'rejected': rechazadas}
+    """
+    counts = {'read': 0, 'imported': 0, 'rejected': 0}
+    mapping = None
+    date_formats = resolve_sheet_date_formats(reader, table_name)
+    report_header = None
+    for chunk, first_row in reader:
+        if mapping is None:
+            mapping = map_import_columns(list(chunk.columns), table_name)
+        valid, rejected, columns = prepare_import_frame(chunk, table_name, first_row=first_row,
+                                                        mapping=mapping, date_formats=date_formats)
+
+        counts['imported'] += load_chunk(valid, columns)
+        counts['read'] += len(chunk)
+        if len(rejected):
+            if report_header is None:
+                report_header = list(rejected.columns)
+                rejected.to_csv(report_path, index=False, encoding='utf-8-sig')
+            else:
+                rejected.reindex(columns=report_header).to_csv(
+                    report_path, mode='a', header=False, index=False, encoding='utf-8')
+            counts['rejected'] += len(rejected)
+
+        if progress_callback is not None:
+            try:
+                progress_callback(counts['read'], reader.total_rows, counts['imported'], counts['rejected'])
+            except Exception as e:
+                logger.error("Error en callback de progreso: %s", e)
+    return counts
+
+
+def _streaming_report_path(excel_path: str, table_name: str, rejected_path: Optional[str]) -> str:
+    """El reporte en streaming se escribe por bloques, siempre como CSV"""
+    return str(Path(rejected_path).with_suffix('.csv')) if rejected_path else default_rejected_path(excel_path, table_name)
 
 
 class ExcelToSQLiteImporter:
     """Importador de Excel a SQLite"""
     
-    def __init__(self):
-        self.db_manager = get_database_connection()
-        self.connection = self.db_manager.get_connection()
+    def __init__(self, db_path: str = None):
+        if db_path:
+            self.db_manager = None
+            self.connection = sqlite3.connect(db_path)
+        else:
+            self.db_manager = get_database_connection()
+            self.connection = self.db_manager.get_connection()
+        self.last_rejected = pd.DataFrame()
     
     def import_from_excel(self, excel_path: str, sheet_name: str, table_name: str, 
-                         skip_rows: int = 0) -> Tuple[bool, str, int]:
+                         skip_rows: int = 0, rejected_path: Optional[str] = None) -> Tuple[bool, str, int]:
         """
         Importa datos desde Excel a SQLite
         
@@ -32,146 +457,84 @@ class ExcelToSQLiteImporter:
             sheet_name: Nombre de la hoja
             table_name: Nombre de la tabla destino
             skip_rows: Filas a saltar desde el inicio
+            rejected_path: Dónde guardar el reporte de filas rechazadas
+                           (por defecto junto al archivo Excel)
             
         Returns:
             Tuple[success, message, records_imported]
         """
         try:
-            # Leer Excel
-            df = pd.read_excel(excel_path, sheet_name=sheet_name, skiprows=skip_rows)
+            df = pd.read_excel(excel_path, sheet_name=sheet_name, skiprows=skip_rows, dtype=object)
+            valid, rejected, columns = prepare_import_frame(df, table_name, first_row=skip_rows + 2)
+            records_imported = self._load_rows(table_name, valid, columns)
             
-            # Limpiar datos
-            df = df.dropna(how='all')  # Eliminar filas completamente vacías
-            df = df.fillna('')  # Llenar valores nulos con string vacío
+            self.connection.commit()
+            if table_name in ('headcount', 'applications') and records_imported:
+                notify_table_changed(table_name)
             
-            # Convertir columnas a string para evitar problemas de tipos
-            for col in df.columns:
-                df[col] = df[col].astype(str)
+            self.last_rejected = rejected
+            report_path = None
+            if len(rejected):
+                report_path = write_rejected_report(
+                    rejected, rejected_path or default_rejected_path(excel_path, table_name))
+            return True, _import_summary(records_imported, len(rejected), report_path), records_imported
             
-            # Insertar datos
-            cursor = self.connection.cursor()
-            records_imported = 0
+        except Exception as e:
+            self.connection.rollback()
+            return False, f"Error importando desde Excel: {str(e)}", 0
+    
+    def import_from_excel_streaming(self, excel_path: str, sheet_name: str, table_name: str,
+                                    skip_rows: int = 0, rejected_path: Optional[str] = None,
+                                    chunk_size: int = IMPORT_CHUNK_SIZE,
+                                    progress_callback: Optional[ProgressCallback] = None) -> Tuple[bool, str, int]:
+        """
+        Importa una hoja grande por bloques de `chunk_size` filas (memoria constante).
+        
+        Cada bloque se valida y se inserta al leerse; el commit es uno solo al final.
+        El reporte de rechazados se escribe como CSV a medida que avanza.
+        
+        Args:
+            progress_callback: Función (filas_leidas, total_estimado, importadas, rechazadas)
+                               llamada después de cada bloque
             
-            for _, row in df.iterrows():
-                try:
-                    # Preparar datos para inserción
-                    data_dict = row.to_dict()
-                    
-                    if table_name == 'headcount':
-                        self._insert_headcount(cursor, data_dict)
-                    elif table_name == 'applications':
-                        self._insert_application(cursor, data_dict)
-                    elif table_name == 'historico':
-                        self._insert_historico(cursor, data_dict)
-                    else:
-                        return False, f"Tabla {table_name} no soportada", 0
-                    
-                    records_imported += 1
-                    
-                except Exception as e:
-                    print(f"Error insertando fila: {e}")
-                    continue
+        Returns:
+            Tuple[success, message, records_imported]
+        """
+        try:
+            reader = ExcelChunkReader(excel_path, sheet_name, skip_rows, chunk_size)
+            report_path = _streaming_report_path(excel_path, table_name, rejected_path)
+            counts = stream_import_chunks(
+                reader, table_name,
+                lambda valid, columns: self._load_rows(table_name, valid, columns),
+                report_path, progress_callback)
             
             self.connection.commit()
-            return True, f"Importación exitosa: {records_imported} registros importados", records_imported
+            if table_name in ('headcount', 'applications') and counts['imported']:
+                notify_table_changed(table_name)
+            return True, _import_summary(counts['imported'], counts['rejected'],
+                                         report_path if counts['rejected'] else None), counts['imported']
             
         except Exception as e:
+            self.connection.rollback()
             return False, f"Error importando desde Excel: {str(e)}", 0
     
-    def _insert_headcount(self, cursor, data: Dict[str, Any]) -> None:
-        """Inserta datos en la tabla headcount"""
-        cursor.execute('''
-            INSERT OR REPLACE INTO headcount 
-            (scotia_id, employee, full_name, email, position, manager, senior_manager, 
-             unit, start_date, ceco, skip_level, cafe_alcides, parents, personal_email, 
-             size, birthday, validacion, activo)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data.get('scotia_id', ''),
-            data.get('employee', ''),
-            data.get('full_name', ''),
-            data.get('email', ''),
-            data.get('position', ''),
-            data.get('manager', ''),
-            data.get('senior_manager', ''),
-            data.get('unit', ''),
-            data.get('start_date', ''),
-            data.get('ceco', ''),
-            data.get('skip_level', ''),
-            data.get('cafe_alcides', ''),
-            data.get('parents', ''),
-            data.get('personal_email', ''),
-            data.get('size', ''),
-            data.get('birthday', ''),
-            data.get('validacion', ''),
-            data.get('activo', 'True').lower() == 'true'
-        ))
-    
-    def _insert_application(self, cursor, data: Dict[str, Any]) -> None:
-        """Inserta datos en la tabla applications"""
-        cursor.execute('''
-            INSERT OR REPLACE INTO applications 
-            (jurisdiction, unit, subunit, logical_access_name, alias, path_email_url, 
-             position_role, exception_tracking, fulfillment_action, system_owner, 
-             role_name, access_type, category, additional_data, ad_code, access_status, 
-             last_update_date, require_licensing, description, authentication_method)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data.get('jurisdiction', ''),
-            data.get('unit', ''),
-            data.get('subunit', ''),
-            data.get('logical_access_name', ''),
-            data.get('alias', ''),
-            data.get('path_email_url', ''),
-            data.get('position_role', ''),
-            data.get('exception_tracking', ''),
-            data.get('fulfillment_action', ''),
-            data.get('system_owner', ''),
-            data.get('role_name', ''),
-            data.get('access_type', ''),
-            data.get('category', ''),
-            data.get('additional_data', ''),
-            data.get('ad_code', ''),
-            data.get('access_status', ''),
-            data.get('last_update_date', ''),
-            data.get('require_licensing', ''),
-            data.get('description', ''),
-            data.get('authentication_method', '')
-        ))
-    
-    def _insert_historico(self, cursor, data: Dict[str, Any]) -> None:
-        """Inserta datos en la tabla historico"""
-        cursor.execute('''
-            INSERT OR REPLACE INTO historico 
-            (scotia_id, case_id, responsible, record_date, request_date, process_access, 
-             sid, area, subunit, event_description, ticket_email, app_access_name, 
-             computer_system_type, status, closing_date_app, closing_date_ticket, 
-             app_quality, confirmation_by_user, comment, ticket_quality, 
-             average_time_open_ticket)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data.get('scotia_id', ''),
-            data.get('case_id', ''),
-            data.get('responsible', ''),
-            data.get('record_date', ''),
-            data.get('request_date', ''),
-            data.get('process_access', ''),
-            data.get('sid', ''),
-            data.get('area', ''),
-            data.get('subunit', ''),
-            data.get('event_description', ''),
-            data.get('ticket_email', ''),
-            data.get('app_access_name', ''),
-            data.get('computer_system_type', ''),
-            data.get('status', ''),
-            data.get('closing_date_app', ''),
-            data.get('closing_date_ticket', ''),
-            data.get('app_quality', ''),
-            data.get('confirmation_by_user', ''),
-            data.get('comment', ''),
-            data.get('ticket_quality', ''),
-            data.get('average_time_open_ticket', '')
-        ))
+    def _load_rows(self, table_name: str, valid: pd.DataFrame, columns: List[str]) -> int:
+        """Inserta un lote de filas válidas con una sola sentencia"""
+        if valid.empty:
+            return 0
+        # SQLite guarda las fechas como texto ISO
+        rows = valid[columns].copy()
+        for column in columns:
+            if IMPORT_SPECS[table_name]['columns'][column] in ('date', 'datetime'):
+                rows[column] = rows[column].map(lambda v: None if v is None else str(v))
+        
+        cursor = self.connection.cursor()
+        placeholders = ', '.join('?' for _ in columns)
+        cursor.executemany(
+            f"INSERT OR REPLACE INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})",
+            rows.itertuples(index=False, name=None)
+        )
+        return len(valid)
     
     def close(self):
         """Cierra la conexión"""
@@ -190,21 +553,25 @@ class ExcelToSQLServerImporter:
         self.password = password
         self.trusted_connection = trusted_connection
         self.connection = None
+        self.last_rejected = pd.DataFrame()
         self._connect()
     
     def _connect(self):
-        """Establece conexión con SQL Server"""
+        """Establece conexión con SQL Server (tomada del pool compartido)"""
         try:
-            if self.trusted_connection:
-                connection_string = f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={self.server};DATABASE={self.database};Trusted_Connection=yes;"
-            else:
-                connection_string = f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={self.server};DATABASE={self.database};UID={self.username};PWD={self.password};"
-            
-            self.connection = pyodbc.connect(connection_string)
-            print("✅ Conexión a SQL Server establecida")
+            config = {
+                **SQL_SERVER_CONFIG,
+                'server': self.server,
+                'database': self.database,
+                'username': self.username or '',
+                'password': self.password or '',
+                'trusted_connection': 'yes' if self.trusted_connection else 'no'
+            }
+            self.connection = SQLServerConnection(config).get_connection()
+            logger.info("Conexión a SQL Server establecida")
             
         except Exception as e:
-            print(f"❌ Error conectando a SQL Server: {e}")
+            logger.error("Error conectando a SQL Server: %s", e)
             raise
     
     def create_tables(self) -> Tuple[bool, str]:
@@ -300,176 +667,221 @@ class ExcelToSQLServerImporter:
         except Exception as e:
             return False, f"Error creando tablas: {str(e)}"
     
+    # ==============================
+    # IMPORTACIÓN POR LOTES (STAGING + MERGE)
+    # ==============================
+    
+    @staticmethod
+    def _staging_table(table_name: str) -> str:
+        return f"#stg_{table_name}"
+    
+    @classmethod
+    def build_staging_sql(cls, table_name: str, columns: List[str]) -> str:
+        """Crea la tabla de staging con los mismos tipos que la tabla destino.
+        
+        Se ejecuta sin parámetros (SQLExecDirect) para que la tabla temporal viva en la
+        sesión y no solo dentro de un sp_prepexec.
+        """
+        staging = cls._staging_table(table_name)
+        return f"""
+            IF OBJECT_ID('tempdb..{staging}') IS NOT NULL DROP TABLE {staging};
+            SELECT TOP 0 CAST(0 AS INT) AS source_row, {', '.join(columns)}
+            INTO {staging}
+            FROM {table_name};
+        """
+    
+    @classmethod
+    def build_merge_sql(cls, table_name: str, columns: List[str]) -> str:
+        """MERGE de la tabla de staging sobre la tabla destino.
+        
+        Si una clave aparece varias veces en el staging se aplica la última fila del
+        archivo. Las columnas de la clave que admiten vacíos se comparan de forma
+        segura ante NULL. Devuelve una fila (insertados, actualizados).
+        """
+        spec = IMPORT_SPECS[table_name]
+        staging = cls._staging_table(table_name)
+        keys = [c for c in spec['key'] if c in columns]
+        cols = ', '.join(columns)
+        
+        conditions = []
+        for key in keys:
+            if key in spec['required']:
+                conditions.append(f"target.{key} = source.{key}")
+            else:
+                conditions.append(f"(target.{key} = source.{key} OR (target.{key} IS NULL AND source.{key} IS NULL))")
+        
+        matched = ''
+        update_columns = [c for c in columns if c not in keys]
+        if spec['update'] and update_columns:
+            matched = "WHEN MATCHED THEN UPDATE SET " + ', '.join(f"{c} = source.{c}" for c in update_columns)
+        
+        return f"""
+            SET NOCOUNT ON;
+            DECLARE @acciones TABLE (accion NVARCHAR(10));
+            WITH source AS (
+                SELECT {cols}
+                FROM (
+                    SELECT {cols},
+                           ROW_NUMBER() OVER (PARTITION BY {', '.join(keys)} ORDER BY source_row DESC) AS rn
+                    FROM {staging}
+                ) s
+                WHERE rn = 1
+            )
+            MERGE {table_name} WITH (HOLDLOCK) AS target
+            USING source
+            ON {' AND '.join(conditions)}
+            {matched}
+            WHEN NOT MATCHED BY TARGET THEN
+                INSERT ({cols}) VALUES ({', '.join(f'source.{c}' for c in columns)})
+            OUTPUT $action INTO @acciones;
+            SELECT COUNT(CASE WHEN accion = 'INSERT' THEN 1 END),
+                   COUNT(CASE WHEN accion = 'UPDATE' THEN 1 END)
+            FROM @acciones;
+        """
+    
+    def _stage_rows(self, cursor, table_name: str, valid: pd.DataFrame, columns: List[str]) -> int:
+        """Carga un lote de filas válidas en la tabla de staging con fast_executemany"""
+        if valid.empty:
+            return 0
+        try:
+            cursor.fast_executemany = True
+        except AttributeError:
+            pass
+        fields = ['source_row'] + columns
+        cursor.executemany(
+            f"INSERT INTO {self._staging_table(table_name)} ({', '.join(fields)}) "
+            f"VALUES ({', '.join('?' for _ in fields)})",
+            list(valid[fields].itertuples(index=False, name=None))
+        )
+        return len(valid)
+    
+    def _merge_staging(self, cursor, table_name: str, columns: List[str],
+                       keep_staging: bool = False) -> Tuple[int, int]:
+        """Aplica el staging sobre la tabla destino y elimina la tabla temporal
+        (o solo la vacía, con keep_staging, para cargar el siguiente bloque)"""
+        cursor.execute(self.build_merge_sql(table_name, columns))
+        row = cursor.fetchone()
+        if keep_staging:
+            cursor.execute(f"TRUNCATE TABLE {self._staging_table(table_name)}")
+        else:
+            cursor.execute(f"DROP TABLE {self._staging_table(table_name)}")
+        return (row[0], row[1]) if row else (0, 0)
+    
+    def _after_import(self, table_name: str, records_imported: int):
+        """Avisa del cambio y mantiene las proyecciones que dependen de la tabla"""
+        if not records_imported:
+            return
+        if table_name in ('headcount', 'applications'):
+            notify_table_changed(table_name)
+        # La carga directa a historico no pasa por el servicio: reconstruir la proyección
+        if table_name == 'historico':
+            from services.access_management_service import access_service
+            rebuilt, rebuild_message = access_service.rebuild_current_access()
+            if not rebuilt:
+                logger.warning("%s", rebuild_message)
+    
     def import_from_excel(self, excel_path: str, sheet_name: str, table_name: str, 
-                         skip_rows: int = 0) -> Tuple[bool, str, int]:
+                         skip_rows: int = 0, rejected_path: Optional[str] = None) -> Tuple[bool, str, int]:
         """
         Importa datos desde Excel a SQL Server
         
+        La hoja se valida completa con pandas, las filas válidas se cargan en una tabla
+        de staging y un único MERGE inserta o actualiza la tabla destino, todo en una
+        transacción. Las filas rechazadas (con el motivo) quedan en self.last_rejected
+        y en un reporte junto al archivo importado.
+        
         Args:
             excel_path: Ruta del archivo Excel
             sheet_name: Nombre de la hoja
             table_name: Nombre de la tabla destino
             skip_rows: Filas a saltar desde el inicio
+            rejected_path: Dónde guardar el reporte de filas rechazadas (.csv o .xlsx)
             
         Returns:
             Tuple[success, message, records_imported]
         """
         try:
-            # Leer Excel
-            df = pd.read_excel(excel_path, sheet_name=sheet_name, skiprows=skip_rows)
+            df = pd.read_excel(excel_path, sheet_name=sheet_name, skiprows=skip_rows, dtype=object)
+            valid, rejected, columns = prepare_import_frame(df, table_name, first_row=skip_rows + 2)
             
-            # Limpiar datos
-            df = df.dropna(how='all')
-            df = df.fillna('')
+            cursor = self.connection.cursor()
+            cursor.execute(self.build_staging_sql(table_name, columns))
+            self._stage_rows(cursor, table_name, valid, columns)
+            inserted, updated = self._merge_staging(cursor, table_name, columns)
+            self.connection.commit()
             
-            # Convertir columnas a string
-            for col in df.columns:
-                df[col] = df[col].astype(str)
+            records_imported = inserted + updated
+            self._after_import(table_name, records_imported)
+            logger.info("Importación a %s: %s insertados, %s actualizados, %s rechazados",
+                        table_name, inserted, updated, len(rejected))
             
-            # Insertar datos
-            cursor = self.connection.cursor()
-            records_imported = 0
+            self.last_rejected = rejected
+            report_path = None
+            if len(rejected):
+                report_path = write_rejected_report(
+                    rejected, rejected_path or default_rejected_path(excel_path, table_name))
+            return True, _import_summary(records_imported, len(rejected), report_path), records_imported
             
-            for _, row in df.iterrows():
-                try:
-                    data_dict = row.to_dict()
-                    
-                    if table_name == 'headcount':
-                        self._insert_headcount_sqlserver(cursor, data_dict)
-                    elif table_name == 'applications':
-                        self._insert_application_sqlserver(cursor, data_dict)
-                    elif table_name == 'historico':
-                        self._insert_historico_sqlserver(cursor, data_dict)
-                    else:
-                        return False, f"Tabla {table_name} no soportada", 0
-                    
-                    records_imported += 1
-                    
-                except Exception as e:
-                    print(f"Error insertando fila: {e}")
-                    continue
+        except Exception as e:
+            try:
+                self.connection.rollback()
+            except Exception:
+                pass
+            return False, f"Error importando desde Excel: {str(e)}", 0
+    
+    def import_from_excel_streaming(self, excel_path: str, sheet_name: str, table_name: str,
+                                    skip_rows: int = 0, rejected_path: Optional[str] = None,
+                                    chunk_size: int = IMPORT_CHUNK_SIZE,
+                                    progress_callback: Optional[ProgressCallback] = None) -> Tuple[bool, str, int]:
+        """
+        Importa una hoja grande por bloques de `chunk_size` filas (memoria constante).
+        
+        Cada bloque se valida, se carga en la tabla de staging y se aplica con MERGE
+        antes de leer el siguiente; el staging se vacía entre bloques y el commit es
+        uno solo al final. El reporte de rechazados se escribe como CSV a medida que avanza.
+        
+        Args:
+            progress_callback: Función (filas_leidas, total_estimado, importadas, rechazadas)
+                               llamada después de cada bloque
+            
+        Returns:
+            Tuple[success, message, records_imported]
+        """
+        cursor = self.connection.cursor()
+        staged_columns: List[str] = []
+        
+        def load_chunk(valid: pd.DataFrame, columns: List[str]) -> int:
+            if not staged_columns:
+                cursor.execute(self.build_staging_sql(table_name, columns))
+                staged_columns.extend(columns)
+            if valid.empty:
+                return 0
+            self._stage_rows(cursor, table_name, valid, columns)
+            inserted, updated = self._merge_staging(cursor, table_name, columns, keep_staging=True)
+            return inserted + updated
+        
+        try:
+            reader = ExcelChunkReader(excel_path, sheet_name, skip_rows, chunk_size)
+            report_path = _streaming_report_path(excel_path, table_name, rejected_path)
+            counts = stream_import_chunks(reader, table_name, load_chunk, report_path, progress_callback)
             
+            if staged_columns:
+                cursor.execute(f"DROP TABLE {self._staging_table(table_name)}")
             self.connection.commit()
-            return True, f"Importación exitosa: {records_imported} registros importados", records_imported
+            
+            self._after_import(table_name, counts['imported'])
+            logger.info("Importación en streaming a %s: %s filas leídas, %s importadas, %s rechazadas",
+                        table_name, counts['read'], counts['imported'], counts['rejected'])
+            return True, _import_summary(counts['imported'], counts['rejected'],
+                                         report_path if counts['rejected'] else None), counts['imported']
             
         except Exception as e:
+            try:
+                self.connection.rollback()
+            except Exception:
+                pass
             return False, f"Error importando desde Excel: {str(e)}", 0
     
-    def _insert_headcount_sqlserver(self, cursor, data: Dict[str, Any]) -> None:
-        """Inserta datos en la tabla headcount de SQL Server"""
-        cursor.execute('''
-            MERGE headcount AS target
-            USING (SELECT ? AS scotia_id, ? AS employee, ? AS full_name, ? AS email, 
-                          ? AS position, ? AS manager, ? AS senior_manager, ? AS unit,
-                          ? AS start_date, ? AS ceco, ? AS skip_level, ? AS cafe_alcides,
-                          ? AS parents, ? AS personal_email, ? AS size, ? AS birthday,
-                          ? AS validacion, ? AS activo) AS source
-            ON target.scotia_id = source.scotia_id
-            WHEN MATCHED THEN
-                UPDATE SET employee = source.employee, full_name = source.full_name,
-                          email = source.email, position = source.position,
-                          manager = source.manager, senior_manager = source.senior_manager,
-                          unit = source.unit, start_date = source.start_date,
-                          ceco = source.ceco, skip_level = source.skip_level,
-                          cafe_alcides = source.cafe_alcides, parents = source.parents,
-                          personal_email = source.personal_email, size = source.size,
-                          birthday = source.birthday, validacion = source.validacion,
-                          activo = source.activo
-            WHEN NOT MATCHED THEN
-                INSERT (scotia_id, employee, full_name, email, position, manager, 
-                       senior_manager, unit, start_date, ceco, skip_level, cafe_alcides,
-                       parents, personal_email, size, birthday, validacion, activo)
-                VALUES (source.scotia_id, source.employee, source.full_name, source.email,
-                       source.position, source.manager, source.senior_manager, source.unit,
-                       source.start_date, source.ceco, source.skip_level, source.cafe_alcides,
-                       source.parents, source.personal_email, source.size, source.birthday,
-                       source.validacion, source.activo);
-        ''', (
-            data.get('scotia_id', ''),
-            data.get('employee', ''),
-            data.get('full_name', ''),
-            data.get('email', ''),
-            data.get('position', ''),
-            data.get('manager', ''),
-            data.get('senior_manager', ''),
-            data.get('unit', ''),
-            data.get('start_date', ''),
-            data.get('ceco', ''),
-            data.get('skip_level', ''),
-            data.get('cafe_alcides', ''),
-            data.get('parents', ''),
-            data.get('personal_email', ''),
-            data.get('size', ''),
-            data.get('birthday', ''),
-            data.get('validacion', ''),
-            1 if data.get('activo', 'True').lower() == 'true' else 0
-        ))
-    
-    def _insert_application_sqlserver(self, cursor, data: Dict[str, Any]) -> None:
-        """Inserta datos en la tabla applications de SQL Server"""
-        cursor.execute('''
-            INSERT INTO applications 
-            (jurisdiction, unit, subunit, logical_access_name, alias, path_email_url, 
-             position_role, exception_tracking, fulfillment_action, system_owner, 
-             role_name, access_type, category, additional_data, ad_code, access_status, 
-             last_update_date, require_licensing, description, authentication_method)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data.get('jurisdiction', ''),
-            data.get('unit', ''),
-            data.get('subunit', ''),
-            data.get('logical_access_name', ''),
-            data.get('alias', ''),
-            data.get('path_email_url', ''),
-            data.get('position_role', ''),
-            data.get('exception_tracking', ''),
-            data.get('fulfillment_action', ''),
-            data.get('system_owner', ''),
-            data.get('role_name', ''),
-            data.get('access_type', ''),
-            data.get('category', ''),
-            data.get('additional_data', ''),
-            data.get('ad_code', ''),
-            data.get('access_status', ''),
-            data.get('last_update_date', ''),
-            data.get('require_licensing', ''),
-            data.get('description', ''),
-            data.get('authentication_method', '')
-        ))
-    
-    def _insert_historico_sqlserver(self, cursor, data: Dict[str, Any]) -> None:
-        """Inserta datos en la tabla historico de SQL Server"""
-        cursor.execute('''
-            INSERT INTO historico 
-            (scotia_id, employee_email, case_id, responsible, record_date, request_date, process_access, 
-             subunit, event_description, ticket_email, app_access_name, 
-             computer_system_type, status, closing_date_app, closing_date_ticket, 
-             app_quality, confirmation_by_user, comment, ticket_quality, general_status_ticket, 
-             average_time_open_ticket)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data.get('scotia_id', ''),
-            data.get('employee_email', ''),
-            data.get('case_id', ''),
-            data.get('responsible', ''),
-            data.get('record_date', ''),
-            data.get('request_date', ''),
-            data.get('process_access', ''),
-            data.get('subunit', ''),
-            data.get('event_description', ''),
-            data.get('ticket_email', ''),
-            data.get('app_access_name', ''),
-            data.get('computer_system_type', ''),
-            data.get('status', ''),
-            data.get('closing_date_app', ''),
-            data.get('closing_date_ticket', ''),
-            data.get('app_quality', ''),
-            data.get('confirmation_by_user', ''),
-            data.get('comment', ''),
-            data.get('ticket_quality', ''),
-            data.get('average_time_open_ticket', '')
-        ))
-    
     def close(self):
         """Cierra la conexión"""
         if self.connection:
@@ -478,11 +890,16 @@ class ExcelToSQLServerImporter:
 
 # Funciones de conveniencia
 def import_excel_to_sqlite(excel_path: str, sheet_name: str, table_name: str, 
-                          db_path: str = None, skip_rows: int = 0) -> Tuple[bool, str, int]:
-    """Función de conveniencia para importar Excel a SQLite"""
+                          db_path: str = None, skip_rows: int = 0,
+                          rejected_path: Optional[str] = None, streaming: bool = False,
+                          progress_callback: Optional[ProgressCallback] = None) -> Tuple[bool, str, int]:
+    """Función de conveniencia para importar Excel a SQLite (streaming=True para libros grandes)"""
     importer = ExcelToSQLiteImporter(db_path)
     try:
-        return importer.import_from_excel(excel_path, sheet_name, table_name, skip_rows)
+        if streaming:
+            return importer.import_from_excel_streaming(excel_path, sheet_name, table_name, skip_rows,
+                                                        rejected_path, progress_callback=progress_callback)
+        return importer.import_from_excel(excel_path, sheet_name, table_name, skip_rows, rejected_path)
     finally:
         importer.close()
 
@@ -490,8 +907,10 @@ def import_excel_to_sqlite(excel_path: str, sheet_name: str, table_name: str,
 def import_excel_to_sqlserver(excel_path: str, sheet_name: str, table_name: str,
                              server: str, database: str, username: str = None, 
                              password: str = None, trusted_connection: bool = True,
-                             skip_rows: int = 0) -> Tuple[bool, str, int]:
-    """Función de conveniencia para importar Excel a SQL Server"""
+                             skip_rows: int = 0, rejected_path: Optional[str] = None,
+                             streaming: bool = False,
+                             progress_callback: Optional[ProgressCallback] = None) -> Tuple[bool, str, int]:
+    """Función de conveniencia para importar Excel a SQL Server (streaming=True para libros grandes)"""
     importer = ExcelToSQLServerImporter(server, database, username, password, trusted_connection)
     try:
         # Crear tablas si no existen
@@ -499,6 +918,9 @@ def import_excel_to_sqlserver(excel_path: str, sheet_name: str, table_name: str,
         if not success:
             return False, f"Error creando tablas: {message}", 0
         
-        return importer.import_from_excel(excel_path, sheet_name, table_name, skip_rows)
+        if streaming:
+            return importer.import_from_excel_streaming(excel_path, sheet_name, table_name, skip_rows,
+                                                        rejected_path, progress_callback=progress_callback)
+        return importer.import_from_excel(excel_path, sheet_name, table_name, skip_rows, rejected_path)
     finally:
         importer.close()
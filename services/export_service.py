@@ -1,12 +1,279 @@
 """
 Servicio de exportación a Excel para tickets de conciliación
+
+Los libros se escriben con openpyxl en modo write_only (StreamingExcelWriter): cada
+hoja recibe sus filas desde un iterable y las vuelca a disco a medida que llegan,
+así que exportar cientos de miles de registros de historial usa memoria acotada.
+El ancho de las columnas se calcula con una muestra de las primeras filas.
+
+Para volcados masivos (historial completo, matriz de autorizaciones) hay además
+formatos CSV (opcionalmente gzip) y Parquet. Los formatos se registran en
+EXPORT_FORMATS y reciben los datos por bloques, p. ej. desde un cursor con fetchmany.
 """
-import pandas as pd
+import csv
+import gzip
+import logging
+from decimal import Decimal
+from itertools import chain, islice
 from pathlib import Path
-from datetime import datetime
-from typing import List, Dict, Any
+from datetime import date, datetime, time
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 import os
 
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+from services.registry import LazyService
+
+logger = logging.getLogger(__name__)
+
+
+# ==============================
+# ESCRITURA EN STREAMING (openpyxl write_only)
+# ==============================
+
+# Filas que se retienen por hoja para calcular el ancho de las columnas
+WIDTH_SAMPLE_ROWS = 1000
+
+# Ancho máximo de una columna (caracteres)
+MAX_COLUMN_WIDTH = 50
+
+# Tipos que openpyxl escribe tal cual; el resto se exporta como texto
+_EXCEL_NATIVE_TYPES = (str, int, float, bool, Decimal, datetime, date, time)
+
+
+def _excel_value(value: Any) -> Any:
+    """Valor listo para una celda de openpyxl"""
+    if value is None or isinstance(value, _EXCEL_NATIVE_TYPES):
+        return value
+    return str(value)
+
+
+def column_widths(columns: List[str], sample: List[Dict[str, Any]]) -> List[int]:
+    """Ancho por columna a partir del encabezado y una muestra de filas (tope MAX_COLUMN_WIDTH)"""
+    widths = []
+    for column in columns:
+        longest = max([len(str(column))] + [len(str(record.get(column)))
+                                            for record in sample if record.get(column) is not None])
+        widths.append(min(longest + 2, MAX_COLUMN_WIDTH))
+    return widths
+
+
+class StreamingExcelWriter:
+    """Libro openpyxl write_only que recibe las filas de cada hoja desde un iterable.
+
+    Uso:
+        with StreamingExcelWriter(ruta) as writer:
+            writer.write_sheet('Historial', registros)   # cualquier iterable de dicts
+
+    Las hojas se escriben en orden y no pueden modificarse después. El libro se guarda
+    al salir del bloque sin errores.
+    """
+
+    def __init__(self, filepath, sample_rows: int = WIDTH_SAMPLE_ROWS):
+        self.filepath = filepath
+        self.sample_rows = sample_rows
+        self.workbook = Workbook(write_only=True)
+
+    def write_sheet(self, title: str, records: Iterable[Dict[str, Any]],
+                    columns: Optional[List[str]] = None) -> int:
+        """Escribe una hoja con encabezado y devuelve el número de filas de datos.
+
+        Si no se indican `columns`, se usan las claves de la primera fila; las claves que
+        aparezcan solo en filas posteriores no se exportan.
+        """
+        records = iter(records)
+        sample = list(islice(records, self.sample_rows))
+        if columns is None:
+            columns = list(sample[0].keys()) if sample else []
+
+        sheet = self.workbook.create_sheet(title)
+        # En write_only las dimensiones deben fijarse antes de la primera fila
+        for index, width in enumerate(column_widths(columns, sample), start=1):
+            sheet.column_dimensions[get_column_letter(index)].width = width
+
+        if columns:
+            header = []
+            for column in columns:
+                cell = WriteOnlyCell(sheet, value=column)
+                cell.font = Font(bold=True)
+                header.append(cell)
+            sheet.append(header)
+
+        written = 0
+        for record in chain(sample, records):
+            sheet.append([_excel_value(record.get(column)) for column in columns])
+            written += 1
+        return written
+
+    def save(self):
+        self.workbook.save(self.filepath)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.save()
+        return False
+
+
+# ==============================
+# FORMATOS DE EXPORTACIÓN (xlsx, csv, csv.gz, parquet)
+# ==============================
+# Cada formato implementa write(filepath, columns, batches, types=None, title='Datos') -> filas,
+# donde `batches` es un iterable de listas de filas (tuplas o filas de pyodbc) y `types`
+# los tipos Python de cada columna (cursor.description) si se conocen.
+
+# Filas por fetchmany / por bloque al exportar
+EXPORT_FETCH_SIZE = 10000
+
+# Filas de datos que admite una hoja de Excel (1.048.576 menos el encabezado)
+EXCEL_MAX_ROWS = 1048575
+
+
+class ExcelExporter:
+    """Hoja única escrita con StreamingExcelWriter"""
+    extension = '.xlsx'
+
+    def write(self, filepath, columns: List[str], batches, types=None, title: str = 'Datos') -> int:
+        def records():
+            written = 0
+            for batch in batches:
+                for row in batch:
+                    written += 1
+                    if written > EXCEL_MAX_ROWS:
+                        raise ValueError(f"Más de {EXCEL_MAX_ROWS} filas no caben en una hoja de Excel; "
+                                         f"use el formato csv o parquet")
+                    yield dict(zip(columns, row))
+
+        with StreamingExcelWriter(filepath) as writer:
+            return writer.write_sheet(title, records(), columns=columns)
+
+
+class CsvExporter:
+    """CSV UTF-8 (con BOM para que Excel reconozca los acentos), opcionalmente comprimido con gzip"""
+
+    def __init__(self, compress: bool = False):
+        self.compress = compress
+        self.extension = '.csv.gz' if compress else '.csv'
+
+    def write(self, filepath, columns: List[str], batches, types=None, title: str = 'Datos') -> int:
+        opener = gzip.open if self.compress else open
+        written = 0
+        with opener(filepath, 'wt', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for batch in batches:
+                writer.writerows(batch)
+                written += len(batch)
+        return written
+
+
+class ParquetExporter:
+    """Parquet columnar con tipos (requiere pyarrow); un row group por bloque"""
+    extension = '.parquet'
+
+    def write(self, filepath, columns: List[str], batches, types=None, title: str = 'Datos') -> int:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("La exportación a Parquet requiere pyarrow (pip install pyarrow)")
+
+        arrow_types = {
+            str: pa.string(), int: pa.int64(), float: pa.float64(), Decimal: pa.float64(),
+            bool: pa.bool_(), datetime: pa.timestamp('us'), date: pa.date32(), time: pa.time64('us'),
+            bytes: pa.binary(), bytearray: pa.binary(),
+        }
+        # Columnas cuyos valores se normalizan en Python (texto mixto, Decimal -> float)
+        converters = ((pa.string(), str), (pa.float64(), float))
+
+        writer = None
+        written = 0
+        try:
+            for batch in batches:
+                if not batch:
+                    continue
+                values = list(zip(*batch))
+                if writer is None:
+                    fields = []
+                    for index, column in enumerate(columns):
+                        python_type = types[index] if types and types[index] in arrow_types else None
+                        if python_type is None:
+                            # Sin metadatos del cursor: tipo del primer valor no nulo del bloque
+                            python_type = next((type(v) for v in values[index] if v is not None), str)
+                        fields.append(pa.field(column, arrow_types.get(python_type, pa.string())))
+                    schema = pa.schema(fields)
+                    writer = pq.ParquetWriter(str(filepath), schema)
+                arrays = []
+                for field, column_values in zip(schema, values):
+                    for arrow_type, convert in converters:
+                        if field.type == arrow_type:
+                            column_values = [v if v is None or isinstance(v, convert) else convert(v)
+                                             for v in column_values]
+                    arrays.append(pa.array(column_values, type=field.type))
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                written += len(batch)
+            if writer is None:
+                pq.write_table(pa.table({column: pa.array([], type=pa.string()) for column in columns}),
+                               str(filepath))
+        finally:
+            if writer is not None:
+                writer.close()
+        return written
+
+
+# Formatos disponibles por nombre; register_export_format agrega otros
+EXPORT_FORMATS: Dict[str, Any] = {
+    'xlsx': ExcelExporter(),
+    'csv': CsvExporter(),
+    'csv.gz': CsvExporter(compress=True),
+    'parquet': ParquetExporter(),
+}
+
+
+def register_export_format(name: str, exporter) -> None:
+    """Registra un formato de exportación (objeto con `extension` y `write`)"""
+    EXPORT_FORMATS[name] = exporter
+
+
+def get_exporter(fmt: str):
+    """Exportador del formato `fmt` ('xlsx', 'csv', 'csv.gz', 'parquet', ...)"""
+    try:
+        return EXPORT_FORMATS[fmt]
+    except KeyError:
+        raise ValueError(f"Formato de exportación no soportado: {fmt} "
+                         f"(disponibles: {', '.join(EXPORT_FORMATS)})")
+
+
+def iter_cursor_batches(cursor, fetch_size: int = EXPORT_FETCH_SIZE) -> Iterator[List[Any]]:
+    """Bloques de filas leídos con fetchmany hasta agotar el cursor"""
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            return
+        yield rows
+
+
+def records_to_batches(records: Iterable[Dict[str, Any]], batch_size: int = EXPORT_FETCH_SIZE):
+    """(columnas, bloques de tuplas) de un iterable de dicts; las columnas salen de la primera fila"""
+    records = iter(records)
+    first = next(records, None)
+    columns = list(first.keys()) if first is not None else []
+
+    def batches():
+        pending = chain([first], records) if first is not None else iter(())
+        while True:
+            batch = [tuple(record.get(column) for column in columns) for record in islice(pending, batch_size)]
+            if not batch:
+                return
+            yield batch
+
+    return columns, batches()
+
 
 class ExportService:
     """Servicio para exportar datos de conciliación a Excel"""
@@ -38,103 +305,63 @@ class ExportService:
             filename = f"tickets_{timestamp}.xlsx"
             filepath = self.output_dir / filename
             
-            # Preparar datos para la hoja de resumen
-            summary_data = []
-            all_tickets = []
-            
-            for person_data in reconciliation_data:
-                if "error" in person_data:
-                    continue
-                
-                sid = person_data.get("person_info", {}).get("sid", "N/A")
-                area = person_data.get("person_info", {}).get("area", "N/A")
-                subunit = person_data.get("person_info", {}).get("subunit", "N/A")
-                cargo = person_data.get("person_info", {}).get("cargo", "N/A")
-                
-                current_count = len(person_data.get("current", []))
-                target_count = len(person_data.get("target", []))
-                to_grant_count = len(person_data.get("to_grant", []))
-                to_revoke_count = len(person_data.get("to_revoke", []))
-                
-                # Agregar a resumen
-                summary_data.append({
-                    "SID": sid,
-                    "Área": area,
-                    "Sub Unidad": subunit,
-                    "Cargo": cargo,
-                    "Accesos Actuales": current_count,
-                    "Accesos Objetivo": target_count,
-                    "A Otorgar": to_grant_count,
-                    "A Revocar": to_revoke_count
-                })
-                
-                # Agregar tickets de GRANT
-                for grant_item in person_data.get("to_grant", []):
-                    all_tickets.append({
-                        "SID": grant_item["sid"],
-                        "App": grant_item["app_name"],
-                        "Rol": grant_item.get("role_name", ""),
-                        "Acción": grant_item["accion"],
-                        "Motivo": grant_item["motivo"],
-                        "Ingresado Por": ingresado_por,
-                        "Fecha Solicitud": datetime.now().strftime("%Y-%m-%d"),
-                        "Status": status,
-                        "Comentarios": comment or f"Acceso requerido para {grant_item['app_name']}"
-                    })
-                
-                # Agregar tickets de REVOKE
-                for revoke_item in person_data.get("to_revoke", []):
-                    all_tickets.append({
-                        "SID": revoke_item["sid"],
-                        "App": revoke_item["app_name"],
-                        "Rol": revoke_item.get("role_name", ""),
-                        "Acción": revoke_item["accion"],
-                        "Motivo": revoke_item["motivo"],
-                        "Ingresado Por": ingresado_por,
-                        "Fecha Solicitud": datetime.now().strftime("%Y-%m-%d"),
-                        "Status": status,
-                        "Comentarios": comment or f"Acceso no autorizado para {revoke_item['app_name']}"
-                    })
-            
-            # Crear DataFrames
-            summary_df = pd.DataFrame(summary_data)
-            tickets_df = pd.DataFrame(all_tickets)
-            
             # Crear archivo Excel con múltiples hojas
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                # Hoja de resumen
-                summary_df.to_excel(writer, sheet_name='Resumen', index=False)
-                
-                # Hoja de tickets
-                if not tickets_df.empty:
-                    tickets_df.to_excel(writer, sheet_name='Tickets', index=False)
-                else:
-                    # Crear hoja vacía con columnas
-                    empty_tickets = pd.DataFrame(columns=[
-                        "SID", "App", "Rol", "Acción", "Motivo", 
-                        "Ingresado Por", "Fecha Solicitud", "Status", "Comentarios"
-                    ])
-                    empty_tickets.to_excel(writer, sheet_name='Tickets', index=False)
-                
-                # Ajustar ancho de columnas
-                for sheet_name in writer.sheets:
-                    worksheet = writer.sheets[sheet_name]
-                    for column in worksheet.columns:
-                        max_length = 0
-                        column_letter = column[0].column_letter
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-                        adjusted_width = min(max_length + 2, 50)
-                        worksheet.column_dimensions[column_letter].width = adjusted_width
+            with StreamingExcelWriter(filepath) as writer:
+                writer.write_sheet('Resumen', self._summary_rows(reconciliation_data),
+                                   columns=self.SUMMARY_COLUMNS)
+                writer.write_sheet('Tickets', self._ticket_rows(reconciliation_data, ingresado_por, status, comment),
+                                   columns=self.TICKET_COLUMNS)
             
             return str(filepath)
             
         except Exception as e:
             raise Exception(f"Error exportando a Excel: {str(e)}")
+
+    SUMMARY_COLUMNS = ["SID", "Área", "Sub Unidad", "Cargo",
+                       "Accesos Actuales", "Accesos Objetivo", "A Otorgar", "A Revocar"]
+    TICKET_COLUMNS = ["SID", "App", "Rol", "Acción", "Motivo",
+                      "Ingresado Por", "Fecha Solicitud", "Status", "Comentarios"]
+
+    @staticmethod
+    def _summary_rows(reconciliation_data: Iterable[Dict[str, Any]]):
+        """Filas de la hoja Resumen: una por persona"""
+        for person_data in reconciliation_data:
+            if "error" in person_data:
+                continue
+            person_info = person_data.get("person_info", {})
+            yield {
+                "SID": person_info.get("sid", "N/A"),
+                "Área": person_info.get("area", "N/A"),
+                "Sub Unidad": person_info.get("subunit", "N/A"),
+                "Cargo": person_info.get("cargo", "N/A"),
+                "Accesos Actuales": len(person_data.get("current", [])),
+                "Accesos Objetivo": len(person_data.get("target", [])),
+                "A Otorgar": len(person_data.get("to_grant", [])),
+                "A Revocar": len(person_data.get("to_revoke", []))
+            }
+
+    @staticmethod
+    def _ticket_rows(reconciliation_data: Iterable[Dict[str, Any]], ingresado_por: str,
+                     status: str, comment: str):
+        """Filas de la hoja Tickets: un ticket GRANT o REVOKE por acceso"""
+        fecha_solicitud = datetime.now().strftime("%Y-%m-%d")
+        for person_data in reconciliation_data:
+            if "error" in person_data:
+                continue
+            for key, default_comment in (("to_grant", "Acceso requerido para {}"),
+                                         ("to_revoke", "Acceso no autorizado para {}")):
+                for item in person_data.get(key, []):
+                    yield {
+                        "SID": item["sid"],
+                        "App": item["app_name"],
+                        "Rol": item.get("role_name", ""),
+                        "Acción": item["accion"],
+                        "Motivo": item["motivo"],
+                        "Ingresado Por": ingresado_por,
+                        "Fecha Solicitud": fecha_solicitud,
+                        "Status": status,
+                        "Comentarios": comment or default_comment.format(item['app_name'])
+                    }
     
     def export_single_person_tickets(self, 
                                    reconciliation_data: Dict[str, Any],
@@ -156,94 +383,144 @@ class ExportService:
         return self.export_reconciliation_tickets([reconciliation_data], ingresado_por, status, comment)
     
     def export_access_history(self, 
-                            access_history: List[Dict[str, Any]],
-                            filename_prefix: str = "historial_accesos") -> str:
+                            access_history: Iterable[Dict[str, Any]],
+                            filename_prefix: str = "historial_accesos",
+                            fmt: str = "xlsx") -> str:
         """
-        Exporta el historial de accesos a Excel
+        Exporta el historial de accesos a Excel (o a otro formato de EXPORT_FORMATS)
         
         Args:
-            access_history: Lista de registros de historial
+            access_history: Registros de historial (lista o cualquier iterable, p. ej. un generador)
             filename_prefix: Prefijo para el nombre del archivo
+            fmt: 'xlsx', 'csv', 'csv.gz' o 'parquet'
             
         Returns:
-            Ruta del archivo Excel generado
+            Ruta del archivo generado
         """
         try:
-            # Generar nombre de archivo con timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-            filename = f"{filename_prefix}_{timestamp}.xlsx"
-            filepath = self.output_dir / filename
-            
-            # Crear DataFrame
-            df = pd.DataFrame(access_history)
-            
-            # Crear archivo Excel
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Historial', index=False)
-                
-                # Ajustar ancho de columnas
-                worksheet = writer.sheets['Historial']
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            return str(filepath)
-            
+            columns, batches = records_to_batches(access_history)
+            return self._export(filename_prefix, fmt, columns, batches, title='Historial')
         except Exception as e:
             raise Exception(f"Error exportando historial: {str(e)}")
     
     def export_authorized_matrix(self, 
-                               matrix_data: List[Dict[str, Any]],
-                               filename_prefix: str = "matriz_autorizaciones") -> str:
+                               matrix_data: Iterable[Dict[str, Any]],
+                               filename_prefix: str = "matriz_autorizaciones",
+                               fmt: str = "xlsx") -> str:
         """
-        Exporta la matriz de autorizaciones a Excel
+        Exporta la matriz de autorizaciones a Excel (o a otro formato de EXPORT_FORMATS)
         
         Args:
-            matrix_data: Lista de registros de matriz de autorizaciones
+            matrix_data: Registros de la matriz de autorizaciones (lista o cualquier iterable)
             filename_prefix: Prefijo para el nombre del archivo
+            fmt: 'xlsx', 'csv', 'csv.gz' o 'parquet'
             
         Returns:
-            Ruta del archivo Excel generado
+            Ruta del archivo generado
         """
         try:
-            # Generar nombre de archivo con timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-            filename = f"{filename_prefix}_{timestamp}.xlsx"
-            filepath = self.output_dir / filename
-            
-            # Crear DataFrame
-            df = pd.DataFrame(matrix_data)
-            
-            # Crear archivo Excel
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Matriz', index=False)
-                
-                # Ajustar ancho de columnas
-                worksheet = writer.sheets['Matriz']
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            return str(filepath)
+            columns, batches = records_to_batches(matrix_data)
+            return self._export(filename_prefix, fmt, columns, batches, title='Matriz')
+        except Exception as e:
+            raise Exception(f"Error exportando matriz: {str(e)}")
+
+    # ==============================
+    # VOLCADOS DESDE LA BASE DE DATOS
+    # ==============================
+
+    # Columnas de historico del volcado completo (sin row_version ni columnas normalizadas)
+    HISTORY_DUMP_SQL = '''
+        SELECT id, scotia_id, employee_email, case_id, responsible, record_date, request_date,
+               process_access, subunit, event_description, ticket_email, app_access_name,
+               computer_system_type, duration_of_access, status, closing_date_app, closing_date_ticket,
+               app_quality, confirmation_by_user, comment, comment_tq, ticket_quality,
+               general_status_ticket, general_status_case, average_time_open_ticket,
+               sla_app, sla_ticket, sla_case
+        FROM historico
+        ORDER BY record_date, id
+    '''
+
+    # Matriz de autorizaciones: aplicaciones y rol autorizados por unidad/subunidad y puesto
+    AUTHORIZED_MATRIX_SQL = '''
+        SELECT unidad_subunidad, unit, subunit, position_role, logical_access_name, role_name,
+               access_type, category, system_owner, access_status, require_licensing, jurisdiction
+        FROM applications
+        ORDER BY unidad_subunidad, position_role, logical_access_name
+    '''
+
+    def _export(self, filename_prefix: str, fmt: str, columns: List[str], batches,
+                types=None, title: str = 'Datos') -> str:
+        """Escribe `batches` con el exportador de `fmt`; si falla no deja un archivo a medias"""
+        exporter = get_exporter(fmt)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+        filepath = self.output_dir / f"{filename_prefix}_{timestamp}{exporter.extension}"
+        try:
+            rows = exporter.write(filepath, columns, batches, types=types, title=title)
+        except Exception:
+            if filepath.exists():
+                filepath.unlink()
+            raise
+        logger.info("Exportación %s: %s filas en %s", fmt, rows, filepath)
+        return str(filepath)
+
+    def export_cursor(self, cursor, filename_prefix: str, fmt: str = "csv",
+                      fetch_size: int = EXPORT_FETCH_SIZE, title: str = 'Datos') -> str:
+        """
+        Exporta el resultado de un cursor ya ejecutado leyéndolo por bloques con fetchmany
+        
+        Args:
+            cursor: Cursor con la consulta ejecutada (pyodbc o DB-API)
+            filename_prefix: Prefijo para el nombre del archivo
+            fmt: 'csv', 'csv.gz', 'parquet' o 'xlsx'
+            fetch_size: Filas por fetchmany
+            title: Nombre de la hoja (solo xlsx)
             
+        Returns:
+            Ruta del archivo generado
+        """
+        columns = [column[0] for column in cursor.description]
+        types = [column[1] for column in cursor.description]
+        return self._export(filename_prefix, fmt, columns, iter_cursor_batches(cursor, fetch_size),
+                            types=types, title=title)
+
+    def export_query(self, sql: str, params: tuple = (), filename_prefix: str = "consulta",
+                     fmt: str = "csv", conn=None, title: str = 'Datos') -> str:
+        """Ejecuta `sql` y exporta el resultado en streaming (abre y cierra una conexión si no se pasa `conn`)"""
+        own_conn = conn is None
+        if own_conn:
+            from services.access_management_service import access_service
+            conn = access_service.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return self.export_cursor(cursor, filename_prefix, fmt=fmt, title=title)
+        finally:
+            if own_conn:
+                conn.close()
+
+    def export_full_history(self, fmt: str = "csv", conn=None,
+                            filename_prefix: str = "historial_completo") -> str:
+        """Vuelca todo historico en `fmt` (por defecto CSV) sin cargarlo en memoria"""
+        try:
+            return self.export_query(self.HISTORY_DUMP_SQL, filename_prefix=filename_prefix,
+                                     fmt=fmt, conn=conn, title='Historial')
+        except Exception as e:
+            raise Exception(f"Error exportando historial completo: {str(e)}")
+
+    def export_authorized_matrix_dump(self, fmt: str = "csv", conn=None,
+                                      filename_prefix: str = "matriz_autorizaciones") -> str:
+        """Vuelca la matriz de autorizaciones (applications) en `fmt` sin cargarla en memoria"""
+        try:
+            return self.export_query(self.AUTHORIZED_MATRIX_SQL, filename_prefix=filename_prefix,
+                                     fmt=fmt, conn=conn, title='Matriz')
         except Exception as e:
             raise Exception(f"Error exportando matriz: {str(e)}")
+
+    @staticmethod
+    def _is_output_file(path: Path) -> bool:
+        """Archivo generado por alguno de los formatos registrados"""
+        extensions = {exporter.extension for exporter in EXPORT_FORMATS.values()}
+        return path.is_file() and any(path.name.endswith(extension) for extension in extensions)
     
     def get_output_files(self) -> List[str]:
         """
@@ -256,11 +533,11 @@ class ExportService:
             if not self.output_dir.exists():
                 return []
             
-            files = [f.name for f in self.output_dir.iterdir() if f.is_file() and f.suffix == '.xlsx']
+            files = [f.name for f in self.output_dir.iterdir() if self._is_output_file(f)]
             return sorted(files, reverse=True)  # Más recientes primero
             
         except Exception as e:
-            print(f"Error obteniendo archivos de salida: {e}")
+            logger.error("Error obteniendo archivos de salida: %s", e)
             return []
     
     def cleanup_old_files(self, keep_days: int = 30) -> int:
@@ -281,7 +558,7 @@ class ExportService:
             deleted_count = 0
             
             for file_path in self.output_dir.iterdir():
-                if file_path.is_file() and file_path.suffix == '.xlsx':
+                if self._is_output_file(file_path):
                     if file_path.stat().st_mtime < cutoff_date:
                         file_path.unlink()
                         deleted_count += 1
@@ -289,9 +566,39 @@ class ExportService:
             return deleted_count
             
         except Exception as e:
-            print(f"Error limpiando archivos antiguos: {e}")
+            logger.error("Error limpiando archivos antiguos: %s", e)
             return 0
 
+    # (clave de las estadísticas, nombre de la hoja), en el orden de las hojas
+    HEADCOUNT_STATISTICS_SHEETS = (
+        ('generales', 'Generales'),
+        ('por_unidad', 'Por Unidad'),
+        ('por_puesto', 'Por Puesto'),
+        ('por_manager', 'Por Manager'),
+        ('por_senior_manager', 'Por Senior Manager'),
+        ('por_estado', 'Por Estado'),
+        ('por_año_inicio', 'Por Año de Inicio'),
+        ('detalle_por_unidad', 'Detalle por Unidad'),
+    )
+    HISTORIAL_STATISTICS_SHEETS = (
+        ('generales', 'Generales'),
+        ('por_unidad', 'Por Unidad'),
+        ('por_subunidad', 'Por Subunidad'),
+        ('por_puesto', 'Por Puesto'),
+        ('por_aplicacion', 'Por Aplicación'),
+        ('por_proceso', 'Por Proceso'),
+    )
+
+    @staticmethod
+    def _write_statistics_sheets(writer: StreamingExcelWriter, statistics_data: Dict[str, Any], sheets):
+        """Una hoja por dimensión presente; 'generales' es un único diccionario"""
+        for key, sheet_name in sheets:
+            if key == 'generales':
+                if 'generales' in statistics_data:
+                    writer.write_sheet(sheet_name, [statistics_data['generales']])
+            elif statistics_data.get(key):
+                writer.write_sheet(sheet_name, statistics_data[key])
+
     def export_headcount_statistics(self, statistics_data: Dict[str, Any], 
                                    source_system: str = "Sistema Integrado") -> str:
         """Exporta estadísticas del headcount a Excel"""
@@ -300,46 +607,8 @@ class ExportService:
             filename = f"estadisticas_headcount_{timestamp}.xlsx"
             filepath = os.path.join(self.output_dir, filename)
             
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                # Hoja 1: Estadísticas Generales
-                if 'generales' in statistics_data:
-                    generales_df = pd.DataFrame([statistics_data['generales']])
-                    generales_df.to_excel(writer, sheet_name='Generales', index=False)
-                
-                # Hoja 2: Por Unidad
-                if 'por_unidad' in statistics_data and statistics_data['por_unidad']:
-                    unidad_df = pd.DataFrame(statistics_data['por_unidad'])
-                    unidad_df.to_excel(writer, sheet_name='Por Unidad', index=False)
-                
-                # Hoja 3: Por Puesto
-                if 'por_puesto' in statistics_data and statistics_data['por_puesto']:
-                    puesto_df = pd.DataFrame(statistics_data['por_puesto'])
-                    puesto_df.to_excel(writer, sheet_name='Por Puesto', index=False)
-                
-                # Hoja 4: Por Manager
-                if 'por_manager' in statistics_data and statistics_data['por_manager']:
-                    manager_df = pd.DataFrame(statistics_data['por_manager'])
-                    manager_df.to_excel(writer, sheet_name='Por Manager', index=False)
-                
-                # Hoja 5: Por Senior Manager
-                if 'por_senior_manager' in statistics_data and statistics_data['por_senior_manager']:
-                    senior_manager_df = pd.DataFrame(statistics_data['por_senior_manager'])
-                    senior_manager_df.to_excel(writer, sheet_name='Por Senior Manager', index=False)
-                
-                # Hoja 6: Por Estado
-                if 'por_estado' in statistics_data and statistics_data['por_estado']:
-                    estado_df = pd.DataFrame(statistics_data['por_estado'])
-                    estado_df.to_excel(writer, sheet_name='Por Estado', index=False)
-                
-                # Hoja 7: Por Año de Inicio
-                if 'por_año_inicio' in statistics_data and statistics_data['por_año_inicio']:
-                    año_df = pd.DataFrame(statistics_data['por_año_inicio'])
-                    año_df.to_excel(writer, sheet_name='Por Año de Inicio', index=False)
-                
-                # Hoja 8: Detalle por Unidad
-                if 'detalle_por_unidad' in statistics_data and statistics_data['detalle_por_unidad']:
-                    detalle_df = pd.DataFrame(statistics_data['detalle_por_unidad'])
-                    detalle_df.to_excel(writer, sheet_name='Detalle por Unidad', index=False)
+            with StreamingExcelWriter(filepath) as writer:
+                self._write_statistics_sheets(writer, statistics_data, self.HEADCOUNT_STATISTICS_SHEETS)
             
             return filepath
             
@@ -354,36 +623,8 @@ class ExportService:
             filename = f"estadisticas_historial_{timestamp}.xlsx"
             filepath = os.path.join(self.output_dir, filename)
             
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                # Hoja 1: Estadísticas Generales
-                if 'generales' in statistics_data:
-                    generales_df = pd.DataFrame([statistics_data['generales']])
-                    generales_df.to_excel(writer, sheet_name='Generales', index=False)
-                
-                # Hoja 2: Por Unidad
-                if 'por_unidad' in statistics_data and statistics_data['por_unidad']:
-                    unidad_df = pd.DataFrame(statistics_data['por_unidad'])
-                    unidad_df.to_excel(writer, sheet_name='Por Unidad', index=False)
-                
-                # Hoja 3: Por Subunidad
-                if 'por_subunidad' in statistics_data and statistics_data['por_subunidad']:
-                    subunidad_df = pd.DataFrame(statistics_data['por_subunidad'])
-                    subunidad_df.to_excel(writer, sheet_name='Por Subunidad', index=False)
-                
-                # Hoja 4: Por Puesto
-                if 'por_puesto' in statistics_data and statistics_data['por_puesto']:
-                    puesto_df = pd.DataFrame(statistics_data['por_puesto'])
-                    puesto_df.to_excel(writer, sheet_name='Por Puesto', index=False)
-                
-                # Hoja 5: Por Aplicación
-                if 'por_aplicacion' in statistics_data and statistics_data['por_aplicacion']:
-                    aplicacion_df = pd.DataFrame(statistics_data['por_aplicacion'])
-                    aplicacion_df.to_excel(writer, sheet_name='Por Aplicación', index=False)
-                
-                # Hoja 6: Por Proceso
-                if 'por_proceso' in statistics_data and statistics_data['por_proceso']:
-                    proceso_df = pd.DataFrame(statistics_data['por_proceso'])
-                    proceso_df.to_excel(writer, sheet_name='Por Proceso', index=False)
+            with StreamingExcelWriter(filepath) as writer:
+                self._write_statistics_sheets(writer, statistics_data, self.HISTORIAL_STATISTICS_SHEETS)
             
             return filepath
             
@@ -391,6 +632,6 @@ class ExportService:
             raise Exception(f"Error exportando estadísticas: {str(e)}")
 
 
-# Instancia global para usar en toda la aplicación
-export_service = ExportService()
+# Instancia global para usar en toda la aplicación (se construye en el primer uso)
+export_service = LazyService('export_service', ExportService)
 
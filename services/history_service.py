@@ -2,12 +2,16 @@
 Servicio de historial para registrar tickets de conciliación
 Sistema optimizado para SQL Server únicamente
 """
+import logging
 from typing import List, Dict, Any, Tuple
 from datetime import datetime
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from config import get_database_connection
+from services.registry import LazyService
+
+logger = logging.getLogger(__name__)
 
 
 class HistoryService:
@@ -283,7 +287,7 @@ class HistoryService:
             return tickets
             
         except Exception as e:
-            print(f"Error obteniendo tickets recientes: {e}")
+            logger.error("Error obteniendo tickets recientes: %s", e)
             return []
     
     def update_ticket_status(self, 
@@ -321,7 +325,7 @@ class HistoryService:
             return rows_affected > 0
             
         except Exception as e:
-            print(f"Error actualizando estado del ticket: {e}")
+            logger.error("Error actualizando estado del ticket: %s", e)
             return False
     
     def get_ticket_statistics(self, 
@@ -383,10 +387,10 @@ class HistoryService:
             return stats
             
         except Exception as e:
-            print(f"Error obteniendo estadísticas de tickets: {e}")
+            logger.error("Error obteniendo estadísticas de tickets: %s", e)
             return {}
 
 
-# Instancia global para usar en toda la aplicación
-history_service = HistoryService()
+# Instancia global para usar en toda la aplicación (se construye en el primer uso)
+history_service = LazyService('history_service', HistoryService)
 
@@ -0,0 +1,91 @@
+"""
+Configuración de logging para los servicios.
+
+Reemplaza las trazas con print: los mensajes usan formato perezoso
+(``logger.debug("... %s", valor)``), de modo que los argumentos solo se
+formatean si el nivel está habilitado. Permite niveles por módulo y una
+salida JSON de una línea por evento.
+"""
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+# Logger raíz: cada módulo usa logging.getLogger(__name__) y cuelga de 'services'
+ROOT_LOGGER = 'services'
+DEFAULT_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+_HANDLER_NAME = 'gamlo-services'
+
+# Atributos estándar de LogRecord: el resto se considera contexto (extra=...)
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatea cada registro como un objeto JSON en una sola línea"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def _to_level(level: Any) -> int:
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).strip().upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Nivel de logging no válido: {level}")
+    return value
+
+
+def configure_logging(config: Optional[Dict[str, Any]] = None, stream=None) -> logging.Logger:
+    """
+    Configura el logger 'services' (idempotente: se puede llamar varias veces).
+
+    Args:
+        config: Diccionario con 'level', 'json', 'file' y 'modules'
+                (nivel por nombre de módulo). Por defecto LOGGING_CONFIG de config.py
+        stream: Flujo de salida cuando no se indica archivo (por defecto stderr)
+
+    Returns:
+        Logger raíz de los servicios
+    """
+    if config is None:
+        from config import LOGGING_CONFIG
+        config = LOGGING_CONFIG
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(_to_level(config.get('level', 'INFO')))
+
+    # Reemplazar el handler instalado por una configuración anterior
+    for handler in list(root.handlers):
+        if handler.get_name() == _HANDLER_NAME:
+            root.removeHandler(handler)
+            handler.close()
+
+    if config.get('file'):
+        handler = logging.FileHandler(config['file'], encoding='utf-8')
+    else:
+        handler = logging.StreamHandler(stream or sys.stderr)
+    handler.set_name(_HANDLER_NAME)
+    if config.get('json'):
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(config.get('format', DEFAULT_FORMAT)))
+    root.addHandler(handler)
+    root.propagate = False
+
+    for module, level in (config.get('modules') or {}).items():
+        logging.getLogger(module).setLevel(_to_level(level))
+
+    return root
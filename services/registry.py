@@ -0,0 +1,116 @@
+"""
+Registro de servicios con construcción perezosa.
+
+Las instancias globales (``access_service``, ``dropdown_service``, ...) son
+proxies que construyen el servicio real en el primer uso. Importar un módulo
+de services/ no abre conexiones ni ejecuta DDL, así que la aplicación, los
+tests y las herramientas arrancan aunque la base de datos no esté disponible.
+
+También lleva el registro de suscriptores a cambios de tablas: los servicios que
+escriben en una tabla llaman a notify_table_changed() y los que mantienen cachés
+derivadas de ella se suscriben con subscribe_table_changes().
+"""
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+
+class LazyService:
+    """Proxy que construye el servicio con `factory` en el primer acceso a un atributo"""
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        """Registra el proxy con `name`, que debe ser único.
+
+        Raises:
+            ValueError: Si ya hay un servicio registrado con `name` (p. ej. el módulo se importó
+                dos veces con rutas distintas: usar siempre ``services.<módulo>``)
+        """
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+        with _registry_lock:
+            if name in _registry:
+                raise ValueError(f"Servicio ya registrado: {name}")
+            _registry[name] = self
+
+    def get_instance(self) -> Any:
+        """Retorna la instancia real, construyéndola una sola vez (seguro entre hilos)"""
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    instance = self._factory()
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._instance is not None
+
+    def reset(self):
+        """Descarta la instancia; el próximo acceso construye una nueva"""
+        with self._lock:
+            object.__setattr__(self, '_instance', None)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get_instance(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self.get_instance(), name, value)
+
+    def __repr__(self) -> str:
+        state = 'inicializado' if self.is_initialized else 'sin inicializar'
+        return f"<LazyService {self._name} ({state})>"
+
+
+_registry: Dict[str, LazyService] = {}
+_registry_lock = threading.Lock()
+
+
+def get_service(name: str) -> Any:
+    """Retorna la instancia real de un servicio registrado por nombre"""
+    try:
+        return _registry[name].get_instance()
+    except KeyError:
+        raise KeyError(f"Servicio no registrado: {name}") from None
+
+
+# ==============================
+# NOTIFICACIÓN DE CAMBIOS EN TABLAS
+# ==============================
+
+_table_subscribers: Dict[str, List[Callable[[str], None]]] = {}
+_table_subscribers_lock = threading.Lock()
+
+
+def subscribe_table_changes(tables: Iterable[str], callback: Callable[[str], None]):
+    """Registra `callback(tabla)` para cuando cambien los datos de alguna de `tables`"""
+    with _table_subscribers_lock:
+        for table in tables:
+            callbacks = _table_subscribers.setdefault(table, [])
+            if callback not in callbacks:
+                callbacks.append(callback)
+
+
+def unsubscribe_table_changes(tables: Iterable[str], callback: Callable[[str], None]):
+    """Quita un callback registrado con subscribe_table_changes()"""
+    with _table_subscribers_lock:
+        for table in tables:
+            callbacks = _table_subscribers.get(table, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+
+def notify_table_changed(table: str):
+    """Avisa a los suscriptores que `table` cambió (llamar después del commit)"""
+    with _table_subscribers_lock:
+        callbacks = list(_table_subscribers.get(table, []))
+    for callback in callbacks:
+        try:
+            callback(table)
+        except Exception as e:
+            logger.error("Error notificando cambio en %s: %s", table, e)
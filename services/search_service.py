@@ -2,15 +2,222 @@
 Servicio de búsqueda para el sistema de gestión de empleados
 Sistema optimizado para SQL Server únicamente
 """
+import logging
+import re
+import sqlite3
 import pyodbc
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import sys
 import os
 
 # Agregar el directorio padre al path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from config import get_database_connection
+from services.registry import LazyService
 
+logger = logging.getLogger(__name__)
+
+
+# ==============================
+# FILTROS SOBRE HISTORICO
+# ==============================
+
+# Filtro -> columna de historico. Incluye los alias usados por la interfaz
+# ('sid', 'numero_caso', 'aplicacion', ...); todos se comparan con LIKE '%valor%'
+HISTORICO_FILTER_COLUMNS = {
+    'case_id': 'case_id',
+    'numero_caso': 'case_id',
+    'scotia_id': 'scotia_id',
+    'sid': 'scotia_id',
+    'process_access': 'process_access',
+    'tipo_proceso': 'process_access',
+    'proceso': 'process_access',
+    'status': 'status',
+    'estado': 'status',
+    'request_date': 'request_date',
+    'record_date': 'record_date',
+    'fecha': 'record_date',
+    'app_access_name': 'app_access_name',
+    'app_name': 'app_access_name',
+    'aplicacion': 'app_access_name',
+    'ticket_email': 'ticket_email',
+    'mail': 'ticket_email',
+    'employee_email': 'employee_email',
+    'app_quality': 'app_quality',
+    'confirmation_by_user': 'confirmation_by_user',
+    'comment': 'comment',
+    'subunit': 'subunit',
+    'responsible': 'responsible',
+    'responsable': 'responsible',
+    'event_description': 'event_description',
+    'descripcion': 'event_description',
+}
+
+
+# Campos libres de historico con índice de texto completo: catálogo ftc_historico
+# en SQL Server (migration_fulltext_historico.sql) y tabla FTS5 historico_fts en SQLite
+HISTORICO_FULLTEXT_COLUMNS = ('event_description', 'comment', 'responsible', 'ticket_email')
+
+# Columnas que retornan las búsquedas sobre historico
+HISTORICO_COLUMNS = (
+    'id', 'case_id', 'scotia_id', 'process_access', 'record_date', 'request_date',
+    'status', 'comment', 'responsible', 'subunit', 'event_description',
+    'ticket_email', 'app_access_name', 'closing_date_app', 'app_quality',
+    'confirmation_by_user', 'employee_email', 'computer_system_type',
+    'duration_of_access', 'closing_date_ticket', 'comment_tq', 'ticket_quality',
+    'general_status_ticket', 'general_status_case', 'average_time_open_ticket',
+    'sla_app', 'sla_ticket', 'sla_case',
+)
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Resultado de la detección del índice de texto completo en SQL Server (None = sin consultar)
+_fulltext_enabled: Optional[bool] = None
+
+def _escape_like(value: str) -> str:
+    """Escapa los comodines de LIKE (sintaxis SQL Server) para buscar el texto literal"""
+    return value.replace('[', '[[]').replace('%', '[%]').replace('_', '[_]')
+
+
+def build_historico_conditions(filtros: Optional[Dict[str, Any]],
+                               alias: str = '', fulltext: Optional[str] = None) -> Tuple[str, List[Any]]:
+    """
+    Traduce un diccionario de filtros a predicados parametrizados sobre historico.
+
+    Las claves de texto se comparan con LIKE '%valor%' (sin distinguir mayúsculas
+    con la intercalación por defecto); 'fecha_desde' / 'fecha_hasta' acotan
+    record_date. Las claves desconocidas o vacías se ignoran.
+
+    Con índice de texto completo los campos de HISTORICO_FULLTEXT_COLUMNS se
+    resuelven con el índice (palabras como prefijo) en lugar de LIKE.
+
+    Args:
+        filtros: Diccionario filtro -> valor
+        alias: Alias de la tabla historico en la consulta (por ejemplo 'h')
+        fulltext: Resultado de historico_fulltext_mode ('sqlserver', 'sqlite' o None)
+
+    Returns:
+        Tupla (cláusula WHERE o cadena vacía, parámetros)
+    """
+    prefix = f"{alias}." if alias else ''
+    conditions = []
+    params: List[Any] = []
+    seen = set()
+
+    for campo, valor in (filtros or {}).items():
+        if valor is None or not str(valor).strip():
+            continue
+        if campo == 'fecha_desde':
+            conditions.append(f"{prefix}record_date >= ?")
+            params.append(valor)
+            continue
+        if campo == 'fecha_hasta':
+            conditions.append(f"{prefix}record_date <= ?")
+            params.append(valor)
+            continue
+        column = HISTORICO_FILTER_COLUMNS.get(campo)
+        if column is None:
+            logger.debug("Filtro de historico ignorado: %s", campo)
+            continue
+        # Un alias y su columna ('sid' y 'scotia_id') no deben duplicar el predicado
+        if (column, str(valor)) in seen:
+            continue
+        seen.add((column, str(valor)))
+        if fulltext and column in HISTORICO_FULLTEXT_COLUMNS:
+            query = build_fulltext_query(str(valor), sqlite=fulltext == 'sqlite')
+            if query and fulltext == 'sqlite':
+                conditions.append(f"{prefix}id IN (SELECT rowid FROM historico_fts WHERE historico_fts MATCH ?)")
+                params.append(f"{column} : ({query})")
+                continue
+            if query:
+                conditions.append(f"CONTAINS({prefix}{column}, ?)")
+                params.append(query)
+                continue
+        conditions.append(f"{prefix}{column} LIKE ?")
+        params.append(f"%{_escape_like(str(valor).strip())}%")
+
+    if not conditions:
+        return '', params
+    return ' WHERE ' + ' AND '.join(conditions), params
+
+
+def build_fulltext_query(texto: str, sqlite: bool = False) -> str:
+    """
+    Construye la condición de texto completo: todas las palabras, como prefijo.
+
+    'juan perez' -> '"juan*" AND "perez*"' (CONTAINS) o '"juan"* AND "perez"*' (FTS5).
+    Retorna cadena vacía si el texto no tiene palabras.
+    """
+    terms = _WORD_PATTERN.findall(texto or '')
+    if sqlite:
+        return ' AND '.join(f'"{term}"*' for term in terms)
+    return ' AND '.join(f'"{term}*"' for term in terms)
+
+
+def historico_fulltext_mode(conn) -> Optional[str]:
+    """
+    Indica cómo buscar por texto completo en historico con la conexión `conn`.
+
+    Returns:
+        'sqlserver' (índice en ftc_historico), 'sqlite' (espejo FTS5 historico_fts)
+        o None si no hay índice y se debe usar LIKE
+    """
+    global _fulltext_enabled
+    if isinstance(conn, sqlite3.Connection):
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'historico_fts'"
+        ).fetchone()
+        return 'sqlite' if row is not None else None
+    if _fulltext_enabled is None:
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT COUNT(*) FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID('historico')"
+            )
+            _fulltext_enabled = cursor.fetchone()[0] > 0
+        except Exception as e:
+            logger.warning("No se pudo consultar el índice de texto completo: %s", e)
+            return None
+        logger.info("Texto completo en historico: %s", 'habilitado' if _fulltext_enabled else 'no disponible')
+    return 'sqlserver' if _fulltext_enabled else None
+
+
+def reset_fulltext_cache():
+    """Olvida la detección del índice (por ejemplo tras ejecutar la migración)"""
+    global _fulltext_enabled
+    _fulltext_enabled = None
+
+
+# Espejo FTS5 para la base SQLite local: tabla de contenido externo sobre
+# historico, sincronizada con triggers
+SQLITE_FULLTEXT_DDL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS historico_fts USING fts5(
+        event_description, comment, responsible, ticket_email,
+        content = 'historico', content_rowid = 'id',
+        tokenize = 'unicode61 remove_diacritics 2'
+    );
+    CREATE TRIGGER IF NOT EXISTS historico_fts_ai AFTER INSERT ON historico BEGIN
+        INSERT INTO historico_fts (rowid, event_description, comment, responsible, ticket_email)
+        VALUES (new.id, new.event_description, new.comment, new.responsible, new.ticket_email);
+    END;
+    CREATE TRIGGER IF NOT EXISTS historico_fts_ad AFTER DELETE ON historico BEGIN
+        INSERT INTO historico_fts (historico_fts, rowid, event_description, comment, responsible, ticket_email)
+        VALUES ('delete', old.id, old.event_description, old.comment, old.responsible, old.ticket_email);
+    END;
+    CREATE TRIGGER IF NOT EXISTS historico_fts_au AFTER UPDATE ON historico BEGIN
+        INSERT INTO historico_fts (historico_fts, rowid, event_description, comment, responsible, ticket_email)
+        VALUES ('delete', old.id, old.event_description, old.comment, old.responsible, old.ticket_email);
+        INSERT INTO historico_fts (rowid, event_description, comment, responsible, ticket_email)
+        VALUES (new.id, new.event_description, new.comment, new.responsible, new.ticket_email);
+    END;
+"""
+
+
+def create_sqlite_fulltext_mirror(conn: sqlite3.Connection):
+    """Crea (idempotente) el espejo FTS5 de historico en SQLite y lo reconstruye"""
+    conn.executescript(SQLITE_FULLTEXT_DDL)
+    conn.execute("INSERT INTO historico_fts (historico_fts) VALUES ('rebuild')")
+    conn.commit()
 
 class SearchService:
     """Servicio para realizar búsquedas en la base de datos"""
@@ -22,112 +229,33 @@ class SearchService:
         """Obtiene una conexión a la base de datos"""
         return self.db_manager.get_connection()
     
-    def buscar_procesos(self, filtros: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    def buscar_procesos(self, filtros: Optional[Dict[str, Any]] = None,
+                        limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
         """
         Busca procesos en la tabla histórico con filtros opcionales
         
         Args:
-            filtros: Diccionario con filtros de búsqueda
+            filtros: Diccionario con filtros de búsqueda (ver HISTORICO_FILTER_COLUMNS)
+            limit: Máximo de registros a retornar (None = todos)
+            offset: Registros a saltar antes de la página (requiere limit)
             
         Returns:
             Lista de procesos encontrados
         """
+        conn = None
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
             # Query base - seleccionar todos los campos relevantes
-            query = """
-                SELECT id, case_id, scotia_id, process_access, record_date, request_date,
-                       status, comment, responsible, subunit, event_description,
-                       ticket_email, app_access_name, closing_date_app, app_quality,
-                       confirmation_by_user, employee_email, computer_system_type,
-                       duration_of_access, closing_date_ticket, comment_tq, ticket_quality,
-                       general_status_ticket, general_status_case, average_time_open_ticket,
-                       sla_app, sla_ticket, sla_case
-                FROM historico
-            """
+            query = f"SELECT {', '.join(HISTORICO_COLUMNS)} FROM historico"
             
-            conditions = []
-            params = []
-            
-            if filtros:
-                if filtros.get('case_id'):
-                    conditions.append("case_id LIKE ?")
-                    params.append(f"%{filtros['case_id']}%")
-                
-                if filtros.get('sid') or filtros.get('scotia_id'):
-                    # 'sid' es un alias para 'scotia_id'
-                    valor = filtros.get('scotia_id') or filtros.get('sid')
-                    conditions.append("scotia_id LIKE ?")
-                    params.append(f"%{valor}%")
-                
-                if filtros.get('process_access') or filtros.get('tipo_proceso'):
-                    # 'tipo_proceso' es un alias para 'process_access'
-                    valor = filtros.get('process_access') or filtros.get('tipo_proceso')
-                    conditions.append("process_access LIKE ?")
-                    params.append(f"%{valor}%")
-                
-                if filtros.get('status'):
-                    conditions.append("status LIKE ?")
-                    params.append(f"%{filtros['status']}%")
-                
-                if filtros.get('request_date'):
-                    conditions.append("request_date LIKE ?")
-                    params.append(f"%{filtros['request_date']}%")
-                
-                if filtros.get('app_access_name') or filtros.get('app_name'):
-                    # 'app_name' es un alias para 'app_access_name'
-                    valor = filtros.get('app_access_name') or filtros.get('app_name')
-                    conditions.append("app_access_name LIKE ?")
-                    params.append(f"%{valor}%")
-                
-                if filtros.get('ticket_email') or filtros.get('mail'):
-                    # 'mail' es un alias para 'ticket_email'
-                    valor = filtros.get('ticket_email') or filtros.get('mail')
-                    conditions.append("ticket_email LIKE ?")
-                    params.append(f"%{valor}%")
-                
-                if filtros.get('employee_email'):
-                    conditions.append("employee_email LIKE ?")
-                    params.append(f"%{filtros['employee_email']}%")
-                
-                if filtros.get('app_quality'):
-                    conditions.append("app_quality LIKE ?")
-                    params.append(f"%{filtros['app_quality']}%")
-                
-                if filtros.get('confirmation_by_user'):
-                    conditions.append("confirmation_by_user LIKE ?")
-                    params.append(f"%{filtros['confirmation_by_user']}%")
-                
-                if filtros.get('comment'):
-                    conditions.append("comment LIKE ?")
-                    params.append(f"%{filtros['comment']}%")
-                
-                if filtros.get('subunit'):
-                    conditions.append("subunit LIKE ?")
-                    params.append(f"%{filtros['subunit']}%")
-                
-                if filtros.get('responsible'):
-                    conditions.append("responsible LIKE ?")
-                    params.append(f"%{filtros['responsible']}%")
-                
-                if filtros.get('event_description'):
-                    conditions.append("event_description LIKE ?")
-                    params.append(f"%{filtros['event_description']}%")
-                
-                if filtros.get('fecha_desde'):
-                    conditions.append("record_date >= ?")
-                    params.append(filtros['fecha_desde'])
-                
-                if filtros.get('fecha_hasta'):
-                    conditions.append("record_date <= ?")
-                    params.append(filtros['fecha_hasta'])
-            
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
-            
-            query += " ORDER BY record_date DESC"
+            where, params = build_historico_conditions(
+                filtros, fulltext=historico_fulltext_mode(conn))
+            query += where + " ORDER BY record_date DESC, id DESC"
+            if limit is not None:
+                query += " OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
+                params.extend([offset, limit])
             
             cursor.execute(query, params)
             columns = [description[0] for description in cursor.description]
@@ -141,9 +269,109 @@ class SearchService:
             return results
             
         except Exception as e:
-            print(f"Error en buscar_procesos: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error en buscar_procesos: %s", e)
+            try:
+                conn.close()
+            except:
+                pass
+            return []
+    
+    def contar_procesos(self, filtros: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Cuenta los procesos del histórico que coinciden con los filtros
+        
+        Args:
+            filtros: Mismos filtros que buscar_procesos
+            
+        Returns:
+            Número total de coincidencias (0 si hay error)
+        """
+        conn = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            where, params = build_historico_conditions(
+                filtros, fulltext=historico_fulltext_mode(conn))
+            cursor.execute("SELECT COUNT(*) FROM historico" + where, params)
+            total = cursor.fetchone()[0]
+            conn.close()
+            return total
+        except Exception as e:
+            logger.error("Error en contar_procesos: %s", e)
+            try:
+                conn.close()
+            except:
+                pass
+            return 0
+    
+    def buscar_texto(self, texto: str, campos: Optional[List[str]] = None,
+                     limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Búsqueda de texto libre en historico ordenada por relevancia
+        
+        Busca todas las palabras de `texto` (como prefijo) en los campos libres
+        usando el índice de texto completo: CONTAINSTABLE en SQL Server o el
+        espejo FTS5 (bm25) en SQLite. Sin índice recurre a LIKE y ordena por fecha.
+        
+        Args:
+            texto: Palabras a buscar
+            campos: Subconjunto de HISTORICO_FULLTEXT_COLUMNS (por defecto todos)
+            limit: Máximo de registros a retornar
+            
+        Returns:
+            Registros de historico con 'search_rank' (mayor = más relevante;
+            None si se buscó sin índice)
+        """
+        columnas = [c for c in (campos or HISTORICO_FULLTEXT_COLUMNS) if c in HISTORICO_FULLTEXT_COLUMNS]
+        columnas = columnas or list(HISTORICO_FULLTEXT_COLUMNS)
+        if not _WORD_PATTERN.search(texto or ''):
+            return []
+        
+        conn = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            select = ', '.join(f"h.{c}" for c in HISTORICO_COLUMNS)
+            modo = historico_fulltext_mode(conn)
+            
+            if modo == 'sqlserver':
+                cursor.execute(f"""
+                    SELECT TOP (?) ft.[RANK] AS search_rank, {select}
+                    FROM CONTAINSTABLE(historico, ({', '.join(columnas)}), ?, ?) ft
+                    JOIN historico h ON h.id = ft.[KEY]
+                    ORDER BY ft.[RANK] DESC, h.record_date DESC
+                """, (limit, build_fulltext_query(texto), limit))
+            elif modo == 'sqlite':
+                # bm25() es menor cuanto más relevante: se invierte el signo
+                cursor.execute(f"""
+                    SELECT -bm25(historico_fts) AS search_rank, {select}
+                    FROM historico_fts
+                    JOIN historico h ON h.id = historico_fts.rowid
+                    WHERE historico_fts MATCH ?
+                    ORDER BY bm25(historico_fts), h.record_date DESC
+                    LIMIT ?
+                """, (f"{{{' '.join(columnas)}}} : ({build_fulltext_query(texto, sqlite=True)})", limit))
+            else:
+                logger.debug("buscar_texto sin índice de texto completo: se usa LIKE")
+                conditions = []
+                params: List[Any] = [limit]
+                for term in _WORD_PATTERN.findall(texto):
+                    conditions.append('(' + ' OR '.join(f"h.{c} LIKE ?" for c in columnas) + ')')
+                    params.extend([f"%{_escape_like(term)}%"] * len(columnas))
+                cursor.execute(f"""
+                    SELECT TOP (?) NULL AS search_rank, {select}
+                    FROM historico h
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY h.record_date DESC, h.id DESC
+                """, params)
+            
+            columns = [description[0] for description in cursor.description]
+            results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            conn.close()
+            return results
+            
+        except Exception as e:
+            logger.error("Error en buscar_texto: %s", e)
             try:
                 conn.close()
             except:
@@ -185,7 +413,7 @@ class SearchService:
             return results
             
         except Exception as e:
-            print(f"Error en buscar_headcount_por_sid: {e}")
+            logger.error("Error en buscar_headcount_por_sid: %s", e)
             return []
     
     def obtener_todo_headcount(self) -> List[Dict[str, Any]]:
@@ -219,7 +447,7 @@ class SearchService:
             return results
             
         except Exception as e:
-            print(f"Error en obtener_todo_headcount: {e}")
+            logger.error("Error en obtener_todo_headcount: %s", e)
             return []
     
     def actualizar_proceso(self, case_id: str, datos_actualizados: Dict[str, Any]) -> tuple[bool, str]:
@@ -271,17 +499,24 @@ class SearchService:
             params.append(case_id)
             
             cursor.execute(query, params)
+            updated = cursor.rowcount
+            
+            # Mantener la proyección current_access de los empleados del caso
+            from services.access_management_service import access_service
+            cursor.execute('SELECT DISTINCT scotia_id FROM historico WHERE case_id = ?', (case_id,))
+            for (scotia_id,) in cursor.fetchall():
+                access_service.refresh_current_access(scotia_id, conn=conn)
             conn.commit()
             
-            if cursor.rowcount > 0:
+            if updated > 0:
                 return True, f"Proceso {case_id} actualizado exitosamente"
             else:
                 return False, f"No se encontró el proceso {case_id}"
                 
         except Exception as e:
-            print(f"Error en actualizar_proceso: {e}")
+            logger.error("Error en actualizar_proceso: %s", e)
             return False, f"Error al actualizar: {str(e)}"
 
 
-# Instancia global del servicio
-search_service = SearchService()
+# Instancia global del servicio (se construye en el primer uso)
+search_service = LazyService('search_service', SearchService)
@@ -266,6 +266,189 @@ BEGIN
 END
 GO
 
+-- =====================================================
+-- COLUMNAS NORMALIZADAS (COMPUTADAS PERSISTIDAS)
+-- =====================================================
+-- Las comparaciones UPPER(LTRIM(RTRIM(col))) no pueden usar índices. Estas columnas
+-- guardan el valor ya normalizado y se mantienen solas en cada INSERT/UPDATE.
+-- Al agregarlas, SQL Server calcula el valor de todas las filas existentes.
+
+-- Columnas normalizadas en applications
+IF COL_LENGTH('dbo.applications', 'unidad_subunidad_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications]
+    ADD [unidad_subunidad_norm] AS UPPER(LTRIM(RTRIM([unidad_subunidad]))) PERSISTED;
+    PRINT 'Columna applications.unidad_subunidad_norm agregada';
+END
+GO
+
+IF COL_LENGTH('dbo.applications', 'position_role_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications]
+    ADD [position_role_norm] AS UPPER(LTRIM(RTRIM([position_role]))) PERSISTED;
+    PRINT 'Columna applications.position_role_norm agregada';
+END
+GO
+
+IF COL_LENGTH('dbo.applications', 'subunit_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications]
+    ADD [subunit_norm] AS UPPER(LTRIM(RTRIM([subunit]))) PERSISTED;
+    PRINT 'Columna applications.subunit_norm agregada';
+END
+GO
+
+IF COL_LENGTH('dbo.applications', 'role_name_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications]
+    ADD [role_name_norm] AS UPPER(LTRIM(RTRIM([role_name]))) PERSISTED;
+    PRINT 'Columna applications.role_name_norm agregada';
+END
+GO
+
+-- Columnas normalizadas en historico
+IF COL_LENGTH('dbo.historico', 'status_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[historico]
+    ADD [status_norm] AS UPPER(LTRIM(RTRIM([status]))) PERSISTED;
+    PRINT 'Columna historico.status_norm agregada';
+END
+GO
+
+IF COL_LENGTH('dbo.historico', 'app_access_name_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[historico]
+    ADD [app_access_name_norm] AS UPPER(LTRIM(RTRIM([app_access_name]))) PERSISTED;
+    PRINT 'Columna historico.app_access_name_norm agregada';
+END
+GO
+
+-- Columnas normalizadas en headcount (lado empleado del cruce con applications)
+IF COL_LENGTH('dbo.headcount', 'unidad_subunidad_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[headcount]
+    ADD [unidad_subunidad_norm] AS UPPER(LTRIM(RTRIM([unidad_subunidad]))) PERSISTED;
+    PRINT 'Columna headcount.unidad_subunidad_norm agregada';
+END
+GO
+
+IF COL_LENGTH('dbo.headcount', 'position_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[headcount]
+    ADD [position_norm] AS UPPER(LTRIM(RTRIM([position]))) PERSISTED;
+    PRINT 'Columna headcount.position_norm agregada';
+END
+GO
+
+-- =====================================================
+-- CONCILIACIÓN INCREMENTAL (CONTROL DE CAMBIOS Y TABLAS MATERIALIZADAS)
+-- =====================================================
+-- Cada tabla de origen lleva una columna ROWVERSION que SQL Server incrementa en
+-- cada INSERT/UPDATE. La conciliación incremental guarda la última versión
+-- procesada (watermark) y solo recalcula los empleados afectados desde entonces.
+
+IF COL_LENGTH('dbo.headcount', 'row_version') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[headcount] ADD [row_version] ROWVERSION;
+    PRINT 'Columna headcount.row_version agregada';
+END
+GO
+
+IF COL_LENGTH('dbo.applications', 'row_version') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications] ADD [row_version] ROWVERSION;
+    PRINT 'Columna applications.row_version agregada';
+END
+GO
+
+IF COL_LENGTH('dbo.historico', 'row_version') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[historico] ADD [row_version] ROWVERSION;
+    PRINT 'Columna historico.row_version agregada';
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_headcount_row_version' AND object_id = OBJECT_ID('headcount'))
+    CREATE INDEX IX_headcount_row_version ON [dbo].[headcount] ([row_version]);
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_applications_row_version' AND object_id = OBJECT_ID('applications'))
+    CREATE INDEX IX_applications_row_version ON [dbo].[applications] ([row_version]) INCLUDE (logical_access_name, unidad_subunidad, position_role);
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_historico_row_version' AND object_id = OBJECT_ID('historico'))
+    CREATE INDEX IX_historico_row_version ON [dbo].[historico] ([row_version]) INCLUDE (scotia_id);
+GO
+
+-- Última versión procesada por tabla de origen
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[reconciliation_watermark]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[reconciliation_watermark] (
+        [source_table] VARCHAR(50) NOT NULL PRIMARY KEY,
+        [last_version] BIGINT NOT NULL DEFAULT 0,
+        [updated_at] DATETIME2 NOT NULL DEFAULT GETDATE()
+    );
+    PRINT 'Tabla reconciliation_watermark creada exitosamente';
+END
+GO
+
+-- Resumen materializado por empleado
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[reconciliation_state]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[reconciliation_state] (
+        [scotia_id] VARCHAR(20) NOT NULL PRIMARY KEY,
+        [current_count] INT NOT NULL DEFAULT 0,
+        [to_grant_count] INT NOT NULL DEFAULT 0,
+        [to_revoke_count] INT NOT NULL DEFAULT 0,
+        [is_stale] BIT NOT NULL DEFAULT 0,
+        [computed_at] DATETIME2 NOT NULL DEFAULT GETDATE()
+    );
+    CREATE INDEX IX_reconciliation_state_stale ON [dbo].[reconciliation_state] ([is_stale]);
+    PRINT 'Tabla reconciliation_state creada exitosamente';
+END
+GO
+
+-- Detalle materializado (mismas columnas que sp_GetAccessReconciliationReport)
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[reconciliation_results]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[reconciliation_results] (
+        [id] INT IDENTITY(1,1) NOT NULL PRIMARY KEY,
+        [scotia_id] VARCHAR(20) NOT NULL,
+        [access_type] VARCHAR(20) NOT NULL,
+        [app_name] VARCHAR(150) NULL,
+        [unit] VARCHAR(100) NULL,
+        [subunit] VARCHAR(100) NULL,
+        [position_role] VARCHAR(100) NULL,
+        [role_name] VARCHAR(100) NULL,
+        [description] NVARCHAR(MAX) NULL,
+        [record_date] DATETIME2 NULL,
+        [status] VARCHAR(50) NULL
+    );
+    CREATE INDEX IX_reconciliation_results_scotia ON [dbo].[reconciliation_results] ([scotia_id], [access_type]);
+    CREATE INDEX IX_reconciliation_results_app ON [dbo].[reconciliation_results] ([app_name]) INCLUDE (scotia_id);
+    PRINT 'Tabla reconciliation_results creada exitosamente';
+END
+GO
+
+-- =====================================================
+-- PROYECCIÓN DE ACCESOS ACTUALES (current_access)
+-- =====================================================
+-- Una fila por empleado y aplicación con el último registro 'closed completed'
+-- del historial. La mantiene la aplicación en cada escritura sobre historico
+-- (AccessManagementService._refresh_current_access).
+
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[current_access]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[current_access] (
+        [scotia_id] VARCHAR(20) NOT NULL,
+        [app_access_name] VARCHAR(150) NOT NULL,
+        [last_process] VARCHAR(50) NOT NULL,
+        [last_record_date] DATETIME2 NULL,
+        [subunit] VARCHAR(100) NULL,
+        [status] VARCHAR(50) NULL,
+        [event_description] NVARCHAR(MAX) NULL,
+        CONSTRAINT PK_current_access PRIMARY KEY ([scotia_id], [app_access_name])
+    );
+    PRINT 'Tabla current_access creada exitosamente';
+END
+GO
+
 -- =====================================================
 -- ÍNDICES PARA OPTIMIZACIÓN
 -- =====================================================
@@ -336,6 +519,31 @@ BEGIN
 END
 GO
 
+-- Índices de cobertura sobre columnas normalizadas
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_applications_norm_unidad_position' AND object_id = OBJECT_ID(N'[dbo].[applications]'))
+BEGIN
+    CREATE INDEX IX_applications_norm_unidad_position ON [dbo].[applications] ([unidad_subunidad_norm], [position_role_norm])
+    INCLUDE ([logical_access_name], [subunit_norm], [role_name_norm], [access_status]);
+    PRINT 'Índice IX_applications_norm_unidad_position creado exitosamente';
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_historico_norm_scotia_status_app' AND object_id = OBJECT_ID(N'[dbo].[historico]'))
+BEGIN
+    CREATE INDEX IX_historico_norm_scotia_status_app ON [dbo].[historico] ([scotia_id], [status_norm], [app_access_name_norm])
+    INCLUDE ([process_access], [record_date]);
+    PRINT 'Índice IX_historico_norm_scotia_status_app creado exitosamente';
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_headcount_norm_unidad_position' AND object_id = OBJECT_ID(N'[dbo].[headcount]'))
+BEGIN
+    CREATE INDEX IX_headcount_norm_unidad_position ON [dbo].[headcount] ([unidad_subunidad_norm], [position_norm])
+    INCLUDE ([activo]);
+    PRINT 'Índice IX_headcount_norm_unidad_position creado exitosamente';
+END
+GO
+
 -- =====================================================
 -- VISTAS DEL SISTEMA
 -- =====================================================
@@ -363,7 +571,9 @@ BEGIN
             logical_access_name,
             unit,
             unidad_subunidad,
+            unidad_subunidad_norm,
             position_role,
+            position_role_norm,
             subunit,
             role_name,
             system_owner,
@@ -373,8 +583,8 @@ BEGIN
         FROM [dbo].[applications]
         WHERE access_status = ''Activo''
     ) a ON 
-        UPPER(LTRIM(RTRIM(h.unidad_subunidad))) = UPPER(LTRIM(RTRIM(a.unidad_subunidad))) AND
-        UPPER(LTRIM(RTRIM(h.position))) = UPPER(LTRIM(RTRIM(a.position_role)))
+        h.unidad_subunidad_norm = a.unidad_subunidad_norm AND
+        h.position_norm = a.position_role_norm
     WHERE h.activo = 1
     GROUP BY h.scotia_id, a.logical_access_name, h.unit, h.unidad_subunidad, h.position, a.subunit, a.position_role, 
              a.role_name, a.system_owner, a.access_type, a.category, a.description');
@@ -403,7 +613,9 @@ BEGIN
             logical_access_name,
             unit,
             unidad_subunidad,
+            unidad_subunidad_norm,
             position_role,
+            position_role_norm,
             subunit,
             role_name,
             system_owner,
@@ -413,8 +625,8 @@ BEGIN
         FROM [dbo].[applications]
         WHERE access_status = ''Activo''
     ) a ON 
-        UPPER(LTRIM(RTRIM(h.unidad_subunidad))) = UPPER(LTRIM(RTRIM(a.unidad_subunidad))) AND
-        UPPER(LTRIM(RTRIM(h.position))) = UPPER(LTRIM(RTRIM(a.position_role)))
+        h.unidad_subunidad_norm = a.unidad_subunidad_norm AND
+        h.position_norm = a.position_role_norm
     WHERE h.activo = 1
     GROUP BY h.scotia_id, a.logical_access_name, h.unit, h.unidad_subunidad, h.position, a.subunit, a.position_role, 
              a.role_name, a.system_owner, a.access_type, a.category, a.description');
@@ -735,6 +947,232 @@ BEGIN
 END
 GO
 
+-- Carga inicial desde historico (solo si la proyección está vacía)
+IF NOT EXISTS (SELECT 1 FROM [dbo].[current_access])
+BEGIN
+    INSERT INTO [dbo].[current_access]
+    (scotia_id, app_access_name, last_process, last_record_date, subunit, status, event_description)
+    SELECT scotia_id, app_access_name, process_access, record_date, subunit, status, event_description
+    FROM (
+        SELECT scotia_id, app_access_name, process_access, record_date, subunit, status, event_description,
+               ROW_NUMBER() OVER (PARTITION BY scotia_id, app_access_name ORDER BY record_date DESC, id DESC) AS rn
+        FROM [dbo].[historico]
+        WHERE status_norm = 'CLOSED COMPLETED'
+          AND process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access', 'offboarding')
+          AND app_access_name IS NOT NULL
+    ) latest
+    WHERE rn = 1;
+    PRINT 'current_access cargada desde historico';
+END
+GO
+
+-- =====================================================
+-- RESUMEN DEL HISTORIAL (historico_stats)
+-- =====================================================
+-- historico_stats: conteos por día, subunidad, aplicación y proceso.
+-- historico_stats_employee: conteos por empleado (unidad y puesto se obtienen
+-- de headcount al leer). Los mantiene de forma incremental el trigger
+-- TR_historico_stats en cada INSERT, UPDATE o DELETE sobre historico, venga de
+-- la aplicación, de una importación o de un script. Los valores NULL de las
+-- dimensiones se guardan como ''. Los lee
+-- AccessManagementService.get_historial_statistics.
+
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[historico_stats]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[historico_stats] (
+        [stat_date] DATE NOT NULL,
+        [subunit] VARCHAR(100) NOT NULL,
+        [app_access_name] VARCHAR(150) NOT NULL,
+        [process_access] VARCHAR(50) NOT NULL,
+        [total_registros] INT NOT NULL,
+        [completados] INT NOT NULL,
+        [pendientes] INT NOT NULL,
+        [en_proceso] INT NOT NULL,
+        [cancelados] INT NOT NULL,
+        [rechazados] INT NOT NULL,
+        CONSTRAINT PK_historico_stats PRIMARY KEY ([stat_date], [subunit], [app_access_name], [process_access])
+    );
+    PRINT 'Tabla historico_stats creada exitosamente';
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[historico_stats_employee]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[historico_stats_employee] (
+        [scotia_id] VARCHAR(20) NOT NULL,
+        [total_registros] INT NOT NULL,
+        [completados] INT NOT NULL,
+        [pendientes] INT NOT NULL,
+        [en_proceso] INT NOT NULL,
+        [cancelados] INT NOT NULL,
+        [rechazados] INT NOT NULL,
+        CONSTRAINT PK_historico_stats_employee PRIMARY KEY ([scotia_id])
+    );
+    PRINT 'Tabla historico_stats_employee creada exitosamente';
+END
+GO
+
+IF EXISTS (SELECT * FROM sys.triggers WHERE name = 'TR_historico_stats')
+    DROP TRIGGER [dbo].[TR_historico_stats];
+GO
+
+CREATE TRIGGER [dbo].[TR_historico_stats] ON [dbo].[historico]
+AFTER INSERT, UPDATE, DELETE
+AS
+-- Suma las filas nuevas y resta las anteriores (deleted) en ambos resúmenes;
+-- elimina los grupos que quedan en cero.
+BEGIN
+    SET NOCOUNT ON;
+
+    IF NOT EXISTS (SELECT 1 FROM inserted) AND NOT EXISTS (SELECT 1 FROM deleted)
+        RETURN;
+
+    -- Ediciones que no tocan columnas del resumen (comentarios, fechas de cierre, SLA...)
+    IF EXISTS (SELECT 1 FROM inserted) AND EXISTS (SELECT 1 FROM deleted)
+       AND NOT (UPDATE(scotia_id) OR UPDATE(record_date) OR UPDATE(subunit)
+                OR UPDATE(app_access_name) OR UPDATE(process_access) OR UPDATE(status))
+        RETURN;
+
+    SELECT scotia_id, record_date, subunit, app_access_name, process_access, status, 1 AS sign
+    INTO #cambios
+    FROM inserted
+    UNION ALL
+    SELECT scotia_id, record_date, subunit, app_access_name, process_access, status, -1
+    FROM deleted;
+
+    MERGE [dbo].[historico_stats] WITH (HOLDLOCK) AS target
+    USING (
+        SELECT CAST(record_date AS DATE) AS stat_date, ISNULL(subunit, '') AS subunit,
+               ISNULL(app_access_name, '') AS app_access_name, ISNULL(process_access, '') AS process_access,
+               SUM(sign) AS total_registros,
+               SUM(CASE WHEN status = 'Completado' THEN sign ELSE 0 END) AS completados,
+               SUM(CASE WHEN status = 'Pendiente' THEN sign ELSE 0 END) AS pendientes,
+               SUM(CASE WHEN status = 'En Proceso' THEN sign ELSE 0 END) AS en_proceso,
+               SUM(CASE WHEN status = 'Cancelado' THEN sign ELSE 0 END) AS cancelados,
+               SUM(CASE WHEN status = 'Rechazado' THEN sign ELSE 0 END) AS rechazados
+        FROM #cambios
+        GROUP BY CAST(record_date AS DATE), ISNULL(subunit, ''), ISNULL(app_access_name, ''), ISNULL(process_access, '')
+    ) AS source
+    ON target.stat_date = source.stat_date AND target.subunit = source.subunit
+       AND target.app_access_name = source.app_access_name AND target.process_access = source.process_access
+    WHEN MATCHED AND target.total_registros + source.total_registros = 0 THEN DELETE
+    WHEN MATCHED THEN UPDATE SET
+        total_registros = target.total_registros + source.total_registros,
+        completados = target.completados + source.completados,
+        pendientes = target.pendientes + source.pendientes,
+        en_proceso = target.en_proceso + source.en_proceso,
+        cancelados = target.cancelados + source.cancelados,
+        rechazados = target.rechazados + source.rechazados
+    WHEN NOT MATCHED BY TARGET AND source.total_registros > 0 THEN
+        INSERT (stat_date, subunit, app_access_name, process_access, total_registros,
+                completados, pendientes, en_proceso, cancelados, rechazados)
+        VALUES (source.stat_date, source.subunit, source.app_access_name, source.process_access,
+                source.total_registros, source.completados, source.pendientes, source.en_proceso,
+                source.cancelados, source.rechazados);
+
+    MERGE [dbo].[historico_stats_employee] WITH (HOLDLOCK) AS target
+    USING (
+        SELECT scotia_id,
+               SUM(sign) AS total_registros,
+               SUM(CASE WHEN status = 'Completado' THEN sign ELSE 0 END) AS completados,
+               SUM(CASE WHEN status = 'Pendiente' THEN sign ELSE 0 END) AS pendientes,
+               SUM(CASE WHEN status = 'En Proceso' THEN sign ELSE 0 END) AS en_proceso,
+               SUM(CASE WHEN status = 'Cancelado' THEN sign ELSE 0 END) AS cancelados,
+               SUM(CASE WHEN status = 'Rechazado' THEN sign ELSE 0 END) AS rechazados
+        FROM #cambios
+        GROUP BY scotia_id
+    ) AS source
+    ON target.scotia_id = source.scotia_id
+    WHEN MATCHED AND target.total_registros + source.total_registros = 0 THEN DELETE
+    WHEN MATCHED THEN UPDATE SET
+        total_registros = target.total_registros + source.total_registros,
+        completados = target.completados + source.completados,
+        pendientes = target.pendientes + source.pendientes,
+        en_proceso = target.en_proceso + source.en_proceso,
+        cancelados = target.cancelados + source.cancelados,
+        rechazados = target.rechazados + source.rechazados
+    WHEN NOT MATCHED BY TARGET AND source.total_registros > 0 THEN
+        INSERT (scotia_id, total_registros, completados, pendientes, en_proceso, cancelados, rechazados)
+        VALUES (source.scotia_id, source.total_registros, source.completados, source.pendientes,
+                source.en_proceso, source.cancelados, source.rechazados);
+END
+GO
+
+PRINT 'Trigger TR_historico_stats creado exitosamente';
+GO
+
+-- Carga inicial desde historico (solo si los resúmenes están vacíos)
+IF NOT EXISTS (SELECT 1 FROM [dbo].[historico_stats])
+BEGIN
+    INSERT INTO [dbo].[historico_stats]
+    (stat_date, subunit, app_access_name, process_access, total_registros,
+     completados, pendientes, en_proceso, cancelados, rechazados)
+    SELECT CAST(record_date AS DATE), ISNULL(subunit, ''), ISNULL(app_access_name, ''), ISNULL(process_access, ''),
+           COUNT(*),
+           COUNT(CASE WHEN status = 'Completado' THEN 1 END),
+           COUNT(CASE WHEN status = 'Pendiente' THEN 1 END),
+           COUNT(CASE WHEN status = 'En Proceso' THEN 1 END),
+           COUNT(CASE WHEN status = 'Cancelado' THEN 1 END),
+           COUNT(CASE WHEN status = 'Rechazado' THEN 1 END)
+    FROM [dbo].[historico]
+    GROUP BY CAST(record_date AS DATE), ISNULL(subunit, ''), ISNULL(app_access_name, ''), ISNULL(process_access, '');
+    PRINT 'historico_stats cargada desde historico';
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM [dbo].[historico_stats_employee])
+BEGIN
+    INSERT INTO [dbo].[historico_stats_employee]
+    (scotia_id, total_registros, completados, pendientes, en_proceso, cancelados, rechazados)
+    SELECT scotia_id,
+           COUNT(*),
+           COUNT(CASE WHEN status = 'Completado' THEN 1 END),
+           COUNT(CASE WHEN status = 'Pendiente' THEN 1 END),
+           COUNT(CASE WHEN status = 'En Proceso' THEN 1 END),
+           COUNT(CASE WHEN status = 'Cancelado' THEN 1 END),
+           COUNT(CASE WHEN status = 'Rechazado' THEN 1 END)
+    FROM [dbo].[historico]
+    GROUP BY scotia_id;
+    PRINT 'historico_stats_employee cargada desde historico';
+END
+GO
+
+-- =====================================================
+-- BÚSQUEDA DE TEXTO COMPLETO EN HISTORICO
+-- =====================================================
+-- Índice de texto completo sobre los campos libres (misma definición que
+-- migration_fulltext_historico.sql). Solo si Full-Text Search está instalado;
+-- sin él la aplicación busca con LIKE.
+
+IF FULLTEXTSERVICEPROPERTY('IsFullTextInstalled') = 1
+   AND NOT EXISTS (SELECT * FROM sys.fulltext_catalogs WHERE name = 'ftc_historico')
+BEGIN
+    CREATE FULLTEXT CATALOG ftc_historico;
+    PRINT 'Catálogo de texto completo ftc_historico creado exitosamente';
+END
+GO
+
+IF FULLTEXTSERVICEPROPERTY('IsFullTextInstalled') = 1
+   AND NOT EXISTS (SELECT * FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID(N'[dbo].[historico]'))
+BEGIN
+    DECLARE @pk_name SYSNAME = (
+        SELECT name FROM sys.indexes
+        WHERE object_id = OBJECT_ID(N'[dbo].[historico]') AND is_primary_key = 1
+    );
+    DECLARE @sql NVARCHAR(MAX) = N'CREATE FULLTEXT INDEX ON [dbo].[historico] (
+            [event_description] LANGUAGE 3082,
+            [comment] LANGUAGE 3082,
+            [responsible] LANGUAGE 3082,
+            [ticket_email] LANGUAGE 3082
+        )
+        KEY INDEX ' + QUOTENAME(@pk_name) + N'
+        ON ftc_historico
+        WITH CHANGE_TRACKING AUTO;';
+    EXEC sp_executesql @sql;
+    PRINT 'Índice de texto completo sobre historico creado exitosamente';
+END
+GO
+
 -- =====================================================
 -- MIGRACIÓN SIMPLE PARA CONFIRMATION_BY_USER
 -- =====================================================
@@ -1041,54 +1479,133 @@ IF EXISTS (SELECT * FROM sys.procedures WHERE name = 'sp_GetReconciliationStats'
 GO
 
 CREATE PROCEDURE [dbo].[sp_GetReconciliationStats]
-    @scotia_id VARCHAR(20) = NULL
+    @scotia_id VARCHAR(20) = NULL,
+    @mode VARCHAR(20) = NULL
 AS
+-- Estadísticas de conciliación calculadas en una sola pasada set-based (sin
+-- ejecutar sp_GetAccessReconciliationReport por empleado). Usa las mismas
+-- reglas que el reporte: accesos actuales = onboarding/lateral_movement
+-- 'Completado' del historial; requeridos = applications 'Activo' de la
+-- unidad_subunidad y posición del empleado. Los conteos son por aplicación.
+--
+-- Modos:
+--   @scotia_id          -> una fila para ese empleado
+--   @mode = 'global'    -> una fila con los totales de la compañía (por defecto)
+--   @mode = 'employee'  -> una fila por empleado activo
+--   @mode = 'unit'      -> una fila por unidad_subunidad
 BEGIN
     SET NOCOUNT ON;
-    
-    IF @scotia_id IS NULL
+
+    SET @mode = CASE WHEN @scotia_id IS NOT NULL THEN 'employee' ELSE ISNULL(@mode, 'global') END;
+
+    IF @mode NOT IN ('global', 'employee', 'unit')
     BEGIN
-        -- Estadísticas globales
-        SELECT 
-            'Global' as scope,
-            (SELECT COUNT(*) FROM [dbo].[headcount] WHERE activo = 1) as empleados_activos,
-            (SELECT COUNT(*) FROM [dbo].[applications] WHERE access_status = 'Activo') as aplicaciones_activas,
-            (SELECT COUNT(*) FROM [dbo].[historico] WHERE status = 'Pendiente') as tickets_pendientes,
-            (SELECT COUNT(*) FROM [dbo].[historico] WHERE status = 'Completado') as tickets_completados,
-            (SELECT COUNT(*) FROM [dbo].[historico]) as total_historico;
+        SELECT 'error' as status, 'Modo no soportado: ' + @mode as message;
+        RETURN;
+    END
+
+    -- Conteos por empleado: un FULL JOIN entre accesos actuales y requeridos
+    SELECT e.scotia_id,
+           e.unidad_subunidad,
+           ISNULL(SUM(CASE WHEN p.is_current = 1 THEN 1 ELSE 0 END), 0) as accesos_actuales,
+           ISNULL(SUM(CASE WHEN p.is_current = 0 THEN 1 ELSE 0 END), 0) as accesos_a_otorgar,
+           ISNULL(SUM(CASE WHEN p.is_required = 0 THEN 1 ELSE 0 END), 0) as accesos_a_revocar
+    INTO #EmployeeStats
+    FROM [dbo].[headcount] e
+    LEFT JOIN (
+        SELECT COALESCE(cur.scotia_id, req.scotia_id) as scotia_id,
+               CASE WHEN cur.app_name IS NULL THEN 0 ELSE 1 END as is_current,
+               CASE WHEN req.app_name IS NULL THEN 0 ELSE 1 END as is_required
+        FROM (
+            SELECT DISTINCT h.scotia_id, h.app_access_name as app_name
+            FROM [dbo].[historico] h
+            WHERE h.process_access IN ('onboarding', 'lateral_movement')
+            AND h.app_access_name IS NOT NULL
+            AND h.status = 'Completado'
+            AND (@scotia_id IS NULL OR h.scotia_id = @scotia_id)
+        ) cur
+        FULL OUTER JOIN (
+            SELECT DISTINCT hc.scotia_id, a.logical_access_name as app_name
+            FROM [dbo].[headcount] hc
+            INNER JOIN [dbo].[applications] a
+                ON a.unidad_subunidad = hc.unidad_subunidad
+               AND a.position_role = hc.position
+            WHERE hc.activo = 1
+            AND a.access_status = 'Activo'
+            AND (@scotia_id IS NULL OR hc.scotia_id = @scotia_id)
+        ) req ON req.scotia_id = cur.scotia_id AND req.app_name = cur.app_name
+    ) p ON p.scotia_id = e.scotia_id
+    WHERE e.activo = 1
+    AND e.unit IS NOT NULL
+    AND e.position IS NOT NULL
+    AND (@scotia_id IS NULL OR e.scotia_id = @scotia_id)
+    GROUP BY e.scotia_id, e.unidad_subunidad
+    OPTION (RECOMPILE);  -- plan distinto para un empleado y para toda la compañía
+
+    IF @scotia_id IS NOT NULL
+    BEGIN
+        -- Siempre una fila (en cero si el empleado no está activo)
+        SELECT @scotia_id as scope,
+               ISNULL(SUM(accesos_actuales), 0) as accesos_actuales,
+               ISNULL(SUM(accesos_a_otorgar), 0) as accesos_a_otorgar,
+               ISNULL(SUM(accesos_a_revocar), 0) as accesos_a_revocar,
+               ISNULL(SUM(accesos_actuales + accesos_a_otorgar - accesos_a_revocar), 0) as accesos_finales
+        FROM #EmployeeStats;
+    END
+    ELSE IF @mode = 'employee'
+    BEGIN
+        SELECT scotia_id as scope,
+               unidad_subunidad,
+               accesos_actuales,
+               accesos_a_otorgar,
+               accesos_a_revocar,
+               accesos_actuales + accesos_a_otorgar - accesos_a_revocar as accesos_finales
+        FROM #EmployeeStats
+        ORDER BY scotia_id;
+    END
+    ELSE IF @mode = 'unit'
+    BEGIN
+        SELECT ISNULL(unidad_subunidad, 'Sin Unidad/Subunidad') as scope,
+               COUNT(*) as empleados,
+               SUM(CASE WHEN accesos_a_otorgar > 0 OR accesos_a_revocar > 0 THEN 1 ELSE 0 END) as empleados_con_diferencias,
+               SUM(accesos_actuales) as accesos_actuales,
+               SUM(accesos_a_otorgar) as accesos_a_otorgar,
+               SUM(accesos_a_revocar) as accesos_a_revocar
+        FROM #EmployeeStats
+        GROUP BY unidad_subunidad
+        ORDER BY scope;
     END
     ELSE
     BEGIN
-        -- Estadísticas del empleado específico
-        DECLARE @current_access INT, @to_grant INT, @to_revoke INT;
-        
-        SELECT @current_access = COUNT(DISTINCT app_access_name)
-        FROM [dbo].[historico] 
-        WHERE scotia_id = @scotia_id 
-        AND process_access IN ('onboarding', 'lateral_movement')
-        AND status = 'Completado';
-        
-        -- Usar el procedimiento de conciliación para obtener to_grant y to_revoke
-        CREATE TABLE #TempReconciliation (
-            access_type VARCHAR(20),
-            app_name VARCHAR(150)
-        );
-        
-        INSERT INTO #TempReconciliation
-        EXEC [dbo].[sp_GetAccessReconciliationReport] @scotia_id;
-        
-        SELECT @to_grant = COUNT(*) FROM #TempReconciliation WHERE access_type = 'to_grant';
-        SELECT @to_revoke = COUNT(*) FROM #TempReconciliation WHERE access_type = 'to_revoke';
-        
-        SELECT 
-            @scotia_id as scope,
-            @current_access as accesos_actuales,
-            @to_grant as accesos_a_otorgar,
-            @to_revoke as accesos_a_revocar,
-            (@current_access + @to_grant - @to_revoke) as accesos_finales;
-        
-        DROP TABLE #TempReconciliation;
+        -- Totales de la compañía: un agregado por tabla en lugar de una subconsulta por métrica
+        SELECT 'Global' as scope,
+               emp.empleados_activos,
+               app.aplicaciones_activas,
+               hist.tickets_pendientes,
+               hist.tickets_completados,
+               hist.total_historico,
+               rec.empleados_con_diferencias,
+               rec.accesos_actuales,
+               rec.accesos_a_otorgar,
+               rec.accesos_a_revocar
+        FROM (SELECT COUNT(*) as empleados_activos FROM [dbo].[headcount] WHERE activo = 1) emp
+        CROSS JOIN (SELECT COUNT(*) as aplicaciones_activas FROM [dbo].[applications] WHERE access_status = 'Activo') app
+        CROSS JOIN (
+            SELECT ISNULL(SUM(CASE WHEN status = 'Pendiente' THEN 1 ELSE 0 END), 0) as tickets_pendientes,
+                   ISNULL(SUM(CASE WHEN status = 'Completado' THEN 1 ELSE 0 END), 0) as tickets_completados,
+                   COUNT(*) as total_historico
+            FROM [dbo].[historico]
+        ) hist
+        CROSS JOIN (
+            SELECT ISNULL(SUM(CASE WHEN accesos_a_otorgar > 0 OR accesos_a_revocar > 0 THEN 1 ELSE 0 END), 0) as empleados_con_diferencias,
+                   ISNULL(SUM(accesos_actuales), 0) as accesos_actuales,
+                   ISNULL(SUM(accesos_a_otorgar), 0) as accesos_a_otorgar,
+                   ISNULL(SUM(accesos_a_revocar), 0) as accesos_a_revocar
+            FROM #EmployeeStats
+        ) rec;
     END
+
+    DROP TABLE #EmployeeStats;
 END
 GO
 
@@ -1136,6 +1653,11 @@ PRINT 'Procedimientos básicos: sp_GetDatabaseStats, sp_GetEmployeeHistory, sp_G
 PRINT 'Procedimientos de conciliación: sp_GetAccessReconciliationReport, sp_ProcessEmployeeOnboarding, sp_ProcessEmployeeOffboarding, sp_GetReconciliationStats';
 PRINT 'Migración automática: confirmation_by_user de VARCHAR a DATE';
 PRINT 'Función creada: fn_NormalizeText';
+PRINT 'Columnas normalizadas persistidas: applications (unidad_subunidad_norm, position_role_norm, subunit_norm, role_name_norm), historico (status_norm, app_access_name_norm), headcount (unidad_subunidad_norm, position_norm)';
+PRINT 'Conciliación incremental: row_version en headcount/applications/historico, tablas reconciliation_state, reconciliation_results, reconciliation_watermark';
+PRINT 'Proyección de accesos actuales: tabla current_access';
+PRINT 'Resumen del historial: tablas historico_stats, historico_stats_employee y trigger TR_historico_stats';
+PRINT 'Texto completo: catálogo ftc_historico (event_description, comment, responsible, ticket_email)';
 PRINT 'Datos de ejemplo insertados correctamente';
 PRINT '=====================================================';
 PRINT 'CAMBIOS EN TABLA HISTORICO:';
@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from services.access_management_service import AccessManagementService
+from services.registry import notify_table_changed, unsubscribe_table_changes
+
+
+class ApplicationIndexTest(unittest.TestCase):
+    def setUp(self):
+        # Crear instancia sin ejecutar __init__ y usar SQLite como sustituto de SQL Server
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.db_manager = MagicMock()
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_path = os.path.join(tmp.name, 'apps.db')
+        columns = ', '.join(f"{col} TEXT" for col in AccessManagementService._APPLICATION_COLUMNS)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(f"CREATE TABLE applications (id INTEGER PRIMARY KEY, {columns})")
+            conn.executemany(
+                "INSERT INTO applications (logical_access_name, unidad_subunidad, position_role, subunit, role_name, last_update_date) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    ('AppB', ' Tecnología/Desarrollo ', 'analista', 'Desarrollo', 'Dev', '2024-01-01'),
+                    ('AppA', 'TECNOLOGÍA/DESARROLLO', 'Analista ', 'QA', 'Tester', '2024-01-01'),
+                    ('AppC', 'Tecnología/QA', 'Analista', 'QA', 'Tester', '2024-01-01'),
+                ],
+            )
+
+        self.service.get_connection = MagicMock(side_effect=lambda: sqlite3.connect(self.db_path))
+
+    def test_lookup_matches_normalized_keys_in_order(self):
+        apps = self.service.get_applications_by_position('ANALISTA', 'tecnología/desarrollo')
+
+        self.assertEqual([a['logical_access_name'] for a in apps], ['AppA', 'AppB'])
+
+        filtered = self.service.get_applications_by_position('Analista', 'Tecnología/Desarrollo', subunit='qa')
+        self.assertEqual([a['logical_access_name'] for a in filtered], ['AppA'])
+
+    def test_repeated_lookups_do_not_hit_the_database(self):
+        self.service.get_applications_by_position('Analista', 'Tecnología/QA')
+        calls = self.service.get_connection.call_count
+
+        self.service.get_applications_by_position('Analista', 'Tecnología/Desarrollo')
+        self.service.get_applications_by_position_flexible('Analista', 'Tecnología/QA')
+
+        self.assertEqual(self.service.get_connection.call_count, calls)
+
+    def test_invalidate_reloads_changes(self):
+        self.assertEqual(len(self.service.get_applications_by_position('Analista', 'Tecnología/QA')), 1)
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT INTO applications (logical_access_name, unidad_subunidad, position_role) "
+                "VALUES ('AppD', 'Tecnología/QA', 'Analista')"
+            )
+        self.service.invalidate_application_index()
+
+        apps = self.service.get_applications_by_position('Analista', 'Tecnología/QA')
+        self.assertEqual([a['logical_access_name'] for a in apps], ['AppC', 'AppD'])
+
+
+    def test_table_change_notification_invalidates_index(self):
+        with patch('services.access_management_service.get_database_connection', return_value=MagicMock()):
+            service = AccessManagementService()
+        self.addCleanup(unsubscribe_table_changes, ('applications',), service.invalidate_application_index)
+        self.addCleanup(unsubscribe_table_changes, ('headcount',), service.invalidate_headcount_statistics)
+        service.get_connection = self.service.get_connection
+        self.assertEqual(len(service.get_applications_by_position('Analista', 'Tecnología/QA')), 1)
+
+        # Un MERGE del importador que no toca COUNT(*) ni MAX(last_update_date)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE applications SET position_role = 'Analista' WHERE logical_access_name = 'AppB'")
+            conn.execute("UPDATE applications SET unidad_subunidad = 'Tecnología/QA' WHERE logical_access_name = 'AppB'")
+        notify_table_changed('applications')
+
+        apps = service.get_applications_by_position('Analista', 'Tecnología/QA')
+        self.assertEqual([a['logical_access_name'] for a in apps], ['AppB', 'AppC'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import threading
+import time
+import unittest
+
+from ui.background import BackgroundTaskRunner
+
+
+class _FakeWidget:
+    """Sustituto de un widget Tk: after() acumula callbacks que el test ejecuta"""
+
+    def __init__(self):
+        self.callbacks = []
+        self.cursor = ""
+
+    def after(self, _ms, func, *args):
+        self.callbacks.append((func, args))
+
+    def winfo_toplevel(self):
+        return self
+
+    def config(self, cursor=""):
+        self.cursor = cursor
+
+    def pump(self, timeout=2.0):
+        """Ejecuta los callbacks programados hasta que no queden (como el mainloop)"""
+        limite = time.time() + timeout
+        while self.callbacks and time.time() < limite:
+            func, args = self.callbacks.pop(0)
+            func(*args)
+            time.sleep(0.005)
+
+
+class BackgroundTaskRunnerTest(unittest.TestCase):
+    def setUp(self):
+        self.widget = _FakeWidget()
+        self.runner = BackgroundTaskRunner(self.widget, max_workers=2)
+        self.addCleanup(self.runner.shutdown)
+
+    def test_results_and_progress_are_delivered_on_ui_thread(self):
+        eventos = []
+        hilo_ui = threading.current_thread()
+
+        def trabajo(task, total):
+            for i in range(1, total + 1):
+                task.report_progress(i, total)
+            return threading.current_thread() is not hilo_ui
+
+        task = self.runner.submit(
+            'tarea', trabajo, 3, pass_task=True,
+            on_progress=lambda done, total: eventos.append(('progreso', done, threading.current_thread() is hilo_ui)),
+            on_done=lambda: eventos.append(('fin',)),
+            on_success=lambda en_worker: eventos.append(('ok', en_worker)))
+
+        self.assertIsNotNone(task)
+        self.assertEqual(self.widget.cursor, "watch")
+        self.assertIsNone(self.runner.submit('tarea', trabajo, 1, pass_task=True))
+
+        self.widget.pump()
+
+        self.assertEqual(eventos, [('progreso', 1, True), ('progreso', 2, True), ('progreso', 3, True),
+                                   ('fin',), ('ok', True)])
+        self.assertFalse(self.runner.is_running('tarea'))
+        self.assertEqual(self.widget.cursor, "")
+
+    def test_cancel_and_errors(self):
+        iniciada = threading.Event()
+        resultados = []
+
+        def trabajo(task):
+            iniciada.set()
+            task.cancel_event.wait(2)
+            if task.cancelled:
+                raise RuntimeError('cancelada')
+            return 'completa'
+
+        self.runner.submit('larga', trabajo, pass_task=True,
+                           on_success=resultados.append,
+                           on_error=lambda e: resultados.append(str(e)))
+        iniciada.wait(1)
+        self.assertTrue(self.runner.cancel('larga'))
+        self.widget.pump()
+
+        self.assertEqual(resultados, ['cancelada'])
+        self.assertFalse(self.runner.cancel('larga'))
+
+
+if __name__ == "__main__":
+    unittest.main()
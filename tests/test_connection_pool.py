@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from config import SQLServerConnectionPool, PoolTimeoutError
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('config.pyodbc.connect', side_effect=lambda *_: MagicMock())
+        self.connect = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = SQLServerConnectionPool(
+            "DRIVER=test;", {'max_size': 2, 'checkout_timeout': 0.05}
+        )
+
+    def test_close_returns_connection_to_pool(self):
+        conn = self.pool.checkout()
+        raw = conn.raw_connection
+        conn.close()
+
+        again = self.pool.checkout()
+        self.assertIs(again.raw_connection, raw)
+        self.assertEqual(self.connect.call_count, 1)
+        raw.rollback.assert_called()
+
+    def test_checkout_blocks_when_pool_is_exhausted(self):
+        first = self.pool.checkout()
+        second = self.pool.checkout()
+
+        with self.assertRaises(PoolTimeoutError):
+            self.pool.checkout()
+
+        first.close()
+        second.close()
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['in_use'], 0)
+        self.assertEqual(stats['idle'], 2)
+        self.assertEqual(stats['timeouts'], 1)
+
+    def test_idle_connections_older_than_max_idle_time_are_discarded(self):
+        self.pool.max_idle_time = 0
+        conn = self.pool.checkout()
+        raw = conn.raw_connection
+        conn.close()
+
+        again = self.pool.checkout()
+        self.assertIsNot(again.raw_connection, raw)
+        raw.close.assert_called_once()
+        self.assertEqual(self.pool.get_stats()['discarded'], 1)
+
+    def test_context_manager_commits_and_releases(self):
+        with self.pool.checkout() as conn:
+            raw = conn.raw_connection
+        raw.commit.assert_called_once()
+        self.assertEqual(self.pool.get_stats()['in_use'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
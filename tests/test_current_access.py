@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from services.access_management_service import AccessManagementService
+
+
+class CurrentAccessProjectionTest(unittest.TestCase):
+    def setUp(self):
+        # Crear instancia sin ejecutar __init__ y usar SQLite como sustituto de SQL Server
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.db_manager = MagicMock()
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_path = os.path.join(tmp.name, 'current_access.db')
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executescript('''
+                CREATE TABLE headcount (scotia_id TEXT PRIMARY KEY, email TEXT, unit TEXT,
+                                        unidad_subunidad TEXT, position TEXT, activo INTEGER);
+                CREATE TABLE applications (id INTEGER PRIMARY KEY, logical_access_name TEXT,
+                                           unidad_subunidad TEXT, position_role TEXT,
+                                           role_name TEXT, description TEXT);
+                CREATE TABLE historico (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    scotia_id TEXT, employee_email TEXT, case_id TEXT, responsible TEXT,
+                    record_date TEXT, request_date TEXT, process_access TEXT, subunit TEXT,
+                    event_description TEXT, ticket_email TEXT, app_access_name TEXT,
+                    computer_system_type TEXT, status TEXT, closing_date_app TEXT,
+                    closing_date_ticket TEXT, app_quality TEXT, confirmation_by_user TEXT,
+                    comment TEXT, ticket_quality TEXT, general_status_ticket TEXT,
+                    average_time_open_ticket TEXT,
+                    status_norm TEXT GENERATED ALWAYS AS (UPPER(TRIM(status))) STORED,
+                    app_access_name_norm TEXT GENERATED ALWAYS AS (UPPER(TRIM(app_access_name))) STORED
+                );
+                CREATE TABLE current_access (
+                    scotia_id TEXT, app_access_name TEXT, last_process TEXT, last_record_date TEXT,
+                    subunit TEXT, status TEXT, event_description TEXT,
+                    PRIMARY KEY (scotia_id, app_access_name)
+                );
+
+                INSERT INTO headcount VALUES ('EMP001', 'emp@empresa.com', 'TI', 'TI/Dev', 'Analista', 1);
+                INSERT INTO applications VALUES (1, 'AppLat', 'TI/Dev', 'Analista', 'Lector', 'Lateral');
+                INSERT INTO applications VALUES (2, 'AppOtra', 'TI/QA', 'Tester', 'Lector', 'Otra unidad');
+            ''')
+
+        self.service.get_connection = MagicMock(side_effect=lambda: sqlite3.connect(self.db_path))
+
+    def _create(self, app_name, process_access, record_date, status='closed completed', description=None):
+        success, message = self.service.create_historical_record({
+            'scotia_id': 'EMP001',
+            'process_access': process_access,
+            'app_access_name': app_name,
+            'record_date': record_date,
+            'status': status,
+            'event_description': description,
+        })
+        self.assertTrue(success, message)
+
+    def _projection(self):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(
+                'SELECT app_access_name, last_process FROM current_access ORDER BY app_access_name'
+            ).fetchall()
+
+    def test_writes_keep_projection_on_latest_completed_process(self):
+        self._create('AppA', 'onboarding', '2024-01-01')
+        self._create('AppA', 'offboarding', '2024-02-01')
+        self._create('AppB', 'onboarding', '2024-01-01', status='Pendiente')
+
+        self.assertEqual(self._projection(), [('AppA', 'offboarding')])
+
+        # Un cambio hecho por fuera del servicio se refleja al refrescar
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE historico SET status = 'closed completed' WHERE app_access_name = 'AppB'")
+        self.assertTrue(self.service.refresh_current_access('EMP001', ['AppB']))
+
+        self.assertEqual(self._projection(), [('AppA', 'offboarding'), ('AppB', 'onboarding')])
+
+    def test_current_position_access_reads_projection(self):
+        self._create('AppOn', 'onboarding', '2024-01-01')
+        self._create('AppLat', 'lateral_movement', '2024-01-02')
+        self._create('AppOtra', 'lateral_movement', '2024-01-02')
+        self._create('AppFlexOld', 'flex_staff', '2024-01-03', description='Asignación (flex staff - Analista)')
+        self._create('AppFlex', 'flex_staff', '2024-01-04', description='Asignación (flex staff - Tester)')
+        self._create('AppBaja', 'onboarding', '2024-01-01')
+        self._create('AppBaja', 'offboarding', '2024-01-05')
+
+        access = self.service.get_employee_current_position_access('EMP001')
+
+        self.assertEqual(
+            [(a['logical_access_name'], a['access_type']) for a in access],
+            [('AppFlex', 'Flex Staff'), ('AppLat', 'Aplicación'), ('AppOn', 'Aplicación')]
+        )
+        self.assertEqual(access[0]['position_role'], 'Tester')
+        self.assertEqual(access[1]['role_name'], 'Lector')
+
+    def test_diagnostics_queries_only_run_when_enabled(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+        cursor.fetchone.return_value = ('TI', 'Analista', 'TI/Dev')
+        cursor.fetchall.return_value = []
+        self.service.get_connection = MagicMock(return_value=conn)
+
+        self.service.get_employee_current_position_access('EMP001')
+        self.assertEqual(cursor.execute.call_count, 2)
+
+        self.service.set_diagnostics_mode(True)
+        self.addCleanup(AccessManagementService.set_diagnostics_mode, False)
+        cursor.fetchone.side_effect = [('TI', 'Analista', 'TI/Dev'), (0,)]
+        cursor.execute.reset_mock()
+
+        self.service.get_employee_current_position_access('EMP001')
+        self.assertEqual(cursor.execute.call_count, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
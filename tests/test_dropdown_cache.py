@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from services.dropdown_service import DropdownService
+from services.registry import notify_table_changed, unsubscribe_table_changes
+
+
+class DropdownCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.service = DropdownService()
+        self.addCleanup(unsubscribe_table_changes, DropdownService.SOURCE_TABLES,
+                        self.service._on_table_changed)
+
+        self.conn = MagicMock()
+        self.cursor = self.conn.cursor.return_value
+        self.cursor.fetchall.return_value = [
+            ('positions', 'Analista'),
+            ('positions', 'Gerente'),
+            ('units', 'Tecnología'),
+            ('roles', 'Admin'),
+        ]
+        self.service.get_connection = MagicMock(return_value=self.conn)
+
+    def test_single_query_loads_every_domain(self):
+        valores = self.service.get_all_dropdown_values()
+
+        self.assertEqual(self.cursor.execute.call_count, 1)
+        sql = self.cursor.execute.call_args[0][0]
+        self.assertIn('GROUPING SETS', sql)
+        self.assertEqual(sql.count('GROUPING('), 2 * len(DropdownService._DOMAIN_COLUMNS))
+        self.assertEqual(valores['positions'], ['Analista', 'Gerente'])
+        self.assertEqual(valores['units'], ['Tecnología'])
+        self.assertEqual(valores['categories'], [])
+        self.assertEqual(valores['unidad_subunidad'], DropdownService.DEFAULT_UNIDAD_SUBUNIDAD)
+        self.conn.close.assert_called_once()
+
+    def test_cached_until_ttl_or_table_change(self):
+        with patch('services.dropdown_service.time.monotonic', return_value=1000.0):
+            self.service.get_all_dropdown_values()['positions'].append('modificado')
+            self.assertEqual(self.service.get_unique_positions(), ['Analista', 'Gerente'])
+            self.assertEqual(self.service.get_unique_roles(), ['Admin'])
+        self.assertEqual(self.cursor.execute.call_count, 1)
+
+        with patch('services.dropdown_service.time.monotonic',
+                   return_value=1000.0 + DropdownService.CACHE_TTL_SECONDS):
+            self.service.get_unique_units()
+        self.assertEqual(self.cursor.execute.call_count, 2)
+
+        notify_table_changed('headcount')
+        self.service.get_unique_units()
+        self.assertEqual(self.cursor.execute.call_count, 3)
+
+        self.service.get_all_dropdown_values(force_refresh=True)
+        self.assertEqual(self.cursor.execute.call_count, 4)
+
+    def test_errors_are_not_cached(self):
+        self.cursor.execute.side_effect = [Exception('sin conexión'), None]
+
+        valores = self.service.get_all_dropdown_values()
+        self.assertEqual(valores['positions'], [])
+        self.assertEqual(valores['unidad_subunidad'], DropdownService.DEFAULT_UNIDAD_SUBUNIDAD)
+
+        self.assertEqual(self.service.get_unique_positions(), ['Analista', 'Gerente'])
+
+
+if __name__ == "__main__":
+    unittest.main()
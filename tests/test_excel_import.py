@@ -0,0 +1,150 @@
+import datetime
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+from services.excel_importer import (
+    ExcelToSQLServerImporter, ExcelToSQLiteImporter, prepare_import_frame, resolve_date_formats,
+)
+
+
+def _headcount_sheet():
+    return pd.DataFrame({
+        'Scotia ID': [1001.0, 'EMP002', 'EMP003', None, 'EMP002', 'EMP005'],
+        'Employee': ['ana', 'luis', 'eva', 'sin id', 'luis2', 'x' * 101],
+        'Full Name': ['Ana', 'Luis', 'Eva', 'Sin Id', 'Luis Dos', 'Largo'],
+        'EMAIL': ['ana@x.com', 'luis@x.com', 'eva@x.com', 'n@x.com', 'luis2@x.com', 'l@x.com'],
+        'start_date': [datetime.datetime(2024, 1, 5), '2024-02-01', 'ayer', None, None, None],
+        'activo': ['Sí', None, 'no', None, None, 'quizás'],
+        'Columna extra': ['a', 'b', 'c', 'd', 'e', 'f'],
+    }, dtype=object)
+
+
+def _dates_sheet(dates):
+    ids = [f'E{i}' for i in range(1, len(dates) + 1)]
+    return pd.DataFrame({'scotia_id': ids, 'employee': ids, 'full_name': ids,
+                         'email': [f'{i}@x.com' for i in ids], 'start_date': dates}, dtype=object)
+
+
+class PrepareImportFrameTest(unittest.TestCase):
+    def test_cleaning_and_rejections(self):
+        valid, rejected, columns = prepare_import_frame(_headcount_sheet(), 'headcount')
+
+        self.assertEqual(columns, ['scotia_id', 'employee', 'full_name', 'email', 'start_date', 'activo'])
+        self.assertEqual(valid['scotia_id'].tolist(), ['1001', 'EMP002'])
+        self.assertEqual(valid['employee'].tolist(), ['ana', 'luis2'])  # se conserva la última aparición
+        self.assertEqual(valid['start_date'].tolist(), [datetime.date(2024, 1, 5), None])
+        self.assertEqual(valid['activo'].tolist(), [True, True])
+        self.assertEqual(valid['source_row'].tolist(), [2, 6])
+
+        motivos = dict(zip(rejected['fila'], rejected['motivo']))
+        self.assertEqual(sorted(motivos), [3, 4, 5, 7])
+        self.assertIn('duplicada', motivos[3])
+        self.assertIn('fecha inválida en start_date', motivos[4])
+        self.assertIn('falta scotia_id', motivos[5])
+        self.assertEqual(motivos[7], 'employee supera 100 caracteres; valor no booleano en activo')
+        self.assertEqual(rejected.loc[rejected['fila'] == 4, 'employee'].item(), 'eva')
+
+    def test_text_dates_are_read_day_first(self):
+        sheet = _dates_sheet(['03/04/2024', '2024-02-01', '25/12/2024', '03-04-2024 ',
+                              datetime.datetime(2024, 6, 7), '31/02/2024'])
+
+        valid, rejected, _ = prepare_import_frame(sheet, 'headcount')
+
+        self.assertEqual(valid['start_date'].tolist(),
+                         [datetime.date(2024, 4, 3), datetime.date(2024, 2, 1), datetime.date(2024, 12, 25),
+                          datetime.date(2024, 4, 3), datetime.date(2024, 6, 7)])
+        self.assertEqual(rejected['fila'].tolist(), [7])
+        self.assertIn('fecha inválida en start_date', rejected['motivo'].item())
+
+    def test_month_first_only_with_evidence(self):
+        ambiguous = _dates_sheet(['03/04/2024'])
+        month_first = _dates_sheet(['03/04/2024', '12/25/2024'])
+
+        self.assertIn('%d/%m/%Y', resolve_date_formats(ambiguous, 'headcount')['start_date'])
+        formats = resolve_date_formats(month_first, 'headcount')['start_date']
+        self.assertNotIn('%d/%m/%Y', formats)
+
+        valid, _, _ = prepare_import_frame(month_first, 'headcount', date_formats={'start_date': formats})
+        self.assertEqual(valid['start_date'].tolist(), [datetime.date(2024, 3, 4), datetime.date(2024, 12, 25)])
+
+    def test_missing_required_column(self):
+        with self.assertRaises(ValueError):
+            prepare_import_frame(pd.DataFrame({'scotia_id': ['EMP001']}), 'headcount')
+
+
+class SQLiteImportTest(unittest.TestCase):
+    def test_bulk_insert_and_report(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        excel_path = os.path.join(tmp.name, 'carga.xlsx')
+        _headcount_sheet().to_excel(excel_path, sheet_name='HC', index=False)
+
+        importer = ExcelToSQLiteImporter(os.path.join(tmp.name, 'db.sqlite'))
+        self.addCleanup(importer.close)
+        importer.connection.execute(
+            "CREATE TABLE headcount (scotia_id TEXT PRIMARY KEY, employee TEXT, full_name TEXT, "
+            "email TEXT, start_date TEXT, activo INTEGER)")
+
+        ok, message, count = importer.import_from_excel(excel_path, 'HC', 'headcount')
+
+        self.assertTrue(ok, message)
+        self.assertEqual(count, 2)
+        self.assertIn('4 filas rechazadas', message)
+        self.assertEqual(importer.connection.execute('SELECT * FROM headcount ORDER BY scotia_id').fetchall(),
+                         [('1001', 'ana', 'Ana', 'ana@x.com', '2024-01-05', 1),
+                          ('EMP002', 'luis2', 'Luis Dos', 'luis2@x.com', None, 1)])
+        report = pd.read_csv(os.path.join(tmp.name, 'carga_headcount_rechazados.csv'))
+        self.assertEqual(report['fila'].tolist(), [3, 4, 5, 7])
+
+
+class SQLServerStagingImportTest(unittest.TestCase):
+    def setUp(self):
+        self.importer = ExcelToSQLServerImporter.__new__(ExcelToSQLServerImporter)
+        self.importer.connection = MagicMock()
+        self.cursor = self.importer.connection.cursor.return_value
+        self.cursor.fetchone.return_value = (1, 1)
+
+    def test_staging_then_single_merge(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        excel_path = os.path.join(tmp.name, 'apps.xlsx')
+        pd.DataFrame({
+            'logical_access_name': ['Jira', 'Jira', 'GitLab', None],
+            'position_role': ['Dev', 'Dev', 'Dev', 'QA'],
+            'role_name': ['User', 'User', None, 'User'],
+            'system_owner': ['Ana', 'Luis', 'Eva', 'Sin nombre'],
+        }).to_excel(excel_path, index=False)
+
+        ok, message, count = self.importer.import_from_excel(
+            excel_path, 'Sheet1', 'applications', rejected_path=os.path.join(tmp.name, 'r.csv'))
+
+        self.assertTrue(ok, message)
+        self.assertEqual(count, 2)
+        sqls = [c[0][0] for c in self.cursor.execute.call_args_list]
+        self.assertIn('INTO #stg_applications', sqls[0])
+        self.assertIn('MERGE applications', sqls[1])
+        self.assertIn('(target.role_name = source.role_name OR (target.role_name IS NULL AND source.role_name IS NULL))',
+                      sqls[1])
+        self.assertIn('WHEN MATCHED THEN UPDATE SET system_owner = source.system_owner', sqls[1])
+        self.assertEqual(sqls[2], 'DROP TABLE #stg_applications')
+
+        self.assertIs(self.cursor.fast_executemany, True)
+        insert_sql, rows = self.cursor.executemany.call_args[0]
+        self.assertIn('INSERT INTO #stg_applications '
+                      '(source_row, logical_access_name, position_role, system_owner, role_name)', insert_sql)
+        self.assertEqual(rows, [(3, 'Jira', 'Dev', 'Luis', 'User'), (4, 'GitLab', 'Dev', 'Eva', None)])
+        self.importer.connection.commit.assert_called_once()
+        self.assertEqual(len(self.importer.last_rejected), 2)
+
+    def test_historico_merge_only_inserts(self):
+        sql = ExcelToSQLServerImporter.build_merge_sql('historico', ['scotia_id', 'case_id', 'status'])
+        self.assertNotIn('WHEN MATCHED', sql)
+        self.assertIn('PARTITION BY scotia_id, case_id ORDER BY source_row DESC', sql)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import datetime
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+from services.excel_importer import (
+    ExcelChunkReader, ExcelToSQLServerImporter, ExcelToSQLiteImporter, stream_import_chunks,
+)
+
+
+class ExcelStreamingImportTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.excel_path = os.path.join(tmp.name, 'grande.xlsx')
+
+        rows = [{'scotia_id': f"EMP{i:03d}", 'employee': f"e{i}", 'full_name': f"Empleado {i}",
+                 'email': f"e{i}@x.com", 'activo': 'si'} for i in range(25)]
+        rows[4]['email'] = None                # rechazada en el primer bloque
+        rows[17]['activo'] = 'tal vez'         # rechazada en el segundo bloque
+        rows[22]['scotia_id'] = 'EMP001'       # repetida en otro bloque: gana la última
+        with pd.ExcelWriter(self.excel_path) as writer:
+            pd.DataFrame([['Reporte de headcount']]).to_excel(writer, sheet_name='HC', index=False, header=False)
+            pd.DataFrame(rows).to_excel(writer, sheet_name='HC', index=False, startrow=1)
+
+    def test_reader_yields_chunks_with_excel_row_numbers(self):
+        reader = ExcelChunkReader(self.excel_path, 'HC', skip_rows=1, chunk_size=10)
+        chunks = list(reader)
+
+        self.assertEqual([(len(c), first) for c, first in chunks], [(10, 3), (10, 13), (5, 23)])
+        self.assertEqual(reader.total_rows, 25)
+        self.assertEqual(list(chunks[0][0].columns), ['scotia_id', 'employee', 'full_name', 'email', 'activo'])
+
+    def test_sqlite_streaming_import(self):
+        importer = ExcelToSQLiteImporter(os.path.join(self.dir, 'db.sqlite'))
+        self.addCleanup(importer.close)
+        importer.connection.execute(
+            "CREATE TABLE headcount (scotia_id TEXT PRIMARY KEY, employee TEXT, full_name TEXT, "
+            "email TEXT, activo INTEGER)")
+        progress = []
+
+        ok, message, count = importer.import_from_excel_streaming(
+            self.excel_path, 'HC', 'headcount', skip_rows=1, chunk_size=10,
+            rejected_path=os.path.join(self.dir, 'rechazados.xlsx'),
+            progress_callback=lambda *args: progress.append(args))
+
+        self.assertTrue(ok, message)
+        self.assertEqual(progress, [(10, 25, 9, 1), (20, 25, 18, 2), (25, 25, 23, 2)])
+        self.assertEqual(count, 23)
+        self.assertEqual(importer.connection.execute('SELECT COUNT(*) FROM headcount').fetchone()[0], 22)
+        self.assertEqual(importer.connection.execute(
+            "SELECT employee FROM headcount WHERE scotia_id = 'EMP001'").fetchone()[0], 'e22')
+
+        report = pd.read_csv(os.path.join(self.dir, 'rechazados.csv'))
+        self.assertEqual(report['fila'].tolist(), [7, 20])
+        self.assertEqual(report['motivo'].tolist(), ['falta email', 'valor no booleano en activo'])
+
+    def test_sql_server_merges_each_chunk(self):
+        importer = ExcelToSQLServerImporter.__new__(ExcelToSQLServerImporter)
+        importer.connection = MagicMock()
+        cursor = importer.connection.cursor.return_value
+        cursor.fetchone.side_effect = [(9, 0), (8, 1), (5, 0)]
+
+        ok, message, count = importer.import_from_excel_streaming(
+            self.excel_path, 'HC', 'headcount', skip_rows=1, chunk_size=10,
+            rejected_path=os.path.join(self.dir, 'r.csv'))
+
+        self.assertTrue(ok, message)
+        self.assertEqual(count, 23)
+        sqls = [c[0][0].strip().split('\n')[0].strip() for c in cursor.execute.call_args_list]
+        self.assertEqual(sqls[0].split()[0], 'IF')  # staging creado una sola vez
+        self.assertEqual(sqls[1:], ['SET NOCOUNT ON;', 'TRUNCATE TABLE #stg_headcount'] * 3
+                         + ['DROP TABLE #stg_headcount'])
+        self.assertEqual([len(c[0][1]) for c in cursor.executemany.call_args_list], [9, 9, 5])
+        importer.connection.commit.assert_called_once()
+
+
+class StreamingDateFormatTest(unittest.TestCase):
+    def _stream(self, dates):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        ids = [f'E{i}' for i in range(1, len(dates) + 1)]
+        excel_path = os.path.join(tmp.name, 'fechas.xlsx')
+        pd.DataFrame({'scotia_id': ids, 'employee': ids, 'full_name': ids,
+                      'email': [f'{i}@x.com' for i in ids], 'start_date': dates}).to_excel(excel_path, index=False)
+        loaded = []
+
+        counts = stream_import_chunks(ExcelChunkReader(excel_path, chunk_size=2), 'headcount',
+                                      lambda valid, columns: loaded.append(valid) or len(valid),
+                                      os.path.join(tmp.name, 'r.csv'))
+        return counts, pd.concat(loaded)['start_date'].tolist()
+
+    def test_month_first_evidence_after_the_first_chunk(self):
+        # El primer bloque solo tiene fechas ambiguas; la prueba de mm/dd llega en el segundo
+        counts, dates = self._stream(['03/04/2024', '2024-01-02', '12/25/2024'])
+
+        self.assertEqual(counts, {'read': 3, 'imported': 3, 'rejected': 0})
+        self.assertEqual(dates, [datetime.date(2024, 3, 4), datetime.date(2024, 1, 2),
+                                 datetime.date(2024, 12, 25)])
+
+    def test_all_chunks_share_the_day_first_format(self):
+        counts, dates = self._stream(['25/12/2024', '2024-01-02', '03/04/2024', '12/25/2024'])
+
+        self.assertEqual(counts, {'read': 4, 'imported': 3, 'rejected': 1})
+        self.assertEqual(dates, [datetime.date(2024, 12, 25), datetime.date(2024, 1, 2),
+                                 datetime.date(2024, 4, 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
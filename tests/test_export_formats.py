@@ -0,0 +1,117 @@
+import csv
+import datetime
+import gzip
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from services.export_service import ExportService
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+class ExportFormatsTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.service = ExportService(output_dir=tmp.name)
+
+        self.conn = sqlite3.connect(':memory:')
+        self.addCleanup(self.conn.close)
+        self.conn.execute('CREATE TABLE historico (id INTEGER, scotia_id TEXT, record_date TEXT, status TEXT)')
+        self.conn.executemany('INSERT INTO historico VALUES (?, ?, ?, ?)',
+                              [(i, f"EMP{i:03d}", f"2024-01-{1 + i % 28:02d}", 'Completado' if i % 2 else None)
+                               for i in range(250)])
+
+    def _cursor(self):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT id, scotia_id, record_date, status FROM historico ORDER BY id')
+        return cursor
+
+    def test_csv_streams_with_fetchmany(self):
+        cursor = _RecordingCursor(self._cursor())
+        path = self.service.export_cursor(cursor, 'historial', fmt='csv', fetch_size=100)
+
+        self.assertEqual(cursor.fetches, [100, 100, 50, 0])
+        self.assertTrue(path.endswith('.csv'))
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ['id', 'scotia_id', 'record_date', 'status'])
+        self.assertEqual(len(rows), 251)
+        self.assertEqual(rows[1], ['0', 'EMP000', '2024-01-01', ''])
+
+    def test_gzip_csv_from_records(self):
+        registros = ({'scotia_id': f"EMP{i}", 'app': 'Jira'} for i in range(5))
+        path = self.service.export_access_history(registros, fmt='csv.gz')
+
+        self.assertTrue(path.endswith('.csv.gz'))
+        with gzip.open(path, 'rt', encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ['scotia_id', 'app'])
+        self.assertEqual(len(rows), 6)
+
+    def test_full_history_dump_uses_given_connection(self):
+        with patch.object(ExportService, 'HISTORY_DUMP_SQL', 'SELECT * FROM historico'):
+            path = self.service.export_full_history(conn=self.conn)
+        with open(path, encoding='utf-8-sig') as f:
+            self.assertEqual(sum(1 for _ in f), 251)
+
+    def test_excel_row_limit_leaves_no_partial_file(self):
+        with patch('services.export_service.EXCEL_MAX_ROWS', 10):
+            with self.assertRaises(ValueError):
+                self.service.export_cursor(self._cursor(), 'historial', fmt='xlsx')
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.service.export_cursor(self._cursor(), 'historial', fmt='json')
+
+    def test_output_files_and_cleanup_cover_every_format(self):
+        names = ['a_1.xlsx', 'b_1.csv', 'c_1.csv.gz', 'd_1.parquet', 'notas.txt']
+        for name in names:
+            with open(os.path.join(self.dir, name), 'w') as f:
+                f.write('x')
+        self.assertEqual(self.service.get_output_files(), ['d_1.parquet', 'c_1.csv.gz', 'b_1.csv', 'a_1.xlsx'])
+
+        viejo = time.time() - 40 * 24 * 60 * 60
+        for name in names:
+            os.utime(os.path.join(self.dir, name), (viejo, viejo))
+        self.assertEqual(self.service.cleanup_old_files(keep_days=30), 4)
+        self.assertEqual(os.listdir(self.dir), ['notas.txt'])
+
+    @unittest.skipIf(pq is None, "pyarrow no está instalado")
+    def test_parquet_is_typed(self):
+        registros = [{'id': i, 'fecha': datetime.date(2024, 1, 1), 'status': None if i % 2 else 'Completado'}
+                     for i in range(30)]
+        path = self.service.export_authorized_matrix(registros, fmt='parquet')
+
+        table = pq.read_table(path)
+        self.assertEqual(table.num_rows, 30)
+        self.assertEqual(str(table.schema.field('id').type), 'int64')
+        self.assertEqual(str(table.schema.field('fecha').type), 'date32[day]')
+        self.assertEqual(table.column('status').to_pylist()[:2], ['Completado', None])
+
+
+class _RecordingCursor:
+    """Cursor que registra cuántas filas devuelve cada fetchmany"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.description = cursor.description
+        self.fetches = []
+
+    def fetchmany(self, size):
+        rows = self.cursor.fetchmany(size)
+        self.fetches.append(len(rows))
+        return rows
+
+
+if __name__ == "__main__":
+    unittest.main()
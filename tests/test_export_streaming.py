@@ -0,0 +1,80 @@
+import datetime
+import tempfile
+import unittest
+
+import openpyxl
+
+from services.export_service import ExportService, MAX_COLUMN_WIDTH, StreamingExcelWriter
+
+
+class StreamingExcelExportTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.service = ExportService(output_dir=tmp.name)
+
+    def _sheet(self, path, title):
+        workbook = openpyxl.load_workbook(path)
+        self.addCleanup(workbook.close)
+        return workbook[title]
+
+    def test_history_from_generator(self):
+        leidas = []
+
+        def registros():
+            for i in range(3000):
+                leidas.append(i)
+                yield {'id': i, 'scotia_id': f"EMP{i:04d}", 'record_date': datetime.datetime(2024, 1, 1 + i % 28),
+                       'comment': 'x' * 80 if i == 2999 else 'ok'}
+
+        path = self.service.export_access_history(registros())
+
+        self.assertEqual(len(leidas), 3000)
+        sheet = self._sheet(path, 'Historial')
+        self.assertEqual(sheet.max_row, 3001)
+        self.assertEqual([c.value for c in sheet[1]], ['id', 'scotia_id', 'record_date', 'comment'])
+        self.assertTrue(sheet['A1'].font.bold)
+        self.assertEqual(sheet['C2'].value, datetime.datetime(2024, 1, 1))
+        self.assertEqual(sheet.column_dimensions['B'].width, len('scotia_id') + 2)
+        # La fila larga está fuera de la muestra: el ancho sale solo de las primeras filas
+        self.assertEqual(sheet.column_dimensions['D'].width, len('comment') + 2)
+
+    def test_sample_limits_buffered_rows_and_width(self):
+        writer = StreamingExcelWriter(f"{self.dir}/muestra.xlsx", sample_rows=2)
+
+        def registros():
+            for value in ('a', 'b' * 200, 'c'):
+                yield {'valor': value, 'extra': object()}
+
+        with writer:
+            self.assertEqual(writer.write_sheet('Datos', registros()), 3)
+        sheet = self._sheet(f"{self.dir}/muestra.xlsx", 'Datos')
+        self.assertEqual(sheet.column_dimensions['A'].width, MAX_COLUMN_WIDTH)
+        self.assertTrue(sheet['B2'].value.startswith('<object object'))
+
+    def test_tickets_keep_headers_without_tickets(self):
+        data = [{'person_info': {'sid': 'EMP1', 'area': 'TI'}, 'current': [1, 2], 'to_grant': [], 'to_revoke': []},
+                {'error': 'sin datos'}]
+
+        path = self.service.export_reconciliation_tickets(data)
+
+        resumen = self._sheet(path, 'Resumen')
+        self.assertEqual([c.value for c in resumen[2]], ['EMP1', 'TI', 'N/A', 'N/A', 2, 0, 0, 0])
+        tickets = self._sheet(path, 'Tickets')
+        self.assertEqual(tickets.max_row, 1)
+        self.assertEqual(tickets['A1'].value, 'SID')
+
+    def test_statistics_sheets(self):
+        stats = {'generales': {'total_registros': 3}, 'por_unidad': [{'unidad': 'TI', 'total_registros': 3}],
+                 'por_subunidad': []}
+
+        path = self.service.export_historial_statistics(stats)
+
+        workbook = openpyxl.load_workbook(path)
+        self.addCleanup(workbook.close)
+        self.assertEqual(workbook.sheetnames, ['Generales', 'Por Unidad'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from services.search_service import (
+    HISTORICO_COLUMNS, SearchService, build_fulltext_query, build_historico_conditions,
+    create_sqlite_fulltext_mirror, historico_fulltext_mode, reset_fulltext_cache,
+)
+
+
+class FullTextSearchTest(unittest.TestCase):
+    def setUp(self):
+        # SQLite con el espejo FTS5 como sustituto de SQL Server
+        self.service = SearchService.__new__(SearchService)
+        self.service.db_manager = MagicMock()
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_path = os.path.join(tmp.name, 'historico.db')
+        columns = ', '.join(f"{c} TEXT" for c in HISTORICO_COLUMNS if c != 'id')
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(f"CREATE TABLE historico (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})")
+            conn.executemany(
+                "INSERT INTO historico (scotia_id, record_date, comment, event_description, responsible) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    ('EMP001', '2024-01-01', 'Licencia renovada', 'Acceso a Jira', 'Ana Pérez'),
+                    ('EMP002', '2024-01-02', 'Sin comentarios', 'Licencia de Jira, licencia de Confluence', 'Luis'),
+                    ('EMP003', '2024-01-03', 'Pendiente', 'Acceso a GitLab', 'Sistema'),
+                ])
+            create_sqlite_fulltext_mirror(conn)
+
+        self.service.get_connection = MagicMock(side_effect=lambda: sqlite3.connect(self.db_path))
+
+    def test_ranked_search_uses_mirror(self):
+        resultados = self.service.buscar_texto('licen')
+
+        self.assertEqual([r['scotia_id'] for r in resultados], ['EMP002', 'EMP001'])
+        self.assertGreater(resultados[0]['search_rank'], resultados[1]['search_rank'])
+
+        # Palabras como prefijo, sin distinguir acentos, restringido a un campo
+        self.assertEqual([r['scotia_id'] for r in self.service.buscar_texto('perez', campos=['responsible'])],
+                         ['EMP001'])
+        self.assertEqual(self.service.buscar_texto('perez', campos=['comment']), [])
+
+    def test_mirror_follows_writes_and_filters_use_it(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE historico SET comment = 'Licencia revocada' WHERE scotia_id = 'EMP003'")
+            conn.execute("DELETE FROM historico WHERE scotia_id = 'EMP001'")
+
+        resultados = self.service.buscar_procesos({'comment': 'licencia'})
+        self.assertEqual([r['scotia_id'] for r in resultados], ['EMP003'])
+        self.assertEqual(self.service.contar_procesos({'comment': 'licencia', 'scotia_id': 'EMP'}), 1)
+
+    def test_sql_server_predicates(self):
+        self.assertEqual(build_fulltext_query('Juan  "Pérez"'), '"Juan*" AND "Pérez*"')
+        where, params = build_historico_conditions(
+            {'event_description': 'jira', 'status': 'pend'}, alias='h', fulltext='sqlserver')
+        self.assertEqual(where, ' WHERE CONTAINS(h.event_description, ?) AND h.status LIKE ?')
+        self.assertEqual(params, ['"jira*"', '%pend%'])
+
+    def test_detection_is_cached_for_sql_server(self):
+        reset_fulltext_cache()
+        self.addCleanup(reset_fulltext_cache)
+        conn = MagicMock()
+        conn.cursor.return_value.fetchone.return_value = (1,)
+
+        self.assertEqual(historico_fulltext_mode(conn), 'sqlserver')
+        self.assertEqual(historico_fulltext_mode(conn), 'sqlserver')
+        self.assertEqual(conn.cursor.return_value.execute.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
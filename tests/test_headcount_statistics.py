@@ -0,0 +1,94 @@
+import datetime
+import unittest
+from unittest.mock import MagicMock, patch
+
+from services.access_management_service import AccessManagementService
+
+
+def _rows():
+    # (scotia_id, full_name, unit, position, manager, senior_manager, activo, start_date, inactivation_date)
+    return [
+        ('E1', 'Ana', 'Tecnología', 'Dev', 'Luis', 'Marta', 1, datetime.date(2023, 3, 1), None),
+        ('E2', 'Beto', 'Tecnología', 'Dev', 'Luis', None, 0, datetime.date(2024, 1, 9), datetime.date(2025, 1, 1)),
+        ('E3', 'Carla', 'Tecnología', 'QA', '', None, 1, None, None),
+        ('E4', 'Dani', 'Riesgos', 'Dev', 'Sofía', 'Marta', 1, datetime.date(2024, 5, 2), None),
+        ('E5', 'Eva', None, None, None, None, 1, None, None),
+    ]
+
+
+class HeadcountStatisticsTest(unittest.TestCase):
+    def setUp(self):
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.conn = MagicMock()
+        self.cursor = self.conn.cursor.return_value
+        self.cursor.fetchall.return_value = _rows()
+        self.service.get_connection = MagicMock(return_value=self.conn)
+
+    def test_single_query_computes_every_dimension(self):
+        stats = self.service.get_headcount_statistics(use_cache=False)
+
+        self.assertEqual(self.cursor.execute.call_count, 1)
+        self.assertEqual(stats['generales'], {
+            'total_empleados': 5, 'activos': 4, 'inactivos': 1, 'con_posicion': 4, 'con_unidad': 4,
+            'con_fecha_inicio': 3, 'con_manager': 3, 'con_senior_manager': 2, 'con_fecha_inactivacion': 1,
+            'unidades_unicas': 2, 'puestos_unicos': 2,
+        })
+        self.assertEqual(stats['por_unidad'][0], {
+            'unidad': 'Tecnología', 'total_empleados': 3, 'activos': 2, 'inactivos': 1,
+            'con_posicion': 3, 'con_fecha_inicio': 2,
+        })
+        self.assertEqual([(p['puesto'], p['unidad'], p['total_empleados']) for p in stats['por_puesto']],
+                         [('Dev', 'Tecnología', 2), ('QA', 'Tecnología', 1), ('Dev', 'Riesgos', 1)])
+        self.assertEqual([(m['manager'], m['total_empleados']) for m in stats['por_manager']],
+                         [('Luis', 2), ('Sofía', 1)])
+        self.assertEqual([(m['senior_manager'], m['unidad']) for m in stats['por_senior_manager']],
+                         [('Marta', 'Tecnología'), ('Marta', 'Riesgos')])
+        self.assertEqual(stats['por_estado'], [
+            {'estado': 'Active', 'total_empleados': 4, 'con_fecha_inactivacion': 0},
+            {'estado': 'Inactive', 'total_empleados': 1, 'con_fecha_inactivacion': 1},
+        ])
+        self.assertEqual([(a['año_inicio'], a['total_empleados'], a['activos']) for a in stats['por_año_inicio']],
+                         [(2024, 2, 1), (2023, 1, 1)])
+        self.assertEqual([d['scotia_id'] for d in stats['detalle_por_unidad']], ['E1', 'E2', 'E3', 'E4'])
+        self.assertEqual(stats['detalle_por_unidad'][1]['estado'], 'Inactive')
+
+    def test_groups_ignore_case_and_surrounding_spaces(self):
+        self.cursor.fetchall.return_value = [
+            ('E1', 'Ana', 'Finanzas', 'Analista', 'Luis', None, 1, None, None),
+            ('E2', 'Beto', 'FINANZAS ', 'analista', 'LUIS', None, 1, None, None),
+            ('E3', 'Carla', '  ', ' ', None, None, 1, None, None),
+        ]
+
+        stats = self.service.get_headcount_statistics(use_cache=False)
+
+        self.assertEqual([(u['unidad'], u['total_empleados']) for u in stats['por_unidad']], [('Finanzas', 2)])
+        self.assertEqual([(p['puesto'], p['unidad'], p['total_empleados']) for p in stats['por_puesto']],
+                         [('Analista', 'Finanzas', 2)])
+        self.assertEqual([(m['manager'], m['total_empleados']) for m in stats['por_manager']], [('Luis', 2)])
+        self.assertEqual((stats['generales']['unidades_unicas'], stats['generales']['puestos_unicos'],
+                          stats['generales']['con_unidad']), (1, 1, 2))
+
+    def test_snapshot_reused_until_ttl_or_invalidation(self):
+        with patch('services.access_management_service.time.monotonic', return_value=500.0):
+            primera = self.service.get_headcount_statistics()
+            self.assertIs(self.service.get_headcount_statistics(), primera)
+        self.assertEqual(self.cursor.execute.call_count, 1)
+
+        with patch('services.access_management_service.time.monotonic',
+                   return_value=500.0 + AccessManagementService.HEADCOUNT_STATS_CACHE_SECONDS):
+            self.service.get_headcount_statistics()
+        self.assertEqual(self.cursor.execute.call_count, 2)
+
+        self.service.invalidate_headcount_statistics()
+        self.service.get_headcount_statistics()
+        self.assertEqual(self.cursor.execute.call_count, 3)
+
+    def test_errors_are_not_cached(self):
+        self.cursor.execute.side_effect = [Exception('sin conexión'), None]
+
+        self.assertIn('error', self.service.get_headcount_statistics())
+        self.assertEqual(self.service.get_headcount_statistics()['generales']['total_empleados'], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
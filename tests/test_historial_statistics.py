@@ -0,0 +1,88 @@
+import os
+import unittest
+from unittest.mock import MagicMock
+
+import pyodbc
+
+from services.access_management_service import AccessManagementService
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _summary_rows():
+    # (dimension, valor, unidad, total, completados, pendientes, en_proceso, cancelados, rechazados, elementos)
+    return [
+        ('subunidad', 'Tecnología/Desarrollo', None, 5, 3, 2, 0, 0, 0, None),
+        ('subunidad', '', None, 1, 0, 1, 0, 0, 0, None),
+        ('aplicacion', 'GitLab', None, 2, 2, 0, 0, 0, 0, None),
+        ('aplicacion', 'Jira', None, 4, 1, 3, 0, 0, 0, None),
+        ('proceso', 'onboarding', None, 6, 3, 3, 0, 0, 0, None),
+        ('generales', None, None, 6, 3, 3, 0, 0, 0, None),
+        ('puesto', 'Dev', 'Tecnología', 4, 2, 2, 0, 0, 0, 2),
+        ('puesto', None, None, 2, 1, 1, 0, 0, 0, 1),
+        ('unidad', 'Tecnología', None, 4, 2, 2, 0, 0, 0, 2),
+        ('unidad', None, None, 2, 1, 1, 0, 0, 0, 1),
+        ('empleados', None, None, 6, 3, 3, 0, 0, 0, 3),
+    ]
+
+
+class HistorialStatisticsTest(unittest.TestCase):
+    def setUp(self):
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.conn = MagicMock()
+        self.cursor = self.conn.cursor.return_value
+        self.cursor.fetchall.return_value = _summary_rows()
+        self.service.get_connection = MagicMock(return_value=self.conn)
+
+    def test_reads_summaries_in_one_query(self):
+        stats = self.service.get_historial_statistics()
+
+        self.assertEqual(self.cursor.execute.call_count, 1)
+        sql = self.cursor.execute.call_args[0][0]
+        self.assertIn('FROM historico_stats\n', sql)
+        self.assertIn('FROM historico_stats_employee s', sql)
+        self.assertNotIn('FROM historico h', sql)
+
+        self.assertEqual(stats['generales'], {
+            'total_registros': 6, 'completados': 3, 'pendientes': 3, 'en_proceso': 0, 'cancelados': 0,
+            'rechazados': 0, 'empleados_unicos': 3, 'aplicaciones_unicas': 2,
+        })
+        self.assertEqual([a['aplicacion'] for a in stats['por_aplicacion']], ['Jira', 'GitLab'])
+        self.assertEqual(stats['por_subunidad'], [{
+            'subunidad': 'Tecnología/Desarrollo', 'total_registros': 5, 'completados': 3, 'pendientes': 2,
+            'en_proceso': 0, 'cancelados': 0, 'rechazados': 0,
+        }])
+        self.assertEqual([(p['puesto'], p['unidad']) for p in stats['por_puesto']], [('Dev', 'Tecnología')])
+        self.assertEqual([u['unidad'] for u in stats['por_unidad']], ['Tecnología'])
+        self.assertEqual(stats['por_proceso'][0]['total_registros'], 6)
+        self.conn.close.assert_called_once()
+
+    def test_falls_back_to_single_scan_without_summaries(self):
+        self.cursor.execute.side_effect = [pyodbc.Error('Invalid object name historico_stats'), None]
+        rows = [r for r in _summary_rows() if r[0] != 'empleados']
+        rows[5] = ('generales', None, None, 6, 3, 3, 0, 0, 0, 3)
+        self.cursor.fetchall.return_value = rows
+
+        stats = self.service.get_historial_statistics()
+
+        self.assertEqual(self.cursor.execute.call_count, 2)
+        sql = self.cursor.execute.call_args[0][0]
+        self.assertIn('FROM historico h', sql)
+        self.assertEqual(sql.count('SELECT'), 1)
+        self.assertEqual(stats['generales']['empleados_unicos'], 3)
+        self.assertEqual(stats['generales']['total_registros'], 6)
+
+    def test_migration_matches_setup_script(self):
+        def trigger(filename):
+            with open(os.path.join(ROOT, filename), encoding='utf-8') as f:
+                text = f.read()
+            start = text.index('CREATE TRIGGER [dbo].[TR_historico_stats]')
+            return text[start:text.index('\nGO', start)]
+
+        body = trigger('sql_server_setup.sql')
+        self.assertEqual(body, trigger('migration_historico_stats.sql'))
+        self.assertIn('MERGE [dbo].[historico_stats_employee]', body)
+
+
+if __name__ == "__main__":
+    unittest.main()
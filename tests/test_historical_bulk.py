@@ -0,0 +1,75 @@
+import sqlite3
+import unittest
+from unittest.mock import MagicMock
+
+from services.access_management_service import AccessManagementService
+
+
+class HistoricalRecordsBulkTest(unittest.TestCase):
+    def setUp(self):
+        # Crear instancia sin ejecutar __init__ y usar SQLite como sustituto de SQL Server
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.db_manager = MagicMock()
+
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.executescript('''
+            CREATE TABLE headcount (scotia_id TEXT PRIMARY KEY, email TEXT);
+            CREATE TABLE historico (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scotia_id TEXT, employee_email TEXT, case_id TEXT, responsible TEXT,
+                record_date TEXT, request_date TEXT, process_access TEXT, subunit TEXT,
+                event_description TEXT, ticket_email TEXT, app_access_name TEXT,
+                computer_system_type TEXT, status TEXT, closing_date_app TEXT,
+                closing_date_ticket TEXT, app_quality TEXT, confirmation_by_user TEXT,
+                comment TEXT, ticket_quality TEXT, general_status_ticket TEXT,
+                average_time_open_ticket TEXT,
+                status_norm TEXT GENERATED ALWAYS AS (UPPER(TRIM(status))) STORED,
+                app_access_name_norm TEXT GENERATED ALWAYS AS (UPPER(TRIM(app_access_name))) STORED
+            );
+            INSERT INTO headcount VALUES ('EMP001', 'emp001@empresa.com');
+            INSERT INTO historico (scotia_id, process_access, app_access_name, status)
+            VALUES ('EMP001', 'onboarding', ' AppA ', 'Pendiente');
+        ''')
+        self.addCleanup(self.conn.close)
+
+    def _record(self, app_name, process_access='onboarding'):
+        return {
+            'scotia_id': 'EMP001',
+            'case_id': 'CASE-1',
+            'process_access': process_access,
+            'app_access_name': app_name,
+            'status': 'Pendiente',
+        }
+
+    def test_bulk_insert_skips_pending_duplicates_and_fills_email(self):
+        records = [
+            self._record('appa'),                  # ya pendiente en la base
+            self._record('AppB'),
+            self._record('AppB'),                  # duplicado dentro del lote
+            self._record('AppA', 'offboarding'),   # offboarding no se deduplica
+        ]
+
+        success, _, inserted = self.service.create_historical_records_bulk(records, conn=self.conn)
+
+        self.assertTrue(success)
+        self.assertEqual([r['app_access_name'] for r in inserted], ['AppB', 'AppA'])
+        rows = self.conn.execute(
+            "SELECT app_access_name, process_access, employee_email FROM historico WHERE id > 1 ORDER BY id"
+        ).fetchall()
+        self.assertEqual(rows, [
+            ('AppB', 'onboarding', 'emp001@empresa.com'),
+            ('AppA', 'offboarding', 'emp001@empresa.com'),
+        ])
+
+    def test_bulk_insert_rejects_records_without_required_fields(self):
+        success, message, inserted = self.service.create_historical_records_bulk(
+            [{'scotia_id': 'EMP001'}], conn=self.conn
+        )
+
+        self.assertFalse(success)
+        self.assertIn('process_access', message)
+        self.assertEqual(inserted, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
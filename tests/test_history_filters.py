@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from services.access_management_service import AccessManagementService
+from services.search_service import build_historico_conditions
+
+
+class HistoricoConditionsTest(unittest.TestCase):
+    def test_filters_become_parameterized_predicates(self):
+        where, params = build_historico_conditions({
+            'scotia_id': 'EMP',
+            'sid': 'EMP',
+            'aplicacion': '50%_off',
+            'status': '  ',
+            'desconocido': 'x',
+            'fecha_desde': '2024-01-01',
+        }, alias='h')
+
+        self.assertEqual(
+            where,
+            ' WHERE h.scotia_id LIKE ? AND h.app_access_name LIKE ? AND h.record_date >= ?'
+        )
+        self.assertEqual(params, ['%EMP%', '%50[%][_]off%', '2024-01-01'])
+
+    def test_no_filters(self):
+        self.assertEqual(build_historico_conditions(None), ('', []))
+
+
+class BuscarProcesosTest(unittest.TestCase):
+    def setUp(self):
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.db_manager = MagicMock()
+        self.conn = MagicMock()
+        self.cursor = self.conn.cursor.return_value
+        self.cursor.description = [('id',), ('status',)]
+        self.service.get_connection = MagicMock(return_value=self.conn)
+        # Sin índice de texto completo: todos los filtros con LIKE
+        patcher = patch('services.access_management_service.historico_fulltext_mode', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_page_and_total_come_from_sql(self):
+        self.cursor.fetchall.return_value = [(3, 'Pendiente'), (2, 'Pendiente')]
+        self.cursor.fetchone.return_value = (57,)
+
+        resultados, total = self.service.buscar_procesos_con_total({'status': 'pend'}, limit=2)
+
+        self.assertEqual([r['id'] for r in resultados], [3, 2])
+        self.assertEqual(total, 57)
+        page_sql, page_params = self.cursor.execute.call_args_list[0][0]
+        self.assertIn('WHERE h.status LIKE ?', page_sql)
+        self.assertIn('OFFSET ? ROWS FETCH NEXT ? ROWS ONLY', page_sql)
+        self.assertEqual(page_params, ['%pend%', 0, 2])
+        count_sql, count_params = self.cursor.execute.call_args_list[1][0]
+        self.assertEqual(count_sql, 'SELECT COUNT(*) FROM historico WHERE status LIKE ?')
+        self.assertEqual(count_params, ['%pend%'])
+        self.conn.close.assert_called_once()
+
+    def test_partial_page_skips_count_query(self):
+        self.cursor.fetchall.return_value = [(3, 'Pendiente')]
+
+        resultados, total = self.service.buscar_procesos_con_total({'status': 'pend'}, limit=10)
+
+        self.assertEqual(total, 1)
+        self.assertEqual(self.cursor.execute.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from services.access_management_service import AccessManagementService
+from services.registry import LazyService, get_service
+
+
+class LazyServiceTest(unittest.TestCase):
+    def test_builds_once_on_first_use(self):
+        factory = MagicMock(side_effect=lambda: MagicMock(value=42))
+        service = LazyService('test_lazy_service', factory)
+
+        self.assertFalse(service.is_initialized)
+        factory.assert_not_called()
+
+        threads = [threading.Thread(target=lambda: service.value) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(service.value, 42)
+        self.assertIs(get_service('test_lazy_service'), service.get_instance())
+        factory.assert_called_once()
+
+        service.flag = True
+        self.assertTrue(service.get_instance().flag)
+
+    def test_name_cannot_be_registered_twice(self):
+        service = LazyService('test_lazy_service_unique', MagicMock())
+
+        with self.assertRaises(ValueError):
+            LazyService('test_lazy_service_unique', MagicMock())
+        self.assertIs(get_service('test_lazy_service_unique'), service.get_instance())
+
+    def test_access_service_does_not_touch_database_until_provisioned(self):
+        db_manager = MagicMock()
+        with patch('services.access_management_service.get_database_connection', return_value=db_manager):
+            service = AccessManagementService()
+        db_manager.get_connection.assert_not_called()
+
+        success, message = service.provision_schema()
+        self.assertTrue(success, message)
+        conn = db_manager.get_connection.return_value
+        self.assertGreater(conn.cursor.return_value.execute.call_count, 0)
+        conn.commit.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import io
+import json
+import logging
+import unittest
+from unittest.mock import MagicMock
+
+from services.access_management_service import AccessManagementService
+from services.logging_setup import ROOT_LOGGER, configure_logging
+
+
+class _ReprCounter:
+    """Valor que cuenta cuántas veces se formatea"""
+    calls = 0
+
+    def __repr__(self):
+        _ReprCounter.calls += 1
+        return 'valor'
+
+
+class LoggingSetupTest(unittest.TestCase):
+    def setUp(self):
+        root = logging.getLogger(ROOT_LOGGER)
+        modules = [logging.getLogger(name) for name in
+                   ('services.access_management_service', 'services.search_service')]
+        saved = (root.level, list(root.handlers), root.propagate, [m.level for m in modules])
+
+        def restore():
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            root.setLevel(saved[0])
+            for handler in saved[1]:
+                root.addHandler(handler)
+            root.propagate = saved[2]
+            for module, level in zip(modules, saved[3]):
+                module.setLevel(level)
+        self.addCleanup(restore)
+        self.stream = io.StringIO()
+
+    def test_json_handler_and_module_levels(self):
+        configure_logging({'level': 'WARNING', 'json': True,
+                           'modules': {'services.search_service': 'DEBUG'}}, stream=self.stream)
+        # Reconfigurar no duplica el handler
+        configure_logging({'level': 'WARNING', 'json': True,
+                           'modules': {'services.search_service': 'DEBUG'}}, stream=self.stream)
+
+        logging.getLogger('services.search_service').debug("Buscando %s", 'EMP001', extra={'case_id': 'C-1'})
+        logging.getLogger('services.history_service').info("No se registra")
+
+        lines = self.stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        event = json.loads(lines[0])
+        self.assertEqual(event['level'], 'DEBUG')
+        self.assertEqual(event['logger'], 'services.search_service')
+        self.assertEqual(event['message'], 'Buscando EMP001')
+        self.assertEqual(event['case_id'], 'C-1')
+
+    def test_debug_payloads_are_only_formatted_when_enabled(self):
+        service = AccessManagementService.__new__(AccessManagementService)
+        service.db_manager = MagicMock()
+        service.get_connection = MagicMock(return_value=MagicMock())
+        record = {'scotia_id': 'EMP001', 'process_access': 'offboarding',
+                  'employee_email': 'emp@empresa.com', 'comment': _ReprCounter()}
+
+        _ReprCounter.calls = 0
+        configure_logging({'level': 'INFO'}, stream=self.stream)
+        self.assertTrue(service.create_historical_record(record)[0])
+        self.assertEqual(_ReprCounter.calls, 0)
+        self.assertEqual(self.stream.getvalue(), '')
+
+        configure_logging({'level': 'INFO',
+                           'modules': {'services.access_management_service': 'DEBUG'}}, stream=self.stream)
+        self.assertTrue(service.create_historical_record(record)[0])
+        self.assertGreater(_ReprCounter.calls, 0)
+        self.assertIn('EMP001', self.stream.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from services.access_management_service import AccessManagementService
+
+
+class MassReconciliationTest(unittest.TestCase):
+    def setUp(self):
+        # Crear instancia sin ejecutar __init__ y usar SQLite como sustituto de SQL Server
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.db_manager = MagicMock()
+        # Bloques pequeños para cruzar los límites de fetchmany
+        self.service.MASS_RECONCILIATION_FETCH_SIZE = 2
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_path = os.path.join(tmp.name, 'reconciliation.db')
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executescript('''
+                CREATE TABLE headcount (scotia_id TEXT PRIMARY KEY, full_name TEXT, unit TEXT,
+                                        unidad_subunidad TEXT, position TEXT, activo INTEGER);
+                CREATE TABLE applications (id INTEGER PRIMARY KEY, logical_access_name TEXT, unit TEXT,
+                                           subunit TEXT, unidad_subunidad TEXT, position_role TEXT,
+                                           role_name TEXT, description TEXT, access_status TEXT);
+                CREATE TABLE historico (id INTEGER PRIMARY KEY, scotia_id TEXT, app_access_name TEXT,
+                                        subunit TEXT, process_access TEXT, record_date TEXT, status TEXT);
+
+                INSERT INTO headcount VALUES ('EMP001', 'Ana', 'TI', 'TI/Dev', 'Analista', 1);
+                INSERT INTO headcount VALUES ('EMP002', 'Luis', 'TI', 'TI/Dev', 'Analista', 1);
+                INSERT INTO headcount VALUES ('EMP003', 'Eva', 'TI', NULL, NULL, 1);
+                INSERT INTO headcount VALUES ('EMP004', 'Inactivo', 'TI', 'TI/Dev', 'Analista', 0);
+
+                INSERT INTO applications VALUES (1, 'AppA', 'TI', 'Dev', 'TI/Dev', 'Analista', 'Lector', 'A', 'Activo');
+                INSERT INTO applications VALUES (2, 'AppB', 'TI', 'Dev', 'TI/Dev', 'Analista', 'Editor', 'B', 'Activo');
+                INSERT INTO applications VALUES (3, 'AppOld', 'TI', 'Dev', 'TI/Dev', 'Analista', NULL, 'X', 'Inactivo');
+
+                INSERT INTO historico VALUES (1, 'EMP001', 'AppA', 'Dev', 'onboarding', '2024-01-01', 'Completado');
+                INSERT INTO historico VALUES (2, 'EMP001', 'AppOld', 'Dev', 'onboarding', '2024-01-01', 'Completado');
+                INSERT INTO historico VALUES (3, 'EMP001', 'AppB', 'Dev', 'onboarding', '2024-01-02', 'Pendiente');
+                INSERT INTO historico VALUES (4, 'EMP002', 'AppA', 'Dev', 'lateral_movement', '2024-01-01', 'Completado');
+                INSERT INTO historico VALUES (5, 'EMP002', 'AppB', 'Dev', 'onboarding', '2024-01-01', 'Completado');
+                INSERT INTO historico VALUES (6, 'EMP004', 'AppZ', 'Dev', 'onboarding', '2024-01-01', 'Completado');
+
+                CREATE TABLE reconciliation_state (scotia_id TEXT PRIMARY KEY, current_count INTEGER,
+                                                   to_grant_count INTEGER, to_revoke_count INTEGER,
+                                                   is_stale INTEGER, computed_at TEXT);
+                CREATE TABLE reconciliation_results (id INTEGER PRIMARY KEY, scotia_id TEXT, access_type TEXT,
+                                                     app_name TEXT, unit TEXT, subunit TEXT, position_role TEXT,
+                                                     role_name TEXT, description TEXT, record_date TEXT, status TEXT);
+                INSERT INTO reconciliation_state VALUES ('EMP004', 1, 0, 1, 1, '2024-01-01');
+                INSERT INTO reconciliation_results (scotia_id, access_type, app_name) VALUES ('EMP004', 'current', 'AppZ');
+            ''')
+
+        self.service.get_connection = MagicMock(side_effect=lambda: sqlite3.connect(self.db_path))
+
+    def test_streams_one_result_per_active_employee(self):
+        results = list(self.service.iter_mass_reconciliation())
+
+        self.assertEqual([r['data']['employee']['scotia_id'] for r in results],
+                         ['EMP001', 'EMP002', 'EMP003'])
+        self.service.get_connection.assert_called_once()
+
+        emp1 = results[0]['data']
+        self.assertEqual([a['app_name'] for a in emp1['current_access']], ['AppA', 'AppOld'])
+        self.assertEqual([a['app_name'] for a in emp1['to_grant']], ['AppB'])
+        self.assertEqual([a['app_name'] for a in emp1['to_revoke']], ['AppOld'])
+        self.assertEqual(emp1['summary']['final_count'], 2)
+
+        emp2 = results[1]['data']
+        self.assertEqual(emp2['to_grant'], [])
+        self.assertEqual(emp2['to_revoke'], [])
+
+        self.assertFalse(results[2]['success'])
+
+    def test_rows_of_employees_missing_from_first_query_are_skipped(self):
+        # EMP0015 se activó entre la consulta de empleados y la de accesos
+        cursor = MagicMock()
+        cursor.description = [('scotia_id',), ('unit',), ('position',)]
+        cursor.fetchall.return_value = [('EMP001', 'TI', 'Analista'), ('EMP002', 'TI', 'Analista')]
+        row = lambda sid, kind, app: (sid, kind, app, 'TI', 'Dev', 'Analista', None, None, None, None)
+        cursor.fetchmany.side_effect = [
+            [row('EMP001', 'current', 'AppA'), row('EMP0015', 'current', 'AppX')],
+            [row('EMP0015', 'required', 'AppX'), row('EMP002', 'required', 'AppA')],
+            [],
+        ]
+
+        results = list(self.service._iter_reconciliation_block(cursor, '', ()))
+
+        self.assertEqual([r['data']['employee']['scotia_id'] for r in results], ['EMP001', 'EMP002'])
+        self.assertEqual([a['app_name'] for a in results[0]['data']['to_revoke']], ['AppA'])
+        self.assertEqual([a['app_name'] for a in results[1]['data']['to_grant']], ['AppA'])
+
+    def test_app_names_compare_case_insensitively(self):
+        employee = {'scotia_id': 'EMP001', 'unit': 'TI', 'position': 'Analista'}
+        current = [('Jira', 'TI', 'Dev', 'Analista', None, None, '2024-01-01', 'Completado')]
+        required = [('JIRA ', 'TI', 'Dev', 'Analista', 'Lector', None, None, 'Required')]
+
+        data = AccessManagementService._build_reconciliation_result(employee, current, required)['data']
+
+        self.assertEqual(data['to_grant'], [])
+        self.assertEqual(data['to_revoke'], [])
+
+    def test_only_null_unit_or_position_is_rejected(self):
+        required = [('Jira', '', 'Dev', '', 'Lector', None, None, 'Required')]
+
+        empty = AccessManagementService._build_reconciliation_result(
+            {'scotia_id': 'EMP001', 'unit': '', 'position': ''}, [], required)
+        missing = AccessManagementService._build_reconciliation_result(
+            {'scotia_id': 'EMP002', 'unit': 'TI', 'position': None}, [], required)
+
+        self.assertTrue(empty['success'])
+        self.assertEqual([a['app_name'] for a in empty['data']['to_grant']], ['Jira'])
+        self.assertFalse(missing['success'])
+        self.assertEqual(missing['message'], 'Empleado no encontrado o inactivo')
+
+    def test_mass_report_aggregates_totals(self):
+        report = self.service.get_mass_reconciliation_report(only_pending=True)
+
+        self.assertTrue(report['success'])
+        self.assertEqual(report['summary']['employees'], 3)
+        self.assertEqual(report['summary']['with_actions'], 1)
+        self.assertEqual(report['summary']['errors'], 1)
+        self.assertEqual([r['data']['employee']['scotia_id'] for r in report['data']], ['EMP001'])
+
+    def test_recompute_replaces_materialized_rows(self):
+        conn = sqlite3.connect(self.db_path)
+        self.addCleanup(conn.close)
+
+        counts = self.service._recompute_reconciliation(conn, ['EMP001', 'EMP002', 'EMP004'])
+        conn.commit()
+
+        # EMP004 está inactivo: se eliminan sus filas materializadas
+        self.assertEqual(counts, {'affected': 3, 'recomputed': 2, 'removed': 1})
+        state = conn.execute(
+            'SELECT scotia_id, current_count, to_grant_count, to_revoke_count FROM reconciliation_state ORDER BY scotia_id'
+        ).fetchall()
+        self.assertEqual(state, [('EMP001', 2, 1, 1), ('EMP002', 2, 0, 0)])
+
+        report = self.service.get_materialized_reconciliation_report('EMP001')
+        self.assertTrue(report['success'])
+        self.assertEqual([a['app_name'] for a in report['data']['to_grant']], ['AppB'])
+        self.assertEqual([a['app_name'] for a in report['data']['to_revoke']], ['AppOld'])
+        self.assertFalse(self.service.get_materialized_reconciliation_report('EMP004')['success'])
+
+    def test_mark_stale_by_application(self):
+        conn = sqlite3.connect(self.db_path)
+        self.addCleanup(conn.close)
+        self.service._recompute_reconciliation(conn, ['EMP001', 'EMP002', 'EMP004'])
+
+        self.service._mark_reconciliation_stale(conn.cursor(), app_name='AppOld')
+
+        stale = conn.execute('SELECT scotia_id FROM reconciliation_state WHERE is_stale = 1').fetchall()
+        self.assertEqual(stale, [('EMP001',)])
+
+
+if __name__ == "__main__":
+    unittest.main()
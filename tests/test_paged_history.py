@@ -0,0 +1,210 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from services.access_management_service import AccessManagementService
+from ui.background import get_task_runner
+from ui.paged_tree import PagedTreeLoader
+
+
+class _FakeTree:
+    """Sustituto mínimo de ttk.Treeview (y de la ventana para el ejecutor de tareas)"""
+
+    master = None
+
+    # Alto del encabezado y de cada fila (px) y filas visibles a la vez
+    HEADING_HEIGHT = 25
+    ROW_HEIGHT = 20
+    VISIBLE_ROWS = 5
+
+    def __init__(self):
+        self.items = []
+        self.values = {}
+        self.callbacks = []
+        self.yscrollcommand = None
+        self.top = 0  # índice de la primera fila visible; Tk lo conserva al insertar o borrar
+        self._next = 0
+
+    # Treeview
+    def configure(self, yscrollcommand=None):
+        self.yscrollcommand = yscrollcommand
+
+    def get_children(self):
+        return tuple(self.items)
+
+    def insert(self, _parent, index, values=()):
+        self._next += 1
+        item = f"I{self._next}"
+        self.items.insert(len(self.items) if index == 'end' else index, item)
+        self.values[item] = values
+        return item
+
+    def delete(self, *items):
+        for item in items:
+            self.items.remove(item)
+            del self.values[item]
+        self.top = min(self.top, max(len(self.items) - self.VISIBLE_ROWS, 0))
+
+    def exists(self, item):
+        return item in self.values
+
+    def index(self, item):
+        return self.items.index(item)
+
+    def identify_row(self, y):
+        if y < self.HEADING_HEIGHT:
+            return ''  # encabezado (show="headings")
+        index = self.top + (y - self.HEADING_HEIGHT) // self.ROW_HEIGHT
+        return self.items[index] if index < len(self.items) else ''
+
+    def yview(self):
+        if not self.items:
+            return 0.0, 1.0
+        total = len(self.items)
+        return self.top / total, min(self.top + self.VISIBLE_ROWS, total) / total
+
+    def yview_moveto(self, fraction):
+        self.top = max(0, min(round(fraction * len(self.items)), len(self.items) - self.VISIBLE_ROWS))
+
+    # Ventana
+    def winfo_toplevel(self):
+        return self
+
+    def config(self, cursor=""):
+        pass
+
+    def after(self, _ms, func, *args):
+        self.callbacks.append((func, args))
+
+    def pump(self, timeout=2.0):
+        limite = time.time() + timeout
+        while self.callbacks and time.time() < limite:
+            func, args = self.callbacks.pop(0)
+            func(*args)
+            time.sleep(0.005)
+
+    def ids(self):
+        return [self.values[item][0] for item in self.items]
+
+    def visible_ids(self):
+        return self.ids()[self.top:self.top + self.VISIBLE_ROWS]
+
+
+class HistorialPageQueryTest(unittest.TestCase):
+    def setUp(self):
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.db_manager = MagicMock()
+        self.conn = MagicMock()
+        self.cursor = self.conn.cursor.return_value
+        self.cursor.description = [('id',), ('record_date',)]
+        self.service.get_connection = MagicMock(return_value=self.conn)
+
+    def test_pages_use_keyset_predicates(self):
+        self.cursor.fetchall.return_value = [(5, '2024-01-05'), (4, '2024-01-04')]
+        rows = self.service.get_historial_page(before=('2024-01-06', 6), page_size=2)
+
+        sql, params = self.cursor.execute.call_args[0]
+        self.assertIn('h.record_date < ? OR (h.record_date = ? AND h.id < ?)', sql)
+        self.assertIn('ORDER BY h.record_date DESC, h.id DESC', sql)
+        self.assertIn('FETCH NEXT ? ROWS ONLY', sql)
+        self.assertEqual(params, ('2024-01-06', '2024-01-06', 6, 2))
+        self.assertEqual([r['id'] for r in rows], [5, 4])
+        self.conn.close.assert_called_once()
+
+    def test_newer_page_is_returned_most_recent_first(self):
+        self.cursor.fetchall.return_value = [(7, '2024-01-07'), (8, '2024-01-08')]
+        rows = self.service.get_historial_page(after=('2024-01-06', 6), page_size=2)
+
+        sql, _ = self.cursor.execute.call_args[0]
+        self.assertIn('ORDER BY h.record_date ASC, h.id ASC', sql)
+        self.assertEqual([r['id'] for r in rows], [8, 7])
+
+
+class PagedTreeLoaderTest(unittest.TestCase):
+    def setUp(self):
+        # 50 registros, del más reciente (id 50) al más antiguo (id 1)
+        self.rows = [{'id': i, 'record_date': f'2024-01-{i:02d}'} for i in range(50, 0, -1)]
+        self.tree = _FakeTree()
+        self.fetches = 0
+        self.scrollbar = MagicMock()
+        self.loader = PagedTreeLoader(self.tree, self.scrollbar, self._fetch,
+                                      to_values=lambda r: (r['id'],),
+                                      key=lambda r: (r['record_date'], r['id']),
+                                      page_size=10, max_rows=20)
+        self.addCleanup(lambda: get_task_runner(self.tree).shutdown())
+
+    def _fetch(self, before=None, after=None, page_size=10):
+        self.fetches += 1
+        if before is not None:
+            rows = [r for r in self.rows if (r['record_date'], r['id']) < before]
+            return rows[:page_size]
+        if after is not None:
+            rows = [r for r in self.rows if (r['record_date'], r['id']) > after]
+            return rows[-page_size:]
+        return self.rows[:page_size]
+
+    def _scroll(self, first, last):
+        self.tree.yscrollcommand(first, last)
+        self.tree.pump()
+
+    def test_scrolling_keeps_a_bounded_window(self):
+        self.loader.start()
+        self.tree.pump()
+        self.assertEqual(self.tree.ids(), list(range(50, 40, -1)))
+
+        # Llegar al final pide la página siguiente y descarta filas del inicio
+        for _ in range(3):
+            self._scroll(0.5, 1.0)
+        self.assertEqual(self.tree.ids(), list(range(30, 10, -1)))
+        self.assertEqual(self.loader.loaded_rows, 20)
+        self.scrollbar.set.assert_called_with(0.5, 1.0)
+
+        # Volver arriba recupera las filas descartadas
+        self._scroll(0.0, 0.5)
+        self.assertEqual(self.tree.ids(), list(range(40, 20, -1)))
+
+        # Al agotar los datos no se piden más páginas
+        for _ in range(4):
+            self._scroll(0.5, 1.0)
+        self.assertEqual(self.tree.ids()[-1], 1)
+
+    def _scroll_to(self, top):
+        """Desplaza la vista como el usuario y notifica la posición como lo hace Tk"""
+        self.tree.top = top
+        self._scroll(*self.tree.yview())
+
+    def test_view_stays_on_the_same_rows_after_trim(self):
+        self.loader.start()
+        self.tree.pump()
+        self._scroll_to(5)  # fin de la primera página: carga la segunda
+        self.assertEqual(self.tree.ids(), list(range(50, 30, -1)))
+
+        self._scroll_to(15)  # fin de la ventana: carga otra página y descarta 10 filas arriba
+        self.assertEqual(self.tree.ids(), list(range(40, 20, -1)))
+        self.assertEqual(self.tree.visible_ids(), [35, 34, 33, 32, 31])
+
+        # La nueva posición no está en el extremo: no se encadenan más cargas
+        fetches = self.fetches
+        self._scroll(*self.tree.yview())
+        self.assertEqual(self.fetches, fetches)
+        self.assertEqual(self.tree.ids(), list(range(40, 20, -1)))
+
+        # Hacia arriba: recupera las filas descartadas sin mover lo que se ve
+        self._scroll_to(0)
+        self.assertEqual(self.tree.ids(), list(range(50, 30, -1)))
+        self.assertEqual(self.tree.visible_ids(), [40, 39, 38, 37, 36])
+        fetches = self.fetches
+        self._scroll(*self.tree.yview())
+        self.assertEqual(self.fetches, fetches)
+
+    def test_stop_discards_pending_pages(self):
+        self.loader.start()
+        self.loader.stop()
+        self.tree.pump()
+        self.assertEqual(self.tree.ids(), [])
+        self._scroll(0.5, 1.0)
+        self.assertEqual(self.tree.ids(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
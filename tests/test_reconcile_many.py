@@ -0,0 +1,48 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from services.access_management_service import AccessManagementService
+
+
+class ReconcileManyTest(unittest.TestCase):
+    def setUp(self):
+        # Crear instancia sin ejecutar __init__
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.db_manager = MagicMock()
+        self.service.db_manager.pool.max_size = 4
+
+        def fake_report(scotia_id):
+            if scotia_id == 'BAD':
+                raise RuntimeError('conexión perdida')
+            # Respuestas desordenadas para comprobar que se conserva el orden
+            time.sleep(0.01 if scotia_id.endswith('1') else 0)
+            return {'success': True, 'message': scotia_id, 'data': {'employee': {'scotia_id': scotia_id}}}
+
+        self.service.get_access_reconciliation_report = MagicMock(side_effect=fake_report)
+
+    def test_results_keep_input_order_and_isolate_errors(self):
+        progress = []
+        sids = ['EMP001', 'BAD', 'EMP002', 'EMP003']
+
+        results = self.service.reconcile_many(
+            sids, workers=3, progress_callback=lambda done, total, sid, _: progress.append((done, total)))
+
+        self.assertEqual([r['message'] for r in results[:1] + results[2:]], ['EMP001', 'EMP002', 'EMP003'])
+        self.assertFalse(results[1]['success'])
+        self.assertIn('conexión perdida', results[1]['message'])
+        self.assertEqual(progress, [(1, 4), (2, 4), (3, 4), (4, 4)])
+
+    def test_cancel_token_skips_pending_employees(self):
+        cancel = threading.Event()
+        cancel.set()
+
+        results = self.service.reconcile_many(['EMP001', 'EMP002'], workers=2, cancel_token=cancel)
+
+        self.assertTrue(all(r.get('cancelled') for r in results))
+        self.service.get_access_reconciliation_report.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
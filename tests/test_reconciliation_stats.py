@@ -0,0 +1,50 @@
+import os
+import unittest
+from unittest.mock import MagicMock
+
+from services.access_management_service import AccessManagementService
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ReconciliationStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.db_manager = MagicMock()
+        self.conn = MagicMock()
+        self.cursor = self.conn.cursor.return_value
+        self.service.get_connection = MagicMock(return_value=self.conn)
+
+    def test_unit_mode_returns_one_dict_per_unit(self):
+        self.cursor.description = [('scope',), ('empleados',), ('accesos_a_otorgar',)]
+        self.cursor.fetchall.return_value = [('Tecnología/QA', 12, 3), ('Finanzas/Contabilidad', 4, 0)]
+
+        stats = self.service.get_reconciliation_stats(mode='unit')
+
+        self.assertEqual(stats[0], {'scope': 'Tecnología/QA', 'empleados': 12, 'accesos_a_otorgar': 3})
+        self.cursor.execute.assert_called_once_with(
+            "EXEC sp_GetReconciliationStats @scotia_id = ?, @mode = ?", (None, 'unit'))
+        self.conn.close.assert_called_once()
+
+    def test_unknown_mode_and_procedure_errors(self):
+        self.assertEqual(self.service.get_reconciliation_stats(mode='area'), [])
+        self.cursor.execute.assert_not_called()
+
+        self.cursor.description = [('status',), ('message',)]
+        self.cursor.fetchall.return_value = [('error', 'Modo no soportado: x')]
+        self.assertEqual(self.service.get_reconciliation_stats(scotia_id='EMP001', mode='x'), [])
+
+    def test_migration_matches_setup_script(self):
+        def procedure(filename):
+            with open(os.path.join(ROOT, filename), encoding='utf-8') as f:
+                text = f.read()
+            start = text.index('CREATE PROCEDURE [dbo].[sp_GetReconciliationStats]')
+            return text[start:text.index('\nGO', start)]
+
+        body = procedure('sql_server_setup.sql')
+        self.assertEqual(body, procedure('migration_reconciliation_stats.sql'))
+        self.assertNotIn('EXEC [dbo].[sp_GetAccessReconciliationReport]', body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import random
+import unittest
+
+from ui.search_index import IncrementalSearchIndex
+
+
+class IncrementalSearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.rows = [
+            {'scotia_id': f"EMP{i:04d}",
+             'comment': ''.join(rng.choice('abcde ') for _ in range(rng.randint(0, 12))),
+             'status': None if i % 5 == 0 else 'Pendiente'}
+            for i in range(400)
+        ]
+
+    def test_matches_plain_substring_filter(self):
+        index = IncrementalSearchIndex(self.rows)
+        for text in ('a', 'AB', 'abc', 'cab', 'de a', 'eeee', 'zz', 'emp01', 'pend'):
+            for column in ('scotia_id', 'comment', 'status'):
+                esperado = [r for r in self.rows if text.lower() in str(r[column] or '').lower()]
+                self.assertEqual(index.search(column, text), esperado, (column, text))
+
+    def test_extended_query_only_checks_previous_results(self):
+        llamadas = []
+
+        def value_of(row, column):
+            llamadas.append(column)
+            return str(row[column]).lower()
+
+        index = IncrementalSearchIndex(self.rows, value_of=value_of)
+        primeros = index.search('scotia_id', 'emp00')
+        self.assertEqual(len(primeros), 100)
+        self.assertEqual(len(llamadas), len(self.rows))  # valores calculados una sola vez
+
+        # Seguir escribiendo reduce el resultado anterior
+        index._values['scotia_id'] = _Spy(index._values['scotia_id'])
+        self.assertEqual([r['scotia_id'] for r in index.search('scotia_id', 'emp001')],
+                         [f"EMP{i:04d}" for i in range(10, 20)])
+        self.assertLessEqual(len(index._values['scotia_id'].leidos), 100)
+        self.assertEqual(len(llamadas), len(self.rows))
+
+    def test_covers(self):
+        completo = IncrementalSearchIndex(self.rows)
+        self.assertTrue(completo.covers('comment', 'x'))
+
+        parcial = IncrementalSearchIndex(self.rows, base_column='status', base_text='Pend')
+        self.assertTrue(parcial.covers('status', 'pendi'))
+        self.assertFalse(parcial.covers('status', 'pe'))
+        self.assertFalse(parcial.covers('comment', 'pendi'))
+
+        truncado = IncrementalSearchIndex(self.rows, base_column='status', base_text='pend', complete=False)
+        self.assertTrue(truncado.covers('status', 'PEND'))
+        self.assertFalse(truncado.covers('status', 'pendi'))
+
+
+class _Spy(list):
+    """Lista que registra las posiciones leídas"""
+
+    def __init__(self, values):
+        super().__init__(values)
+        self.leidos = []
+
+    def __getitem__(self, i):
+        self.leidos.append(i)
+        return super().__getitem__(i)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import MagicMock
+
+from services.access_management_service import AccessManagementService
+
+
+class OnboardingUnitOfWorkTest(unittest.TestCase):
+    def setUp(self):
+        # Crear instancia sin ejecutar __init__
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.db_manager = MagicMock()
+
+        self.conn = MagicMock()
+        self.service.get_connection = MagicMock(return_value=self.conn)
+        self.service.get_employee_by_id = MagicMock(return_value={
+            'scotia_id': 'EMP001', 'position': 'Analista', 'unit': 'Tecnología',
+            'unidad_subunidad': 'Tecnología/Desarrollo'
+        })
+        self.service.update_employee_status = MagicMock(return_value=(True, "ok"))
+        self.service.get_applications_by_position = MagicMock(return_value=[
+            {'logical_access_name': 'AppA', 'unit': 'Tecnología', 'position_role': 'Analista'},
+            {'logical_access_name': 'AppB', 'unit': 'Tecnología', 'position_role': 'Analista'},
+        ])
+
+    def test_onboarding_commits_once_on_shared_connection(self):
+        self.service.create_historical_records_bulk = MagicMock(return_value=(True, "ok", []))
+
+        success, _, records = self.service.process_employee_onboarding('EMP001', 'Analista', 'Tecnología/Desarrollo')
+
+        self.assertTrue(success)
+        self.assertEqual(len(records), 2)
+        self.service.get_connection.assert_called_once()
+        self.service.create_historical_records_bulk.assert_called_once()
+        self.assertIs(self.service.create_historical_records_bulk.call_args.kwargs['conn'], self.conn)
+        self.conn.commit.assert_called_once()
+        self.conn.rollback.assert_not_called()
+        self.conn.close.assert_called_once()
+
+    def test_onboarding_rolls_back_whole_case_on_failure(self):
+        self.service.create_historical_records_bulk = MagicMock(return_value=(False, "fallo", []))
+
+        success, message, records = self.service.process_employee_onboarding('EMP001', 'Analista', 'Tecnología/Desarrollo')
+
+        self.assertFalse(success)
+        self.assertIn("fallo", message)
+        self.assertEqual(records, [])
+        self.conn.commit.assert_not_called()
+        self.conn.rollback.assert_called_once()
+        self.conn.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
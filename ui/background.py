@@ -0,0 +1,179 @@
+"""
+Ejecución de operaciones largas fuera del hilo de Tkinter.
+
+Las llamadas a servicios (consultas, conciliaciones, procesos) se ejecutan en
+hilos de trabajo y sus resultados vuelven al hilo de la interfaz mediante
+``after()``: los callbacks on_success / on_error / on_progress siempre corren en
+el hilo de Tkinter, por lo que pueden actualizar widgets con seguridad. La
+función de trabajo nunca debe tocar widgets ni variables de Tkinter.
+
+Uso:
+    runner = get_task_runner(self.frame)
+    runner.submit('aplicaciones', access_service.get_all_applications,
+                  on_success=self._mostrar_aplicaciones)
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class BackgroundTask:
+    """Tarea en curso: permite cancelar y publicar progreso desde el hilo de trabajo"""
+
+    def __init__(self, runner: 'BackgroundTaskRunner', name: str,
+                 on_success: Optional[Callable[[Any], None]] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None,
+                 on_progress: Optional[Callable[..., None]] = None,
+                 on_done: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.cancel_event = threading.Event()
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self._runner = runner
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        """Solicita la cancelación; la función de trabajo decide cuándo detenerse"""
+        self.cancel_event.set()
+
+    def report_progress(self, *args):
+        """Publica progreso (se entrega a on_progress(*args) en el hilo de la interfaz)"""
+        self._runner._queue.put((self, 'progress', args))
+
+
+class BackgroundTaskRunner:
+    """Ejecuta funciones en un pool de hilos y entrega los resultados con after()"""
+
+    POLL_INTERVAL_MS = 100
+
+    def __init__(self, widget, max_workers: int = 4):
+        self.widget = widget
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ui-task')
+        self._queue = queue.Queue()
+        self._active: Dict[str, BackgroundTask] = {}
+        self._polling = False
+
+    def submit(self, name: str, func: Callable[..., Any], *args,
+               on_success: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None,
+               on_progress: Optional[Callable[..., None]] = None,
+               on_done: Optional[Callable[[], None]] = None,
+               pass_task: bool = False, **kwargs) -> Optional[BackgroundTask]:
+        """
+        Ejecuta func(*args, **kwargs) en segundo plano.
+
+        Args:
+            name: Identificador de la tarea; no se admite otra con el mismo nombre en curso
+            pass_task: Si es True, func recibe la BackgroundTask como primer argumento
+                       (para report_progress() y consultar cancelled / cancel_event)
+            on_done: Se llama al terminar (éxito o error), antes de on_success / on_error
+
+        Returns:
+            La tarea creada, o None si ya había una tarea con ese nombre en curso
+        """
+        if name in self._active:
+            return None
+
+        task = BackgroundTask(self, name, on_success, on_error, on_progress, on_done)
+        self._active[name] = task
+        self._set_busy(True)
+
+        def _run():
+            try:
+                result = func(task, *args, **kwargs) if pass_task else func(*args, **kwargs)
+                self._queue.put((task, 'success', result))
+            except Exception as e:
+                self._queue.put((task, 'error', e))
+
+        self._executor.submit(_run)
+        self._schedule_poll()
+        return task
+
+    def is_running(self, name: str) -> bool:
+        return name in self._active
+
+    def cancel(self, name: str) -> bool:
+        """Cancela la tarea indicada si está en curso"""
+        task = self._active.get(name)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    def cancel_all(self):
+        for task in list(self._active.values()):
+            task.cancel()
+
+    def shutdown(self):
+        """Cancela las tareas en curso y libera los hilos (al cerrar la ventana)"""
+        self.cancel_all()
+        self._executor.shutdown(wait=False)
+
+    # ==============================
+    # ENTREGA EN EL HILO DE LA INTERFAZ
+    # ==============================
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        try:
+            while True:
+                try:
+                    task, kind, value = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._dispatch(task, kind, value)
+        finally:
+            # Si un callback falla, los mensajes pendientes se entregan en la siguiente ronda
+            if self._active or not self._queue.empty():
+                self._schedule_poll()
+
+    def _dispatch(self, task: BackgroundTask, kind: str, value: Any):
+        if kind == 'progress':
+            if task.on_progress:
+                task.on_progress(*value)
+            return
+
+        self._active.pop(task.name, None)
+        if not self._active:
+            self._set_busy(False)
+        # on_done va primero: así on_success puede lanzar otra tarea con el mismo nombre
+        if task.on_done:
+            task.on_done()
+        if kind == 'success':
+            if task.on_success:
+                task.on_success(value)
+        elif task.on_error:
+            task.on_error(value)
+        else:
+            from tkinter import messagebox
+            messagebox.showerror("Error", f"Error en operación en segundo plano: {str(value)}")
+
+    def _set_busy(self, busy: bool):
+        """Cursor de espera en la ventana mientras haya tareas en curso"""
+        try:
+            self.widget.winfo_toplevel().config(cursor="watch" if busy else "")
+        except Exception:
+            pass
+
+
+def get_task_runner(widget) -> BackgroundTaskRunner:
+    """Retorna el ejecutor compartido por la ventana principal de `widget`"""
+    root = widget.winfo_toplevel()
+    while getattr(root, 'master', None) is not None:
+        root = root.master.winfo_toplevel()
+    runner = getattr(root, '_background_task_runner', None)
+    if runner is None:
+        runner = BackgroundTaskRunner(root)
+        root._background_task_runner = runner
+    return runner
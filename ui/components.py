@@ -4,6 +4,9 @@ from datetime import datetime
 from typing import List, Optional
 from tkinter import messagebox
 from services.dropdown_service import dropdown_service
+from ui.background import get_task_runner
+from ui.paged_tree import PagedTreeLoader
+from ui.search_index import IncrementalSearchIndex
 
 class CamposGeneralesFrame:
     """Componente para los campos generales del empleado"""
@@ -600,6 +603,15 @@ class EdicionBusquedaFrame:
         hsb = ttk.Scrollbar(resultados_frame, orient="horizontal", command=self.tree.xview)
         self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
         
+        # Historial completo paginado: páginas keyset a medida que se desplaza la tabla
+        # (el paginador toma el yscrollcommand y actualiza la barra vertical)
+        self.paginador_historial = PagedTreeLoader(
+            self.tree, vsb, self._consultar_pagina_historial,
+            to_values=self._valores_historial,
+            key=lambda r: (r.get('record_date'), r.get('id')),
+            task_name='historial', page_size=200, max_rows=1000,
+            on_error=lambda e: messagebox.showerror("Error", f"Error obteniendo historial: {str(e)}"))
+        
         # Empaquetar tabla y scrollbars
         self.tree.grid(row=0, column=0, sticky="nsew")
         vsb.grid(row=0, column=1, sticky="ns")
@@ -615,6 +627,9 @@ class EdicionBusquedaFrame:
         
         # Inicializar filtro delay
         self.filtro_delay_id = None
+        
+        # Índice en memoria del filtro en tiempo real (ver _aplicar_filtro_tiempo_real)
+        self._indice_tiempo_real = None
     
     def _on_doble_clic(self, event):
         """Maneja el doble clic en la tabla"""
@@ -623,9 +638,9 @@ class EdicionBusquedaFrame:
     def _refrescar_respetando_filtros(self, mostrar_mensaje: bool = True):
         """Refresca la tabla manteniendo los filtros activos si existen."""
         try:
-            # Limpiar tabla primero
-            for item in self.tree.get_children():
-                self.tree.delete(item)
+            # Limpiar tabla primero; los datos cambiaron, el índice en memoria ya no sirve
+            self._limpiar_tabla()
+            self._indice_tiempo_real = None
 
             if self.filtros_activos:
                 # Reaplicar filtros de forma silenciosa
@@ -665,10 +680,7 @@ class EdicionBusquedaFrame:
             app_access_name = values[4]  # Aplicación
             
             # Buscar los datos completos del registro del historial
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
+            from services.access_management_service import access_service
             
             # Obtener el registro completo del historial usando una combinación de campos
             conn = access_service.get_connection()
@@ -702,15 +714,15 @@ class EdicionBusquedaFrame:
             dialog = HistorialDialog(self.parent, f"Editar Registro de Historial - SID: {scotia_id}", historial_data)
             self.parent.wait_window(dialog.dialog)
             
-                if dialog.result:
-                    success, message = self.actualizar_registro_historial_por_id(record_id, dialog.result)
-                    
-                    if success:
-                        messagebox.showinfo("Éxito", message)
-                        # Refrescar respetando filtros actuales
-                        self._refrescar_respetando_filtros(mostrar_mensaje=False)
-                    else:
-                        messagebox.showerror("Error", message)
+            if dialog.result:
+                success, message = self.actualizar_registro_historial_por_id(record_id, dialog.result)
+                
+                if success:
+                    messagebox.showinfo("Éxito", message)
+                    # Refrescar respetando filtros actuales
+                    self._refrescar_respetando_filtros(mostrar_mensaje=False)
+                else:
+                    messagebox.showerror("Error", message)
                     
         except Exception as e:
             messagebox.showerror("Error", f"Error editando registro: {str(e)}")
@@ -719,10 +731,7 @@ class EdicionBusquedaFrame:
     def actualizar_registro_historial_por_id(self, record_id, data):
         """Actualiza un registro del historial usando el ID como identificador"""
         try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
+            from services.access_management_service import access_service
             
             conn = access_service.get_connection()
             cursor = conn.cursor()
@@ -759,6 +768,8 @@ class EdicionBusquedaFrame:
             print(f"DEBUG: Parámetros: {params}")
             
             cursor.execute(query, params)
+            if scotia_id_result:
+                access_service.refresh_current_access(scotia_id_result[0], conn=conn)
             conn.commit()
             conn.close()
             
@@ -771,10 +782,7 @@ class EdicionBusquedaFrame:
     def actualizar_registro_historial_por_campos(self, scotia_id, case_id, process_access, app_access_name, data):
         """Actualiza un registro del historial usando una combinación de campos para identificarlo"""
         try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
+            from services.access_management_service import access_service
             
             conn = access_service.get_connection()
             cursor = conn.cursor()
@@ -812,6 +820,7 @@ class EdicionBusquedaFrame:
                 conn.close()
                 return False, f"Registro con SID {scotia_id}, Caso {case_id} no encontrado"
             
+            access_service.refresh_current_access(scotia_id, [app_access_name], conn=conn)
             conn.commit()
             conn.close()
             
@@ -949,8 +958,7 @@ class EdicionBusquedaFrame:
     def mostrar_resultados_busqueda(self, resultados, busqueda=""):
         """Muestra los resultados de búsqueda en la tabla"""
         # Limpiar tabla anterior
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self._limpiar_tabla()
         
         if resultados:
             for i, resultado in enumerate(resultados):
@@ -1103,146 +1111,94 @@ class EdicionBusquedaFrame:
         for campo, valor in self.filtros_activos.items():
             self.filtros_listbox.insert(tk.END, f"{campo}: {valor}")
     
+    # Máximo de registros filtrados que se traen a la tabla (el total se informa aparte)
+    LIMITE_RESULTADOS_FILTROS = 1000
+    
+    # Columna del filtro por texto -> campo de historico
+    MAPEO_COLUMNAS_FILTRO = {
+        "SID": "scotia_id",
+        "Status": "status",
+        "Request Date": "request_date",
+        "Tipo": "process_access",
+        "APP Name": "app_access_name",
+        "Mail": "ticket_email",
+        "App Quality": "app_quality",
+        "Confirmation by User": "confirmation_by_user",
+        "Comment": "comment",
+        "Case ID": "case_id",
+        "Responsible": "responsible",
+        "Subunit": "subunit",
+        "Event Description": "event_description"
+    }
+    
     def _aplicar_filtros_multiples(self, silent: bool = False):
-        """Aplica todos los filtros activos. Si silent=True, no muestra mensajes emergentes."""
+        """Aplica todos los filtros activos. Si silent=True, no muestra mensajes emergentes.
+        
+        Los filtros se resuelven en SQL: solo llegan las primeras coincidencias
+        (hasta LIMITE_RESULTADOS_FILTROS) y el total se obtiene con un conteo.
+        """
         if not self.filtros_activos:
             if not silent:
                 messagebox.showwarning("Advertencia", "No hay filtros activos para aplicar")
             return
         
-        try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
-            
-            # Obtener todos los registros del historial
-            todos_resultados = access_service.buscar_procesos({})
-            
-            # Aplicar filtros múltiples
-            resultados_filtrados = self._aplicar_filtros_en_memoria(todos_resultados)
-            
-            # Mostrar resultados
+        def _mostrar(resultado):
+            resultados_filtrados, total = resultado
             if resultados_filtrados:
-                mensaje = f"Se encontraron {len(resultados_filtrados)} registros con los filtros aplicados"
+                mensaje = f"Se encontraron {total} registros con los filtros aplicados"
+                if total > len(resultados_filtrados):
+                    mensaje += f" (se muestran los primeros {len(resultados_filtrados)})"
+                self.mostrar_resultados_historial(resultados_filtrados, "")
                 # En modo silencioso no mostrar popup
                 if not silent:
                     messagebox.showinfo("Filtros", mensaje)
-                self.mostrar_resultados_historial(resultados_filtrados, "")
             else:
+                self._limpiar_tabla()
                 if not silent:
                     messagebox.showinfo("Filtros", "No se encontraron registros que coincidan con los filtros aplicados")
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Error aplicando filtros: {str(e)}")
-    
-    def _aplicar_filtros_en_memoria(self, resultados):
-        """Aplica los filtros activos a los resultados en memoria"""
-        if not resultados:
-            return resultados
         
-        resultados_filtrados = []
-        for resultado in resultados:
-            cumple_filtros = True
-            
-            for campo_ui, valor_filtro in self.filtros_activos.items():
-                campo_bd = self.campos_filtro.get(campo_ui)
-                if campo_bd:
-                    valor_campo = str(resultado.get(campo_bd, '')).lower()
-                    if valor_filtro.lower() not in valor_campo:
-                        cumple_filtros = False
-                        break
-            
-            if cumple_filtros:
-                resultados_filtrados.append(resultado)
-        
-        return resultados_filtrados
+        get_task_runner(self.parent).submit(
+            'filtros', self._buscar_con_filtros, self._filtros_para_consulta(),
+            self.LIMITE_RESULTADOS_FILTROS,
+            on_success=_mostrar,
+            on_error=lambda e: messagebox.showerror("Error", f"Error aplicando filtros: {str(e)}"))
+    
+    def _filtros_para_consulta(self):
+        """Traduce los filtros activos (nombres de la interfaz) a columnas de historico"""
+        filtros = {}
+        for campo_ui, valor_filtro in self.filtros_activos.items():
+            campo_bd = self.campos_filtro.get(campo_ui)
+            if campo_bd:
+                filtros[campo_bd] = valor_filtro
+        return filtros
+    
+    @staticmethod
+    def _buscar_con_filtros(filtros, limite):
+        """Consulta filtrada con total de coincidencias (se ejecuta fuera del hilo de la interfaz)"""
+        from services.access_management_service import access_service
+        return access_service.buscar_procesos_con_total(filtros, limit=limite)
+    
+    def _limpiar_tabla(self):
+        """Vacía la tabla y detiene la carga paginada del historial"""
+        self.paginador_historial.stop()
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
     
     def mostrar_todo_el_historial(self):
-        """Muestra todo el historial de procesos"""
-        try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
-            
-            # Obtener todo el historial usando el método del servicio
-            conn = access_service.get_connection()
-            cursor = conn.cursor()
-            
-            # Primero verificar cuántos registros hay en total
-            cursor.execute('SELECT COUNT(*) FROM historico')
-            total_count = cursor.fetchone()[0]
-            print(f"DEBUG: Total de registros en historico: {total_count}")
-            
-            # Verificar registros recientes
-            cursor.execute('SELECT TOP 5 scotia_id, process_access, event_description, record_date FROM historico ORDER BY record_date DESC')
-            recent_records = cursor.fetchall()
-            print("DEBUG: Últimos 5 registros en la base de datos:")
-            for record in recent_records:
-                print(f"  SID={record[0]}, Process={record[1]}, Event={record[2][:30]}..., Date={record[3]}")
-            
-            cursor.execute('''
-                SELECT h.id, h.scotia_id, h.case_id, h.responsible, h.record_date, h.request_date, 
-                       h.process_access, h.subunit, h.event_description, h.ticket_email, h.app_access_name, 
-                       h.computer_system_type, h.status, h.closing_date_app, h.closing_date_ticket, 
-                       h.app_quality, h.confirmation_by_user, h.comment, h.ticket_quality, 
-                       h.average_time_open_ticket, h.duration_of_access, h.comment_tq, h.general_status_ticket, 
-                       h.general_status_case, h.sla_app, h.sla_ticket, h.sla_case, h.employee_email,
-                       a.logical_access_name, a.description as app_description,
-                       hc.email as headcount_email
-                FROM historico h
-                LEFT JOIN (
-                    SELECT 
-                        logical_access_name,
-                        description,
-                        ROW_NUMBER() OVER (PARTITION BY logical_access_name ORDER BY id) as rn
-                    FROM applications
-                ) a ON h.app_access_name = a.logical_access_name AND a.rn = 1
-                LEFT JOIN headcount hc ON h.scotia_id = hc.scotia_id
-                ORDER BY h.record_date DESC
-            ''')
-            rows = cursor.fetchall()
-            conn.close()
-            
-            # Convertir a diccionarios
-            columns = [description[0] for description in cursor.description]
-            historial = [dict(zip(columns, row)) for row in rows]
-            
-            print(f"DEBUG: Historial obtenido: {len(historial)} registros")
-            
-            # Debug: mostrar los primeros 5 registros
-            for i, registro in enumerate(historial[:5]):
-                print(f"DEBUG: Registro {i}: SID={registro.get('scotia_id')}, Process={registro.get('process_access')}, Event={registro.get('event_description', '')[:50]}...")
-            
-            # Analizar registros de lateral movement para debug
-            lateral_records = [r for r in historial if r.get('event_description') and 'lateral movement' in r.get('event_description', '')]
-            onboarding_count = len([r for r in lateral_records if r.get('process_access') == 'onboarding'])
-            offboarding_count = len([r for r in lateral_records if r.get('process_access') == 'offboarding'])
-            
-            print(f"DEBUG: Registros de lateral movement: {len(lateral_records)} (Onboarding: {onboarding_count}, Offboarding: {offboarding_count})")
-            
-            # Debug: mostrar todos los registros recientes (últimos 10)
-            print("DEBUG: Últimos 10 registros:")
-            for i, registro in enumerate(historial[:10]):
-                print(f"  {i+1}. SID={registro.get('scotia_id')}, Process={registro.get('process_access')}, Status={registro.get('status')}, Event={registro.get('event_description', '')[:30]}...")
-            
-            self.mostrar_resultados_historial(historial, "")
-            
-            # Mostrar información de debug al usuario
-            if lateral_records:
-                messagebox.showinfo("Información de Debug", 
-                    f"Se encontraron {len(lateral_records)} registros de lateral movement:\n"
-                    f"• Onboarding: {onboarding_count}\n"
-                    f"• Offboarding: {offboarding_count}\n\n"
-                    f"Si no ves todos los registros, verifica:\n"
-                    f"1. Filtros activos en la interfaz\n"
-                    f"2. Búsqueda por SID específico\n"
-                    f"3. Scroll en la tabla")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error obteniendo historial: {str(e)}")
-            print(f"Error completo: {e}")
+        """Muestra todo el historial de procesos.
+        
+        Las filas se cargan por páginas a medida que el usuario se desplaza y la
+        tabla conserva solo una ventana de registros, en lugar de traer todo el
+        historial a memoria.
+        """
+        self.paginador_historial.start()
+    
+    @staticmethod
+    def _consultar_pagina_historial(before=None, after=None, page_size=200):
+        """Consulta una página del historial (se ejecuta fuera del hilo de la interfaz)"""
+        from services.access_management_service import access_service
+        return access_service.get_historial_page(before=before, after=after, page_size=page_size)
     
     def crear_datos_ejemplo_historial(self, conn, cursor):
         """Crea datos de ejemplo en la tabla historico si está vacía"""
@@ -1301,11 +1257,68 @@ class EdicionBusquedaFrame:
         except Exception as e:
             print(f"Error creando datos de ejemplo: {e}")
     
+    @staticmethod
+    def _valores_historial(resultado):
+        """Convierte un registro del historial en la tupla de valores de la tabla"""
+        # Formatear fecha
+        fecha = resultado.get('record_date', '')
+        try:
+            from datetime import datetime
+            fecha_formatted = datetime.fromisoformat(fecha).strftime('%d/%m/%Y %H:%M') if fecha else 'N/A'
+        except:
+            fecha_formatted = fecha or 'N/A'
+        
+        # Formatear fecha de solicitud
+        request_fecha = resultado.get('request_date', '')
+        try:
+            from datetime import datetime
+            request_fecha_formatted = datetime.fromisoformat(request_fecha).strftime('%d/%m/%Y') if request_fecha else 'N/A'
+        except:
+            request_fecha_formatted = request_fecha or 'N/A'
+        
+        # Formatear fechas adicionales
+        closing_app = resultado.get('closing_date_app', '')
+        closing_ticket = resultado.get('closing_date_ticket', '')
+        try:
+            closing_app_formatted = datetime.fromisoformat(closing_app).strftime('%d/%m/%Y') if closing_app else 'N/A'
+            closing_ticket_formatted = datetime.fromisoformat(closing_ticket).strftime('%d/%m/%Y') if closing_ticket else 'N/A'
+        except:
+            closing_app_formatted = closing_app or 'N/A'
+            closing_ticket_formatted = closing_ticket or 'N/A'
+        
+        # Formatear confirmación
+        confirmation = resultado.get('confirmation_by_user', '')
+        confirmation_text = 'Sí' if confirmation else 'No' if confirmation is not None else 'N/A'
+        
+        # Mapear todos los campos del historial
+        # Usar el email del headcount si está disponible, sino usar el employee_email de la tabla historico
+        email_to_show = resultado.get('headcount_email', '') or resultado.get('employee_email', '')
+        
+        return (
+            resultado.get('id', ''),                     # ID
+            resultado.get('scotia_id', ''),             # SID
+            email_to_show,                               # Email (del headcount o historico)
+            resultado.get('case_id', ''),               # Caso
+            resultado.get('process_access', ''),        # Proceso
+            resultado.get('app_access_name', ''),       # Aplicación
+            resultado.get('status', ''),                # Estado
+            fecha_formatted,                            # Fecha
+            request_fecha_formatted,                    # Fecha Solicitud
+            resultado.get('responsible', ''),           # Responsable
+            resultado.get('subunit', ''),               # Subunidad
+            resultado.get('computer_system_type', ''),   # Tipo Sistema
+            resultado.get('duration_of_access', ''),     # Duración
+            closing_app_formatted,                       # Cierre App
+            closing_ticket_formatted,                    # Cierre Ticket
+            resultado.get('app_quality', ''),           # Calidad App
+            confirmation_text,                          # Confirmación
+            resultado.get('comment', '')                # Comentario
+        )
+    
     def mostrar_resultados_historial(self, resultados, busqueda=""):
         """Muestra los resultados del historial en la tabla"""
         # Limpiar tabla anterior
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self._limpiar_tabla()
         
         print(f"DEBUG: Mostrando {len(resultados) if resultados else 0} resultados del historial")
         
@@ -1315,66 +1328,7 @@ class EdicionBusquedaFrame:
                 if i < 3:
                     print(f"DEBUG: Registro {i}: {resultado}")
                 
-                # Formatear fecha
-                fecha = resultado.get('record_date', '')
-                try:
-                    from datetime import datetime
-                    fecha_formatted = datetime.fromisoformat(fecha).strftime('%d/%m/%Y %H:%M') if fecha else 'N/A'
-                except:
-                    fecha_formatted = fecha or 'N/A'
-                
-                # Formatear fecha de solicitud
-                request_fecha = resultado.get('request_date', '')
-                try:
-                    from datetime import datetime
-                    request_fecha_formatted = datetime.fromisoformat(request_fecha).strftime('%d/%m/%Y') if request_fecha else 'N/A'
-                except:
-                    request_fecha_formatted = request_fecha or 'N/A'
-                
-                # Formatear fechas adicionales
-                closing_app = resultado.get('closing_date_app', '')
-                closing_ticket = resultado.get('closing_date_ticket', '')
-                try:
-                    closing_app_formatted = datetime.fromisoformat(closing_app).strftime('%d/%m/%Y') if closing_app else 'N/A'
-                    closing_ticket_formatted = datetime.fromisoformat(closing_ticket).strftime('%d/%m/%Y') if closing_ticket else 'N/A'
-                except:
-                    closing_app_formatted = closing_app or 'N/A'
-                    closing_ticket_formatted = closing_ticket or 'N/A'
-                
-                # Formatear confirmación
-                confirmation = resultado.get('confirmation_by_user', '')
-                confirmation_text = 'Sí' if confirmation else 'No' if confirmation is not None else 'N/A'
-                
-                # Mapear todos los campos del historial
-                # Usar el email del headcount si está disponible, sino usar el employee_email de la tabla historico
-                email_to_show = resultado.get('headcount_email', '') or resultado.get('employee_email', '')
-                
-                # Debug para ver qué email se está usando
-                if i < 3:  # Debug para los primeros 3 registros
-                    print(f"DEBUG: Email del headcount: {resultado.get('headcount_email', '')}")
-                    print(f"DEBUG: Email del historico: {resultado.get('employee_email', '')}")
-                    print(f"DEBUG: Email final a mostrar: {email_to_show}")
-                
-                values = (
-                    resultado.get('id', ''),                     # ID
-                    resultado.get('scotia_id', ''),             # SID
-                    email_to_show,                               # Email (del headcount o historico)
-                    resultado.get('case_id', ''),               # Caso
-                    resultado.get('process_access', ''),        # Proceso
-                    resultado.get('app_access_name', ''),       # Aplicación
-                    resultado.get('status', ''),                # Estado
-                    fecha_formatted,                            # Fecha
-                    request_fecha_formatted,                    # Fecha Solicitud
-                    resultado.get('responsible', ''),           # Responsable
-                    resultado.get('subunit', ''),               # Subunidad
-                    resultado.get('computer_system_type', ''),   # Tipo Sistema
-                    resultado.get('duration_of_access', ''),     # Duración
-                    closing_app_formatted,                       # Cierre App
-                    closing_ticket_formatted,                    # Cierre Ticket
-                    resultado.get('app_quality', ''),           # Calidad App
-                    confirmation_text,                          # Confirmación
-                    resultado.get('comment', '')                # Comentario
-                )
+                values = self._valores_historial(resultado)
                 
                 if i < 3:  # Debug para los primeros 3 registros
                     print(f"DEBUG: Valores a insertar: {values}")
@@ -1395,8 +1349,7 @@ class EdicionBusquedaFrame:
     def mostrar_resultados_busqueda(self, resultados, busqueda=""):
         """Muestra los resultados de búsqueda en el treeview"""
         # Limpiar resultados anteriores
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self._limpiar_tabla()
         
         if resultados:
             for resultado in resultados:
@@ -1470,23 +1423,7 @@ class EdicionBusquedaFrame:
         try:
             if self.service and hasattr(self.service, 'buscar_procesos'):
                 # Mapear nombres de columnas a campos de la base de datos
-                mapeo_columnas = {
-                    "SID": "scotia_id",
-                    "Status": "status",
-                    "Request Date": "request_date",
-                    "Tipo": "process_access",
-                    "APP Name": "app_access_name",
-                    "Mail": "ticket_email",
-                    "App Quality": "app_quality",
-                    "Confirmation by User": "confirmation_by_user",
-                    "Comment": "comment",
-                    "Case ID": "case_id",
-                    "Responsible": "responsible",
-                    "Subunit": "subunit",
-                    "Event Description": "event_description"
-                }
-                
-                campo_bd = mapeo_columnas.get(columna, "scotia_id")
+                campo_bd = self.MAPEO_COLUMNAS_FILTRO.get(columna, "scotia_id")
                 
                 # Crear filtro para la búsqueda
                 filtros = {campo_bd: texto_filtro}
@@ -1525,82 +1462,52 @@ class EdicionBusquedaFrame:
         self.filtro_delay_id = self.parent.after(500, self._aplicar_filtro_tiempo_real)
     
     def _aplicar_filtro_tiempo_real(self):
-        """Aplica el filtro en tiempo real sin mostrar mensajes"""
+        """Aplica el filtro en tiempo real sin mostrar mensajes.
+        
+        Solo se consulta la base de datos cuando el texto deja de estar cubierto por
+        las filas ya cargadas; si el usuario sigue escribiendo, el índice en memoria
+        reduce el resultado anterior sin ir al servidor.
+        """
         texto_filtro = self.variables['filtro_texto'].get().strip()
         columna = self.variables['columna_filtro'].get()
         
         if not texto_filtro:
             # Si no hay texto, mostrar todos los registros
+            self._indice_tiempo_real = None
             self.buscar_todos_los_registros()
             return
         
-        try:
-            if self.service and hasattr(self.service, 'buscar_procesos'):
-                # Mapear nombres de columnas a campos de la base de datos
-                mapeo_columnas = {
-                    "SID": "scotia_id",
-                    "Status": "status",
-                    "Request Date": "request_date",
-                    "Tipo": "process_access",
-                    "APP Name": "app_access_name",
-                    "Mail": "ticket_email",
-                    "App Quality": "app_quality",
-                    "Confirmation by User": "confirmation_by_user",
-                    "Comment": "comment",
-                    "Case ID": "case_id",
-                    "Responsible": "responsible",
-                    "Subunit": "subunit",
-                    "Event Description": "event_description"
-                }
-                
-                campo_bd = mapeo_columnas.get(columna, "scotia_id")
-                
-                # Crear filtro para la búsqueda
-                filtros = {campo_bd: texto_filtro}
-                resultados = self.service.buscar_procesos(filtros)
-                
-                # Aplicar filtro adicional en memoria si es necesario
-                if resultados:
-                    resultados_filtrados = []
-                    for resultado in resultados:
-                        valor_campo = str(resultado.get(campo_bd, '')).lower()
-                        if texto_filtro.lower() in valor_campo:
-                            resultados_filtrados.append(resultado)
-                    resultados = resultados_filtrados
-                
-                # Mostrar resultados sin mensaje de confirmación
-                self._mostrar_resultados_sin_mensaje(resultados)
-            else:
-                print("Servicio no disponible para filtrado en tiempo real")
-        except Exception as e:
-            print(f"Error en filtrado en tiempo real: {e}")
+        if not (self.service and hasattr(self.service, 'buscar_procesos')):
+            print("Servicio no disponible para filtrado en tiempo real")
+            return
+        
+        campo_bd = self.MAPEO_COLUMNAS_FILTRO.get(columna, "scotia_id")
+        indice = self._indice_tiempo_real
+        if indice is not None and indice.covers(campo_bd, texto_filtro):
+            self._mostrar_resultados_sin_mensaje(indice.search(campo_bd, texto_filtro))
+            return
+        
+        limite = self.LIMITE_RESULTADOS_FILTROS
+        
+        def _indexar(resultados):
+            self._indice_tiempo_real = IncrementalSearchIndex(
+                resultados, base_column=campo_bd, base_text=texto_filtro,
+                complete=len(resultados) < limite)
+            # El texto pudo cambiar mientras llegaba la consulta: reevaluar con el actual
+            self._aplicar_filtro_tiempo_real()
+        
+        get_task_runner(self.parent).submit(
+            'filtro_tiempo_real', self.service.buscar_procesos, {campo_bd: texto_filtro}, limit=limite,
+            on_success=_indexar,
+            on_error=lambda e: print(f"Error en filtrado en tiempo real: {e}"))
     
     def _mostrar_resultados_sin_mensaje(self, resultados):
         """Muestra los resultados sin mostrar mensajes de confirmación"""
         # Limpiar resultados anteriores
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self._limpiar_tabla()
         
-        if resultados:
-            for resultado in resultados:
-                # Extraer valores del resultado de la base de datos
-                valores = (
-                    resultado.get('numero_caso', ''),
-                    resultado.get('sid', ''),
-                    resultado.get('nueva_unidad_subunidad', ''),
-                    resultado.get('nuevo_cargo', ''),
-                    resultado.get('status', ''),
-                    resultado.get('request_date', ''),
-                    resultado.get('ingreso_por', ''),
-                    resultado.get('tipo_proceso', ''),
-                    resultado.get('app_name', ''),
-                    resultado.get('mail', ''),
-                    resultado.get('closing_date_app', ''),
-                    resultado.get('app_quality', ''),
-                    resultado.get('confirmation_by_user', ''),
-                    resultado.get('comment', '')
-                )
-                self.tree.insert("", "end", values=valores)
+        for resultado in resultados or []:
+            self.tree.insert("", "end", values=self._valores_historial(resultado))
     
     
     def seleccionar_registro(self, event):
@@ -1712,6 +1619,7 @@ class EdicionBusquedaFrame:
     
     def refrescar_busqueda_actual(self):
         """Refresca la búsqueda actual para mostrar los cambios"""
+        self._indice_tiempo_real = None
         # Si hay un SID en búsqueda, refrescar esa búsqueda
         sid = self.variables['sid_busqueda'].get().strip()
         if sid:
@@ -1730,20 +1638,19 @@ class EdicionBusquedaFrame:
             var.set("")
         
         # Limpiar resultados de búsqueda
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self._limpiar_tabla()
 
     def mostrar_estadisticas(self):
+        """Muestra las estadísticas del historial en una ventana (las estadísticas se calculan en segundo plano)"""
+        from services.access_management_service import access_service
+        get_task_runner(self.parent).submit(
+            'estadisticas_historial', access_service.get_historial_statistics,
+            on_success=self._mostrar_estadisticas_ventana,
+            on_error=lambda e: messagebox.showerror("Error", f"Error obteniendo estadísticas: {str(e)}"))
+    
+    def _mostrar_estadisticas_ventana(self, stats):
         """Muestra las estadísticas del historial en una ventana"""
         try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
-            
-            # Obtener estadísticas
-            stats = access_service.get_historial_statistics()
-            
             if "error" in stats:
                 messagebox.showerror("Error", stats["error"])
                 return
@@ -1838,37 +1745,34 @@ Aplicaciones Únicas: {generales.get('aplicaciones_unicas', 0)}
             messagebox.showerror("Error", f"Error mostrando estadísticas: {str(e)}")
 
     def exportar_estadisticas(self):
-        """Exporta las estadísticas del historial a Excel"""
-        try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
-            from export_service import export_service
-            
+        """Exporta las estadísticas del historial a Excel (en segundo plano)"""
+        from services.access_management_service import access_service
+        from services.export_service import export_service
+        
+        def _trabajo():
             # Obtener estadísticas
             stats = access_service.get_historial_statistics()
-            
             if "error" in stats:
-                messagebox.showerror("Error", stats["error"])
-                return
-            
+                return False, stats["error"]
             # Exportar a Excel
-            filepath = export_service.export_historial_statistics(stats)
-            
-            messagebox.showinfo("Éxito", f"Estadísticas exportadas exitosamente a:\n{filepath}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error exportando estadísticas: {str(e)}")
+            return True, export_service.export_historial_statistics(stats)
+        
+        def _mostrar(resultado):
+            success, valor = resultado
+            if success:
+                messagebox.showinfo("Éxito", f"Estadísticas exportadas exitosamente a:\n{valor}")
+            else:
+                messagebox.showerror("Error", valor)
+        
+        get_task_runner(self.parent).submit(
+            'exportar_estadisticas_historial', _trabajo, on_success=_mostrar,
+            on_error=lambda e: messagebox.showerror("Error", f"Error exportando estadísticas: {str(e)}"))
 
     def crear_registro_manual(self):
         """Abre el diálogo para crear un registro manual de acceso"""
         try:
             from ui.manual_access_component import ManualAccessDialog
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
+            from services.access_management_service import access_service
             
             # Abrir diálogo de registro manual
             dialog = ManualAccessDialog(self.frame, access_service)
@@ -1885,6 +1789,17 @@ Aplicaciones Únicas: {generales.get('aplicaciones_unicas', 0)}
 class CreacionPersonaFrame:
     """Componente para la gestión completa de headcount y applications"""
     
+    # Columna del filtro por texto -> campo de headcount
+    MAPEO_COLUMNAS_FILTRO = {
+        "SID": "employee",
+        "Nombre": "full_name",
+        "Email": "email",
+        "Posición": "position",
+        "Manager": "manager",
+        "Unidad": "unit",
+        "Estado": "activo"
+    }
+    
     def __init__(self, parent, service=None):
         self.parent = parent
         self.service = service
@@ -2047,6 +1962,9 @@ class CreacionPersonaFrame:
         
         # Inicializar filtro delay
         self.filtro_delay_id = None
+        
+        # Índice en memoria del headcount para el filtro en tiempo real
+        self._indice_headcount = None
     
     def _crear_panel_filtros_personas(self, parent):
         """Crea el panel de filtros múltiples para personas"""
@@ -2189,13 +2107,20 @@ class CreacionPersonaFrame:
         return resultados_filtrados
     
     def mostrar_todos(self):
-        """Muestra todos los registros del headcount"""
-        try:
-            # Obtener todos los registros de la base de datos real
-            resultados = self.service.obtener_todo_headcount()
+        """Muestra todos los registros del headcount (consulta en segundo plano)"""
+        def _mostrar(resultados):
+            self._indexar_headcount(resultados)
             self.mostrar_resultados_busqueda(resultados)
-        except Exception as e:
-            messagebox.showerror("Error", f"Error obteniendo registros: {str(e)}")
+        
+        # Obtener todos los registros de la base de datos real
+        get_task_runner(self.parent).submit(
+            'headcount', self.service.obtener_todo_headcount,
+            on_success=_mostrar,
+            on_error=lambda e: messagebox.showerror("Error", f"Error obteniendo registros: {str(e)}"))
+    
+    def _indexar_headcount(self, resultados):
+        """Guarda el headcount completo en el índice del filtro en tiempo real"""
+        self._indice_headcount = IncrementalSearchIndex(resultados or [], value_of=self._obtener_valor_persona)
     
     def aplicar_filtro(self):
         """Aplica un filtro por texto en la columna seleccionada"""
@@ -2211,17 +2136,7 @@ class CreacionPersonaFrame:
             todos_resultados = self.service.obtener_todo_headcount()
             
             # Mapear nombres de columnas a campos de la base de datos real
-            mapeo_columnas = {
-                "SID": "employee",
-                "Nombre": "full_name",
-                "Email": "email",
-                "Posición": "position",
-                "Manager": "manager",
-                "Unidad": "unit",
-                "Estado": "activo"
-            }
-            
-            campo_bd = mapeo_columnas.get(columna, "employee")
+            campo_bd = self.MAPEO_COLUMNAS_FILTRO.get(columna, "employee")
             
             # Aplicar filtro en memoria
             if todos_resultados:
@@ -2268,46 +2183,31 @@ class CreacionPersonaFrame:
         self.filtro_delay_id = self.parent.after(500, self._aplicar_filtro_tiempo_real)
     
     def _aplicar_filtro_tiempo_real(self):
-        """Aplica el filtro en tiempo real sin mostrar mensajes"""
+        """Aplica el filtro en tiempo real sin mostrar mensajes.
+        
+        Filtra en memoria con el índice del headcount; la base de datos solo se
+        consulta la primera vez (o tras actualizar la tabla).
+        """
         texto_filtro = self.variables['filtro_texto'].get().strip()
         columna = self.variables['columna_filtro'].get()
         
-        if not texto_filtro:
-            # Si no hay texto, mostrar todos los registros
-            self.mostrar_todos()
-            return
-        
-        try:
-            # Obtener todos los registros de la base de datos real
-            todos_resultados = self.service.obtener_todo_headcount()
-            
-            # Mapear nombres de columnas a campos de la base de datos real
-            mapeo_columnas = {
-                "SID": "employee",
-                "Nombre": "full_name",
-                "Email": "email",
-                "Posición": "position",
-                "Manager": "manager",
-                "Unidad": "unit",
-                "Estado": "activo"
-            }
-            
-            campo_bd = mapeo_columnas.get(columna, "employee")
+        if self._indice_headcount is None:
+            if not texto_filtro:
+                self.mostrar_todos()
+                return
             
-            # Aplicar filtro en memoria
-            if todos_resultados:
-                resultados_filtrados = []
-                for resultado in todos_resultados:
-                    valor_campo = str(resultado.get(campo_bd, '')).lower()
-                    if texto_filtro.lower() in valor_campo:
-                        resultados_filtrados.append(resultado)
-                todos_resultados = resultados_filtrados
+            def _indexar(resultados):
+                self._indexar_headcount(resultados)
+                self._aplicar_filtro_tiempo_real()
             
-            # Mostrar resultados sin mensaje de confirmación
-            self._mostrar_resultados_sin_mensaje(todos_resultados)
-        except Exception as e:
-            print(f"Error en filtrado en tiempo real: {e}")
-    
+            get_task_runner(self.parent).submit(
+                'headcount', self.service.obtener_todo_headcount, on_success=_indexar,
+                on_error=lambda e: print(f"Error en filtrado en tiempo real: {e}"))
+            return
+        
+        campo_bd = self.MAPEO_COLUMNAS_FILTRO.get(columna, "employee")
+        # Mostrar resultados sin mensaje de confirmación
+        self._mostrar_resultados_sin_mensaje(self._indice_headcount.search(campo_bd, texto_filtro))
     
     def _mostrar_resultados_sin_mensaje(self, resultados):
         """Muestra los resultados sin mostrar mensajes de confirmación"""
@@ -2315,23 +2215,8 @@ class CreacionPersonaFrame:
         for item in self.tree.get_children():
             self.tree.delete(item)
         
-        if resultados:
-            for resultado in resultados:
-                # Separar nombre y apellido del full_name
-                full_name = resultado.get('full_name', '')
-                nombre_parts = full_name.split(' ', 1)
-                nombre = nombre_parts[0] if nombre_parts else ''
-                apellido = nombre_parts[1] if len(nombre_parts) > 1 else ''
-                
-                self.tree.insert("", "end", values=(
-                    resultado.get('scotia_id', ''),  # SID
-                    nombre,                          # Nombre
-                    apellido,                        # Apellido
-                    resultado.get('email', ''),      # Email
-                    resultado.get('unit', ''),       # Departamento
-                    resultado.get('position', ''),   # Cargo
-                    'Active' if resultado.get('activo', True) else 'Inactive'  # Estado
-                ))
+        for resultado in resultados or []:
+            self.tree.insert("", "end", values=self._valores_persona(resultado))
     
     
     
@@ -2367,10 +2252,7 @@ class CreacionPersonaFrame:
             self.parent.wait_window(dialog.dialog)
             
             if dialog.result:
-                import sys
-                import os
-                sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-                from access_management_service import access_service
+                from services.access_management_service import access_service
                 
                 success, message = access_service.create_employee(dialog.result)
                 
@@ -2406,13 +2288,15 @@ class CreacionPersonaFrame:
         self.variables['activo'].set("Active")
     
     def actualizar_tabla(self):
-        """Actualiza la tabla con todos los registros"""
-        try:
-            resultados = self.service.obtener_todo_headcount()
+        """Actualiza la tabla con todos los registros (consulta en segundo plano)"""
+        def _mostrar(resultados):
+            self._indexar_headcount(resultados)
             self.mostrar_resultados_busqueda(resultados)
             messagebox.showinfo("Actualización", f"Tabla actualizada. Se encontraron {len(resultados)} registros.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Error actualizando tabla: {str(e)}")
+        
+        get_task_runner(self.parent).submit(
+            'headcount', self.service.obtener_todo_headcount, on_success=_mostrar,
+            on_error=lambda e: messagebox.showerror("Error", f"Error actualizando tabla: {str(e)}"))
     
     def _on_doble_clic(self, event):
         """Maneja doble clic en la tabla"""
@@ -2430,10 +2314,7 @@ class CreacionPersonaFrame:
         
         # Buscar la persona en la base de datos
         try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
+            from services.access_management_service import access_service
             
             persona_data = access_service.get_employee_by_id(scotia_id)
             if not persona_data:
@@ -2481,10 +2362,7 @@ class CreacionPersonaFrame:
         
         if result:
             try:
-                import sys
-                import os
-                sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-                from access_management_service import access_service
+                from services.access_management_service import access_service
                 
                 success, message = access_service.delete_employee(scotia_id)
                 if success:
@@ -2496,6 +2374,26 @@ class CreacionPersonaFrame:
             except Exception as e:
                 messagebox.showerror("Error", f"Error eliminando persona: {str(e)}")
     
+    @staticmethod
+    def _valores_persona(resultado):
+        """Convierte un registro de headcount en la tupla de valores de la tabla"""
+        # Separar nombre y apellido del full_name
+        full_name = resultado.get('full_name', '') or ''
+        nombre_parts = full_name.split(' ', 1)
+        nombre = nombre_parts[0] if nombre_parts else ''
+        apellido = nombre_parts[1] if len(nombre_parts) > 1 else ''
+        
+        return (
+            resultado.get('scotia_id', ''),  # SID
+            nombre,                          # Nombre
+            apellido,                        # Apellido
+            resultado.get('email', ''),      # Email
+            resultado.get('unit', ''),       # Departamento
+            resultado.get('unidad_subunidad', ''),  # Unidad/Subunidad
+            resultado.get('position', ''),   # Cargo
+            'Active' if resultado.get('activo', True) else 'Inactive'  # Estado
+        )
+    
     def mostrar_resultados_busqueda(self, resultados, busqueda=""):
         """Muestra los resultados de búsqueda en la tabla"""
         # Limpiar tabla anterior
@@ -2504,22 +2402,7 @@ class CreacionPersonaFrame:
         
         if resultados:
             for resultado in resultados:
-                # Separar nombre y apellido del full_name
-                full_name = resultado.get('full_name', '')
-                nombre_parts = full_name.split(' ', 1)
-                nombre = nombre_parts[0] if nombre_parts else ''
-                apellido = nombre_parts[1] if len(nombre_parts) > 1 else ''
-                
-                self.tree.insert("", "end", values=(
-                    resultado.get('scotia_id', ''),  # SID
-                    nombre,                          # Nombre
-                    apellido,                        # Apellido
-                    resultado.get('email', ''),      # Email
-                    resultado.get('unit', ''),       # Departamento
-                    resultado.get('unidad_subunidad', ''),  # Unidad/Subunidad
-                    resultado.get('position', ''),   # Cargo
-                    'Active' if resultado.get('activo', True) else 'Inactive'  # Estado
-                ))
+                self.tree.insert("", "end", values=self._valores_persona(resultado))
             
             # Mostrar mensaje de confirmación si se especifica
             if busqueda:
@@ -2532,16 +2415,16 @@ class CreacionPersonaFrame:
                 messagebox.showinfo("Búsqueda", "No se encontraron registros")
 
     def mostrar_estadisticas_headcount(self):
+        """Muestra las estadísticas del headcount en una ventana (las estadísticas se calculan en segundo plano)"""
+        from services.access_management_service import access_service
+        get_task_runner(self.parent).submit(
+            'estadisticas_headcount', access_service.get_headcount_statistics,
+            on_success=self._mostrar_estadisticas_headcount_ventana,
+            on_error=lambda e: messagebox.showerror("Error", f"Error obteniendo estadísticas: {str(e)}"))
+    
+    def _mostrar_estadisticas_headcount_ventana(self, stats):
         """Muestra las estadísticas del headcount en una ventana"""
         try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
-            
-            # Obtener estadísticas
-            stats = access_service.get_headcount_statistics()
-            
             if "error" in stats:
                 messagebox.showerror("Error", stats["error"])
                 return
@@ -2719,28 +2602,28 @@ Puestos Únicos: {generales.get('puestos_unicos', 0)}
             messagebox.showerror("Error", f"Error mostrando estadísticas: {str(e)}")
 
     def exportar_estadisticas_headcount(self):
-        """Exporta las estadísticas del headcount a Excel"""
-        try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
-            from export_service import export_service
-            
+        """Exporta las estadísticas del headcount a Excel (en segundo plano)"""
+        from services.access_management_service import access_service
+        from services.export_service import export_service
+        
+        def _trabajo():
             # Obtener estadísticas
             stats = access_service.get_headcount_statistics()
-            
             if "error" in stats:
-                messagebox.showerror("Error", stats["error"])
-                return
-            
+                return False, stats["error"]
             # Exportar a Excel
-            filepath = export_service.export_headcount_statistics(stats)
-            
-            messagebox.showinfo("Éxito", f"Estadísticas del headcount exportadas exitosamente a:\n{filepath}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error exportando estadísticas: {str(e)}")
+            return True, export_service.export_headcount_statistics(stats)
+        
+        def _mostrar(resultado):
+            success, valor = resultado
+            if success:
+                messagebox.showinfo("Éxito", f"Estadísticas del headcount exportadas exitosamente a:\n{valor}")
+            else:
+                messagebox.showerror("Error", valor)
+        
+        get_task_runner(self.parent).submit(
+            'exportar_estadisticas_headcount', _trabajo, on_success=_mostrar,
+            on_error=lambda e: messagebox.showerror("Error", f"Error exportando estadísticas: {str(e)}"))
     
     def _on_busqueda_change(self, *args):
         """Maneja cambios en la búsqueda"""
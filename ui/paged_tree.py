@@ -0,0 +1,177 @@
+"""
+Carga paginada de un ttk.Treeview para tablas grandes.
+
+En lugar de insertar todas las filas de una consulta, el paginador pide páginas
+con paginación por clave (keyset) a medida que el usuario se desplaza y mantiene
+en el Treeview solo una ventana de `max_rows` filas: al avanzar descarta las
+filas del inicio y al volver hacia arriba las recupera con una consulta inversa.
+Las páginas se consultan con el BackgroundTaskRunner, así que la interfaz no se
+bloquea mientras llegan.
+
+Uso:
+    paginador = PagedTreeLoader(self.tree, vsb, access_service.get_historial_page,
+                                to_values=self._valores_historial,
+                                key=lambda r: (r['record_date'], r['id']))
+    paginador.start()
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ui.background import get_task_runner
+
+
+class PagedTreeLoader:
+    """Mantiene una ventana de filas de un Treeview alimentada por páginas keyset"""
+
+    def __init__(self, tree, scrollbar, fetch_page: Callable[..., List[Dict[str, Any]]],
+                 to_values: Callable[[Dict[str, Any]], Tuple],
+                 key: Callable[[Dict[str, Any]], Tuple],
+                 task_name: str = 'pagina',
+                 page_size: int = 200, max_rows: int = 1000, threshold: float = 0.9,
+                 on_error: Optional[Callable[[Exception], None]] = None):
+        """
+        Args:
+            tree: Treeview donde se muestran las filas
+            scrollbar: Scrollbar vertical del Treeview (recibe las posiciones de desplazamiento)
+            fetch_page: fetch_page(before=clave, after=clave, page_size=n) -> filas ordenadas
+                        de la más reciente a la más antigua; se ejecuta fuera del hilo de la interfaz
+            to_values: Convierte una fila en la tupla de valores del Treeview
+            key: Clave de orden de una fila (la misma que usa fetch_page)
+            page_size: Filas por página
+            max_rows: Máximo de filas que se mantienen en el Treeview
+            threshold: Fracción de desplazamiento a partir de la cual se pide la página siguiente
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch_page = fetch_page
+        self.to_values = to_values
+        self.key = key
+        self.task_name = task_name
+        self.page_size = page_size
+        self.max_rows = max(max_rows, 2 * page_size)
+        self.threshold = threshold
+        self.on_error = on_error
+
+        self.active = False
+        self._generation = 0
+        self._keys: Dict[str, Tuple] = {}
+        self._has_older = False
+        self._has_newer = False
+
+        tree.configure(yscrollcommand=self._on_yscroll)
+
+    # ==============================
+    # CONTROL
+    # ==============================
+
+    def start(self):
+        """Vacía la tabla y carga la primera página"""
+        self._reset()
+        self.active = True
+        self._has_older = True
+        self._load('older')
+
+    def stop(self):
+        """Deja de paginar (la tabla pasa a mostrar otros resultados)"""
+        self._reset()
+
+    @property
+    def loaded_rows(self) -> int:
+        return len(self._keys)
+
+    def _reset(self):
+        self._generation += 1
+        self.active = False
+        self._has_older = False
+        self._has_newer = False
+        self._keys.clear()
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+
+    # ==============================
+    # DESPLAZAMIENTO Y CARGA
+    # ==============================
+
+    def _on_yscroll(self, first, last):
+        """yscrollcommand del Treeview: actualiza la barra y pide páginas en los extremos"""
+        self.scrollbar.set(first, last)
+        if not self.active:
+            return
+        first, last = float(first), float(last)
+        if last >= self.threshold and self._has_older:
+            self._load('older')
+        elif first <= 1.0 - self.threshold and self._has_newer:
+            self._load('newer')
+
+    def _task_id(self) -> str:
+        # Una sola carga en curso por generación; start() abre una nueva generación
+        return f"{self.task_name}:{self._generation}"
+
+    def _load(self, direction: str):
+        runner = get_task_runner(self.tree)
+        if runner.is_running(self._task_id()):
+            return
+
+        children = self.tree.get_children()
+        kwargs = {'page_size': self.page_size}
+        if direction == 'older' and children:
+            kwargs['before'] = self._keys[children[-1]]
+        elif direction == 'newer':
+            kwargs['after'] = self._keys[children[0]]
+
+        generation = self._generation
+        runner.submit(self._task_id(), self.fetch_page,
+                      on_success=lambda rows: self._on_page(generation, direction, rows),
+                      on_error=self.on_error, **kwargs)
+
+    def _on_page(self, generation: int, direction: str, rows: List[Dict[str, Any]]):
+        if generation != self._generation or not self.active:
+            return  # Resultado de una carga anterior a start()/stop()
+
+        exhausted = len(rows) < self.page_size
+        anchor = self._top_visible_item()
+
+        if direction == 'older':
+            self._has_older = not exhausted
+            for row in rows:
+                self._insert(row, 'end')
+        else:
+            self._has_newer = not exhausted
+            # Filas más recientes primero: insertarlas en orden inverso en la posición 0
+            for row in reversed(rows):
+                self._insert(row, 0)
+
+        self._trim(direction)
+        if anchor is not None and self.tree.exists(anchor):
+            # Mantener a la vista la fila que el usuario estaba mirando: al insertar o
+            # descartar filas Tk conserva el índice de la primera fila, no la fila
+            children = self.tree.get_children()
+            self.tree.yview_moveto(self.tree.index(anchor) / max(len(children), 1))
+
+    def _insert(self, row: Dict[str, Any], index):
+        item = self.tree.insert('', index, values=self.to_values(row))
+        self._keys[item] = self.key(row)
+
+    def _trim(self, direction: str):
+        """Descarta filas del extremo opuesto a la carga para no superar max_rows"""
+        children = self.tree.get_children()
+        excess = len(children) - self.max_rows
+        if excess <= 0:
+            return
+        if direction == 'older':
+            dropped = children[:excess]
+            self._has_newer = True
+        else:
+            dropped = children[-excess:]
+            self._has_older = True
+        self.tree.delete(*dropped)
+        for item in dropped:
+            self._keys.pop(item, None)
+
+    def _top_visible_item(self) -> Optional[str]:
+        """Primera fila visible según yview() (identify_row cerca de y=0 cae en el encabezado)"""
+        children = self.tree.get_children()
+        if not children:
+            return None
+        first = float(self.tree.yview()[0])
+        return children[min(int(round(first * len(children))), len(children) - 1)]
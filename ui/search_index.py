@@ -0,0 +1,106 @@
+"""
+Índice de búsqueda en memoria para el filtrado en tiempo real.
+
+Las pantallas de búsqueda filtran por subcadena (sin distinguir mayúsculas) en
+una columna mientras el usuario escribe. En lugar de consultar la base de datos
+en cada pausa, se indexa una vez el conjunto cargado:
+
+- Por columna se construye (al primer uso) un índice de n-gramas: cada trigrama
+  apunta a las filas que lo contienen, y una búsqueda solo verifica las filas
+  presentes en todos los trigramas del texto.
+- Si el nuevo texto contiene al anterior (el usuario siguió escribiendo), solo se
+  revisan los resultados de la búsqueda anterior.
+"""
+from typing import Any, Callable, Dict, List, Optional, Set
+
+ValueGetter = Callable[[Dict[str, Any], str], str]
+
+
+def _default_value(row: Dict[str, Any], column: str) -> str:
+    value = row.get(column)
+    return '' if value is None else str(value).lower()
+
+
+class IncrementalSearchIndex:
+    """Búsqueda por subcadena sobre filas en memoria, con índice de n-gramas por columna"""
+
+    def __init__(self, rows: List[Dict[str, Any]], value_of: Optional[ValueGetter] = None,
+                 ngram: int = 3, base_column: Optional[str] = None,
+                 base_text: Optional[str] = None, complete: bool = True):
+        """
+        Args:
+            rows: Filas cargadas (se conserva su orden en los resultados)
+            value_of: value_of(fila, columna) -> texto en minúsculas a comparar
+            ngram: Tamaño de los n-gramas del índice
+            base_column / base_text: Filtro con el que se obtuvieron las filas, si no son
+                                     el conjunto completo (ver covers())
+            complete: False si la consulta base se truncó por límite de filas
+        """
+        self.rows = rows
+        self.value_of = value_of or _default_value
+        self.ngram = ngram
+        self.base_column = base_column
+        self.base_text = base_text.lower() if base_text is not None else None
+        self.complete = complete
+        self._values: Dict[str, List[str]] = {}
+        self._grams: Dict[str, Dict[str, Set[int]]] = {}
+        self._last = None  # (columna, texto, posiciones)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def covers(self, column: str, text: str) -> bool:
+        """Indica si las filas cargadas bastan para responder la búsqueda sin ir a la base de datos"""
+        if self.base_column is None:
+            return True
+        text = text.lower()
+        if column != self.base_column:
+            return False
+        if text == self.base_text:
+            return True
+        # Toda fila que contiene `text` contiene también el texto base
+        return self.complete and self.base_text in text
+
+    def search(self, column: str, text: str) -> List[Dict[str, Any]]:
+        """Retorna las filas cuyo valor en `column` contiene `text`"""
+        text = text.lower()
+        if not text:
+            self._last = None
+            return list(self.rows)
+
+        values = self._column_values(column)
+        last = self._last
+        if last is not None and last[0] == column and last[1] in text:
+            candidates = last[2]
+        elif len(text) >= self.ngram:
+            candidates = self._candidates(column, text)
+        else:
+            candidates = range(len(self.rows))
+
+        matches = [i for i in candidates if text in values[i]]
+        self._last = (column, text, matches)
+        return [self.rows[i] for i in matches]
+
+    def _column_values(self, column: str) -> List[str]:
+        values = self._values.get(column)
+        if values is None:
+            values = [self.value_of(row, column) for row in self.rows]
+            self._values[column] = values
+        return values
+
+    def _candidates(self, column: str, text: str) -> List[int]:
+        """Filas que contienen todos los n-gramas de `text` (superconjunto de los resultados)"""
+        grams = self._grams.get(column)
+        if grams is None:
+            grams = {}
+            n = self.ngram
+            for i, value in enumerate(self._column_values(column)):
+                for start in range(len(value) - n + 1):
+                    grams.setdefault(value[start:start + n], set()).add(i)
+            self._grams[column] = grams
+
+        n = self.ngram
+        postings = sorted((grams.get(text[i:i + n], set()) for i in range(len(text) - n + 1)), key=len)
+        if not postings[0]:
+            return []
+        return sorted(postings[0].intersection(*postings[1:]))